@@ -0,0 +1,197 @@
+# aerodrome_universe.py
+"""
+Univers des pools Aerodrome (Base), téléchargé une fois par cycle et indexé
+par token.
+
+AERODROME_POOLS_API renvoie la liste complète des pools. Le repli niveau 2
+de fetch_base_pools la téléchargeait pour chaque token sans pool subgraph
+(20 tokens Base -> 20 fois le même payload), puis la parcourait en entier.
+Ici:
+- un seul téléchargement par UNIVERSE_TTL_SECONDS (un cycle), les appelants
+  concurrents partagent le fetch en cours (singleflight)
+- chaque pool est parsée une fois (prix = reserve1 / reserve0, frais, TVL)
+  et indexée sous ses deux tokens (adresses en minuscules)
+- pools_for_token / best_pool_for_pair remplacent le parcours linéaire, pour
+  la cascade Base (pool_fetchers) comme pour get_aerodrome_price
+
+Les temps de téléchargement et de parsing de chaque chargement sont
+exposés par get_aerodrome_universe_stats().
+"""
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from circuit_breaker import (
+    allow_request,
+    record_failure,
+    record_status,
+    record_success,
+)
+from config import AERODROME_POOLS_API, CHECK_INTERVAL_SECONDS
+from rate_limiter import PRIORITY_LOW, acquire as acquire_rate_limit, observe as observe_rate_limit
+from singleflight import singleflight
+from utils import logger
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+UNIVERSE_TTL_SECONDS = CHECK_INTERVAL_SECONDS  # un téléchargement par cycle
+DOWNLOAD_TIMEOUT_SECONDS = 15
+MAX_RETRIES = 3
+BREAKER = "aerodrome"
+
+
+class AerodromeUniverse:
+    """Pools Aerodrome parsées, indexées par adresse de token (minuscules)."""
+
+    def __init__(self, pools: List[Dict[str, Any]], loaded_at: float):
+        self.pools = pools
+        self.loaded_at = loaded_at
+        self.by_token: Dict[str, List[Dict[str, Any]]] = {}
+        for pool in pools:
+            self.by_token.setdefault(pool["token0"].lower(), []).append(pool)
+            if pool["token1"].lower() != pool["token0"].lower():
+                self.by_token.setdefault(pool["token1"].lower(), []).append(pool)
+
+    def pools_for_token(self, token: str) -> List[Dict[str, Any]]:
+        return self.by_token.get(token.lower(), [])
+
+    def best_pool_for_pair(self, token_a: str, token_b: str) -> Optional[Dict[str, Any]]:
+        """Pool token_a/token_b de plus grande TVL, None si aucune."""
+        other = token_b.lower()
+        best = None
+        for pool in self.pools_for_token(token_a):
+            if other not in (pool["token0"].lower(), pool["token1"].lower()):
+                continue
+            if best is None or pool["liquidity_usd"] > best["liquidity_usd"]:
+                best = pool
+        return best
+
+
+def parse_pool(raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Entrée brute de l'API -> pool normalisée, None si inexploitable."""
+    try:
+        pid = raw.get("address") or raw.get("id")
+        token0 = (raw.get("token0") or {}).get("address")
+        token1 = (raw.get("token1") or {}).get("address")
+        reserve0 = float(raw.get("reserve0", 0) or 0)
+        reserve1 = float(raw.get("reserve1", 0) or 0)
+        if not pid or not token0 or not token1 or reserve0 <= 0 or reserve1 <= 0:
+            return None
+        fee_raw = float(raw.get("fee", 0) or 0)
+        fee_bps = int(fee_raw * 10000) if fee_raw < 1 else int(fee_raw)
+        return {
+            "pool_id": pid,
+            "token0": token0,
+            "token1": token1,
+            "reserve0": reserve0,
+            "reserve1": reserve1,
+            "price": reserve1 / reserve0,  # token1 par token0
+            "fee_pct": max(0.0, min(fee_bps / 10000.0, 0.05)),
+            "liquidity_usd": float(raw.get("tvlUsd", 0) or raw.get("liquidityUsd", 0) or 0),
+            "is_stable": bool(raw.get("stable") or raw.get("isStable")),
+        }
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+# ============================================================================
+# CACHE PAR CYCLE
+# ============================================================================
+_universe: Optional[AerodromeUniverse] = None
+_universe_stats: Dict[str, Any] = {
+    "downloads": 0,
+    "failures": 0,
+    "hits": 0,
+    "bytes": 0,
+    "pools": 0,
+    "tokens": 0,
+    "last_download_ms": 0.0,
+    "last_parse_ms": 0.0,
+}
+
+
+def get_aerodrome_universe_stats() -> Dict[str, Any]:
+    """Stats: downloads, hits (servis depuis le cache), bytes, pools, last_download_ms, last_parse_ms..."""
+    return dict(_universe_stats)
+
+
+async def _download(session: aiohttp.ClientSession) -> Optional[AerodromeUniverse]:
+    url = AERODROME_POOLS_API
+    for attempt in range(MAX_RETRIES):
+        if not allow_request(BREAKER):
+            logger.debug(f"[{BREAKER}] universe skipped (circuit open)")
+            return None
+        try:
+            await acquire_rate_limit(url, PRIORITY_LOW)
+            started = time.monotonic()
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT_SECONDS)) as resp:
+                observe_rate_limit(url, resp.status, resp.headers)
+                if resp.status == 200:
+                    body = await resp.read()
+                    download_s = time.monotonic() - started
+                    record_success(BREAKER, download_s)
+                    return _build(body, download_s)
+                record_status(BREAKER, resp.status, time.monotonic() - started)
+                logger.warning(f"[{BREAKER}] universe status {resp.status}")
+                if resp.status == 429:
+                    continue  # pause Retry-After appliquée par le limiter de l'hôte
+        except Exception as e:
+            record_failure(BREAKER)
+            logger.warning(f"[{BREAKER}] universe error {e} (attempt {attempt+1}/{MAX_RETRIES})")
+        await asyncio.sleep(2 ** attempt)
+    return None
+
+
+def _build(body: bytes, download_s: float) -> AerodromeUniverse:
+    started = time.perf_counter()
+    data = json.loads(body)
+    items = data.get("data", []) if isinstance(data, dict) else data if isinstance(data, list) else []
+    pools = [pool for pool in map(parse_pool, items) if pool is not None]
+    universe = AerodromeUniverse(pools, time.time())
+    parse_ms = (time.perf_counter() - started) * 1000
+
+    _universe_stats.update({
+        "bytes": len(body),
+        "pools": len(pools),
+        "tokens": len(universe.by_token),
+        "last_download_ms": download_s * 1000,
+        "last_parse_ms": parse_ms,
+    })
+    logger.info(
+        f"[{BREAKER}] universe loaded: {len(pools)} pools, {len(universe.by_token)} tokens, "
+        f"{len(body) / 1024:.0f} KiB, download {download_s * 1000:.0f} ms, parse {parse_ms:.0f} ms"
+    )
+    return universe
+
+
+async def _load(session: aiohttp.ClientSession) -> Optional[AerodromeUniverse]:
+    global _universe
+
+    universe = await _download(session)
+    if universe is None:
+        _universe_stats["failures"] += 1
+        return None
+    _universe_stats["downloads"] += 1
+    _universe = universe
+    return universe
+
+
+async def get_aerodrome_universe(session: aiohttp.ClientSession) -> Optional[AerodromeUniverse]:
+    """
+    Univers du cycle: téléchargé au premier appel puis servi depuis le cache
+    pendant UNIVERSE_TTL_SECONDS. None si le téléchargement échoue.
+    """
+    if _universe is not None and time.time() - _universe.loaded_at < UNIVERSE_TTL_SECONDS:
+        _universe_stats["hits"] += 1
+        return _universe
+    return await singleflight("aerodrome_universe", lambda: _load(session))
+
+
+def clear_aerodrome_universe():
+    """Oublie l'univers en cache (prochain appel: nouveau téléchargement)."""
+    global _universe
+    _universe = None
@@ -16,14 +16,18 @@ Supported DEX (Base):
 - Uniswap V3, Aerodrome Finance, PancakeSwap V3, KyberSwap
 """
 import asyncio
+import heapq
+import math
 from typing import Dict, Optional, List, Any
 from config import MIN_SPREAD_AFTER_FEES
 from utils import logger
 from fees import estimate_network_fee
+from cost_tables import CostTables, get_cost_tables, size_multiplier
 import json
 
 # Import pool-based fetchers
 from pool_prices import get_pool_prices_for_token, filter_pools_by_liquidity, sort_pools_by_buy_price, sort_pools_by_sell_price
+from pool_fetchers import fetch_all_pools, watch_mints
 
 # Import Base DEX module
 try:
@@ -95,6 +99,68 @@ MEDIUM_TOKENS = {
     "4k3Dyjzvzp8eMZWUXbBCjEvwSkkk59S5iCNLY3QrkX6R",  # RAY
 }
 
+TOKEN_CATEGORY_MAJOR, TOKEN_CATEGORY_MEDIUM, TOKEN_CATEGORY_MICROCAP = 0, 1, 2
+
+
+def token_category(token_mint: str) -> int:
+    """Token category index (major, medium, microcap) used by the cost tables."""
+    if token_mint in MAJOR_TOKENS:
+        return TOKEN_CATEGORY_MAJOR
+    if token_mint in MEDIUM_TOKENS:
+        return TOKEN_CATEGORY_MEDIUM
+    return TOKEN_CATEGORY_MICROCAP  # Unknown token = microcap
+
+
+# =============================================================================
+# COST MODEL TIERS
+# =============================================================================
+# Tiers are (threshold, value) pairs, highest threshold first: the first tier
+# whose threshold is <= the input applies, the last one is the floor.
+# cost_tables.py turns these constants into lookup tables (rebuilt when one
+# of them is reassigned).
+
+# Base slippage by token category (major, medium, microcap)
+CATEGORY_BASE_SLIPPAGE = (0.0005, 0.0020, 0.0040)
+
+# Slippage multiplier by pool liquidity (USD)
+SLIPPAGE_LIQUIDITY_TIERS = (
+    (1_000_000, 0.5),   # Very liquid, reduce slippage
+    (500_000, 0.75),
+    (100_000, 1.0),     # Normal
+    (50_000, 1.25),
+    (10_000, 1.5),
+    (0, 2.0),           # Very illiquid, increase slippage
+)
+
+# Slippage multiplier by pool fee tier (bps), when the fee is known
+SLIPPAGE_FEE_TIERS = (
+    (300, 1.2),   # 0.3%+ fees usually mean less liquid
+    (100, 1.0),   # 0.1%+ standard
+    (0, 0.9),     # < 0.1% very low fees (often high volume pairs)
+)
+
+# Price impact of a $1000 swap by liquidity (USD)
+IMPACT_LIQUIDITY_TIERS = (
+    (1_000_000, 0.0005),  # 0.05%
+    (200_000, 0.0010),    # 0.10%
+    (20_000, 0.0020),     # 0.20%
+    (0, 0.0050),          # 0.50%
+)
+
+# Confidence score points: liquidity (30), DEX count (10), 24h volume (10)
+CONFIDENCE_LIQUIDITY_TIERS = ((500_000, 30), (100_000, 25), (50_000, 20), (10_000, 10), (0, 5))
+CONFIDENCE_DEX_TIERS = ((4, 10), (3, 7), (2, 4), (0, 0))
+CONFIDENCE_VOLUME_TIERS = ((1_000_000, 10), (100_000, 7), (10_000, 4), (0, 2))
+
+# MEV risk thresholds and slippage buffers
+MEV_BAIT_SPREAD = 0.05          # spread above this with thin liquidity = MEV bait
+MEV_BAIT_LIQUIDITY = 50_000
+MEV_MIN_LIQUIDITY = 10_000      # below this: too easy to manipulate
+MEV_MEDIUM_SPREAD = 0.03
+MEV_MEDIUM_LIQUIDITY = 50_000
+MEV_HIGH_BUFFER = 0.005         # 0.5%
+MEV_MEDIUM_BUFFER = 0.002       # 0.2%
+
 
 # =============================================================================
 # SMART SLIPPAGE ESTIMATION
@@ -106,7 +172,8 @@ def estimate_slippage(
     swap_size_usd: float = 1000,
     fee_bps: Optional[int] = None,
     price_coherence: float = 1.0,
-    pool_count: int = 1
+    pool_count: int = 1,
+    tables: Optional[CostTables] = None
 ) -> float:
     """
     Estimate slippage based on token category, liquidity, swap size, and pool fee tier.
@@ -124,58 +191,19 @@ def estimate_slippage(
     - Medium tokens (BONK, WIF, JUP): 0.15-0.25%
     - Microcaps: 0.4-0.6%
     """
-    # Base slippage by token category
-    if token_mint in MAJOR_TOKENS:
-        base_slippage = 0.0005  # 0.05%
-    elif token_mint in MEDIUM_TOKENS:
-        base_slippage = 0.0020  # 0.20%
-    else:
-        # Unknown token = microcap
-        base_slippage = 0.0040  # 0.40%
+    # Category base x liquidity tier x fee tier (SLIPPAGE_*_TIERS), from the
+    # precomputed table; no fee data: fee multiplier 1.0
+    tables = tables or get_cost_tables()
+    slippage = tables.slippage_base(token_category(token_mint), liquidity_usd, fee_bps)
 
     # Price coherence factor: lower coherence = higher slippage
-    coherence_multiplier = max(0.5, 2.0 - price_coherence)  # 0.5x to 2.0x
-    base_slippage *= coherence_multiplier
+    slippage *= max(0.5, 2.0 - price_coherence)  # 0.5x to 2.0x
 
     # Pool count factor: fewer pools = higher slippage risk
-    pool_multiplier = max(1.0, 2.0 - (pool_count * 0.2))  # More pools = lower multiplier
-    base_slippage *= pool_multiplier
-    
-    # Liquidity adjustment multiplier
-    if liquidity_usd >= 1_000_000:
-        liq_multiplier = 0.5   # Very liquid, reduce slippage
-    elif liquidity_usd >= 500_000:
-        liq_multiplier = 0.75
-    elif liquidity_usd >= 100_000:
-        liq_multiplier = 1.0   # Normal
-    elif liquidity_usd >= 50_000:
-        liq_multiplier = 1.25
-    elif liquidity_usd >= 10_000:
-        liq_multiplier = 1.5
-    else:
-        liq_multiplier = 2.0   # Very illiquid, increase slippage
-    
-    # Swap size impact: larger swaps relative to liquidity = more slippage
-    # Formula: impact = (swap_size / liquidity) ^ 0.7 (sub-linear growth)
-    if liquidity_usd > 0:
-        size_ratio = swap_size_usd / liquidity_usd
-        # Cap size_ratio at 0.1 (10% of pool) for safety
-        size_ratio = min(size_ratio, 0.1)
-        size_multiplier = 1 + (size_ratio ** 0.7) * 2.0  # Max 2x for 10% of pool
-    else:
-        size_multiplier = 2.0  # Very conservative if no liquidity data
+    slippage *= max(1.0, 2.0 - (pool_count * 0.2))  # More pools = lower multiplier
     
-    # Fee tier adjustment: higher fees often indicate lower liquidity
-    fee_multiplier = 1.0
-    if fee_bps:
-        if fee_bps >= 300:  # 0.3%+ fees usually mean less liquid
-            fee_multiplier = 1.2
-        elif fee_bps >= 100:  # 0.1%+ standard
-            fee_multiplier = 1.0
-        else:  # < 0.1% very low fees (often high volume pairs)
-            fee_multiplier = 0.9
-    
-    slippage = base_slippage * liq_multiplier * size_multiplier * fee_multiplier
+    # Swap size impact: 1 + 2 x min(swap / liquidity, 0.1) ^ 0.7 (memoized)
+    slippage *= size_multiplier(swap_size_usd, liquidity_usd)
     
     # Cap slippage at reasonable bounds
     return min(max(slippage, 0.0005), 0.015)  # 0.05% to 1.5%
@@ -185,7 +213,11 @@ def estimate_slippage(
 # SMART PRICE IMPACT ESTIMATION
 # =============================================================================
 
-def estimate_price_impact(liquidity_usd: float, swap_size_usd: float = 1000) -> float:
+def estimate_price_impact(
+    liquidity_usd: float,
+    swap_size_usd: float = 1000,
+    tables: Optional[CostTables] = None
+) -> float:
     """
     Estimate price impact based on liquidity depth.
     
@@ -197,22 +229,9 @@ def estimate_price_impact(liquidity_usd: float, swap_size_usd: float = 1000) ->
     - $20k-200k:  0.20%
     - < $20k:     0.50%
     """
-    if liquidity_usd >= 1_000_000:
-        base_impact = 0.0005  # 0.05%
-    elif liquidity_usd >= 200_000:
-        base_impact = 0.0010  # 0.10%
-    elif liquidity_usd >= 20_000:
-        base_impact = 0.0020  # 0.20%
-    else:
-        base_impact = 0.0050  # 0.50%
-    
-    # Adjust for swap size (larger swaps = more impact)
-    size_multiplier = (swap_size_usd / 1000) ** 0.5  # Square root scaling
-    
-    impact = base_impact * size_multiplier
-    
-    # Cap at reasonable bounds
-    return min(max(impact, 0.0005), 0.02)  # 0.05% to 2%
+    # Tier impact x sqrt(swap_size / 1000), capped to 0.05%-2%: one
+    # precomputed row per swap size (IMPACT_LIQUIDITY_TIERS)
+    return (tables or get_cost_tables()).price_impact(liquidity_usd, swap_size_usd)
 
 
 # =============================================================================
@@ -282,7 +301,8 @@ def calculate_confidence_score(
     prices: Dict[str, float],
     liquidity_usd: float,
     volume_24h: float,
-    spread_brut: float
+    spread_brut: float,
+    tables: Optional[CostTables] = None
 ) -> int:
     """
     Calculate a comprehensive confidence score (0-100).
@@ -294,48 +314,20 @@ def calculate_confidence_score(
     - DEX availability (10%): How many DEX have prices?
     - Volume 24h (10%): Is there trading activity?
     """
-    dex_count = len(prices)
-    
     # 1. Price coherence (30 points)
     price_coherence = calculate_price_coherence(prices)
     coherence_score = price_coherence * 30
     
-    # 2. Liquidity depth (30 points)
-    if liquidity_usd >= 500_000:
-        liq_score = 30
-    elif liquidity_usd >= 100_000:
-        liq_score = 25
-    elif liquidity_usd >= 50_000:
-        liq_score = 20
-    elif liquidity_usd >= 10_000:
-        liq_score = 10
-    else:
-        liq_score = 5
+    # 2. Liquidity depth (30 points), 4. DEX availability (10 points),
+    # 5. Volume 24h (10 points): precomputed tiers (CONFIDENCE_*_TIERS)
+    liq_score, dex_score, volume_score = (tables or get_cost_tables()).confidence_points(
+        liquidity_usd, len(prices), volume_24h
+    )
     
     # 3. Volatility check (20 points)
     volatility_risk = assess_volatility_risk(spread_brut, price_coherence)
     volatility_score = (1 - volatility_risk) * 20
     
-    # 4. DEX availability (10 points)
-    if dex_count >= 4:
-        dex_score = 10
-    elif dex_count >= 3:
-        dex_score = 7
-    elif dex_count >= 2:
-        dex_score = 4
-    else:
-        dex_score = 0
-    
-    # 5. Volume 24h (10 points)
-    if volume_24h >= 1_000_000:
-        volume_score = 10
-    elif volume_24h >= 100_000:
-        volume_score = 7
-    elif volume_24h >= 10_000:
-        volume_score = 4
-    else:
-        volume_score = 2
-    
     # Total score
     total = coherence_score + liq_score + volatility_score + dex_score + volume_score
     
@@ -349,7 +341,8 @@ def calculate_confidence_score(
 def assess_mev_risk(
     token_mint: str,
     liquidity_usd: float,
-    spread_brut: float
+    spread_brut: float,
+    tables: Optional[CostTables] = None
 ) -> Dict[str, any]:
     """
     Assess MEV (front-running) risk.
@@ -359,43 +352,56 @@ def assess_mev_risk(
     - slippage_buffer: additional slippage to add
     - should_reject: whether to reject this opportunity
     """
+    tables = tables or get_cost_tables()
+    risk_level, slippage_buffer, should_reject, reason = tables.mev_decision(
+        token_category(token_mint), liquidity_usd, spread_brut
+    )
+    
+    return {
+        "risk_level": risk_level,
+        "slippage_buffer": slippage_buffer,
+        "should_reject": should_reject,
+        "reason": reason
+    }
+
+
+def mev_rule(category: int, liquidity_usd: float, spread_brut: float) -> tuple:
+    """
+    MEV decision (risk_level, slippage_buffer, should_reject, reason).
+    Evaluated once per table cell by cost_tables, not per opportunity.
+    """
     risk_level = "low"
     slippage_buffer = 0.0
     should_reject = False
     reason = None
     
     # High spread + low liquidity = MEV target
-    if spread_brut > 0.05 and liquidity_usd < 50_000:
+    if spread_brut > MEV_BAIT_SPREAD and liquidity_usd < MEV_BAIT_LIQUIDITY:
         risk_level = "high"
-        slippage_buffer = 0.005  # Add 0.5% buffer
+        slippage_buffer = MEV_HIGH_BUFFER
         should_reject = True
         reason = "High spread with low liquidity - likely MEV bait"
     
     # Very low liquidity = easy to manipulate
-    elif liquidity_usd < 10_000:
+    elif liquidity_usd < MEV_MIN_LIQUIDITY:
         risk_level = "high"
-        slippage_buffer = 0.005
+        slippage_buffer = MEV_HIGH_BUFFER
         should_reject = True
         reason = "Liquidity too low - high manipulation risk"
     
     # Medium risk scenarios
-    elif liquidity_usd < 50_000 or spread_brut > 0.03:
+    elif liquidity_usd < MEV_MEDIUM_LIQUIDITY or spread_brut > MEV_MEDIUM_SPREAD:
         risk_level = "medium"
-        slippage_buffer = 0.002  # Add 0.2% buffer
+        slippage_buffer = MEV_MEDIUM_BUFFER
     
     # Major tokens are safer
-    if token_mint in MAJOR_TOKENS:
+    if category == TOKEN_CATEGORY_MAJOR:
         risk_level = "low"
         slippage_buffer = 0.0
         should_reject = False
         reason = None
     
-    return {
-        "risk_level": risk_level,
-        "slippage_buffer": slippage_buffer,
-        "should_reject": should_reject,
-        "reason": reason
-    }
+    return risk_level, slippage_buffer, should_reject, reason
 
 
 # =============================================================================
@@ -453,6 +459,26 @@ async def compute_spread_and_metrics(
     
     logger.info(f"[ARB-POOL] Token {token_mint[:8]}: {len(pools)} pools found")
     
+    return evaluate_pools_for_token(
+        token_mint, pools, base_mint, liquidity_usd, volume_24h, swap_size_usd
+    )
+
+
+def evaluate_pools_for_token(
+    token_mint: str,
+    pools: List[Dict[str, Any]],
+    base_mint: str = "So11111111111111111111111111111111111111112",
+    liquidity_usd: float = 100_000,
+    volume_24h: float = 50_000,
+    swap_size_usd: float = 1000
+) -> Optional[Dict]:
+    """
+    Steps 2-8 of compute_spread_and_metrics on already fetched and filtered
+    pools (no I/O). Scalar reference of the batch kernel (arbitrage_kernel).
+    
+    Returns:
+        Opportunity dict or None
+    """
     # Guardrail: cohérence minimale des prix disponibles
     if len(set(p.get("dex") for p in pools)) < 2:
         logger.debug(f"[ARB-POOL] {token_mint[:8]}: Not enough distinct DEX/pools")
@@ -480,12 +506,6 @@ async def compute_spread_and_metrics(
     
     buy_price = buy_pool.get("buy_price")
     sell_price = sell_pool.get("sell_price")
-    buy_dex = buy_pool.get("dex")
-    sell_dex = sell_pool.get("dex")
-    buy_pool_id = buy_pool.get("pool_id")
-    sell_pool_id = sell_pool.get("pool_id")
-    buy_pool_url = buy_pool.get("url")
-    sell_pool_url = sell_pool.get("url")
     
     # =========================================================================
     # STEP 3: Calculate spread_brut
@@ -565,25 +585,26 @@ async def compute_spread_and_metrics(
     sell_pool_fee_bps = sell_pool.get("fee_bps", 25)
 
     # Slippage pour chaque pool individuellement avec facteurs avancés
+    # (tables de coûts lues une fois pour tout le token)
+    tables = get_cost_tables()
     buy_slippage = estimate_slippage(
         token_mint, buy_pool_liq, swap_size_usd, buy_pool_fee_bps,
-        price_coherence, len(pools)
+        price_coherence, len(pools), tables
     )
     sell_slippage = estimate_slippage(
         token_mint, sell_pool_liq, swap_size_usd, sell_pool_fee_bps,
-        price_coherence, len(pools)
+        price_coherence, len(pools), tables
     )
-    base_slippage = (buy_slippage + sell_slippage) / 2
     
     # 4d. MEV risk assessment
-    mev_assessment = assess_mev_risk(token_mint, avg_pool_liq, spread_brut)
+    mev_assessment = assess_mev_risk(token_mint, avg_pool_liq, spread_brut, tables)
     slippage_buffer = mev_assessment["slippage_buffer"]
     
     # Total slippage (buy + sell + MEV buffer)
     total_slippage = buy_slippage + sell_slippage + slippage_buffer
     
     # 4e. Smart price impact (use actual pool liquidity)
-    price_impact = estimate_price_impact(avg_pool_liq, swap_size_usd)
+    price_impact = estimate_price_impact(avg_pool_liq, swap_size_usd, tables)
     
     # 4f. Total costs
     total_costs = total_dex_fees + network_fee + total_slippage + price_impact
@@ -625,7 +646,8 @@ async def compute_spread_and_metrics(
         prices=pool_prices_dict,
         liquidity_usd=avg_pool_liq,
         volume_24h=volume_24h,
-        spread_brut=spread_brut
+        spread_brut=spread_brut,
+        tables=tables
     )
     
     # Guardrail 3: cohérence minimale avant envoi
@@ -635,6 +657,73 @@ async def compute_spread_and_metrics(
         )
         return None
     
+    return build_pool_opportunity(
+        token_mint, base_mint, pools, buy_pool, sell_pool,
+        buy_pool_liq=buy_pool_liq,
+        sell_pool_liq=sell_pool_liq,
+        spread_brut=spread_brut,
+        spread_net=spread_net,
+        price_coherence=price_coherence,
+        network_fee=network_fee,
+        buy_slippage=buy_slippage,
+        sell_slippage=sell_slippage,
+        slippage_buffer=slippage_buffer,
+        price_impact=price_impact,
+        total_costs=total_costs,
+        confidence_score=confidence_score,
+        mev_risk=mev_assessment["risk_level"],
+        volume_24h=volume_24h,
+        swap_size_usd=swap_size_usd,
+    )
+
+
+def build_pool_opportunity(
+    token_mint: str,
+    base_mint: str,
+    pools: List[Dict[str, Any]],
+    buy_pool: Dict[str, Any],
+    sell_pool: Dict[str, Any],
+    *,
+    buy_pool_liq: float,
+    sell_pool_liq: float,
+    spread_brut: float,
+    spread_net: float,
+    price_coherence: float,
+    network_fee: float,
+    buy_slippage: float,
+    sell_slippage: float,
+    slippage_buffer: float,
+    price_impact: float,
+    total_costs: float,
+    confidence_score: int,
+    mev_risk: str,
+    volume_24h: float,
+    swap_size_usd: float
+) -> Dict:
+    """
+    Build (and log) the opportunity dict of a selected buy/sell pool pair.
+    Shared by evaluate_pools_for_token and the batch kernel, which only
+    calls it for the tokens that pass every filter.
+    """
+    buy_price = buy_pool.get("buy_price")
+    sell_price = sell_pool.get("sell_price")
+    buy_dex = buy_pool.get("dex")
+    sell_dex = sell_pool.get("dex")
+    buy_pool_id = buy_pool.get("pool_id")
+    sell_pool_id = sell_pool.get("pool_id")
+    buy_pool_url = buy_pool.get("url")
+    sell_pool_url = sell_pool.get("url")
+    
+    buy_pool_fee_pct = buy_pool.get("fee_pct", 0.003)
+    sell_pool_fee_pct = sell_pool.get("fee_pct", 0.003)
+    total_dex_fees = buy_pool_fee_pct + sell_pool_fee_pct
+    
+    avg_pool_liq = (buy_pool_liq + sell_pool_liq) / 2
+    base_slippage = (buy_slippage + sell_slippage) / 2
+    total_slippage = buy_slippage + sell_slippage + slippage_buffer
+    
+    pool_prices_dict = {p.get("dex"): p.get("buy_price") for p in pools if p.get("buy_price")}
+    
     # =========================================================================
     # STEP 8: Build result dict with POOL URLs
     # =========================================================================
@@ -691,7 +780,7 @@ async def compute_spread_and_metrics(
         "confidence_score": confidence_score,
         
         # MEV assessment
-        "mev_risk": mev_assessment["risk_level"],
+        "mev_risk": mev_risk,
         
         # Profit estimate
         "profit_estimate_usd": profit_1000,
@@ -728,7 +817,7 @@ async def compute_spread_and_metrics(
     logger.info(f"  Slippage: {total_slippage*100:.3f}%")
     logger.info(f"  Price impact: {price_impact*100:.3f}%")
     logger.info(f"  Total: {total_costs*100:.2f}%")
-    logger.info(f"Confidence: {confidence_score}/100 | MEV risk: {mev_assessment['risk_level']}")
+    logger.info(f"Confidence: {confidence_score}/100 | MEV risk: {mev_risk}")
     logger.info(f"Profit (${swap_size_usd}): ${profit_1000:.2f}")
     logger.info(f"Buy URL: {buy_pool_url}")
     logger.info(f"Sell URL: {sell_pool_url}")
@@ -751,7 +840,7 @@ async def compute_spread_and_metrics(
         "confidence_score": confidence_score,
         "avg_liquidity_usd": round(avg_pool_liq, 0),
         "pool_count": len(pools),
-        "mev_risk": mev_assessment["risk_level"],
+        "mev_risk": mev_risk,
         "price_coherence": round(price_coherence, 3),
         "timestamp": asyncio.get_event_loop().time()
     }
@@ -782,23 +871,26 @@ async def find_best_arbitrage_opportunities(
     Returns:
         List of opportunities sorted by spread_net (descending)
     """
+    from arbitrage_kernel import find_batch_opportunities  # import différé (cycle)
+    
     logger.info(f"[ARB] Scanning {len(tokens)} tokens...")
     
-    # Run all scans in parallel
-    tasks = [
-        compute_spread_and_metrics(session, token, base_mint)
-        for token in tokens
-    ]
+    # Enregistrer tous les mints avant le fetch: la watchlist ne change plus
+    # pendant le scan et tous les tokens partagent un seul fetch_all_pools
+    watch_mints(list(tokens) + [base_mint])
+    all_pools = await fetch_all_pools(session)
     
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    # Pools de chaque token (lookup dans l'index, sans I/O), puis évaluation
+    # de tous les tokens en un lot (même résultat que compute_spread_and_metrics)
+    token_pools = {}
+    for token in tokens:
+        try:
+            pools = await get_pool_prices_for_token(session, token, base_mint, all_pools=all_pools)
+            token_pools[token] = filter_pools_by_liquidity(pools, min_liquidity_usd=10000)
+        except Exception as e:
+            logger.error(f"[ARB] Error for {token[:8]}: {e}")
     
-    # Filter valid results
-    opportunities = []
-    for i, result in enumerate(results):
-        if isinstance(result, dict):
-            opportunities.append(result)
-        elif isinstance(result, Exception):
-            logger.error(f"[ARB] Error for {tokens[i][:8]}: {result}")
+    opportunities = find_batch_opportunities(token_pools, base_mint)
     
     # Sort by spread_net descending
     opportunities.sort(key=lambda x: x.get("spread_net", 0), reverse=True)
@@ -916,6 +1008,99 @@ def compute_pool_arbitrage(
         return None
 
 
+def _pool_quotes(pools: List[Dict[str, Any]]) -> List[tuple]:
+    """(index, buy_price, sell_price, fee_pct) des pools évaluables, lus comme compute_pool_arbitrage."""
+    quotes = []
+    for index, pool in enumerate(pools):
+        try:
+            buy_price = float(pool.get("buy_price") or 0)
+            sell_price = float(pool.get("sell_price") or 0)
+        except (TypeError, ValueError):
+            continue
+        fee = pool.get("fee_pct", 0) or 0
+        if not isinstance(fee, (int, float)) or not math.isfinite(fee):
+            continue
+        if 0 < buy_price < math.inf and 0 < sell_price < math.inf:
+            quotes.append((index, buy_price, sell_price, fee))
+    return quotes
+
+
+def find_pool_opportunities(
+    pools: List[Dict[str, Any]],
+    token: str,
+    top_k: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Opportunités pool-to-pool d'un token, meilleures d'abord, sans évaluer
+    les n(n-1)/2 paires une à une.
+
+    Spread net d'un achat sur i et d'une vente sur j (formule de
+    compute_pool_arbitrage): (sell_j - buy_i) / buy_i - (fee_i + fee_j).
+    Il croît avec sell_j et se borne en prenant le plus petit fee de vente:
+    - pools de vente triées par sell_price décroissant
+    - pools d'achat triées par leur meilleur spread possible (plus haut
+      sell_price, plus petit fee), décroissant
+    - chaque parcours s'arrête dès que la borne ne peut plus dépasser le
+      seuil (0, ou le K-ième meilleur spread déjà trouvé avec top_k)
+    Coût: le tri, plus les seules paires potentiellement rentables.
+
+    Chaque paire retenue passe par compute_pool_arbitrage (pools dans
+    l'ordre de la liste): mêmes dicts que la boucle par paires, triés par
+    spread_net décroissant (égalités: ordre des paires). Les pools à prix ou
+    fee non numériques ou non finis sont ignorées.
+
+    Args:
+        top_k: Nombre max de paires distinctes renvoyées (None: toutes)
+    """
+    quotes = _pool_quotes(pools)
+    if len(quotes) < 2 or top_k == 0:
+        return []
+
+    max_sell = max(q[2] for q in quotes)
+    min_fee = min(q[3] for q in quotes)
+    sells = sorted(quotes, key=lambda q: q[2], reverse=True)
+    buys = sorted(quotes, key=lambda q: (max_sell - q[1]) / q[1] - (q[3] + min_fee), reverse=True)
+
+    threshold: List[float] = []  # min-heap des top_k meilleurs spreads trouvés
+    found: List[tuple] = []      # (spread_net, index a, index b), a < b
+    seen = set()
+
+    def beaten(bound: float) -> bool:
+        return bound <= 0 or (top_k is not None and len(threshold) == top_k and bound < threshold[0])
+
+    for i, buy_i, sell_i, fee_i in buys:
+        if beaten((max_sell - buy_i) / buy_i - (fee_i + min_fee)):
+            break
+        for j, buy_j, sell_j, fee_j in sells:
+            if beaten((sell_j - buy_i) / buy_i - (fee_i + min_fee)):
+                break
+            pair = (i, j) if i < j else (j, i)
+            if j == i or pair in seen:
+                continue
+            seen.add(pair)
+            # Les deux sens, comme compute_pool_arbitrage
+            spread_net = max(
+                (sell_j - buy_i) / buy_i - (fee_i + fee_j),
+                (sell_i - buy_j) / buy_j - (fee_j + fee_i),
+            )
+            if spread_net <= 0:
+                continue
+            found.append((spread_net, *pair))
+            if top_k is not None:
+                if len(threshold) < top_k:
+                    heapq.heappush(threshold, spread_net)
+                elif spread_net > threshold[0]:
+                    heapq.heapreplace(threshold, spread_net)
+
+    found.sort(key=lambda f: (-f[0], f[1], f[2]))
+    opportunities = []
+    for _, a, b in found[:top_k]:
+        opp = compute_pool_arbitrage(pools[a], pools[b], token)
+        if opp:
+            opportunities.append(opp)
+    return opportunities
+
+
 # =============================================================================
 # BASE CHAIN ARBITRAGE FUNCTIONS
 # =============================================================================
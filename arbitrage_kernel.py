@@ -0,0 +1,293 @@
+# arbitrage_kernel.py
+"""
+Évaluation pool-to-pool de tous les tokens d'un cycle en un seul lot NumPy.
+
+compute_spread_and_metrics traite un token à la fois en Python scalaire
+(tris, estimate_slippage, estimate_price_impact, assess_mev_risk,
+calculate_confidence_score), soit quelques milliers d'opérations Python par
+token et par cycle, presque toujours pour conclure "pas d'opportunité".
+
+Ici les pools normalisées de tous les tokens sont mises en colonnes
+(PoolBatch: id de token, buy/sell, fee, liquidité, DEX) et
+evaluate_pool_batch calcule, pour chaque token en même temps:
+- meilleure pool d'achat / de vente (tri lexicographique par segment de
+  token, mêmes règles d'égalité que les tris stables de pool_prices)
+- cohérence des prix par DEX, spread_brut, garde-fous
+- slippage, impact de prix, risque MEV, spread_net, score de confiance
+avec exactement les règles de evaluate_pools_for_token (arbitrage.py), qui
+reste la référence scalaire: les paliers du modèle de coûts sont indexés
+dans les mêmes tables que les fonctions scalaires (cost_tables).
+
+Les dicts d'opportunité (build_pool_opportunity) ne sont construits que pour
+les tokens qui passent tous les filtres, dont MIN_SPREAD_AFTER_FEES.
+"""
+import time
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config import MIN_SPREAD_AFTER_FEES
+from cost_tables import MEV_LEVELS, get_cost_tables, size_multipliers
+from fees import estimate_network_fee
+from utils import logger
+
+
+class PoolBatch:
+    """Pools normalisées (après filtre de liquidité) de tous les tokens, en colonnes."""
+
+    def __init__(self, token_pools: Dict[str, List[Mapping]], liquidity_usd: float = 100_000):
+        self.token_pools = token_pools
+        self.tokens = list(token_pools)
+        counts = [len(token_pools[token]) for token in self.tokens]
+        self.pools: List[Mapping] = [pool for token in self.tokens for pool in token_pools[token]]
+        pools = self.pools
+        dex_codes: Dict[Any, int] = {}
+        id_codes: Dict[Any, int] = {}
+
+        # Une liste par colonne; mêmes valeurs par défaut que les tris et
+        # calculs scalaires
+        buy_prices = [pool.get("buy_price") for pool in pools]
+        self.token_id = np.repeat(np.arange(len(self.tokens), dtype=np.int64), counts)
+        self.buy = np.array([float("inf") if p is None else p for p in buy_prices], dtype=np.float64)
+        self.sell = np.array([pool.get("sell_price", 0) or 0 for pool in pools], dtype=np.float64)
+        self.priced = np.array([bool(p) for p in buy_prices], dtype=bool)
+        self.fee_pct = np.array([pool.get("fee_pct", 0.003) for pool in pools], dtype=np.float64)
+        self.fee_bps = np.array([pool.get("fee_bps", 25) or 0 for pool in pools], dtype=np.float64)
+        self.liquidity = np.array([pool.get("liquidity_usd", liquidity_usd) for pool in pools], dtype=np.float64)
+        self.dex = np.array(
+            [dex_codes.setdefault(pool.get("dex"), len(dex_codes)) for pool in pools], dtype=np.int64
+        )
+        self.pool_id = np.array(
+            [id_codes.setdefault(pool.get("pool_id"), len(id_codes)) for pool in pools], dtype=np.int64
+        )
+        self.n_dex = max(len(dex_codes), 1)
+        self.counts = np.array(counts, dtype=np.int64)
+        self.starts = np.concatenate(([0], np.cumsum(self.counts)[:-1])).astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.pools)
+
+
+def _token_categories(tokens: List[str]) -> np.ndarray:
+    from arbitrage import token_category  # import différé (cycle)
+
+    return np.array([token_category(token) for token in tokens], dtype=np.int64)
+
+
+def _price_coherence(batch: PoolBatch, n_tokens: int):
+    """
+    calculate_price_coherence de chaque token sur {dex: buy_price} (dernière
+    pool cotée de chaque DEX, comme le dict construit par l'appelant).
+
+    Returns:
+        (cohérence, nombre de DEX cotés) par token
+    """
+    priced = np.flatnonzero(batch.priced)
+    keys = batch.token_id[priced] * batch.n_dex + batch.dex[priced]
+    # Tables indexées par (token, DEX): pas de tri, O(n) sur les pools
+    n_keys = n_tokens * batch.n_dex
+    first = np.full(n_keys, len(batch), dtype=np.int64)
+    last = np.full(n_keys, -1, dtype=np.int64)
+    np.minimum.at(first, keys, priced)
+    np.maximum.at(last, keys, priced)
+    # Valeur: dernière pool du DEX; ordre de sommation: première apparition
+    # du DEX (ordre d'insertion du dict), pour des sommes identiques au scalaire
+    is_first = np.zeros(len(batch), dtype=bool)
+    is_first[first[first < len(batch)]] = True
+    last = last[batch.token_id[is_first] * batch.n_dex + batch.dex[is_first]]
+    tokens = batch.token_id[last]
+    prices = batch.buy[last]
+
+    n = np.bincount(tokens, minlength=n_tokens).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.bincount(tokens, weights=prices, minlength=n_tokens) / n
+        variance = np.bincount(tokens, weights=(prices - mean[tokens]) ** 2, minlength=n_tokens) / n
+        cv = variance ** 0.5 / mean
+    coherence = np.minimum(np.maximum(0, 1 - cv * 10), 1.0)
+    coherence = np.where((n < 2) | (mean == 0), 0.0, coherence)
+    return coherence, n.astype(np.int64)
+
+
+def _slippage(base, coherence, pool_count, liquidity, swap_size_usd: float):
+    """estimate_slippage vectorisé (même table de base, même ordre des produits)."""
+    slippage = base * np.maximum(0.5, 2.0 - coherence)
+    slippage = slippage * np.maximum(1.0, 2.0 - (pool_count * 0.2))
+    slippage = slippage * size_multipliers(swap_size_usd, liquidity)
+    return np.minimum(np.maximum(slippage, 0.0005), 0.015)
+
+
+def evaluate_pool_batch(
+    batch: PoolBatch,
+    volume_24h: float = 50_000,
+    swap_size_usd: float = 1000
+) -> Dict[str, np.ndarray]:
+    """
+    Métriques de tous les tokens du lot (tableaux indexés par token).
+
+    Returns:
+        {"passed", "buy_idx", "sell_idx", "spread_brut", "spread_net",
+         "coherence", "buy_slippage", "sell_slippage", "slippage_buffer",
+         "price_impact", "total_costs", "confidence", "mev_level", "network_fee"}
+        passed: le token a une opportunité (mêmes filtres que evaluate_pools_for_token);
+        lot vide: {"passed"} seulement
+    """
+    n_tokens = len(batch.tokens)
+    if len(batch) == 0:
+        return {"passed": np.zeros(n_tokens, dtype=bool)}
+
+    counts = batch.counts
+    has_pools = counts > 0
+    starts = np.where(has_pools, batch.starts, 0)
+    pool_index = np.arange(len(batch), dtype=np.int64)
+
+    # Garde-fou: au moins 2 DEX distincts (clé dex, cotée ou non)
+    dex_seen = np.zeros(n_tokens * batch.n_dex, dtype=bool)
+    dex_seen[batch.token_id * batch.n_dex + batch.dex] = True
+    distinct_dex = dex_seen.reshape(n_tokens, batch.n_dex).sum(axis=1)
+
+    # Meilleur achat: buy_price croissant; meilleure vente: sell_price décroissant
+    # (égalités: ordre d'origine, comme les tris stables de pool_prices)
+    by_buy = np.lexsort((pool_index, batch.buy, batch.token_id))
+    by_sell = np.lexsort((pool_index, -batch.sell, batch.token_id))
+    buy_idx = by_buy[starts]
+    sell_idx = by_sell[starts]
+    same_pool = batch.pool_id[buy_idx] == batch.pool_id[sell_idx]
+    second_sell = by_sell[np.minimum(starts + 1, len(batch) - 1)]
+    sell_idx = np.where(same_pool & (counts >= 3), second_sell, sell_idx)
+
+    buy_price = batch.buy[buy_idx]
+    sell_price = batch.sell[sell_idx]
+    valid_prices = (buy_price > 0) & (sell_price > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spread_brut = np.where(valid_prices, (sell_price - buy_price) / buy_price, 0.0)
+
+    coherence, priced_dex = _price_coherence(batch, n_tokens)
+
+    def incoherent(pool):
+        return batch.priced[pool] & (batch.sell[pool] != 0) & (batch.buy[pool] > batch.sell[pool])
+
+    # Coûts
+    buy_fee = batch.fee_pct[buy_idx]
+    sell_fee = batch.fee_pct[sell_idx]
+    total_dex_fees = buy_fee + sell_fee
+    network_fee = estimate_network_fee("solana", swap_size_usd)
+    buy_liq = batch.liquidity[buy_idx]
+    sell_liq = batch.liquidity[sell_idx]
+    avg_liq = (buy_liq + sell_liq) / 2
+    min_liq = np.minimum(buy_liq, sell_liq)
+
+    tables = get_cost_tables()
+    category = _token_categories(batch.tokens)
+    buy_base = tables.slippage_bases(
+        category, tables.liquidity_buckets(buy_liq), tables.fee_tiers(batch.fee_bps[buy_idx]))
+    sell_base = tables.slippage_bases(
+        category, tables.liquidity_buckets(sell_liq), tables.fee_tiers(batch.fee_bps[sell_idx]))
+    buy_slippage = _slippage(buy_base, coherence, counts, buy_liq, swap_size_usd)
+    sell_slippage = _slippage(sell_base, coherence, counts, sell_liq, swap_size_usd)
+
+    # assess_mev_risk: cellule (catégorie, liquidité moyenne, spread)
+    avg_bucket = tables.liquidity_buckets(avg_liq)
+    mev_level, slippage_buffer, mev_reject = tables.mev_decisions(
+        category, avg_bucket, tables.spread_buckets(spread_brut))
+
+    total_slippage = buy_slippage + sell_slippage + slippage_buffer
+    price_impact = tables.price_impacts(avg_bucket, swap_size_usd)
+    total_costs = total_dex_fees + network_fee + total_slippage + price_impact
+    spread_net = spread_brut - total_costs
+
+    # calculate_confidence_score
+    liq_score = tables.confidence_liquidity(avg_bucket)
+    spread_risk = np.minimum(spread_brut * 10, 1.0)
+    volatility_risk = np.minimum(np.maximum((spread_risk * 0.4) + ((1 - coherence) * 0.6), 0), 1.0)
+    dex_score = tables.dex_scores(priced_dex)
+    volume_score = tables.volume_score(volume_24h)
+    total = coherence * 30 + liq_score + (1 - volatility_risk) * 20 + dex_score + volume_score
+    confidence = np.trunc(np.minimum(np.maximum(total, 0), 100)).astype(np.int64)
+
+    passed = (
+        has_pools
+        & (distinct_dex >= 2)
+        & ~(same_pool & (counts < 3))
+        & valid_prices
+        & ~((counts < 3) & (spread_brut > 0.10) & (coherence < 0.8))
+        & ~(spread_brut > 0.20)
+        & ~incoherent(buy_idx)
+        & ~incoherent(sell_idx)
+        & ~(avg_liq < 10_000)
+        & ~(min_liq < 5_000)
+        & ~mev_reject
+        & ~(spread_net < MIN_SPREAD_AFTER_FEES)
+        & ~(coherence < 0.5)
+        & np.isfinite(spread_net)  # fee ou liquidité manquante (NaN): le scalaire échoue
+        & np.isfinite(avg_liq)
+    )
+
+    return {
+        "passed": passed,
+        "buy_idx": buy_idx,
+        "sell_idx": sell_idx,
+        "spread_brut": spread_brut,
+        "spread_net": spread_net,
+        "coherence": coherence,
+        "buy_slippage": buy_slippage,
+        "sell_slippage": sell_slippage,
+        "slippage_buffer": slippage_buffer,
+        "price_impact": price_impact,
+        "total_costs": total_costs,
+        "confidence": confidence,
+        "mev_level": mev_level,
+        "network_fee": np.full(n_tokens, network_fee),
+    }
+
+
+def find_batch_opportunities(
+    token_pools: Dict[str, List[Mapping]],
+    base_mint: str = "So11111111111111111111111111111111111111112",
+    liquidity_usd: float = 100_000,
+    volume_24h: float = 50_000,
+    swap_size_usd: float = 1000,
+    batch: Optional[PoolBatch] = None
+) -> List[Dict[str, Any]]:
+    """
+    Opportunités de tous les tokens (pools déjà filtrées par liquidité),
+    dans l'ordre de token_pools: mêmes dicts que evaluate_pools_for_token
+    token par token.
+    """
+    from arbitrage import build_pool_opportunity  # import différé (cycle)
+
+    started = time.perf_counter()
+    if batch is None:
+        batch = PoolBatch(token_pools, liquidity_usd)
+    metrics = evaluate_pool_batch(batch, volume_24h, swap_size_usd)
+    kernel_ms = (time.perf_counter() - started) * 1000
+
+    opportunities = []
+    for t in np.flatnonzero(metrics["passed"]).tolist():
+        token = batch.tokens[t]
+        buy_pool = batch.pools[metrics["buy_idx"][t]]
+        sell_pool = batch.pools[metrics["sell_idx"][t]]
+        opportunities.append(build_pool_opportunity(
+            token, base_mint, token_pools[token], buy_pool, sell_pool,
+            buy_pool_liq=buy_pool.get("liquidity_usd", liquidity_usd),
+            sell_pool_liq=sell_pool.get("liquidity_usd", liquidity_usd),
+            spread_brut=float(metrics["spread_brut"][t]),
+            spread_net=float(metrics["spread_net"][t]),
+            price_coherence=float(metrics["coherence"][t]),
+            network_fee=float(metrics["network_fee"][t]),
+            buy_slippage=float(metrics["buy_slippage"][t]),
+            sell_slippage=float(metrics["sell_slippage"][t]),
+            slippage_buffer=float(metrics["slippage_buffer"][t]),
+            price_impact=float(metrics["price_impact"][t]),
+            total_costs=float(metrics["total_costs"][t]),
+            confidence_score=int(metrics["confidence"][t]),
+            mev_risk=MEV_LEVELS[metrics["mev_level"][t]],
+            volume_24h=volume_24h,
+            swap_size_usd=swap_size_usd,
+        ))
+
+    logger.debug(
+        f"[ARB-KERNEL] {len(batch.tokens)} tokens, {len(batch)} pools: "
+        f"{len(opportunities)} opportunities, kernel {kernel_ms:.2f} ms"
+    )
+    return opportunities
@@ -11,6 +11,7 @@ import asyncio
 import aiohttp
 from typing import Dict, Optional, List
 from utils import logger
+from http_transport import create_session
 
 # Import des fonctions principales depuis base_dex_fetchers
 try:
@@ -146,7 +147,7 @@ def get_base_token_info(token_address: str) -> Dict[str, str]:
 
 async def main():
     """Exemple d'utilisation."""
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         # Exemple: récupérer le prix de VIRTUAL
         token = "0x0b3e328455c4059EEb9e3f84b5543F74E24e7E1b"
         prices = await get_base_token_prices_all_dex(session, token)
@@ -19,6 +19,8 @@ import asyncio
 import aiohttp
 from typing import Dict, Optional, Any
 from utils import logger
+from circuit_breaker import allow_request, track
+from aerodrome_universe import get_aerodrome_universe
 
 
 # =============================================================================
@@ -138,6 +140,7 @@ async def get_uniswap_price(
         {
             "url": "https://interface.gateway.uniswap.org/v2/quote",
             "method": "POST",
+            "breaker": "uniswap_gateway",
             "body": {
                 "tokenInChainId": BASE_CHAIN_ID,
                 "tokenOutChainId": BASE_CHAIN_ID,
@@ -151,11 +154,14 @@ async def get_uniswap_price(
         # Uniswap Quote API (legacy)
         {
             "url": f"https://api.uniswap.org/v2/quote?tokenInAddress={token_in}&tokenOutAddress={token_out}&tokenInChainId={BASE_CHAIN_ID}&tokenOutChainId={BASE_CHAIN_ID}&amount={amount}&type=exactIn",
-            "method": "GET"
+            "method": "GET",
+            "breaker": "uniswap_api",
         }
     ]
     
     for endpoint in endpoints:
+        if not allow_request(endpoint["breaker"]):
+            continue
         try:
             headers = {
                 "Content-Type": "application/json",
@@ -163,25 +169,28 @@ async def get_uniswap_price(
                 "Accept": "application/json"
             }
             
-            if endpoint["method"] == "POST":
-                async with session.post(
-                    endpoint["url"],
-                    json=endpoint.get("body"),
-                    headers=headers,
-                    timeout=10
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        return _parse_uniswap_response(data, token_in, token_out, amount)
-            else:
-                async with session.get(
-                    endpoint["url"],
-                    headers=headers,
-                    timeout=10
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        return _parse_uniswap_response(data, token_in, token_out, amount)
+            with track(endpoint["breaker"]) as call:
+                if endpoint["method"] == "POST":
+                    async with session.post(
+                        endpoint["url"],
+                        json=endpoint.get("body"),
+                        headers=headers,
+                        timeout=10
+                    ) as resp:
+                        call.status = resp.status
+                        if resp.status == 200:
+                            data = await resp.json()
+                            return _parse_uniswap_response(data, token_in, token_out, amount)
+                else:
+                    async with session.get(
+                        endpoint["url"],
+                        headers=headers,
+                        timeout=10
+                    ) as resp:
+                        call.status = resp.status
+                        if resp.status == 200:
+                            data = await resp.json()
+                            return _parse_uniswap_response(data, token_in, token_out, amount)
                         
         except asyncio.TimeoutError:
             continue
@@ -255,6 +264,8 @@ async def _get_uniswap_via_1inch(
     amount: str
 ) -> Optional[Dict[str, Any]]:
     """Fallback: get Uniswap price via 1inch API."""
+    if not allow_request("1inch"):
+        return None
     try:
         url = f"https://api.1inch.dev/swap/v6.0/{BASE_CHAIN_ID}/quote"
         params = {
@@ -267,25 +278,27 @@ async def _get_uniswap_via_1inch(
             "Accept": "application/json"
         }
         
-        async with session.get(url, params=params, headers=headers, timeout=10) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                amount_out = int(data.get("toAmount", 0))
+        with track("1inch") as call:
+            async with session.get(url, params=params, headers=headers, timeout=10) as resp:
+                call.status = resp.status
+                if resp.status == 200:
+                    data = await resp.json()
+                    amount_out = int(data.get("toAmount", 0))
                 
-                if amount_out > 0:
-                    amount_in = int(amount)
-                    decimals_out = 6 if token_out.lower() == USDC_BASE.lower() else 18
-                    price = (amount_out / (10 ** decimals_out)) / (amount_in / (10 ** 18))
+                    if amount_out > 0:
+                        amount_in = int(amount)
+                        decimals_out = 6 if token_out.lower() == USDC_BASE.lower() else 18
+                        price = (amount_out / (10 ** decimals_out)) / (amount_in / (10 ** 18))
                     
-                    return {
-                        "dex": "uniswap",
-                        "output": amount_out,
-                        "price": price,
-                        "fee_tier": 3000,
-                        "fee_decimal": 0.003,
-                        "price_impact": None,
-                        "liquidity": None,
-                    }
+                        return {
+                            "dex": "uniswap",
+                            "output": amount_out,
+                            "price": price,
+                            "fee_tier": 3000,
+                            "fee_decimal": 0.003,
+                            "price_impact": None,
+                            "liquidity": None,
+                        }
     except Exception as e:
         logger.debug(f"[BASE] 1inch fallback error: {e}")
     
@@ -299,31 +312,35 @@ async def _get_price_via_defillama(
     dex_name: str
 ) -> Optional[Dict[str, Any]]:
     """Get token price via DeFiLlama API."""
+    if not allow_request("defillama"):
+        return None
     try:
         # DeFiLlama uses chain:address format
         url = f"https://coins.llama.fi/prices/current/base:{token}"
         
-        async with session.get(url, timeout=10) as resp:
-            if resp.status == 200:
-                data = await resp.json()
+        with track("defillama") as call:
+            async with session.get(url, timeout=10) as resp:
+                call.status = resp.status
+                if resp.status == 200:
+                    data = await resp.json()
                 
-                coins = data.get("coins", {})
-                coin_data = coins.get(f"base:{token}")
+                    coins = data.get("coins", {})
+                    coin_data = coins.get(f"base:{token}")
                 
-                if coin_data:
-                    price = float(coin_data.get("price", 0))
+                    if coin_data:
+                        price = float(coin_data.get("price", 0))
                     
-                    if price > 0:
-                        return {
-                            "dex": dex_name,
-                            "output": 0,
-                            "price": price,
-                            "fee_tier": 3000 if dex_name == "uniswap" else 2500,
-                            "fee_decimal": 0.003 if dex_name == "uniswap" else 0.0025,
-                            "price_impact": None,
-                            "liquidity": None,
-                            "source": "defillama"
-                        }
+                        if price > 0:
+                            return {
+                                "dex": dex_name,
+                                "output": 0,
+                                "price": price,
+                                "fee_tier": 3000 if dex_name == "uniswap" else 2500,
+                                "fee_decimal": 0.003 if dex_name == "uniswap" else 0.0025,
+                                "price_impact": None,
+                                "liquidity": None,
+                                "source": "defillama"
+                            }
     except Exception as e:
         logger.debug(f"[BASE] DeFiLlama error: {e}")
     
@@ -355,7 +372,12 @@ async def get_aerodrome_price(
         Dict with: output, price, fee, is_stable, price_impact, liquidity
         None on error
     """
-    # Try via OpenOcean aggregator first (includes Aerodrome)
+    # Cached pool list first: downloaded once per cycle, no extra request
+    result = await _get_aerodrome_via_universe(session, token_in, token_out, amount)
+    if result:
+        return result
+    
+    # Try via OpenOcean aggregator (includes Aerodrome)
     result = await _get_aerodrome_via_openocean(session, token_in, token_out, amount)
     if result:
         return result
@@ -366,6 +388,8 @@ async def get_aerodrome_price(
         return result
     
     # Fallback: try direct Aerodrome API
+    if not allow_request("aerodrome_quote"):
+        return None
     try:
         url = "https://aerodrome.finance/api/v1/quote"
         params = {
@@ -374,10 +398,12 @@ async def get_aerodrome_price(
             "amount": amount,
         }
         
-        async with session.get(url, params=params, timeout=10) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                return _parse_aerodrome_response(data, token_in, token_out, amount)
+        with track("aerodrome_quote") as call:
+            async with session.get(url, params=params, timeout=10) as resp:
+                call.status = resp.status
+                if resp.status == 200:
+                    data = await resp.json()
+                    return _parse_aerodrome_response(data, token_in, token_out, amount)
                 
     except Exception as e:
         logger.debug(f"[BASE] Aerodrome direct API error: {e}")
@@ -385,6 +411,49 @@ async def get_aerodrome_price(
     return None
 
 
+async def _get_aerodrome_via_universe(
+    session: aiohttp.ClientSession,
+    token_in: str,
+    token_out: str,
+    amount: str
+) -> Optional[Dict[str, Any]]:
+    """Quote from the per-cycle Aerodrome pool list (highest-TVL pool of the pair)."""
+    universe = await get_aerodrome_universe(session)
+    if universe is None:
+        return None
+    pool = universe.best_pool_for_pair(token_in, token_out)
+    if pool is None:
+        return None
+    
+    amount_in = int(amount) / (10 ** 18)
+    if amount_in <= 0:
+        return None
+    if token_in.lower() == pool["token0"].lower():
+        reserve_in, reserve_out = pool["reserve0"], pool["reserve1"]
+    else:
+        reserve_in, reserve_out = pool["reserve1"], pool["reserve0"]
+    spot = reserve_out / reserve_in
+    amount_in_net = amount_in * (1 - pool["fee_pct"])
+    if pool["is_stable"]:
+        amount_out = amount_in_net * spot  # stable curve: flat around the peg
+    else:
+        amount_out = reserve_out * amount_in_net / (reserve_in + amount_in_net)
+    if amount_out <= 0:
+        return None
+    
+    decimals_out = 6 if token_out.lower() == USDC_BASE.lower() else 18
+    return {
+        "dex": "aerodrome",
+        "output": int(amount_out * (10 ** decimals_out)),
+        "price": amount_out / amount_in,
+        "fee_decimal": pool["fee_pct"],
+        "is_stable": pool["is_stable"],
+        "price_impact": max(0.0, 1 - amount_out / (amount_in_net * spot)),
+        "liquidity": pool["liquidity_usd"] or None,
+        "source": "aerodrome_pools",
+    }
+
+
 async def _get_aerodrome_via_openocean(
     session: aiohttp.ClientSession,
     token_in: str,
@@ -392,6 +461,8 @@ async def _get_aerodrome_via_openocean(
     amount: str
 ) -> Optional[Dict[str, Any]]:
     """Get Aerodrome price via OpenOcean aggregator."""
+    if not allow_request("openocean"):
+        return None
     try:
         url = "https://open-api.openocean.finance/v3/base/quote"
         params = {
@@ -401,26 +472,28 @@ async def _get_aerodrome_via_openocean(
             "gasPrice": "0.001"
         }
         
-        async with session.get(url, params=params, timeout=10) as resp:
-            if resp.status == 200:
-                data = await resp.json()
+        with track("openocean") as call:
+            async with session.get(url, params=params, timeout=10) as resp:
+                call.status = resp.status
+                if resp.status == 200:
+                    data = await resp.json()
                 
-                if data.get("code") == 200 and data.get("data"):
-                    out_amount = float(data["data"].get("outAmount", 0))
+                    if data.get("code") == 200 and data.get("data"):
+                        out_amount = float(data["data"].get("outAmount", 0))
                     
-                    if out_amount > 0:
-                        in_amount = float(data["data"].get("inAmount", 1))
-                        price = out_amount / in_amount if in_amount > 0 else 0
+                        if out_amount > 0:
+                            in_amount = float(data["data"].get("inAmount", 1))
+                            price = out_amount / in_amount if in_amount > 0 else 0
                         
-                        return {
-                            "dex": "aerodrome",
-                            "output": int(out_amount * (10 ** 6)),  # Convert to USDC decimals
-                            "price": price,
-                            "fee_decimal": 0.0004,  # Aerodrome default
-                            "is_stable": False,
-                            "price_impact": None,
-                            "liquidity": None,
-                        }
+                            return {
+                                "dex": "aerodrome",
+                                "output": int(out_amount * (10 ** 6)),  # Convert to USDC decimals
+                                "price": price,
+                                "fee_decimal": 0.0004,  # Aerodrome default
+                                "is_stable": False,
+                                "price_impact": None,
+                                "liquidity": None,
+                            }
     except Exception as e:
         logger.debug(f"[BASE] OpenOcean error: {e}")
     
@@ -434,6 +507,8 @@ async def _get_aerodrome_via_paraswap(
     amount: str
 ) -> Optional[Dict[str, Any]]:
     """Get Aerodrome price via ParaSwap aggregator."""
+    if not allow_request("paraswap"):
+        return None
     try:
         url = "https://apiv5.paraswap.io/prices"
         params = {
@@ -446,26 +521,28 @@ async def _get_aerodrome_via_paraswap(
             "excludeDEXS": ""  # Include all DEXs
         }
         
-        async with session.get(url, params=params, timeout=10) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                price_route = data.get("priceRoute", {})
+        with track("paraswap") as call:
+            async with session.get(url, params=params, timeout=10) as resp:
+                call.status = resp.status
+                if resp.status == 200:
+                    data = await resp.json()
+                    price_route = data.get("priceRoute", {})
                 
-                dest_amount = int(price_route.get("destAmount", 0))
-                if dest_amount > 0:
-                    decimals_out = 6 if token_out.lower() == USDC_BASE.lower() else 18
-                    amount_in = int(amount)
-                    price = (dest_amount / (10 ** decimals_out)) / (amount_in / (10 ** 18))
+                    dest_amount = int(price_route.get("destAmount", 0))
+                    if dest_amount > 0:
+                        decimals_out = 6 if token_out.lower() == USDC_BASE.lower() else 18
+                        amount_in = int(amount)
+                        price = (dest_amount / (10 ** decimals_out)) / (amount_in / (10 ** 18))
                     
-                    return {
-                        "dex": "aerodrome",
-                        "output": dest_amount,
-                        "price": price,
-                        "fee_decimal": 0.0004,
-                        "is_stable": False,
-                        "price_impact": None,
-                        "liquidity": None,
-                    }
+                        return {
+                            "dex": "aerodrome",
+                            "output": dest_amount,
+                            "price": price,
+                            "fee_decimal": 0.0004,
+                            "is_stable": False,
+                            "price_impact": None,
+                            "liquidity": None,
+                        }
     except Exception as e:
         logger.debug(f"[BASE] ParaSwap error: {e}")
     
@@ -545,6 +622,8 @@ async def _get_pancake_via_smart_router(
     amount: str
 ) -> Optional[Dict[str, Any]]:
     """Try PancakeSwap smart router API."""
+    if not allow_request("pancakeswap"):
+        return None
     try:
         # PancakeSwap uses a POST endpoint for quotes
         url = "https://routing-api.pancakeswap.com/v1/quote"
@@ -571,36 +650,38 @@ async def _get_pancake_via_smart_router(
             "Origin": "https://pancakeswap.finance"
         }
         
-        async with session.post(url, json=payload, headers=headers, timeout=10) as resp:
-            if resp.status == 200:
-                data = await resp.json()
+        with track("pancakeswap") as call:
+            async with session.post(url, json=payload, headers=headers, timeout=10) as resp:
+                call.status = resp.status
+                if resp.status == 200:
+                    data = await resp.json()
                 
-                quote = data.get("quote", {})
-                amount_out_str = quote.get("quoteGasAdjusted") or quote.get("quote") or "0"
+                    quote = data.get("quote", {})
+                    amount_out_str = quote.get("quoteGasAdjusted") or quote.get("quote") or "0"
                 
-                # Parse amount (may be decimal string)
-                if '.' in str(amount_out_str):
-                    # Decimal amount - need to convert to wei
-                    decimals_out = 6 if token_out.lower() == USDC_BASE.lower() else 18
-                    amount_out = int(float(amount_out_str) * (10 ** decimals_out))
-                else:
-                    amount_out = int(amount_out_str)
+                    # Parse amount (may be decimal string)
+                    if '.' in str(amount_out_str):
+                        # Decimal amount - need to convert to wei
+                        decimals_out = 6 if token_out.lower() == USDC_BASE.lower() else 18
+                        amount_out = int(float(amount_out_str) * (10 ** decimals_out))
+                    else:
+                        amount_out = int(amount_out_str)
                 
-                if amount_out > 0:
-                    amount_in = int(amount)
-                    decimals_out = 6 if token_out.lower() == USDC_BASE.lower() else 18
+                    if amount_out > 0:
+                        amount_in = int(amount)
+                        decimals_out = 6 if token_out.lower() == USDC_BASE.lower() else 18
                     
-                    price = (amount_out / (10 ** decimals_out)) / (amount_in / (10 ** 18))
+                        price = (amount_out / (10 ** decimals_out)) / (amount_in / (10 ** 18))
                     
-                    return {
-                        "dex": "pancakeswap",
-                        "output": amount_out,
-                        "price": price,
-                        "fee_tier": 2500,
-                        "fee_decimal": 0.0025,
-                        "price_impact": None,
-                        "liquidity": None,
-                    }
+                        return {
+                            "dex": "pancakeswap",
+                            "output": amount_out,
+                            "price": price,
+                            "fee_tier": 2500,
+                            "fee_decimal": 0.0025,
+                            "price_impact": None,
+                            "liquidity": None,
+                        }
     except Exception as e:
         logger.debug(f"[BASE] PancakeSwap smart router error: {e}")
     
@@ -614,6 +695,8 @@ async def _get_pancake_via_0x(
     amount: str
 ) -> Optional[Dict[str, Any]]:
     """Get PancakeSwap price via 0x API."""
+    if not allow_request("0x"):
+        return None
     try:
         url = "https://base.api.0x.org/swap/v1/quote"
         params = {
@@ -628,27 +711,29 @@ async def _get_pancake_via_0x(
             "Accept": "application/json"
         }
         
-        async with session.get(url, params=params, headers=headers, timeout=10) as resp:
-            if resp.status == 200:
-                data = await resp.json()
+        with track("0x") as call:
+            async with session.get(url, params=params, headers=headers, timeout=10) as resp:
+                call.status = resp.status
+                if resp.status == 200:
+                    data = await resp.json()
                 
-                buy_amount = int(data.get("buyAmount", 0))
+                    buy_amount = int(data.get("buyAmount", 0))
                 
-                if buy_amount > 0:
-                    amount_in = int(amount)
-                    decimals_out = 6 if token_out.lower() == USDC_BASE.lower() else 18
+                    if buy_amount > 0:
+                        amount_in = int(amount)
+                        decimals_out = 6 if token_out.lower() == USDC_BASE.lower() else 18
                     
-                    price = (buy_amount / (10 ** decimals_out)) / (amount_in / (10 ** 18))
+                        price = (buy_amount / (10 ** decimals_out)) / (amount_in / (10 ** 18))
                     
-                    return {
-                        "dex": "pancakeswap",
-                        "output": buy_amount,
-                        "price": price,
-                        "fee_tier": 2500,
-                        "fee_decimal": 0.0025,
-                        "price_impact": float(data.get("estimatedPriceImpact", 0)),
-                        "liquidity": None,
-                    }
+                        return {
+                            "dex": "pancakeswap",
+                            "output": buy_amount,
+                            "price": price,
+                            "fee_tier": 2500,
+                            "fee_decimal": 0.0025,
+                            "price_impact": float(data.get("estimatedPriceImpact", 0)),
+                            "liquidity": None,
+                        }
     except Exception as e:
         logger.debug(f"[BASE] 0x API error: {e}")
     
@@ -674,6 +759,8 @@ async def get_kyberswap_price(
     Already implemented in price_fetchers.py, this is a wrapper
     that returns the structured format.
     """
+    if not allow_request("kyberswap"):
+        return None
     try:
         url = f"https://aggregator-api.kyberswap.com/base/api/v1/routes"
         
@@ -683,34 +770,36 @@ async def get_kyberswap_price(
             "amountIn": amount,
         }
         
-        async with session.get(url, params=params, timeout=10) as resp:
-            if resp.status == 200:
-                data = await resp.json()
+        with track("kyberswap") as call:
+            async with session.get(url, params=params, timeout=10) as resp:
+                call.status = resp.status
+                if resp.status == 200:
+                    data = await resp.json()
                 
-                route_summary = data.get("data", {}).get("routeSummary", {})
-                amount_out = int(route_summary.get("amountOut", 0))
+                    route_summary = data.get("data", {}).get("routeSummary", {})
+                    amount_out = int(route_summary.get("amountOut", 0))
                 
-                # Gas and price info
-                gas_usd = float(route_summary.get("gasUsd", 0))
+                    # Gas and price info
+                    gas_usd = float(route_summary.get("gasUsd", 0))
                 
-                if amount_out > 0:
-                    amount_in = int(amount)
-                    decimals_out = 6 if token_out.lower() == USDC_BASE.lower() else 18
-                    decimals_in = 18
+                    if amount_out > 0:
+                        amount_in = int(amount)
+                        decimals_out = 6 if token_out.lower() == USDC_BASE.lower() else 18
+                        decimals_in = 18
                     
-                    price = (amount_out / (10 ** decimals_out)) / (amount_in / (10 ** decimals_in))
+                        price = (amount_out / (10 ** decimals_out)) / (amount_in / (10 ** decimals_in))
                     
-                    return {
-                        "dex": "kyberswap",
-                        "output": amount_out,
-                        "price": price,
-                        "fee_decimal": 0.001,  # 0.10%
-                        "price_impact": None,
-                        "liquidity": None,
-                        "gas_usd": gas_usd,
-                    }
-            else:
-                logger.debug(f"[BASE] KyberSwap API status: {resp.status}")
+                        return {
+                            "dex": "kyberswap",
+                            "output": amount_out,
+                            "price": price,
+                            "fee_decimal": 0.001,  # 0.10%
+                            "price_impact": None,
+                            "liquidity": None,
+                            "gas_usd": gas_usd,
+                        }
+                else:
+                    logger.debug(f"[BASE] KyberSwap API status: {resp.status}")
                 
     except asyncio.TimeoutError:
         logger.debug("[BASE] KyberSwap timeout")
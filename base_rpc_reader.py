@@ -0,0 +1,413 @@
+# base_rpc_reader.py
+"""
+Lecture directe de l'état des pools Base via Multicall3 (eth_call).
+
+Le chemin Base dépend des subgraphs et d'APIs tierces (lentes, limitées,
+souvent indisponibles). Pour les pools déjà découvertes (pool_id connus),
+ce module lit l'état on-chain en un seul aller-retour par bloc:
+- V3 (Uniswap V3, PancakeSwap V3): slot0() (sqrtPriceX96) et liquidity(),
+  plus balanceOf(pool) des deux tokens pour la liquidité en USD
+- V2 / Aerodrome: getReserves()
+
+Tous les appels passent par Multicall3.aggregate3 (allowFailure: une pool
+en erreur n'invalide pas le lot), avec getBlockNumber() en tête de chaque
+lot pour dater l'état. Au-delà de MAX_CALLS_PER_MULTICALL appels, les lots
+partent dans une seule requête JSON-RPC batch.
+
+Les métadonnées immuables (token0, token1, fee, decimals) sont lues une
+seule fois puis gardées en cache: en régime établi, une requête par cycle.
+
+Les enregistrements produits reprennent les pools de fetch_base_pools
+(token, pool_id, dex, buy_price, sell_price, fee_pct, liquidity_usd, url,
+chain) avec l'état on-chain, plus block et source="rpc".
+"""
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import aiohttp
+
+from circuit_breaker import allow_request, track
+from config import BASE_RPC_URL
+from rate_limiter import acquire as acquire_rate_limit, observe as observe_rate_limit
+from utils import logger
+
+# ============================================================================
+# CONTRATS ET SÉLECTEURS
+# ============================================================================
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+SEL_AGGREGATE3 = bytes.fromhex("82ad56cb")       # aggregate3((address,bool,bytes)[])
+SEL_GET_BLOCK_NUMBER = bytes.fromhex("42cbb15c")  # getBlockNumber()
+SEL_SLOT0 = bytes.fromhex("3850c7bd")             # slot0()
+SEL_LIQUIDITY = bytes.fromhex("1a686502")         # liquidity()
+SEL_GET_RESERVES = bytes.fromhex("0902f1ac")      # getReserves()
+SEL_TOKEN0 = bytes.fromhex("0dfe1681")            # token0()
+SEL_TOKEN1 = bytes.fromhex("d21220a7")            # token1()
+SEL_FEE = bytes.fromhex("ddca3f43")               # fee()
+SEL_DECIMALS = bytes.fromhex("313ce567")          # decimals()
+SEL_BALANCE_OF = bytes.fromhex("70a08231")        # balanceOf(address)
+
+MAX_CALLS_PER_MULTICALL = 500
+RPC_TIMEOUT_SECONDS = 10
+RPC_BREAKER = "base_rpc"
+
+# Modèle de pool par DEX (noms de pool_fetchers / data/static_pools.json)
+V3_DEXES = ("uniswap_v3", "pancake_v3", "uniswap", "pancakeswap")
+V2_DEXES = ("aerodrome", "uniswap_v2", "sushiswap", "baseswap")
+
+# Prix USD connus sans source externe (stablecoins Base, minuscules)
+DEFAULT_USD_PRICES: Dict[str, float] = {
+    "0x833589fcd6edb6e08f4c7c32d4f71b54bda02913": 1.0,  # USDC
+    "0xd9aaec86b65d86f6a7b5b1b0c42ffa531710b6ca": 1.0,  # USDbC
+    "0xfde4c96c8593536e31f229ea8f37b2ada2699bb2": 1.0,  # USDT
+}
+
+Q96 = float(2 ** 96)
+
+
+# ============================================================================
+# ABI
+# ============================================================================
+
+def _word(value: int) -> bytes:
+    return value.to_bytes(32, "big")
+
+
+def _address_word(address: str) -> bytes:
+    return bytes(12) + bytes.fromhex(address[2:] if address.startswith("0x") else address)
+
+
+def _uint(data: bytes, index: int = 0) -> int:
+    return int.from_bytes(data[32 * index:32 * index + 32], "big")
+
+
+def _address(data: bytes, index: int = 0) -> str:
+    return "0x" + data[32 * index + 12:32 * index + 32].hex()
+
+
+def encode_aggregate3(calls: Sequence[Tuple[str, bytes]]) -> bytes:
+    """aggregate3(Call3[]) avec allowFailure=true pour chaque (cible, calldata)."""
+    tuples = []
+    for target, calldata in calls:
+        padded = calldata + bytes(-len(calldata) % 32)
+        tuples.append(_address_word(target) + _word(1) + _word(0x60) + _word(len(calldata)) + padded)
+    offsets = []
+    offset = 32 * len(tuples)
+    for encoded in tuples:
+        offsets.append(_word(offset))
+        offset += len(encoded)
+    return SEL_AGGREGATE3 + _word(0x20) + _word(len(tuples)) + b"".join(offsets) + b"".join(tuples)
+
+
+def decode_aggregate3(data: bytes) -> List[Optional[bytes]]:
+    """Result[] d'aggregate3 -> returnData par appel (None si l'appel a échoué)."""
+    array = _uint(data)
+    count = int.from_bytes(data[array:array + 32], "big")
+    base = array + 32
+    results: List[Optional[bytes]] = []
+    for i in range(count):
+        start = base + int.from_bytes(data[base + 32 * i:base + 32 * i + 32], "big")
+        success = int.from_bytes(data[start:start + 32], "big") != 0
+        payload = start + int.from_bytes(data[start + 32:start + 64], "big")
+        length = int.from_bytes(data[payload:payload + 32], "big")
+        results.append(data[payload + 32:payload + 32 + length] if success else None)
+    return results
+
+
+# ============================================================================
+# RPC
+# ============================================================================
+_pool_meta: Dict[str, Dict[str, Any]] = {}   # pool -> {token0, token1, fee}
+_token_decimals: Dict[str, int] = {}
+_rpc_stats: Dict[str, Any] = {
+    "requests": 0,
+    "eth_calls": 0,
+    "calls": 0,
+    "failed_calls": 0,
+    "decoded": 0,
+    "undecoded": 0,
+    "last_block": 0,
+    "last_read_ms": 0.0,
+}
+
+
+def get_base_rpc_reader_stats() -> Dict[str, Any]:
+    """Stats: requests (POST), eth_calls, calls (sous-appels), failed_calls, decoded, last_block..."""
+    return dict(_rpc_stats)
+
+
+async def _post_batch(
+    session: aiohttp.ClientSession,
+    rpc_url: str,
+    requests: List[Dict[str, Any]]
+) -> Dict[int, Any]:
+    """Une requête HTTP JSON-RPC batch: {id: result} (réponses en erreur omises)."""
+    if not allow_request(RPC_BREAKER):
+        return {}
+    await acquire_rate_limit(rpc_url)
+    with track(RPC_BREAKER) as call:
+        async with session.post(
+            rpc_url,
+            json=requests if len(requests) > 1 else requests[0],
+            timeout=aiohttp.ClientTimeout(total=RPC_TIMEOUT_SECONDS),
+        ) as resp:
+            call.status = resp.status
+            observe_rate_limit(rpc_url, resp.status, resp.headers)
+            if resp.status != 200:
+                logger.warning(f"[BASE RPC] status {resp.status}")
+                return {}
+            body = await resp.json()
+    _rpc_stats["requests"] += 1
+    _rpc_stats["eth_calls"] += len(requests)
+
+    results = {}
+    for item in body if isinstance(body, list) else [body]:
+        if "error" in item:
+            logger.warning(f"[BASE RPC] eth_call error: {item['error']}")
+            continue
+        results[item.get("id")] = item.get("result")
+    return results
+
+
+async def multicall(
+    session: aiohttp.ClientSession,
+    calls: Sequence[Tuple[str, bytes]],
+    rpc_url: Optional[str] = None
+) -> Tuple[int, List[Optional[bytes]]]:
+    """
+    Exécute des appels (cible, calldata) via Multicall3 en une requête HTTP.
+
+    Returns:
+        (bloc le plus ancien des lots, returnData par appel dans l'ordre;
+        None pour un appel en échec ou un lot sans réponse)
+    """
+    rpc_url = rpc_url or BASE_RPC_URL
+    if not calls:
+        return 0, []
+    chunk_size = MAX_CALLS_PER_MULTICALL - 1  # getBlockNumber() en tête de lot
+    chunks = [list(calls[i:i + chunk_size]) for i in range(0, len(calls), chunk_size)]
+    requests = [
+        {
+            "jsonrpc": "2.0",
+            "id": i,
+            "method": "eth_call",
+            "params": [
+                {"to": MULTICALL3_ADDRESS, "data": "0x" + encode_aggregate3([(MULTICALL3_ADDRESS, SEL_GET_BLOCK_NUMBER)] + chunk).hex()},
+                "latest",
+            ],
+        }
+        for i, chunk in enumerate(chunks)
+    ]
+    responses = await _post_batch(session, rpc_url, requests)
+
+    results: List[Optional[bytes]] = []
+    blocks = []
+    for i, chunk in enumerate(chunks):
+        raw = responses.get(i)
+        decoded = decode_aggregate3(bytes.fromhex(raw[2:])) if raw else []
+        if len(decoded) != len(chunk) + 1:
+            results.extend([None] * len(chunk))
+            continue
+        if decoded[0]:
+            blocks.append(_uint(decoded[0]))
+        results.extend(decoded[1:])
+    _rpc_stats["calls"] += len(calls)
+    _rpc_stats["failed_calls"] += sum(1 for r in results if r is None)
+    return (min(blocks) if blocks else 0), results
+
+
+# ============================================================================
+# LECTURE DES POOLS
+# ============================================================================
+
+def pool_model(dex: Optional[str]) -> Optional[str]:
+    """"v3", "v2" ou None (DEX non lisible on-chain)."""
+    if dex in V3_DEXES:
+        return "v3"
+    if dex in V2_DEXES:
+        return "v2"
+    return None
+
+
+async def _load_metadata(session: aiohttp.ClientSession, pools: List[Dict[str, Any]], rpc_url: Optional[str]):
+    """token0/token1/fee des pools puis decimals des tokens, hors cache."""
+    missing = [p for p in pools if p["pool_id"].lower() not in _pool_meta]
+    if missing:
+        calls = []
+        for pool in missing:
+            calls += [(pool["pool_id"], SEL_TOKEN0), (pool["pool_id"], SEL_TOKEN1)]
+            if pool_model(pool.get("dex")) == "v3":
+                calls.append((pool["pool_id"], SEL_FEE))
+        _, results = await multicall(session, calls, rpc_url)
+        cursor = 0
+        for pool in missing:
+            is_v3 = pool_model(pool.get("dex")) == "v3"
+            token0, token1 = results[cursor], results[cursor + 1]
+            fee = results[cursor + 2] if is_v3 else None
+            cursor += 3 if is_v3 else 2
+            if not token0 or not token1 or (is_v3 and not fee):
+                continue
+            _pool_meta[pool["pool_id"].lower()] = {
+                "token0": _address(token0),
+                "token1": _address(token1),
+                "fee": _uint(fee) / 1_000_000 if fee else None,  # V3: millionièmes
+            }
+
+    tokens = {
+        meta[side]
+        for pool in pools
+        for meta in [_pool_meta.get(pool["pool_id"].lower())]
+        if meta
+        for side in ("token0", "token1")
+        if meta[side] not in _token_decimals
+    }
+    if tokens:
+        tokens = sorted(tokens)
+        _, results = await multicall(session, [(token, SEL_DECIMALS) for token in tokens], rpc_url)
+        for token, result in zip(tokens, results):
+            if result:
+                _token_decimals[token] = _uint(result)
+
+
+def _state_calls(pool: Dict[str, Any], meta: Dict[str, Any]) -> List[Tuple[str, bytes]]:
+    pool_id = pool["pool_id"]
+    if pool_model(pool.get("dex")) == "v3":
+        owner = _address_word(pool_id)
+        return [
+            (pool_id, SEL_SLOT0),
+            (pool_id, SEL_LIQUIDITY),
+            (meta["token0"], SEL_BALANCE_OF + owner),
+            (meta["token1"], SEL_BALANCE_OF + owner),
+        ]
+    return [(pool_id, SEL_GET_RESERVES)]
+
+
+def _liquidity_usd(
+    meta: Dict[str, Any],
+    price: float,
+    amount0: float,
+    amount1: float,
+    usd_prices: Dict[str, float]
+) -> Optional[float]:
+    usd0 = usd_prices.get(meta["token0"])
+    usd1 = usd_prices.get(meta["token1"])
+    if usd0 is None and usd1 is None:
+        return None
+    if usd0 is None:
+        usd0 = price * usd1
+    elif usd1 is None:
+        usd1 = usd0 / price if price else 0.0
+    return amount0 * usd0 + amount1 * usd1
+
+
+def build_record(
+    pool: Dict[str, Any],
+    meta: Dict[str, Any],
+    results: List[Optional[bytes]],
+    block: int,
+    usd_prices: Dict[str, float]
+) -> Optional[Dict[str, Any]]:
+    """Pool fetch_base_pools + returnData de ses appels -> pool à l'état on-chain."""
+    dec0 = _token_decimals.get(meta["token0"])
+    dec1 = _token_decimals.get(meta["token1"])
+    if dec0 is None or dec1 is None or any(r is None for r in results):
+        return None
+
+    is_v3 = pool_model(pool.get("dex")) == "v3"
+    if is_v3:
+        sqrt_price_x96 = _uint(results[0])
+        amount0 = _uint(results[2]) / 10 ** dec0
+        amount1 = _uint(results[3]) / 10 ** dec1
+        price = (sqrt_price_x96 / Q96) ** 2 * 10 ** (dec0 - dec1)  # token1 par token0
+    else:
+        amount0 = _uint(results[0], 0) / 10 ** dec0
+        amount1 = _uint(results[0], 1) / 10 ** dec1
+        price = amount1 / amount0 if amount0 else 0.0
+    if not price or price <= 0:
+        return None
+
+    # Même orientation que le fetcher REST du DEX (normalize_pools pour les
+    # V3, fetch_aerodrome_for_token pour les V2)
+    token = pool.get("token", "").lower()
+    if token not in (meta["token0"], meta["token1"]):
+        return None
+    is_token0 = token == meta["token0"]
+    if is_v3:
+        buy_price = 1 / price if is_token0 else price
+    else:
+        buy_price = price if is_token0 else 1 / price
+
+    record = {
+        **pool,
+        "buy_price": buy_price,
+        "sell_price": 1 / buy_price,
+        "block": block,
+        "source": "rpc",
+    }
+    if is_v3:
+        record["fee_pct"] = meta["fee"]
+        record["liquidity"] = _uint(results[1])
+    liquidity = _liquidity_usd(meta, price, amount0, amount1, usd_prices)
+    if liquidity is not None:
+        record["liquidity_usd"] = liquidity
+    return record
+
+
+async def read_base_pools(
+    session: aiohttp.ClientSession,
+    pools: Iterable[Dict[str, Any]],
+    usd_prices: Optional[Dict[str, float]] = None,
+    rpc_url: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Relit on-chain l'état des pools Base données (format fetch_base_pools).
+
+    Args:
+        pools: Pools de fetch_base_pools; seules celles d'un DEX V3/V2
+            connu (V3_DEXES, V2_DEXES) sont lues
+        usd_prices: Prix USD par adresse (minuscules) pour liquidity_usd
+
+    Returns:
+        Pools à l'état on-chain, dans l'ordre d'entrée. Les pools non
+        lisibles sont omises; liquidity_usd d'entrée est conservée si
+        l'état ne peut pas être valorisé en USD.
+    """
+    started = time.perf_counter()
+    readable = [p for p in pools if p.get("pool_id") and pool_model(p.get("dex"))]
+    if not readable:
+        return []
+    prices = {**DEFAULT_USD_PRICES, **{k.lower(): v for k, v in (usd_prices or {}).items()}}
+
+    await _load_metadata(session, readable, rpc_url)
+
+    # Un seul multicall pour l'état de toutes les pools
+    calls: List[Tuple[str, bytes]] = []
+    spans = []
+    for pool in readable:
+        meta = _pool_meta.get(pool["pool_id"].lower())
+        if meta is None:
+            spans.append(None)
+            continue
+        pool_calls = _state_calls(pool, meta)
+        spans.append((meta, len(calls), len(pool_calls)))
+        calls += pool_calls
+    block, results = await multicall(session, calls, rpc_url)
+
+    records = []
+    for pool, span in zip(readable, spans):
+        record = None
+        if span is not None:
+            meta, start, count = span
+            record = build_record(pool, meta, results[start:start + count], block, prices)
+        if record is None:
+            _rpc_stats["undecoded"] += 1
+            continue
+        records.append(record)
+    _rpc_stats["decoded"] += len(records)
+    _rpc_stats["last_block"] = block
+    _rpc_stats["last_read_ms"] = (time.perf_counter() - started) * 1000
+    logger.debug(
+        f"[BASE RPC] {len(records)}/{len(readable)} pools read at block {block} "
+        f"in {_rpc_stats['last_read_ms']:.0f} ms"
+    )
+    return records
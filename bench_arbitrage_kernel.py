@@ -0,0 +1,104 @@
+# bench_arbitrage_kernel.py
+"""
+Benchmark: évaluation des opportunités d'un cycle, token par token
+(evaluate_pools_for_token) vs kernel NumPy sur tous les tokens
+(arbitrage_kernel.find_batch_opportunities).
+
+Pools synthétiques (2 à 10 par token, DEX et liquidités variés, spreads de
+0.1% à 8%), déjà filtrées par liquidité comme dans
+find_best_arbitrage_opportunities. Les deux chemins doivent retenir les
+mêmes tokens.
+
+Mesure, pour chaque taille de lot: durée du chemin scalaire, durée du
+kernel seul (PoolBatch déjà construit), durée kernel + construction du
+lot + dicts des tokens retenus, débit en tokens/s.
+
+Usage:
+    SAVE_LOGS=false LOG_LEVEL=ERROR python bench_arbitrage_kernel.py [tailles...]
+    (défaut: 100 1000 10000)
+"""
+import random
+import sys
+import time
+
+from arbitrage import evaluate_pools_for_token
+from arbitrage_kernel import PoolBatch, evaluate_pool_batch, find_batch_opportunities
+from pool_prices import filter_pools_by_liquidity
+
+DEXES = ("raydium", "orca", "meteora", "lifinity", "phoenix")
+
+
+def build_token_pools(n_tokens: int, seed: int = 3):
+    rng = random.Random(seed)
+    token_pools = {}
+    for t in range(n_tokens):
+        mid = 10 ** rng.uniform(-6, 3)
+        spread = rng.choice([0.001, 0.005, 0.02, 0.08])
+        pools = []
+        for i in range(rng.randint(2, 10)):
+            buy = mid * (1 + rng.uniform(-spread, spread))
+            fee_bps = rng.choice([1, 4, 25, 30, 100])
+            pools.append({
+                "pool_id": f"T{t}-{i}",
+                "dex": rng.choice(DEXES),
+                "buy_price": buy,
+                "sell_price": buy * (1 + rng.uniform(-spread / 4, spread / 4)),
+                "liquidity_usd": 10 ** rng.uniform(3.5, 6.5),
+                "fee_bps": fee_bps,
+                "fee_pct": fee_bps / 10000.0,
+                "url": f"https://example/{t}/{i}",
+            })
+        token_pools[f"TOKEN{t:05d}"] = filter_pools_by_liquidity(pools, min_liquidity_usd=10000)
+    return token_pools
+
+
+def _scalar(token_pools):
+    results = []
+    for token, pools in token_pools.items():
+        opp = evaluate_pools_for_token(token, pools)
+        if opp:
+            results.append(opp)
+    return results
+
+
+def _best_ms(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def run_benchmark(sizes=(100, 1000, 10000)) -> list:
+    rows = []
+    print(f"{'tokens':>7} {'pools':>7} {'found':>6} {'scalar ms':>10} {'kernel ms':>10} "
+          f"{'batch ms':>9} {'scalar tok/s':>13} {'batch tok/s':>12} {'speedup':>8}")
+    for n_tokens in sizes:
+        token_pools = build_token_pools(n_tokens)
+        expected = _scalar(token_pools)
+        got = find_batch_opportunities(token_pools)
+        assert [o["token"] for o in got] == [o["token"] for o in expected]
+
+        batch = PoolBatch(token_pools)
+        row = {
+            "tokens": n_tokens,
+            "pools": len(batch),
+            "found": len(got),
+            "scalar_ms": _best_ms(lambda: _scalar(token_pools)),
+            "kernel_ms": _best_ms(lambda: evaluate_pool_batch(batch, 50_000, 1000)),
+            "batch_ms": _best_ms(lambda: find_batch_opportunities(token_pools)),
+        }
+        rows.append(row)
+        print(
+            f"{n_tokens:>7} {row['pools']:>7} {row['found']:>6} {row['scalar_ms']:>10.1f} "
+            f"{row['kernel_ms']:>10.2f} {row['batch_ms']:>9.1f} "
+            f"{n_tokens / row['scalar_ms'] * 1000:>13.0f} {n_tokens / row['batch_ms'] * 1000:>12.0f} "
+            f"{row['scalar_ms'] / row['batch_ms']:>7.1f}x"
+        )
+    return rows
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]
+    run_benchmark(sizes)
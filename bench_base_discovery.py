@@ -0,0 +1,157 @@
+# bench_base_discovery.py
+"""
+Benchmark: découverte des pools Base, tokens en série vs en parallèle.
+
+Un serveur local imite les trois niveaux de la cascade de fetch_base_pools
+avec une latence injectée:
+- subgraphs (POST /subgraph): aucune pool, pour forcer le niveau 2
+- Kyber (GET /kyber?token0=|token1=): une pool par token, latence L
+- Aerodrome (GET /aerodrome): liste complète, latence 1.5 x L, téléchargée
+  une fois par cycle (aerodrome_universe)
+
+Deux passes sur les mêmes tokens:
+- "sequential": BASE_DISCOVERY_CONCURRENCY = 1 (équivalent de l'ancienne boucle)
+- "concurrent": BASE_DISCOVERY_CONCURRENCY et BASE_PROVIDER_CONCURRENCY par défaut
+
+Mesure: durée, pools trouvées (identiques dans les deux passes), appels
+reçus et pic d'appels simultanés vus par le serveur, par fournisseur.
+
+Usage:
+    SAVE_LOGS=false python bench_base_discovery.py [tokens] [latency_ms]
+"""
+import asyncio
+import sys
+import time
+
+from aiohttp import web
+
+import aerodrome_universe
+import http_transport
+import pool_fetchers
+import rate_limiter
+import thegraph_fetcher
+from http_transport import create_session
+
+USDC = pool_fetchers.BASE_USDC
+
+
+def make_app(tokens, latency: float) -> web.Application:
+    in_flight = {"kyber": 0, "aerodrome": 0}
+    peaks = {"kyber": 0, "aerodrome": 0}
+    calls = {"kyber": 0, "aerodrome": 0}
+
+    def _enter(provider):
+        calls[provider] += 1
+        in_flight[provider] += 1
+        peaks[provider] = max(peaks[provider], in_flight[provider])
+
+    async def subgraph(request):
+        body = await request.json()
+        await asyncio.sleep(latency)
+        aliases = [name for name in body["variables"] if name != "quote"]
+        return web.json_response({"data": {alias: [] for alias in aliases}})
+
+    async def kyber(request):
+        _enter("kyber")
+        try:
+            await asyncio.sleep(latency)
+            token = request.query.get("token0") or request.query.get("token1")
+            pool = {
+                "address": f"0xkyber{token[-8:]}",
+                "token0": {"address": token, "decimals": 18},
+                "token1": {"address": USDC, "decimals": 6},
+                "sqrtPriceX96": str(2 ** 96 * 1e-6),
+                "feeTier": 300,
+                "tvlUsd": 50_000,
+            }
+            return web.json_response({"data": {"pools": [pool]}})
+        finally:
+            in_flight["kyber"] -= 1
+
+    async def aerodrome(request):
+        _enter("aerodrome")
+        try:
+            await asyncio.sleep(latency * 1.5)
+            pools = [{
+                "address": f"0xaero{token[-8:]}",
+                "token0": {"address": token},
+                "token1": {"address": USDC},
+                "reserve0": 1_000.0,
+                "reserve1": 2_000.0,
+                "fee": 0.003,
+                "tvlUsd": 80_000,
+            } for token in tokens]
+            return web.json_response({"data": pools})
+        finally:
+            in_flight["aerodrome"] -= 1
+
+    app = web.Application()
+    app.router.add_post("/subgraph", subgraph)
+    app.router.add_get("/kyber", kyber)
+    app.router.add_get("/aerodrome", aerodrome)
+    app["peaks"] = peaks
+    app["calls"] = calls
+    return app
+
+
+async def _run_pass(tokens, concurrency: int) -> tuple:
+    pool_fetchers.BASE_DISCOVERY_CONCURRENCY = concurrency
+    rate_limiter._buckets.clear()
+    aerodrome_universe.clear_aerodrome_universe()
+    async with create_session() as session:
+        started = time.perf_counter()
+        pools = await pool_fetchers._fetch_base_pools_uncached(tokens, session)
+        return time.perf_counter() - started, pools
+
+
+async def run_benchmark(n_tokens: int = 20, latency_ms: int = 200) -> dict:
+    tokens = [f"0x{i:040x}" for i in range(1, n_tokens + 1)]
+    latency = latency_ms / 1000
+    default_concurrency = pool_fetchers.BASE_DISCOVERY_CONCURRENCY
+
+    # Serveur local: ni plafond de connexions ni rate limit de l'hôte réel
+    http_transport.HOST_POOL_LIMITS["127.0.0.1"] = {"limit": 32, "warm": False}
+    rate_limiter.HOST_RATE_LIMITS["127.0.0.1"] = {"rate": 1000.0, "burst": 1000, "max_rate": 1000.0}
+
+    results = {}
+    for name, concurrency in (("sequential", 1), ("concurrent", default_concurrency)):
+        app = make_app(tokens, latency)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        base_url = f"http://127.0.0.1:{port}"
+
+        pool_fetchers.KYBERSWAP_BASE_API = f"{base_url}/kyber?token0={{token}}"
+        aerodrome_universe.AERODROME_POOLS_API = f"{base_url}/aerodrome"
+        for dex in ("uniswap_v3", "pancake_v3"):
+            thegraph_fetcher.SUBGRAPHS["base"][dex] = f"{base_url}/subgraph"
+
+        elapsed, pools = await _run_pass(tokens, concurrency)
+        results[name] = {
+            "seconds": elapsed,
+            "pools": sorted((p["token"], p["pool_id"]) for p in pools),
+            "peaks": dict(app["peaks"]),
+            "calls": dict(app["calls"]),
+            "concurrency": concurrency,
+        }
+        await runner.cleanup()
+
+    pool_fetchers.BASE_DISCOVERY_CONCURRENCY = default_concurrency
+    same = results["sequential"]["pools"] == results["concurrent"]["pools"]
+    print(f"{n_tokens} Base tokens, {latency_ms} ms injected latency, provider caps {pool_fetchers.BASE_PROVIDER_CONCURRENCY}")
+    for name, r in results.items():
+        print(
+            f"  {name:<10} concurrency {r['concurrency']:>2}  {r['seconds']:>6.2f}s  "
+            f"{len(r['pools']):>3} pools  calls {r['calls']}  peak in-flight {r['peaks']}"
+        )
+    speedup = results["sequential"]["seconds"] / results["concurrent"]["seconds"]
+    print(f"  speedup x{speedup:.1f}, identical pools: {same}")
+    return results
+
+
+if __name__ == "__main__":
+    n_tokens = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latency_ms = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(run_benchmark(n_tokens, latency_ms))
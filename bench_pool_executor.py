@@ -0,0 +1,142 @@
+# bench_pool_executor.py
+"""
+Benchmark: lag de la boucle asyncio pendant un fetch Raydium volumineux,
+normalisation inline vs process pool (POOL_EXECUTOR_MODE).
+
+Un serveur aiohttp local (thread dédié) sert un dump Raydium synthétique. Pendant le fetch,
+une tâche "ticker" dort 5 ms en boucle et mesure son retard de réveil: c'est
+le temps pendant lequel Telegram, les fetchs Base ou les timers seraient
+bloqués.
+
+Usage:
+    SAVE_LOGS=false python bench_pool_executor.py [nb_pools] [ratio_surveillées]
+"""
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+
+import aiohttp
+from aiohttp import web
+
+import pool_fetchers
+from pool_workers import set_pool_executor_mode, warm_pool_executor, shutdown_pool_executor
+
+TICK_SECONDS = 0.005
+PORT = 8791
+_B58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def _random_mint(rng: random.Random) -> str:
+    return "".join(rng.choice(_B58) for _ in range(44))
+
+
+def build_raydium_fixture(n_pools: int, watched_ratio: float, seed: int = 7) -> bytes:
+    """Dump {"data": [...]} dont une fraction `watched_ratio` de pools SOL/USDC."""
+    rng = random.Random(seed)
+    pools = []
+    for i in range(n_pools):
+        if rng.random() < watched_ratio:
+            mint_a, mint_b = pool_fetchers.SOL_MINT, pool_fetchers.USDC_MINT
+        else:
+            mint_a, mint_b = _random_mint(rng), _random_mint(rng)
+        pools.append({
+            "id": f"pool{i:08d}",
+            "mintA": mint_a,
+            "mintB": mint_b,
+            "price": round(rng.uniform(0.1, 200), 6),
+            "tvl": round(rng.uniform(1e3, 1e7), 2),
+            "feeRate": rng.choice([0.0001, 0.0025, 0.01]),
+            "volume24h": round(rng.uniform(0, 1e6), 2),
+            "lpMint": _random_mint(rng),
+            "rewardInfos": [{"mint": _random_mint(rng), "perSecond": "0"}],
+        })
+    return json.dumps({"success": True, "data": pools}).encode()
+
+
+async def _ticker(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(max(0.0, time.perf_counter() - started - TICK_SECONDS) * 1000)
+
+
+async def _measure(session: aiohttp.ClientSession, mode: str) -> dict:
+    set_pool_executor_mode(mode)
+    pool_fetchers._http_validators.clear()  # forcer un parsing complet
+    lags: list = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    started = time.perf_counter()
+    pools = await pool_fetchers.fetch_raydium_pools(session)
+    elapsed = (time.perf_counter() - started) * 1000
+    stop.set()
+    await ticker
+    lags.sort()
+    return {
+        "mode": mode,
+        "pools": len(pools),
+        "fetch_ms": elapsed,
+        "max_lag_ms": lags[-1] if lags else 0.0,
+        "p99_lag_ms": lags[int(len(lags) * 0.99)] if lags else 0.0,
+        "ticks": len(lags),
+    }
+
+
+async def run_benchmark(n_pools: int = 200_000, watched_ratio: float = 0.2):
+    body = build_raydium_fixture(n_pools, watched_ratio)
+    print(f"Fixture: {n_pools} pools, {len(body) / 1e6:.1f} MB, {watched_ratio:.0%} SOL/USDC")
+
+    # Serveur dans son propre thread/boucle: l'envoi des 74 Mo ne doit pas
+    # compter dans le lag mesuré sur la boucle du bot
+    server_loop = asyncio.new_event_loop()
+    server_ready = threading.Event()
+    runner_box = {}
+
+    def serve():
+        asyncio.set_event_loop(server_loop)
+
+        async def handler(request):
+            return web.Response(body=body, content_type="application/json")
+
+        async def start():
+            app = web.Application()
+            app.router.add_get("/pools", handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            await web.TCPSite(runner, "127.0.0.1", PORT).start()
+            runner_box["runner"] = runner
+
+        server_loop.run_until_complete(start())
+        server_ready.set()
+        server_loop.run_forever()
+
+    server_thread = threading.Thread(target=serve, daemon=True)
+    server_thread.start()
+    server_ready.wait()
+    pool_fetchers.RAYDIUM_POOLS_API = f"http://127.0.0.1:{PORT}/pools"
+
+    # Démarrer les workers avant la mesure (coût de fork hors benchmark)
+    await warm_pool_executor()
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            results = [await _measure(session, mode) for mode in ("inline", "process")]
+    finally:
+        asyncio.run_coroutine_threadsafe(runner_box["runner"].cleanup(), server_loop).result()
+        server_loop.call_soon_threadsafe(server_loop.stop)
+        server_thread.join()
+        shutdown_pool_executor()
+
+    print(f"{'mode':<8} {'pools':>7} {'fetch ms':>9} {'max lag ms':>11} {'p99 lag ms':>11} {'ticks':>6}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['pools']:>7} {r['fetch_ms']:>9.0f} {r['max_lag_ms']:>11.1f} {r['p99_lag_ms']:>11.1f} {r['ticks']:>6}")
+    return results
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    ratio = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    asyncio.run(run_benchmark(n, ratio))
@@ -0,0 +1,157 @@
+# bench_pool_table.py
+"""
+Benchmark: PoolTable (colonnes NumPy + vues PoolRow) vs listes de dicts.
+
+Mesure, sur un snapshot synthétique de pools SOL/token:
+- la mémoire retenue par le snapshot (tracemalloc) en dicts parsés vs en PoolTable
+- le débit d'un cycle fetch_solana_pools: recherche par paire +
+  normalize_price_for_token + enrichissement token/chain, pour tous les tokens
+
+Le chemin "dicts" reproduit l'ancien comportement (copie de dict à chaque
+étape) avec les mêmes fonctions de pool_prices.
+
+Usage:
+    SAVE_LOGS=false python bench_pool_table.py [pools_par_dex] [nb_tokens]
+"""
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from pool_fetchers import SOL_MINT, build_pool_index
+from pool_prices import normalize_price_for_token
+from pool_table import PoolTable
+
+DEXES = ("raydium", "orca", "meteora", "lifinity", "phoenix")
+_B58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def build_snapshot(pools_per_dex: int, n_tokens: int, seed: int = 5):
+    rng = random.Random(seed)
+    tokens = ["".join(rng.choice(_B58) for _ in range(44)) for _ in range(n_tokens)]
+    snapshot = {}
+    for dex in DEXES:
+        pools = []
+        for _ in range(pools_per_dex):
+            token = rng.choice(tokens)
+            a, b = (token, SOL_MINT) if rng.random() < 0.5 else (SOL_MINT, token)
+            fee_bps = rng.choice([4, 25, 30])
+            pools.append({
+                "pool_id": "".join(rng.choice(_B58) for _ in range(44)),
+                "dex": dex,
+                "token_a": a,
+                "token_b": b,
+                "price": rng.uniform(1e-4, 100),
+                "liquidity_usd": rng.uniform(1e3, 1e6),
+                "fee_bps": fee_bps,
+                "fee_pct": fee_bps / 10000.0,
+                "pool_type": "CLMM",
+            })
+        snapshot[dex] = pools
+    return snapshot, tokens
+
+
+def _cycle_dicts(index, tokens):
+    """Ancien chemin: dict normalisé copié, puis dict enrichi copié."""
+    results = []
+    for token in tokens:
+        for pool in index.get((token, SOL_MINT), []):
+            normalized = normalize_price_for_token(pool, token, SOL_MINT)
+            if normalized:
+                enriched = dict(normalized)
+                enriched["token"] = token
+                enriched["chain"] = "solana"
+                results.append(enriched)
+    return results
+
+
+def _cycle_table(index, tokens):
+    """Nouveau chemin: une vue PoolRow par pool (surcharge buy/sell/url/token), aucune copie de ligne."""
+    results = []
+    for token in tokens:
+        extra_fields = {"token": token, "chain": "solana"}
+        for pool in index.get((token, SOL_MINT), []):
+            normalized = normalize_price_for_token(pool, token, SOL_MINT, extra_fields)
+            if normalized:
+                results.append(normalized)
+    return results
+
+
+def _traced(fn):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def _best_ms(fn, repeat: int = 5, setup=None) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def run_benchmark(pools_per_dex: int = 4000, n_tokens: int = 300) -> dict:
+    source, tokens = build_snapshot(pools_per_dex, n_tokens)
+    total = pools_per_dex * len(DEXES)
+
+    # Comme dans les fetchers, les pools viennent d'un JSON parsé: chaque dict
+    # possède ses propres chaînes (mints, pool_id) et floats
+    dumps = {dex: json.dumps(pools) for dex, pools in source.items()}
+    dict_snapshot, dict_bytes = _traced(lambda: {dex: json.loads(raw) for dex, raw in dumps.items()})
+    # Seule la table est retenue dans le snapshot: les dicts parsés sont libérés
+    table_snapshot, table_bytes = _traced(
+        lambda: {dex: PoolTable.from_dicts(json.loads(raw)) for dex, raw in dumps.items()}
+    )
+    # Les vues (une par ligne) sont créées avec l'index: les compter côté table
+    _, views_bytes = _traced(lambda: [table.views() for table in table_snapshot.values()])
+
+    dict_index = build_pool_index(dict_snapshot)
+    table_index = build_pool_index(table_snapshot)
+
+    dict_out, dict_cycle_bytes = _traced(lambda: _cycle_dicts(dict_index, tokens))
+    table_out, table_cycle_bytes = _traced(lambda: _cycle_table(table_index, tokens))
+    assert len(dict_out) == len(table_out)
+    for a, b in zip(dict_out[:200], table_out[:200]):
+        for key in ("pool_id", "dex", "buy_price", "sell_price", "fee_pct", "liquidity_usd", "url", "token"):
+            assert a[key] == b[key], key
+
+    results = {
+        "pools": total,
+        "dict_snapshot_kb": dict_bytes / 1024,
+        "table_snapshot_kb": (table_bytes + views_bytes) / 1024,
+        "dict_cycle_kb": dict_cycle_bytes / 1024,
+        "table_cycle_kb": table_cycle_bytes / 1024,
+        "dict_cycle_ms": _best_ms(lambda: _cycle_dicts(dict_index, tokens)),
+        "table_cycle_ms": _best_ms(lambda: _cycle_table(table_index, tokens)),
+        # Premier cycle après un refresh: tables neuves, colonnes et URLs à décoder
+        "table_cold_cycle_ms": _best_ms(
+            lambda index: _cycle_table(index, tokens),
+            setup=lambda: (build_pool_index({dex: PoolTable.from_dicts(p) for dex, p in source.items()}),),
+        ),
+        "dict_index_ms": _best_ms(lambda: build_pool_index(dict_snapshot)),
+        "table_index_ms": _best_ms(lambda: build_pool_index(table_snapshot)),
+    }
+
+    print(f"{total} pools ({len(DEXES)} DEX), {n_tokens} tokens, {len(dict_out)} pools per cycle")
+    print(f"{'':<8} {'snapshot KB':>12} {'cycle KB':>10} {'cycle ms':>10} {'index ms':>10}")
+    for name in ("dict", "table"):
+        print(
+            f"{name:<8} {results[name + '_snapshot_kb']:>12.0f} {results[name + '_cycle_kb']:>10.0f} "
+            f"{results[name + '_cycle_ms']:>10.1f} {results[name + '_index_ms']:>10.1f}"
+        )
+    print(f"table, first cycle after refresh: {results['table_cold_cycle_ms']:.1f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    t = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    run_benchmark(n, t)
@@ -0,0 +1,122 @@
+# bench_rate_limiter.py
+"""
+Benchmark: rate limiter adaptatif vs backoff fixe sur 429.
+
+Un serveur local accepte LIMIT requêtes par fenêtre glissante d'une seconde
+et répond 429 + Retry-After au-delà. Deux clients envoient N requêtes avec
+CONCURRENCY tâches:
+- "backoff": ancien comportement de fetch_with_retry (sleep
+  INITIAL_RETRY_DELAY * 2^n + 1 sur 429, abandon après MAX_RETRIES)
+- "limiter": acquire/observe de rate_limiter, démarrant au-dessus de la
+  limite, mêmes MAX_RETRIES
+
+Mesure: débit utile (req réussies/s), nombre de 429, requêtes abandonnées.
+
+Usage:
+    SAVE_LOGS=false python bench_rate_limiter.py [limit_req_s] [requests]
+"""
+import asyncio
+import sys
+import time
+from collections import deque
+
+from aiohttp import web
+
+import rate_limiter
+from http_transport import create_session
+from pool_fetchers import INITIAL_RETRY_DELAY, MAX_RETRIES
+
+CONCURRENCY = 16
+
+
+def make_app(limit: int) -> web.Application:
+    hits = deque()
+    counters = {"ok": 0, "throttled": 0}
+
+    async def handler(request):
+        now = time.monotonic()
+        while hits and now - hits[0] > 1.0:
+            hits.popleft()
+        if len(hits) >= limit:
+            counters["throttled"] += 1
+            retry = max(0.05, 1.0 - (now - hits[0]))
+            return web.Response(status=429, headers={"Retry-After": f"{retry:.2f}"})
+        hits.append(now)
+        counters["ok"] += 1
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    app["counters"] = counters
+    return app
+
+
+async def _run_client(url: str, total: int, use_limiter: bool) -> tuple:
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+    dropped = 0
+
+    async with create_session() as session:
+        async def worker():
+            nonlocal dropped
+            while not queue.empty():
+                queue.get_nowait()
+                for attempt in range(MAX_RETRIES):
+                    if use_limiter:
+                        await rate_limiter.acquire(url)
+                    async with session.get(url) as resp:
+                        if use_limiter:
+                            rate_limiter.observe(url, resp.status, resp.headers)
+                        if resp.status == 200:
+                            break
+                    if not use_limiter:
+                        await asyncio.sleep(INITIAL_RETRY_DELAY * (2 ** attempt) + 1)
+                else:
+                    dropped += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+        return time.perf_counter() - started, dropped
+
+
+async def run_benchmark(limit: int = 10, total: int = 200) -> dict:
+    results = {}
+    for name, use_limiter in (("backoff", False), ("limiter", True)):
+        app = make_app(limit)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        url = f"http://127.0.0.1:{port}/"
+
+        # Bucket volontairement trop optimiste: 2x la limite réelle
+        rate_limiter.HOST_RATE_LIMITS["127.0.0.1"] = {"rate": limit * 2.0, "burst": limit * 2, "max_rate": limit * 4.0}
+        rate_limiter._buckets.clear()
+
+        elapsed, dropped = await _run_client(url, total, use_limiter)
+        counters = app["counters"]
+        results[name] = {
+            "seconds": elapsed,
+            "throughput": counters["ok"] / elapsed,
+            "throttled": counters["throttled"],
+            "dropped": dropped,
+        }
+        await runner.cleanup()
+
+    print(f"Server limit {limit} req/s, {total} requests, {CONCURRENCY} concurrent tasks")
+    for name, r in results.items():
+        print(
+            f"  {name:<8} {r['seconds']:>6.1f}s  {r['throughput']:>5.1f} req/s ok  "
+            f"{r['throttled']:>4} x 429  {r['dropped']:>4} dropped"
+        )
+    bucket = rate_limiter.get_rate_limiter_stats().get("127.0.0.1", {})
+    print(f"  limiter final rate {bucket.get('rate')} req/s, ceiling {bucket.get('ceiling')}")
+    return results
+
+
+if __name__ == "__main__":
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(run_benchmark(limit, total))
@@ -0,0 +1,102 @@
+# bench_snapshot_load.py
+"""
+Benchmark: temps de chargement du snapshot disque des pools (démarrage à chaud).
+
+Compare le format binaire de snapshot_persistence (mmap + table de chaînes)
+à un dump JSON des mêmes sections.
+
+Usage:
+    SAVE_LOGS=false python bench_snapshot_load.py [pools_par_dex] [répétitions]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from snapshot_persistence import save_pool_snapshot, load_pool_snapshot, FORMAT_VERSION
+
+DEXES = {
+    "raydium": "CLMM",
+    "orca": "Whirlpool",
+    "meteora": "DLMM",
+    "lifinity": "PMM",
+    "phoenix": "OrderBook",
+}
+_B58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def build_sections(pools_per_dex: int, n_mints: int = 500, seed: int = 11) -> dict:
+    """Sections réalistes: peu de mints distincts, beaucoup de pools."""
+    rng = random.Random(seed)
+    mints = ["".join(rng.choice(_B58) for _ in range(44)) for _ in range(n_mints)]
+    now = time.time()
+    sections = {}
+    for dex, pool_type in DEXES.items():
+        pools = []
+        for _ in range(pools_per_dex):
+            fee_bps = rng.choice([1, 4, 25, 30, 100])
+            pools.append({
+                "pool_id": "".join(rng.choice(_B58) for _ in range(44)),
+                "dex": dex,
+                "token_a": rng.choice(mints),
+                "token_b": rng.choice(mints),
+                "price": rng.uniform(1e-6, 500),
+                "liquidity_usd": rng.uniform(0, 5e6),
+                "fee_bps": fee_bps,
+                "fee_pct": fee_bps / 10000.0,
+                "pool_type": pool_type,
+            })
+        sections[f"solana/{dex}"] = {"updated_at": now, "pools": pools}
+    return sections
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def run_benchmark(pools_per_dex: int = 20_000, repeat: int = 5) -> dict:
+    sections = build_sections(pools_per_dex)
+    total = pools_per_dex * len(DEXES)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bin_path = os.path.join(tmp, "pool_snapshot.bin")
+        json_path = os.path.join(tmp, "pool_snapshot.json")
+
+        save_ms = _best_of(lambda: save_pool_snapshot(sections, bin_path), repeat)
+        with open(json_path, "w") as f:
+            json.dump(sections, f)
+
+        def load_json():
+            with open(json_path, "rb") as f:
+                return json.loads(f.read())
+
+        loaded = load_pool_snapshot(bin_path, mark_stale=False)
+        assert loaded is not None
+        assert loaded["solana/raydium"]["pools"][0] == sections["solana/raydium"]["pools"][0]
+
+        results = {
+            "pools": total,
+            "bin_kb": os.path.getsize(bin_path) / 1024,
+            "json_kb": os.path.getsize(json_path) / 1024,
+            "save_ms": save_ms,
+            "bin_load_ms": _best_of(lambda: load_pool_snapshot(bin_path), repeat),
+            "json_load_ms": _best_of(load_json, repeat),
+        }
+
+    print(f"Snapshot format v{FORMAT_VERSION}: {results['pools']} pools ({len(DEXES)} DEX)")
+    print(f"  binary : {results['bin_kb']:>8.0f} KB  load {results['bin_load_ms']:>7.1f} ms  (save {results['save_ms']:.1f} ms)")
+    print(f"  json   : {results['json_kb']:>8.0f} KB  load {results['json_load_ms']:>7.1f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    r = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    run_benchmark(n, r)
@@ -0,0 +1,106 @@
+# bench_triangular_arbitrage.py
+"""
+Benchmark: détecteur de cycles multi-pools (triangular_arbitrage) sur un
+graphe synthétique de plusieurs dizaines de milliers de pools.
+
+Topologie proche du snapshot réel: cinq pools par token environ, surtout
+contre SOL (70%) et USDC (20%), le reste token/token; une PoolTable par DEX
+comme fetch_all_pools; prix cohérents à ±0.05% près, plus PLANTED cycles
+rentables.
+
+Mesure, pour chaque taille de graphe: construction du graphe (premier
+snapshot), recherche complète (deux ancres), cycle incrémental avec 1% des
+pools modifiées en place (update_row: mise à jour, puis recherche), cycle
+sans changement (recherche sautée).
+
+Usage:
+    SAVE_LOGS=false LOG_LEVEL=ERROR python bench_triangular_arbitrage.py [pools...]
+    (défaut: 10000 50000)
+"""
+import random
+import sys
+import time
+
+from pool_fetchers import SOL_MINT, USDC_MINT
+from pool_table import PoolTable
+from triangular_arbitrage import PoolGraph
+
+DEXES = ("raydium", "orca", "meteora", "lifinity", "phoenix")
+PLANTED = 20
+
+
+def build_snapshot(n_pools: int, seed: int = 5):
+    rng = random.Random(seed)
+    n_tokens = max(n_pools // 5, 10)
+    usd = {SOL_MINT: 150.0, USDC_MINT: 1.0}
+    usd.update({f"MINT{i:06d}": 10 ** rng.uniform(-6, 3) for i in range(n_tokens)})
+    tokens = list(usd)[2:]
+    snapshot = {dex: [] for dex in DEXES}
+
+    def add(i, a, b, noise):
+        pool = {
+            "pool_id": f"P{i}",
+            "token_a": a,
+            "token_b": b,
+            "price": usd[a] / usd[b] * (1 + rng.uniform(-noise, noise)),
+            "fee_pct": rng.choice([0.0001, 0.0025, 0.003]),
+            "liquidity_usd": 10 ** rng.uniform(3.5, 7),
+        }
+        snapshot[rng.choice(DEXES)].append(pool)
+        return pool
+
+    for i in range(n_pools - PLANTED):
+        draw = rng.random()
+        token = rng.choice(tokens)
+        quote = SOL_MINT if draw < 0.7 else USDC_MINT if draw < 0.9 else rng.choice(tokens)
+        if quote != token:
+            add(i, token, quote, 0.0005)
+    for i in range(PLANTED):
+        # Pool token/token décalée de 3%: cycle SOL -> X -> Y -> SOL rentable
+        a, b = rng.sample(tokens, 2)
+        add(n_pools + i, a, b, 0.0)["price"] *= 1.03
+    return {dex: PoolTable.from_dicts(pools) for dex, pools in snapshot.items()}
+
+
+def _ms(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+
+def run_benchmark(sizes=(10000, 50000)) -> list:
+    rows = []
+    print(f"{'pools':>7} {'nodes':>7} {'edges':>7} {'cycles':>6} {'build ms':>9} {'search ms':>10} "
+          f"{'1% upd ms':>10} {'1% search ms':>13} {'idle ms':>8}")
+    rng = random.Random(7)
+    for n_pools in sizes:
+        snapshot = build_snapshot(n_pools)
+        graph = PoolGraph(max_hops=4, min_profit=0.0025, min_liquidity_usd=1e4)
+        build_ms = _ms(lambda: graph.update(snapshot))
+        cycles = []
+        search_ms = _ms(lambda: cycles.extend(graph.find_cycles()))
+
+        # 1% des pools changent de prix (mises à jour on-chain en place)
+        pools = [(dex, i) for dex in DEXES for i in range(len(snapshot[dex]))]
+        for dex, i in rng.sample(pools, len(pools) // 100):
+            table = snapshot[dex]
+            table.update_row(i, {"price": table[i]["price"] * (1 + rng.uniform(-0.001, 0.001))})
+        update_ms = _ms(lambda: graph.update(snapshot))
+        incremental_ms = _ms(graph.find_cycles)
+        idle_ms = _ms(lambda: (graph.update(snapshot), graph.find_cycles()))
+
+        stats = graph.snapshot()
+        row = {"pools": stats["pools"], "nodes": stats["nodes"], "edges": stats["edges"],
+               "cycles": len(cycles), "build_ms": build_ms, "search_ms": search_ms,
+               "update_ms": update_ms, "incremental_ms": incremental_ms, "idle_ms": idle_ms}
+        rows.append(row)
+        print(
+            f"{row['pools']:>7} {row['nodes']:>7} {row['edges']:>7} {row['cycles']:>6} "
+            f"{build_ms:>9.1f} {search_ms:>10.1f} {update_ms:>10.1f} {incremental_ms:>13.1f} {idle_ms:>8.1f}"
+        )
+    return rows
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 50000]
+    run_benchmark(sizes)
@@ -0,0 +1,274 @@
+# circuit_breaker.py
+"""
+Circuit breakers partagés, un par source (DEX, agrégateur, subgraph).
+
+Remplace le marqueur _dex_down_until (TTL fixe de 300s, chemin Base
+uniquement). Sans breaker, un Raydium mort coûtait à chaque cycle 3
+tentatives avec des timeouts jusqu'à 15s. Avec breaker:
+- closed: les requêtes passent; chaque résultat (succès, échec, latence)
+  entre dans une fenêtre glissante de WINDOW_SIZE appels
+- open: le taux d'échec ou d'appels lents de la fenêtre dépasse son seuil,
+  ou CONSECUTIVE_FAILURES échecs d'affilée: allow_request() refuse sans
+  réseau pendant open_seconds
+- half-open: à l'échéance, UNE seule requête sonde est autorisée. Succès:
+  retour à closed (fenêtre vidée). Échec: retour à open, durée doublée
+  jusqu'à MAX_OPEN_SECONDS
+
+Une source malade coûte donc une sonde par fenêtre au lieu de dizaines de
+secondes par cycle; les appelants gardent leurs dernières données (cache,
+refresher) tant que le breaker est ouvert.
+
+Usage type dans un fetcher:
+
+    if not allow_request("orca_price"):
+        return {}
+    with track("orca_price") as call:
+        async with session.get(url) as resp:
+            call.status = resp.status
+            ...
+
+Un 429 n'est pas un échec: la source répond, le rate_limiter gère le débit.
+"""
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from utils import logger
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+WINDOW_SIZE = 20                # appels retenus pour les taux
+MIN_CALLS = 5                   # appels minimum avant d'évaluer les taux
+FAILURE_RATE_THRESHOLD = 0.5    # échecs / appels de la fenêtre
+SLOW_CALL_RATE_THRESHOLD = 0.8  # appels lents / appels de la fenêtre
+SLOW_CALL_SECONDS = 8.0         # au-delà, un appel réussi compte comme lent
+CONSECUTIVE_FAILURES = 3        # ouvre sans attendre MIN_CALLS (ex: retries d'un cycle)
+OPEN_SECONDS = 30.0             # première ouverture
+MAX_OPEN_SECONDS = 300.0        # plafond après des sondes en échec
+PROBE_TIMEOUT_SECONDS = 60.0    # sonde jamais rapportée (tâche annulée): on en relance une
+
+# Surcharges par source (clés: celles de la configuration ci-dessus, en minuscules)
+BREAKER_CONFIG: Dict[str, Dict[str, float]] = {
+    # Gros dumps: lents par nature
+    "raydium": {"slow_call_seconds": 12.0},
+    "meteora": {"slow_call_seconds": 12.0},
+    # Quotes unitaires: doivent répondre vite
+    "jupiter_price": {"slow_call_seconds": 3.0},
+    "jupiter_quote": {"slow_call_seconds": 3.0},
+}
+
+
+def _setting(name: str, key: str) -> float:
+    return BREAKER_CONFIG.get(name, {}).get(key, globals()[key.upper()])
+
+
+class CircuitBreaker:
+    """Breaker closed / open / half-open d'une source."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.window_size = int(_setting(name, "window_size"))
+        self.min_calls = int(_setting(name, "min_calls"))
+        self.failure_rate_threshold = _setting(name, "failure_rate_threshold")
+        self.slow_call_rate_threshold = _setting(name, "slow_call_rate_threshold")
+        self.slow_call_seconds = _setting(name, "slow_call_seconds")
+        self.consecutive_threshold = int(_setting(name, "consecutive_failures"))
+        self.base_open_seconds = _setting(name, "open_seconds")
+        self.max_open_seconds = _setting(name, "max_open_seconds")
+        self.open_seconds = self.base_open_seconds
+        self._calls = deque(maxlen=self.window_size)  # (échec, lent)
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self.probing = False
+        self.stats = {
+            "calls": 0,
+            "failures": 0,
+            "slow_calls": 0,
+            "rejected": 0,
+            "opened": 0,
+            "probes": 0,
+        }
+
+    def _rates(self):
+        total = len(self._calls)
+        if total == 0:
+            return 0.0, 0.0
+        failures = sum(1 for failed, _ in self._calls if failed)
+        slow = sum(1 for _, is_slow in self._calls if is_slow)
+        return failures / total, slow / total
+
+    def allow_request(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self.opened_at < self.open_seconds:
+                self.stats["rejected"] += 1
+                return False
+            self.state = HALF_OPEN
+            self.probing = False
+        # Half-open: une seule sonde à la fois
+        if self.probing and now - self.probe_started < PROBE_TIMEOUT_SECONDS:
+            self.stats["rejected"] += 1
+            return False
+        self.probing = True
+        self.probe_started = now
+        self.stats["probes"] += 1
+        logger.info(f"[BREAKER] {self.name} half-open, probing")
+        return True
+
+    def _open(self, reason: str):
+        if self.state == HALF_OPEN:
+            self.open_seconds = min(self.open_seconds * 2, self.max_open_seconds)
+        else:
+            self.open_seconds = self.base_open_seconds
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.probing = False
+        self.stats["opened"] += 1
+        logger.warning(f"[BREAKER] {self.name} open for {self.open_seconds:.0f}s ({reason})")
+
+    def _close(self):
+        self.state = CLOSED
+        self.open_seconds = self.base_open_seconds
+        self.probing = False
+        self._calls.clear()
+        logger.info(f"[BREAKER] {self.name} closed")
+
+    def record_success(self, latency: Optional[float] = None):
+        slow = latency is not None and latency > self.slow_call_seconds
+        self.stats["calls"] += 1
+        self.stats["slow_calls"] += slow
+        self.consecutive_failures = 0
+        if self.state == HALF_OPEN:
+            if slow:
+                self._open(f"slow probe {latency:.1f}s")
+            else:
+                self._close()
+            return
+        if self.state == OPEN:
+            return  # réponse d'une requête partie avant l'ouverture
+        self._calls.append((False, slow))
+        self._evaluate()
+
+    def record_failure(self):
+        self.stats["calls"] += 1
+        self.stats["failures"] += 1
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            self._open("probe failed")
+            return
+        if self.state == OPEN:
+            return
+        self._calls.append((True, False))
+        if self.consecutive_failures >= self.consecutive_threshold:
+            self._open(f"{self.consecutive_failures} consecutive failures")
+            return
+        self._evaluate()
+
+    def _evaluate(self):
+        if len(self._calls) < self.min_calls:
+            return
+        failure_rate, slow_rate = self._rates()
+        if failure_rate >= self.failure_rate_threshold:
+            self._open(f"failure rate {failure_rate:.0%}")
+        elif slow_rate >= self.slow_call_rate_threshold:
+            self._open(f"slow call rate {slow_rate:.0%}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        failure_rate, slow_rate = self._rates()
+        retry_in = 0.0
+        if self.state == OPEN:
+            retry_in = max(0.0, self.open_seconds - (time.monotonic() - self.opened_at))
+        return {
+            **self.stats,
+            "state": self.state,
+            "failure_rate": round(failure_rate, 3),
+            "slow_call_rate": round(slow_rate, 3),
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in_s": round(retry_in, 1),
+        }
+
+
+# ============================================================================
+# REGISTRE
+# ============================================================================
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Breaker de la source (créé au premier appel)."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name)
+    return breaker
+
+
+def allow_request(name: str) -> bool:
+    """À appeler avant chaque requête vers la source; False: ne pas appeler."""
+    return get_breaker(name).allow_request()
+
+
+def record_success(name: str, latency: Optional[float] = None):
+    """Succès d'un appel (latency en secondes, pour le seuil d'appels lents)."""
+    get_breaker(name).record_success(latency)
+
+
+def record_failure(name: str):
+    """Échec d'un appel: timeout, erreur réseau, 5xx, réponse illisible."""
+    get_breaker(name).record_failure()
+
+
+def record_status(name: str, status: int, latency: Optional[float] = None):
+    """Rapporte un statut HTTP: 5xx et 408 sont des échecs, le reste un succès."""
+    if status >= 500 or status == 408:
+        record_failure(name)
+    else:
+        record_success(name, latency)
+
+
+class _TrackedCall:
+    """Appel suivi par track(): latence mesurée, résultat rapporté en sortie."""
+
+    __slots__ = ("name", "status", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.status: Optional[int] = None
+        self.started = 0.0
+
+    def __enter__(self) -> "_TrackedCall":
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        latency = time.monotonic() - self.started
+        if exc_type is not None:
+            # Annulation (CancelledError): ni succès ni échec, la sonde expire
+            if issubclass(exc_type, Exception):
+                record_failure(self.name)
+        elif self.status is None:
+            record_success(self.name, latency)
+        else:
+            record_status(self.name, self.status, latency)
+        return False
+
+
+def track(name: str) -> _TrackedCall:
+    """
+    Contexte autour d'une requête: exception = échec, sinon call.status
+    (s'il est renseigné) est rapporté via record_status.
+    """
+    return _TrackedCall(name)
+
+
+def get_breaker_states() -> Dict[str, Dict[str, Any]]:
+    """État par source pour les dashboards: state, taux, rejets, retry_in_s..."""
+    return {name: breaker.snapshot() for name, breaker in _breakers.items()}
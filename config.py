@@ -58,19 +58,92 @@ KYBERSWAP_BASE_API = os.getenv("KYBERSWAP_BASE_API", "https://aggregator-api.kyb
 # Solana RPC endpoint - utilisé pour les requêtes blockchain Solana
 SOLANA_RPC_URL = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.triton.one")
 
+# Lecture on-chain des pools surveillées (solana_rpc_reader.py), en
+# surcouche des dumps REST: désactivée par défaut (RPC public limité)
+SOLANA_RPC_POOLS = os.getenv("SOLANA_RPC_POOLS", "false").lower() == "true"
+# Comptes par appel getMultipleAccounts (max 100)
+SOLANA_RPC_BATCH_SIZE = int(os.getenv("SOLANA_RPC_BATCH_SIZE", "100"))
+SOLANA_RPC_COMMITMENT = os.getenv("SOLANA_RPC_COMMITMENT", "confirmed")
+
+# Streaming WebSocket (accountSubscribe) des pools surveillées
+# (solana_ws_stream.py): réévaluation d'un token dès qu'une de ses pools change
+SOLANA_WS_STREAM = os.getenv("SOLANA_WS_STREAM", "false").lower() == "true"
+SOLANA_WS_URL = os.getenv(
+    "SOLANA_WS_URL",
+    SOLANA_RPC_URL.replace("https://", "wss://", 1).replace("http://", "ws://", 1),
+)
+
 # Base RPC endpoint - utilisé pour les requêtes blockchain Base
 BASE_RPC_URL = os.getenv("BASE_RPC_URL", "https://mainnet.base.org")
 
+# Lecture on-chain (Multicall3) des pools Base découvertes (base_rpc_reader.py),
+# en surcouche des subgraphs/APIs: désactivée par défaut (RPC public limité)
+BASE_RPC_POOLS = os.getenv("BASE_RPC_POOLS", "false").lower() == "true"
+
+# Découverte des pools Base (fetch_base_pools): tokens traités en parallèle,
+# et appels simultanés max par API de repli (Aerodrome: un seul
+# téléchargement par cycle, voir aerodrome_universe.py)
+BASE_DISCOVERY_CONCURRENCY = int(os.getenv("BASE_DISCOVERY_CONCURRENCY", "8"))
+BASE_PROVIDER_CONCURRENCY = {
+    "kyber": int(os.getenv("BASE_KYBER_CONCURRENCY", "4")),
+}
+
 # Backward compatibility (anciens noms)
 RPC_ENDPOINT = SOLANA_RPC_URL
 BASE_RPC_ENDPOINT = BASE_RPC_URL
 
+# ============================================================
+# POOL NORMALIZATION EXECUTOR
+# ============================================================
+# "inline": parsing streaming + normalisation sur la boucle asyncio
+# "process": body brut envoyé à un pool de process workers (boucle libre)
+POOL_EXECUTOR_MODE = os.getenv("POOL_EXECUTOR_MODE", "inline").lower()
+POOL_EXECUTOR_WORKERS = int(os.getenv("POOL_EXECUTOR_WORKERS", "2"))
+
+# Snapshot disque des pools (démarrage à chaud), réécrit à chaque cycle
+POOL_SNAPSHOT_PATH = os.getenv("POOL_SNAPSHOT_PATH", "data/pool_snapshot.bin")
+
+# ============================================================
+# HTTP TRANSPORT (http_transport.py)
+# ============================================================
+# Connexions max (total / par hôte hors HOST_POOL_LIMITS)
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "4"))
+# TTL du cache DNS et durée de vie d'une connexion inactive (s)
+HTTP_DNS_TTL_SECONDS = int(os.getenv("HTTP_DNS_TTL_SECONDS", "300"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+
+# ============================================================
+# CROSS-QUOTE NORMALIZATION (pool_prices.py)
+# ============================================================
+# Pools TOKEN/USDC converties en SOL (mid SOL/USDC du même snapshot) et
+# comparées aux pools TOKEN/SOL
+CROSS_QUOTE_POOLS = os.getenv("CROSS_QUOTE_POOLS", "true").lower() == "true"
+# Pools SOL/USDC moins liquides ignorées pour le calcul du mid
+CROSS_QUOTE_MIN_BRIDGE_LIQUIDITY_USD = float(os.getenv("CROSS_QUOTE_MIN_BRIDGE_LIQUIDITY_USD", "100000"))
+
+# ============================================================
+# TRIANGULAR ARBITRAGE (triangular_arbitrage.py)
+# ============================================================
+# Cycles SOL -> X -> USDC -> SOL sur le graphe des pools, à chaque cycle
+TRIANGULAR_SCAN = os.getenv("TRIANGULAR_SCAN", "false").lower() == "true"
+# Pools par cycle (3 à TRIANGULAR_MAX_HOPS)
+TRIANGULAR_MAX_HOPS = int(os.getenv("TRIANGULAR_MAX_HOPS", "4"))
+# Profit minimal après frais de pools (0.0025 = 0.25%)
+TRIANGULAR_MIN_PROFIT = float(os.getenv("TRIANGULAR_MIN_PROFIT", "0.0025"))
+# Pools moins liquides ignorées dans le graphe
+TRIANGULAR_MIN_LIQUIDITY_USD = float(os.getenv("TRIANGULAR_MIN_LIQUIDITY_USD", "10000"))
+
 # ============================================================
 # FILTERS AND THRESHOLDS
 # ============================================================
 # Interval between scans
 CHECK_INTERVAL_SECONDS = int(os.getenv("CHECK_INTERVAL_SECONDS", "30"))
 
+# Opportunités d'un token réutilisées tant que ses pools ne changent pas
+# (token_evaluation_cache.py), au plus ce délai (s) avant réévaluation
+EVALUATION_CACHE_MAX_AGE_SECONDS = float(os.getenv("EVALUATION_CACHE_MAX_AGE_SECONDS", "300"))
+
 # Minimum time between two alerts pour une même paire (capé à 60s)
 _min_notif_env = int(os.getenv("MIN_NOTIFICATION_INTERVAL_SECONDS", "60"))
 MIN_NOTIFICATION_INTERVAL_SECONDS = min(_min_notif_env, 60)
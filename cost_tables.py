@@ -0,0 +1,304 @@
+# cost_tables.py
+"""
+Tables précalculées du modèle de coûts heuristique de arbitrage.py
+(estimate_slippage, estimate_price_impact, calculate_confidence_score,
+assess_mev_risk).
+
+Ces fonctions sont des paliers (liquidité, fee, spread, catégorie de token)
+multipliés entre eux, réévalués pour chaque candidat. Ici chaque palier est
+évalué une fois par cellule:
+- liquidité: un bucket par intervalle entre deux seuils de palier (tous
+  paliers confondus, MEV compris), plus un bucket NaN (comparaisons
+  fausses, comme le code scalaire d'origine): le résultat d'un palier est
+  constant dans un bucket, les tables sont donc exactes
+- fee (bps): un bucket par palier de SLIPPAGE_FEE_TIERS, plus NaN et
+  "fee inconnu" (None/0)
+- spread: buckets ]seuil précédent, seuil] des seuils MEV (comparaisons >)
+- catégorie de token: majeur, moyen, microcap (arbitrage.token_category)
+
+Tables: slippage de base [catégorie, liquidité, fee], impact de prix
+[liquidité] par taille de swap (mémoïsé), points de confiance (liquidité,
+nombre de DEX, volume), décision MEV [catégorie, liquidité, spread]. Le seul
+terme continu, 1 + 2 x min(swap / liquidité, 0.1) ^ 0.7, est mémoïsé
+(size_multiplier) côté scalaire et calculé en bloc côté kernel.
+
+Construites au démarrage (main) depuis les constantes de arbitrage.py, et
+reconstruites par get_cost_tables() dès qu'une de ces constantes est
+réassignée. Le kernel NumPy (arbitrage_kernel) indexe les mêmes tables en
+tableaux, d'où des résultats identiques aux fonctions scalaires.
+"""
+import math
+import time
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils import logger
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+MEV_LEVELS = ("low", "medium", "high")
+
+# Constantes de arbitrage.py dont dépendent les tables
+COST_CONSTANTS = (
+    "CATEGORY_BASE_SLIPPAGE",
+    "SLIPPAGE_LIQUIDITY_TIERS",
+    "SLIPPAGE_FEE_TIERS",
+    "IMPACT_LIQUIDITY_TIERS",
+    "CONFIDENCE_LIQUIDITY_TIERS",
+    "CONFIDENCE_DEX_TIERS",
+    "CONFIDENCE_VOLUME_TIERS",
+    "MEV_BAIT_SPREAD",
+    "MEV_BAIT_LIQUIDITY",
+    "MEV_MIN_LIQUIDITY",
+    "MEV_MEDIUM_SPREAD",
+    "MEV_MEDIUM_LIQUIDITY",
+    "MEV_HIGH_BUFFER",
+    "MEV_MEDIUM_BUFFER",
+)
+
+_stats = {
+    "builds": 0,
+    "cells": 0,
+    "last_build_ms": 0.0,
+}
+
+
+def _tier(tiers: Sequence[Tuple[float, Any]], value: float) -> Any:
+    """Valeur du premier palier (seuil, valeur) dont le seuil est <= value, sinon le plancher."""
+    for threshold, tier_value in tiers:
+        if value >= threshold:
+            return tier_value
+    return tiers[-1][1]
+
+
+def _bisect(breaks: Sequence[float], values: np.ndarray, right: bool = True) -> np.ndarray:
+    """
+    bisect_right (bisect_left si right=False) de chaque valeur dans breaks,
+    NaN -> len(breaks) + 1. Une comparaison par seuil: pour une dizaine de
+    seuils, plus rapide que np.searchsorted.
+    """
+    buckets = np.isnan(values) * np.intp(len(breaks) + 1)
+    for threshold in breaks:
+        buckets += (values >= threshold) if right else (values > threshold)
+    return buckets
+
+
+@lru_cache(maxsize=65536)
+def size_multiplier(swap_size_usd: float, liquidity_usd: float) -> float:
+    """Terme de taille de estimate_slippage (max 2x à 10% de la pool)."""
+    if liquidity_usd > 0:
+        size_ratio = min(swap_size_usd / liquidity_usd, 0.1)
+        return 1 + (size_ratio ** 0.7) * 2.0
+    return 2.0  # Pas de donnée de liquidité: prudent
+
+
+def size_multipliers(swap_size_usd: float, liquidity: np.ndarray) -> np.ndarray:
+    """size_multiplier vectorisé."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        size_ratio = np.minimum(swap_size_usd / liquidity, 0.1)
+        return np.where(liquidity > 0, 1 + (size_ratio ** 0.7) * 2.0, 2.0)
+
+
+class CostTables:
+    """Tables du modèle de coûts pour un jeu de constantes donné."""
+
+    def __init__(self, constants: Tuple, namespace: Dict[str, Any]):
+        self.constants = constants
+        c = dict(zip(COST_CONSTANTS, constants))
+        mev_rule = namespace["mev_rule"]
+
+        # Buckets de liquidité: [-inf, s0[, [s0, s1[, ..., [sn, +inf[, NaN
+        thresholds = {t for name in ("SLIPPAGE_LIQUIDITY_TIERS", "IMPACT_LIQUIDITY_TIERS",
+                                     "CONFIDENCE_LIQUIDITY_TIERS") for t, _ in c[name]}
+        thresholds.update((c["MEV_BAIT_LIQUIDITY"], c["MEV_MIN_LIQUIDITY"], c["MEV_MEDIUM_LIQUIDITY"]))
+        self.liquidity_breaks: List[float] = sorted(thresholds)
+        liquidity_reps = [-math.inf] + self.liquidity_breaks + [math.nan]
+        self.nan_bucket = len(liquidity_reps) - 1
+
+        # Buckets de fee: [-inf, f0[, ..., [fn, +inf[, NaN (plancher),
+        # fee inconnu (None/0: multiplicateur 1.0)
+        self.fee_breaks: List[float] = sorted({t for t, _ in c["SLIPPAGE_FEE_TIERS"]})
+        fee_reps = [-math.inf] + self.fee_breaks + [math.nan]
+        fee_multipliers = [_tier(c["SLIPPAGE_FEE_TIERS"], rep) for rep in fee_reps] + [1.0]
+        self.nan_fee = len(fee_reps) - 1
+        self.unknown_fee = len(fee_multipliers) - 1
+
+        # Buckets de spread: ]-inf, s0], ]s0, s1], ]s1, +inf[, NaN
+        self.spread_breaks: List[float] = sorted({c["MEV_MEDIUM_SPREAD"], c["MEV_BAIT_SPREAD"]})
+        spread_reps = self.spread_breaks + [math.nextafter(self.spread_breaks[-1], math.inf), math.nan]
+        self.nan_spread = len(spread_reps) - 1
+
+        liquidity_multipliers = [_tier(c["SLIPPAGE_LIQUIDITY_TIERS"], rep) for rep in liquidity_reps]
+        self.slippage_base_array = (
+            np.array(c["CATEGORY_BASE_SLIPPAGE"], dtype=np.float64)[:, None, None]
+            * np.array(liquidity_multipliers)[None, :, None]
+            * np.array(fee_multipliers)[None, None, :]
+        )
+        self._slippage_base = self.slippage_base_array.tolist()
+        self._slippage_flat = self.slippage_base_array.ravel()
+
+        self._impact_bases = [_tier(c["IMPACT_LIQUIDITY_TIERS"], rep) for rep in liquidity_reps]
+        self._impact_rows: Dict[float, Tuple[List[float], np.ndarray]] = {}
+
+        self._confidence_liquidity = [_tier(c["CONFIDENCE_LIQUIDITY_TIERS"], rep) for rep in liquidity_reps]
+        self.confidence_liquidity_array = np.array(self._confidence_liquidity, dtype=np.float64)
+        max_dex = max(t for t, _ in c["CONFIDENCE_DEX_TIERS"])
+        self._dex_scores = [_tier(c["CONFIDENCE_DEX_TIERS"], n) for n in range(int(max_dex) + 1)]
+        self.dex_score_array = np.array(self._dex_scores, dtype=np.float64)
+        self._volume_tiers = c["CONFIDENCE_VOLUME_TIERS"]
+        self._volume_scores: Dict[float, int] = {}
+
+        # Décision MEV par cellule [catégorie, liquidité, spread]
+        self._mev = [
+            [[mev_rule(category, liquidity, spread) for spread in spread_reps] for liquidity in liquidity_reps]
+            for category in range(len(c["CATEGORY_BASE_SLIPPAGE"]))
+        ]
+        self.mev_level_array = np.array(
+            [[[MEV_LEVELS.index(cell[0]) for cell in row] for row in rows] for rows in self._mev], dtype=np.int64
+        )
+        self.mev_buffer_array = np.array([[[cell[1] for cell in row] for row in rows] for rows in self._mev])
+        self.mev_reject_array = np.array([[[cell[2] for cell in row] for row in rows] for rows in self._mev], dtype=bool)
+        self._mev_flat = (self.mev_level_array.ravel(), self.mev_buffer_array.ravel(), self.mev_reject_array.ravel())
+
+        self.cells = (self.slippage_base_array.size + len(self._impact_bases)
+                      + len(self._confidence_liquidity) + len(self._dex_scores) + self.mev_level_array.size)
+
+    # ------------------------------------------------------------------
+    # Buckets
+    # ------------------------------------------------------------------
+    def liquidity_bucket(self, liquidity_usd: float) -> int:
+        if liquidity_usd != liquidity_usd:
+            return self.nan_bucket
+        return bisect_right(self.liquidity_breaks, liquidity_usd)
+
+    def liquidity_buckets(self, liquidity: np.ndarray) -> np.ndarray:
+        return _bisect(self.liquidity_breaks, liquidity)
+
+    def fee_tier(self, fee_bps: Optional[float]) -> int:
+        if not fee_bps:
+            return self.unknown_fee
+        if fee_bps != fee_bps:
+            return self.nan_fee
+        return bisect_right(self.fee_breaks, fee_bps)
+
+    def fee_tiers(self, fee_bps: np.ndarray) -> np.ndarray:
+        """fee_bps manquant ou None déjà mis à 0 (PoolBatch)."""
+        tiers = _bisect(self.fee_breaks, fee_bps)
+        tiers[fee_bps == 0] = self.unknown_fee
+        return tiers
+
+    def spread_bucket(self, spread: float) -> int:
+        if spread != spread:
+            return self.nan_spread
+        return bisect_left(self.spread_breaks, spread)
+
+    def spread_buckets(self, spread: np.ndarray) -> np.ndarray:
+        return _bisect(self.spread_breaks, spread, right=False)
+
+    # ------------------------------------------------------------------
+    # Lookups scalaires (valeurs brutes, bucket calculé sur place: un seul
+    # appel par fonction de arbitrage.py)
+    # ------------------------------------------------------------------
+    def slippage_base(self, category: int, liquidity_usd: float, fee_bps: Optional[float]) -> float:
+        """Base de la catégorie x palier de liquidité x palier de fee."""
+        bucket = self.nan_bucket if liquidity_usd != liquidity_usd else bisect_right(self.liquidity_breaks, liquidity_usd)
+        if not fee_bps:
+            fee_tier = self.unknown_fee
+        else:
+            fee_tier = self.nan_fee if fee_bps != fee_bps else bisect_right(self.fee_breaks, fee_bps)
+        return self._slippage_base[category][bucket][fee_tier]
+
+    def _impact(self, swap_size_usd: float) -> Tuple[List[float], np.ndarray]:
+        row = self._impact_rows.get(swap_size_usd)
+        if row is None:
+            size_factor = (swap_size_usd / 1000) ** 0.5  # Racine carrée de la taille
+            values = [min(max(base * size_factor, 0.0005), 0.02) for base in self._impact_bases]
+            row = self._impact_rows[swap_size_usd] = (values, np.array(values, dtype=np.float64))
+        return row
+
+    def price_impact(self, liquidity_usd: float, swap_size_usd: float) -> float:
+        """Impact de prix (ligne mémoïsée par taille de swap)."""
+        bucket = self.nan_bucket if liquidity_usd != liquidity_usd else bisect_right(self.liquidity_breaks, liquidity_usd)
+        return self._impact(swap_size_usd)[0][bucket]
+
+    def confidence_points(self, liquidity_usd: float, dex_count: int, volume_24h: float) -> Tuple[int, int, int]:
+        """Points de confiance (liquidité, nombre de DEX, volume)."""
+        bucket = self.nan_bucket if liquidity_usd != liquidity_usd else bisect_right(self.liquidity_breaks, liquidity_usd)
+        dex_score = self._dex_scores[min(dex_count, len(self._dex_scores) - 1)]
+        return self._confidence_liquidity[bucket], dex_score, self.volume_score(volume_24h)
+
+    def volume_score(self, volume_24h: float) -> int:
+        """Points de volume (mémoïsés par volume, constant d'un cycle à l'autre)."""
+        score = self._volume_scores.get(volume_24h)
+        if score is None:
+            score = self._volume_scores[volume_24h] = _tier(self._volume_tiers, volume_24h)
+        return score
+
+    def mev_decision(self, category: int, liquidity_usd: float, spread_brut: float) -> tuple:
+        """(risk_level, slippage_buffer, should_reject, reason) de mev_rule pour cette cellule."""
+        bucket = self.nan_bucket if liquidity_usd != liquidity_usd else bisect_right(self.liquidity_breaks, liquidity_usd)
+        spread = self.nan_spread if spread_brut != spread_brut else bisect_left(self.spread_breaks, spread_brut)
+        return self._mev[category][bucket][spread]
+
+    # ------------------------------------------------------------------
+    # Lookups vectorisés (buckets calculés une fois par lot)
+    # ------------------------------------------------------------------
+    def slippage_bases(self, category: np.ndarray, liquidity_bucket: np.ndarray, fee_tier: np.ndarray) -> np.ndarray:
+        """slippage_base vectorisé (index à plat dans la table)."""
+        _, n_buckets, n_fees = self.slippage_base_array.shape
+        return self._slippage_flat.take((category * n_buckets + liquidity_bucket) * n_fees + fee_tier)
+
+    def price_impacts(self, liquidity_bucket: np.ndarray, swap_size_usd: float) -> np.ndarray:
+        return self._impact(swap_size_usd)[1].take(liquidity_bucket)
+
+    def confidence_liquidity(self, liquidity_bucket: np.ndarray) -> np.ndarray:
+        return self.confidence_liquidity_array.take(liquidity_bucket)
+
+    def dex_scores(self, dex_count: np.ndarray) -> np.ndarray:
+        return self.dex_score_array.take(np.minimum(dex_count, len(self._dex_scores) - 1))
+
+    def mev_decisions(self, category: np.ndarray, liquidity_bucket: np.ndarray, spread_bucket: np.ndarray):
+        """mev_decision vectorisé: (niveau (index MEV_LEVELS), buffer, rejet) par élément."""
+        _, n_buckets, n_spreads = self.mev_level_array.shape
+        cell = (category * n_buckets + liquidity_bucket) * n_spreads + spread_bucket
+        return tuple(column.take(cell) for column in self._mev_flat)
+
+
+# ============================================================================
+# INSTANCE PARTAGÉE
+# ============================================================================
+_tables: Optional[CostTables] = None
+_namespace: Optional[Dict[str, Any]] = None
+_read_constants = itemgetter(*COST_CONSTANTS)
+
+
+def get_cost_tables() -> CostTables:
+    """Tables courantes, reconstruites si une constante de arbitrage.py a été réassignée."""
+    global _tables, _namespace
+
+    if _namespace is None:
+        import arbitrage  # import différé (cycle)
+        _namespace = vars(arbitrage)
+    # Appelée une fois par token (evaluate_pools_for_token) ou par lot
+    # (kernel): lecture des constantes en un appel C, comparaison par
+    # identité d'abord (tuple ==)
+    constants = _read_constants(_namespace)
+    if _tables is None or constants != _tables.constants:
+        started = time.perf_counter()
+        _tables = CostTables(constants, _namespace)
+        _stats["builds"] += 1
+        _stats["cells"] = _tables.cells
+        _stats["last_build_ms"] = (time.perf_counter() - started) * 1000
+        logger.debug(f"[COST-TABLES] Built {_tables.cells} cells in {_stats['last_build_ms']:.2f} ms")
+    return _tables
+
+
+def get_cost_table_stats() -> Dict[str, Any]:
+    """Stats: builds, cells, last_build_ms, size_cache (hits/misses de size_multiplier)."""
+    info = size_multiplier.cache_info()
+    return {**_stats, "size_cache": {"hits": info.hits, "misses": info.misses, "size": info.currsize}}
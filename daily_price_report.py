@@ -17,6 +17,7 @@ from utils import logger
 from telegram_bot import start_telegram_app
 from price_fetchers import get_all_dex_prices
 from base_dex_fetchers import get_all_base_dex_prices, USDC_BASE
+from http_transport import create_session
 
 # Gestion du fuseau horaire Paris (UTC+1 ou UTC+2 selon l'heure d'été)
 try:
@@ -184,7 +185,7 @@ async def send_daily_report(app, chat_id: int) -> None:
     
     logger.info("📊 Début génération rapport quotidien...")
     
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         # Récupérer les prix
         solana_prices = await fetch_solana_prices(session)
         base_prices = await fetch_base_prices(session)
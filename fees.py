@@ -87,6 +87,21 @@ def estimate_base_network_fee(swap_size_usd: float = 1000.0) -> float:
         return 0.001  # Valeur par défaut
 
 
+def estimate_network_fee_usd(chain: str) -> float:
+    """
+    Frais réseau d'un swap en USD (montant fixe, indépendant de la taille).
+
+    Args:
+        chain: "solana" ou "base"
+
+    Returns:
+        Frais réseau en USD
+    """
+    if chain.lower() == "base":
+        return BASE_GAS_PER_SWAP * BASE_GAS_PRICE_GWEI * 1e-9 * ETH_PRICE_USD
+    return (SOLANA_TOTAL_FEE_LAMPORTS / 1_000_000_000) * SOL_PRICE_USD
+
+
 def estimate_network_fee(
     chain: str,
     swap_size_usd: float = 1000.0
@@ -14,6 +14,7 @@ import aiohttp
 import os
 from datetime import datetime, timezone
 from dotenv import load_dotenv
+from http_transport import create_session
 
 load_dotenv()
 
@@ -34,7 +35,7 @@ async def get_prices():
     prices = {}
     timeout = aiohttp.ClientTimeout(total=15)
     
-    async with aiohttp.ClientSession(timeout=timeout) as s:
+    async with create_session(timeout=timeout) as s:
         
         # RAYDIUM (fonctionne sans API key)
         try:
@@ -123,7 +124,7 @@ async def get_base_prices():
     prices = {}
     timeout = aiohttp.ClientTimeout(total=15)
     
-    async with aiohttp.ClientSession(timeout=timeout) as s:
+    async with create_session(timeout=timeout) as s:
         
         # KYBERSWAP (Base) - Prix ETH en USDC
         try:
@@ -196,7 +197,7 @@ async def send_telegram(solana_prices, base_prices):
     text = "\n".join(lines)
     
     url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         payload = {
             "chat_id": TELEGRAM_CHAT_ID,
             "text": text,
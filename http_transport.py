@@ -0,0 +1,249 @@
+# http_transport.py
+"""
+Transport HTTP partagé par tous les points d'entrée (main, rapport quotidien,
+get_sol_prices, tests).
+
+Un aiohttp.ClientSession() par défaut n'a ni limite par hôte, ni politique de
+cache DNS explicite, ni keep-alive réglé, et chaque premier appel d'un DEX
+paie DNS + TCP + TLS. create_session() fournit:
+- un pool de connexions dimensionné par hôte (HOST_POOL_LIMITS)
+- un cache DNS avec TTL (HTTP_DNS_TTL_SECONDS)
+- un keep-alive réglé pour des appels toutes les 10-30s par hôte
+- la décompression automatique (gzip/deflate, br/zstd si les paquets sont
+  installés: aiohttp annonce lui-même les encodages supportés)
+- des statistiques de réutilisation des connexions par hôte (TraceConfig)
+
+warm_connections() ouvre les connexions vers les hôtes chauds au démarrage.
+
+HTTP/2: aiohttp ne parle que HTTP/1.1. Les gains visés (multiplexage) sont
+couverts ici par le keep-alive et des pools par hôte dimensionnés.
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, Optional
+
+import aiohttp
+
+from config import (
+    HTTP_DNS_TTL_SECONDS,
+    HTTP_KEEPALIVE_SECONDS,
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+)
+from utils import logger
+
+# ============================================================================
+# CONFIGURATION PAR HÔTE
+# ============================================================================
+# Connexions simultanées max par hôte (HTTP_POOL_LIMIT_PER_HOST sinon).
+# warm: connexion ouverte au démarrage (hôtes appelés à chaque cycle)
+HOST_POOL_LIMITS: Dict[str, Dict[str, Any]] = {
+    # Dumps DEX Solana: un gros GET par refresh, rarement concurrent
+    "api.raydium.io": {"limit": 2, "warm": True},
+    "api-v3.raydium.io": {"limit": 4, "warm": False},
+    "api.mainnet.orca.so": {"limit": 2, "warm": True},
+    "dlmm-api.meteora.ag": {"limit": 2, "warm": True},
+    "lifinity.io": {"limit": 2, "warm": True},
+    "api.phoenix.so": {"limit": 2, "warm": True},
+    # Quotes / agrégateurs: appels par token, plus de parallélisme
+    "api.jup.ag": {"limit": 8, "warm": False},
+    "quote-api.jup.ag": {"limit": 8, "warm": False},
+    "aggregator-api.kyberswap.com": {"limit": 8, "warm": True},
+    # Base: subgraphs et gateways
+    "api.studio.thegraph.com": {"limit": 6, "warm": True},
+    "interface.gateway.uniswap.org": {"limit": 4, "warm": True},
+    "api.aerodrome.finance": {"limit": 4, "warm": True},
+    "routing-api.pancakeswap.com": {"limit": 4, "warm": False},
+    "mainnet.base.org": {"limit": 8, "warm": False},
+    "api.telegram.org": {"limit": 2, "warm": False},
+}
+
+WARMUP_TIMEOUT_SECONDS = 5
+
+# ============================================================================
+# STATISTIQUES PAR HÔTE
+# ============================================================================
+_transport_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _host_stats(host: Optional[str]) -> Dict[str, float]:
+    return _transport_stats.setdefault(host or "?", {
+        "requests": 0,
+        "connections_created": 0,
+        "connections_reused": 0,
+        "connect_ms": 0.0,
+        "dns_hits": 0,
+        "dns_misses": 0,
+    })
+
+
+def get_transport_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Stats par hôte: requests, connections_created, connections_reused,
+    connect_ms (cumul des ouvertures), dns_hits, dns_misses et reuse_ratio.
+    """
+    stats = {}
+    for host, entry in _transport_stats.items():
+        entry = dict(entry)
+        opened = entry["connections_created"] + entry["connections_reused"]
+        entry["reuse_ratio"] = entry["connections_reused"] / opened if opened else 0.0
+        stats[host] = entry
+    return stats
+
+
+def reset_transport_stats():
+    _transport_stats.clear()
+
+
+async def _on_request_start(session, ctx: SimpleNamespace, params: aiohttp.TraceRequestStartParams):
+    # ctx est propre à la requête: les callbacks de connexion y retrouvent l'hôte
+    ctx.host = params.url.host
+    _host_stats(ctx.host)["requests"] += 1
+
+
+async def _on_connection_create_start(session, ctx: SimpleNamespace, params):
+    ctx.connect_started = time.perf_counter()
+
+
+async def _on_connection_create_end(session, ctx: SimpleNamespace, params):
+    stats = _host_stats(getattr(ctx, "host", None))
+    stats["connections_created"] += 1
+    stats["connect_ms"] += (time.perf_counter() - getattr(ctx, "connect_started", time.perf_counter())) * 1000
+
+
+async def _on_connection_reuseconn(session, ctx: SimpleNamespace, params):
+    _host_stats(getattr(ctx, "host", None))["connections_reused"] += 1
+
+
+async def _on_dns_cache_hit(session, ctx: SimpleNamespace, params: aiohttp.TraceDnsCacheHitParams):
+    _host_stats(params.host)["dns_hits"] += 1
+
+
+async def _on_dns_cache_miss(session, ctx: SimpleNamespace, params: aiohttp.TraceDnsCacheMissParams):
+    _host_stats(params.host)["dns_misses"] += 1
+
+
+def _build_trace_config() -> aiohttp.TraceConfig:
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(_on_request_start)
+    trace.on_connection_create_start.append(_on_connection_create_start)
+    trace.on_connection_create_end.append(_on_connection_create_end)
+    trace.on_connection_reuseconn.append(_on_connection_reuseconn)
+    trace.on_dns_cache_hit.append(_on_dns_cache_hit)
+    trace.on_dns_cache_miss.append(_on_dns_cache_miss)
+    return trace
+
+
+# ============================================================================
+# CONNECTOR
+# ============================================================================
+
+class HostLimitedConnector(aiohttp.TCPConnector):
+    """
+    TCPConnector avec une limite de connexions propre à chaque hôte.
+
+    aiohttp n'offre qu'un limit_per_host uniforme; on surcharge le calcul des
+    connexions disponibles (utilisé à l'acquisition et au réveil des
+    requêtes en attente) pour appliquer HOST_POOL_LIMITS. limit_per_host doit
+    rester non nul: c'est lui qui active le suivi des connexions par hôte.
+    """
+
+    def __init__(self, host_limits: Optional[Dict[str, int]] = None, **kwargs):
+        kwargs.setdefault("limit_per_host", HTTP_POOL_LIMIT_PER_HOST)
+        super().__init__(**kwargs)
+        self._host_limits = host_limits or {}
+
+    def _available_connections(self, key) -> int:
+        host_limit = self._host_limits.get(key.host)
+        if host_limit is None:
+            return super()._available_connections(key)
+
+        total_remain = 1
+        if self._limit:
+            total_remain = self._limit - len(self._acquired)
+            if total_remain <= 0:
+                return total_remain
+        host_remain = host_limit - len(self._acquired_per_host.get(key, ()))
+        return min(total_remain, host_remain)
+
+
+def create_connector(**overrides) -> HostLimitedConnector:
+    """Connector partagé: pools par hôte, cache DNS avec TTL, keep-alive."""
+    options = {
+        "limit": HTTP_POOL_LIMIT,
+        "limit_per_host": HTTP_POOL_LIMIT_PER_HOST,
+        "ttl_dns_cache": HTTP_DNS_TTL_SECONDS,
+        "use_dns_cache": True,
+        "keepalive_timeout": HTTP_KEEPALIVE_SECONDS,
+        "enable_cleanup_closed": True,
+    }
+    options.update(overrides)
+    host_limits = {host: conf["limit"] for host, conf in HOST_POOL_LIMITS.items()}
+    return HostLimitedConnector(host_limits=host_limits, **options)
+
+
+def create_session(
+    timeout: Optional[aiohttp.ClientTimeout] = None,
+    **kwargs
+) -> aiohttp.ClientSession:
+    """
+    Session aiohttp configurée pour la production, à utiliser partout à la
+    place de aiohttp.ClientSession() (s'utilise aussi en `async with`).
+
+    Args:
+        timeout: Timeout par défaut des requêtes (défaut: 30s total)
+        **kwargs: Options supplémentaires de ClientSession (headers...)
+    """
+    trace_configs = list(kwargs.pop("trace_configs", None) or [])
+    trace_configs.append(_build_trace_config())
+    return aiohttp.ClientSession(
+        connector=kwargs.pop("connector", None) or create_connector(),
+        timeout=timeout or aiohttp.ClientTimeout(total=30, sock_connect=10),
+        trace_configs=trace_configs,
+        auto_decompress=True,
+        **kwargs
+    )
+
+
+# ============================================================================
+# WARMUP
+# ============================================================================
+
+async def _warm_host(session: aiohttp.ClientSession, host: str) -> bool:
+    try:
+        # HEAD sur la racine: DNS + TCP + TLS faits, connexion rendue au pool
+        async with session.head(
+            f"https://{host}/",
+            allow_redirects=False,
+            timeout=aiohttp.ClientTimeout(total=WARMUP_TIMEOUT_SECONDS),
+        ):
+            return True
+    except Exception as e:
+        logger.debug(f"[HTTP] Warmup {host} failed: {e}")
+        return False
+
+
+async def warm_connections(
+    session: aiohttp.ClientSession,
+    hosts: Optional[Iterable[str]] = None
+) -> int:
+    """
+    Pré-ouvre une connexion keep-alive vers chaque hôte chaud (en parallèle).
+
+    Args:
+        hosts: Hôtes à préchauffer (défaut: ceux marqués warm dans HOST_POOL_LIMITS)
+
+    Returns:
+        Nombre d'hôtes joignables
+    """
+    if hosts is None:
+        hosts = [host for host, conf in HOST_POOL_LIMITS.items() if conf.get("warm")]
+    hosts = list(hosts)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(_warm_host(session, host) for host in hosts))
+    warmed = sum(results)
+    logger.info(
+        f"[HTTP] Warmed {warmed}/{len(hosts)} hosts in {(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+    return warmed
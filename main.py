@@ -7,17 +7,33 @@ Ne modifie aucun autre fichier.
 
 import asyncio
 import logging
-import aiohttp
 import hashlib
 import time
 from collections import defaultdict
-from typing import Dict
+from typing import Dict, List, Optional, Set
 
-from pool_fetchers import fetch_solana_pools, fetch_base_pools
+from http_transport import create_session, warm_connections
+from pool_fetchers import (
+    fetch_all_pools,
+    fetch_solana_pools,
+    fetch_base_pools,
+    get_snapshot_sections,
+    seed_pools_from_snapshot,
+    watched_pool_ids,
+)
+from pool_refresher import start_pool_refreshers, stop_pool_refreshers
+from pool_workers import pool_executor_enabled, warm_pool_executor
+from price_worker import stop_price_worker
+from solana_ws_stream import start_pool_stream, stop_pool_stream, watch_pools
+from snapshot_persistence import load_pool_snapshot, save_pool_snapshot
+from token_evaluation_cache import get_token_evaluation_cache
+from trade_sizing import size_opportunities
+from triangular_arbitrage import find_triangular_opportunities
 from utils import logger
-from arbitrage import compute_pool_arbitrage
+from arbitrage import find_pool_opportunities
+from cost_tables import get_cost_tables
 from telegram_bot import start_telegram_app, send_opportunity
-from config import CHECK_INTERVAL_SECONDS, TELEGRAM_CHAT_ID
+from config import CHECK_INTERVAL_SECONDS, SOLANA_WS_STREAM, TELEGRAM_CHAT_ID, TRIANGULAR_SCAN
 from token_loader import get_solana_tokens, get_base_tokens
 
 # ============================================================================ #
@@ -98,6 +114,69 @@ def record_notification(token: str, opportunity_hash: str):
         if v > cleanup_threshold
     }
 
+def compute_token_opportunities(token: str, pools: List[Dict]) -> List[Dict]:
+    """Paires de pools rentables du token (meilleure d'abord), mises en cache avec l'empreinte des pools."""
+    # Moins de 2 pools: pas d'arbitrage possible
+    opportunities = find_pool_opportunities(pools, token) if len(pools) >= 2 else []
+    get_token_evaluation_cache().store(token, pools, opportunities)
+    return opportunities
+
+
+async def evaluate_token(telegram_app, token: str, pools: List[Dict], cached: Optional[List[Dict]] = None):
+    """
+    Cherche les paires de pools rentables du token et envoie les opportunités
+    (meilleure d'abord). cached: opportunités encore valides (pools
+    inchangées depuis leur calcul, déjà dimensionnées), envoyées sans
+    réévaluation.
+    """
+    opportunities = cached
+    if opportunities is None:
+        opportunities = size_opportunities(compute_token_opportunities(token, pools))
+
+    for opp in opportunities:
+        details = opp["details"]
+        if details["pool_a"].get("stale") or details["pool_b"].get("stale"):
+            # Pool du snapshot disque pas encore rafraîchie: pas d'alerte
+            logger.debug(f"[MAIN] Skipping alert on stale pools for {token[:8]}")
+            continue
+        # Générer hash ordre-invariant pour anti-spam
+        buy_pool_id = opp.get("buy_pool_id", "")
+        sell_pool_id = opp.get("sell_pool_id", "")
+        opportunity_hash = generate_opportunity_hash(token, buy_pool_id, sell_pool_id)
+
+        # Vérifier anti-spam
+        if should_send_notification(token, opportunity_hash):
+            await send_opportunity(telegram_app, TELEGRAM_CHAT_ID, opp)
+            record_notification(token, opportunity_hash)
+            logger.info(f"[NOTIFICATION] Sent alert for {token[:8]} | Hash: {opportunity_hash[:8]}")
+            break  # token en cooldown (TOKEN_COOLDOWN): les suivantes seraient filtrées
+
+
+# ============================================================================
+# STREAMING (SOLANA_WS_STREAM)
+# ============================================================================
+
+async def stream_evaluation_loop(session, telegram_app, dirty: Set[str], wakeup: asyncio.Event):
+    """
+    Réévalue les seuls tokens dont une pool a changé on-chain: le stream a
+    déjà réécrit les pools dans le snapshot, fetch_solana_pools([token]) lit
+    donc l'état à jour sans I/O réseau.
+    """
+    watched = set(TOKENS_SOL)
+    while True:
+        await wakeup.wait()
+        wakeup.clear()
+        tokens = [token for token in dirty if token in watched]
+        dirty.clear()
+        for token in tokens:
+            try:
+                pools = await fetch_solana_pools([token], session)
+                await evaluate_token(telegram_app, token, pools)
+            except Exception as e:
+                logger.error(f"[STREAM] Evaluation error for {token[:8]}: {e}")
+            await asyncio.sleep(0)
+
+
 async def main():
     """
     Boucle principale du bot avec limitation de taux: 1 requête par token tous les 4 secondes.
@@ -109,60 +188,117 @@ async def main():
     all_tokens = TOKENS_SOL + TOKENS_BASE
     logger.info(f"[MAIN] Starting scan loop with {len(all_tokens)} tokens (1 token every 4 seconds)")
 
-    async with aiohttp.ClientSession() as session:
-        while True:
-            try:
-                # Récupérer les pools pour TOUS les tokens (une fois par cycle complet)
-                # Cette approche est plus efficace que de récupérer par token individuel
-                sol_pools = await fetch_solana_pools(TOKENS_SOL, session)
-                base_pools = await fetch_base_pools(TOKENS_BASE, session)
-
-                # Combiner toutes les pools
-                all_pools = sol_pools + base_pools
-
-                # Regrouper par token
-                pools_by_token = {}
-                for p in all_pools:
-                    pools_by_token.setdefault(p["token"], []).append(p)
-
-                logger.info(f"[MAIN] Retrieved {len(all_pools)} pools across {len(pools_by_token)} tokens")
-
-                # Traiter chaque token avec un délai de 4 secondes entre chaque
-                # Cela limite à 1 token traité par tranche de 4 secondes
-                for i, (token, pools) in enumerate(pools_by_token.items()):
-                    if len(pools) < 2:
-                        continue  # Pas assez de pools pour faire de l'arbitrage
-
-                    logger.debug(f"[MAIN] Processing token {token[:8]}... ({i+1}/{len(pools_by_token)})")
-
-                    # Comparer chaque paire de pools pour ce token
-                    n = len(pools)
-                    for ii in range(n):
-                        for jj in range(ii + 1, n):
-                            opp = compute_pool_arbitrage(pools[ii], pools[jj], token)
-                            if opp:
-                                # Générer hash ordre-invariant pour anti-spam
-                                buy_pool_id = opp.get("buy_pool_id", "")
-                                sell_pool_id = opp.get("sell_pool_id", "")
-                                opportunity_hash = generate_opportunity_hash(token, buy_pool_id, sell_pool_id)
-
-                                # Vérifier anti-spam
-                                if should_send_notification(token, opportunity_hash):
-                                    await send_opportunity(telegram_app, TELEGRAM_CHAT_ID, opp)
-                                    record_notification(token, opportunity_hash)
-                                    logger.info(f"[NOTIFICATION] Sent alert for {token[:8]} | Hash: {opportunity_hash[:8]}")
-
-                    # Attendre 50-100ms entre chaque token pour éviter les bursts API
-                    if i < len(pools_by_token) - 1:
-                        await asyncio.sleep(0.05)  # 50ms delay between tokens
-
-                # Attendre entre les cycles complets (tous les tokens scannés)
-                logger.info(f"[MAIN] Cycle completed, waiting {CHECK_INTERVAL_SECONDS}s before next cycle...")
-                await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+    # Tables du modèle de coûts (slippage, impact, MEV, confiance), avant le premier cycle
+    logger.info(f"[MAIN] Cost tables built ({get_cost_tables().cells} cells)")
 
-            except Exception as e:
-                logging.error(f"Main loop error: {e}")
-                await asyncio.sleep(5)
+    # POOL_EXECUTOR_MODE=process: forker les workers maintenant, tas encore petit
+    if pool_executor_enabled():
+        await warm_pool_executor()
+
+    # Démarrage à chaud: pools du dernier snapshot disque, marquées stale,
+    # évaluées tout de suite pendant que les fetchs frais tournent
+    snapshot = load_pool_snapshot()
+    if snapshot:
+        seed_pools_from_snapshot(snapshot)
+
+    async with create_session() as session:
+        # DNS + TLS vers les hôtes appelés à chaque cycle, avant le premier fetch
+        await warm_connections(session)
+
+        stream_task: Optional[asyncio.Task] = None
+        try:
+            # Un refresher par DEX Solana, chacun à sa cadence: fetch_solana_pools
+            # lit leur snapshot sans attendre le DEX le plus lent
+            start_pool_refreshers(session)
+
+            # Streaming des pools surveillées: un token est réévalué dès qu'une de
+            # ses pools change, sans attendre CHECK_INTERVAL_SECONDS
+            if SOLANA_WS_STREAM:
+                dirty: Set[str] = set()
+                wakeup = asyncio.Event()
+
+                def on_pool_update(tokens: Set[str]):
+                    dirty.update(tokens)
+                    wakeup.set()
+
+                start_pool_stream(session, on_pool_update)
+                stream_task = asyncio.create_task(
+                    stream_evaluation_loop(session, telegram_app, dirty, wakeup), name="stream-evaluation"
+                )
+
+            while True:
+                try:
+                    # Récupérer les pools pour TOUS les tokens (une fois par cycle complet)
+                    # Cette approche est plus efficace que de récupérer par token individuel
+                    sol_pools = await fetch_solana_pools(TOKENS_SOL, session)
+                    base_pools = await fetch_base_pools(TOKENS_BASE, session)
+                    if SOLANA_WS_STREAM or TRIANGULAR_SCAN:
+                        pool_snapshot = await fetch_all_pools(session)
+                    if SOLANA_WS_STREAM:
+                        watch_pools(watched_pool_ids(pool_snapshot, TOKENS_SOL))
+                    if TRIANGULAR_SCAN:
+                        # Cycles SOL -> X -> USDC -> SOL sur tout le graphe des pools
+                        for cycle in find_triangular_opportunities(pool_snapshot)[:3]:
+                            route = " -> ".join(mint[:6] for mint in cycle["tokens"])
+                            dexes = "/".join(hop["dex"] for hop in cycle["hops"])
+                            logger.info(
+                                f"[TRI] {route} via {dexes}: {cycle['profit_pct']:.2%} "
+                                f"(min liquidity ${cycle['min_liquidity_usd']:,.0f})"
+                            )
+
+                    # Persister le snapshot (écriture atomique hors boucle asyncio)
+                    await asyncio.to_thread(save_pool_snapshot, get_snapshot_sections())
+
+                    # Combiner toutes les pools
+                    all_pools = sol_pools + base_pools
+
+                    # Regrouper par token
+                    pools_by_token = {}
+                    for p in all_pools:
+                        pools_by_token.setdefault(p["token"], []).append(p)
+
+                    logger.info(f"[MAIN] Retrieved {len(all_pools)} pools across {len(pools_by_token)} tokens")
+
+                    # Seuls les tokens dont une pool a changé (prix, liquidité,
+                    # frais) sont réévalués; les autres reprennent leur résultat
+                    evaluation_cache = get_token_evaluation_cache()
+                    dirty_tokens = evaluation_cache.dirty_tokens(pools_by_token)
+                    logger.info(
+                        f"[MAIN] Dirty tokens: {len(dirty_tokens)}/{len(pools_by_token)} "
+                        f"({evaluation_cache.stats['last_dirty_ratio']:.0%})"
+                    )
+
+                    # Tailles optimales de toutes les nouvelles opportunités du cycle en une passe
+                    size_opportunities([
+                        opp
+                        for token, pools in pools_by_token.items() if token in dirty_tokens
+                        for opp in compute_token_opportunities(token, pools)
+                    ])
+
+                    for i, (token, pools) in enumerate(pools_by_token.items()):
+                        logger.debug(f"[MAIN] Processing token {token[:8]}... ({i+1}/{len(pools_by_token)})")
+                        await evaluate_token(telegram_app, token, pools, evaluation_cache.get(token))
+
+                        # Les envois Telegram passent par le rate limiter: plus de délai
+                        # fixe, on rend juste la main aux refreshers entre deux tokens
+                        await asyncio.sleep(0)
+
+                    # Attendre entre les cycles complets (tous les tokens scannés)
+                    logger.info(f"[MAIN] Cycle completed, waiting {CHECK_INTERVAL_SECONDS}s before next cycle...")
+                    await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+
+                except Exception as e:
+                    logging.error(f"Main loop error: {e}")
+                    await asyncio.sleep(5)
+        finally:
+            # Arrêt propre (annulation, Ctrl+C): tâche de réévaluation, websocket,
+            # refreshers et worker de prix fermés avant la session HTTP
+            if stream_task is not None:
+                stream_task.cancel()
+                await asyncio.gather(stream_task, return_exceptions=True)
+            await stop_pool_stream()
+            await stop_pool_refreshers()
+            await stop_price_worker()
 
 
 if __name__ == "__main__":
@@ -21,21 +21,55 @@ import asyncio
 import aiohttp
 import time
 import json
-from typing import List, Dict, Optional, Any
+import hashlib
+from collections import defaultdict
+from typing import List, Dict, Optional, Any, Tuple, Set, Iterable, Callable, Awaitable
 from utils import logger
+from pool_stream_parser import PoolStreamParser
+from singleflight import singleflight, graphql_key
+from pool_workers import pool_executor_enabled, normalize_dump_offloaded
+from pool_table import PoolTable
+from aerodrome_universe import get_aerodrome_universe
+from solana_rpc_reader import read_pools as read_onchain_pools
+from base_rpc_reader import read_base_pools
+from rate_limiter import (
+    PRIORITY_LOW,
+    PRIORITY_NORMAL,
+    acquire as acquire_rate_limit,
+    observe as observe_rate_limit,
+)
+from circuit_breaker import (
+    allow_request as breaker_allows,
+    record_failure as breaker_failure,
+    record_status as breaker_status,
+    record_success as breaker_success,
+)
+from pool_refresher import (
+    refreshers_running,
+    request_refresh,
+    wait_until_ready,
+    get_pools_snapshot,
+    get_snapshot_timestamps,
+    seed_snapshot,
+)
 from config import (
     RAYDIUM_POOLS_API,
     ORCA_WHIRLPOOLS_API,
     METEORA_POOLS_API,
     PHOENIX_MARKETS_API,
     LIFINITY_POOLS_API,
-    AERODROME_POOLS_API,
     KYBERSWAP_BASE_API,
+    SOLANA_RPC_POOLS,
+    CROSS_QUOTE_POOLS,
+    BASE_RPC_POOLS,
+    BASE_DISCOVERY_CONCURRENCY,
+    BASE_PROVIDER_CONCURRENCY,
 )
 from thegraph_fetcher import (
-    get_pool_from_subgraph,
+    get_pools_from_subgraph_batch,
     get_static_pools_for_pair,
     sqrt_price_x96_to_price,
+    subgraph_breaker_name,
 )
 
 # USDC mint pour calculer les prix en USDC
@@ -43,22 +77,41 @@ USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
 SOL_MINT = "So11111111111111111111111111111111111111112"
 BASE_USDC = "0x833589fcd6edb6e08f4c7c19962234ef8f82f18e"
 
+
+def solana_quote_mints() -> Tuple[str, ...]:
+    """Quotes des pools Solana scannées par token: SOL, plus USDC si CROSS_QUOTE_POOLS."""
+    return (SOL_MINT, USDC_MINT) if CROSS_QUOTE_POOLS else (SOL_MINT,)
+
 # ============================================================================
 # CACHE INTELLIGENT PAR (CHAIN, DEX, TOKEN) - TTL DYNAMIQUE
 # ============================================================================
 _smart_cache: Dict[str, Dict[str, Any]] = {}  # key: f"{chain}_{dex}_{token}", value: {"data": [...], "timestamp": float, "ttl": int}
 MAX_RETRIES = 3  # Nombre max de tentatives
 INITIAL_RETRY_DELAY = 1  # Délai initial en secondes
-DEX_DOWN_TTL_SECONDS = 300  # TTL pour marquer un DEX down
-_dex_down_until: Dict[str, float] = {}
 
 # Cache global pour fetch_all_pools (legacy)
 _pools_cache: Optional[Dict[str, List[Dict[str, Any]]]] = None
 _cache_timestamp: float = 0.0
 CACHE_TTL_SECONDS = 30  # TTL du cache global (30 secondes)
 
-# Cache pour fetch_base_pools
-_base_cache: Dict[str, Any] = {"timestamp": 0.0, "data": []}
+# Index inversé (token_mint, base_mint) -> pools, reconstruit une fois par snapshot
+_pools_index: Optional[Dict[Tuple[str, str], List[Dict[str, Any]]]] = None
+_pools_index_source: Optional[Dict[str, List[Dict[str, Any]]]] = None
+
+# Cache pour fetch_base_pools ("stale": données du snapshot disque, revalidées en tâche de fond)
+_base_cache: Dict[str, Any] = {"timestamp": 0.0, "data": [], "stale": False}
+_base_revalidation: Optional[asyncio.Task] = None
+
+# Watchlist des mints Solana (tokens surveillés + SOL/USDC) pour le parsing élagué
+_pool_watchlist: Set[str] = set()
+STREAM_CHUNK_SIZE = 64 * 1024  # Taille des chunks lus depuis le body HTTP
+_stream_stats: Dict[str, Dict[str, Any]] = {}  # dex -> stats du dernier parsing streaming
+_watchlist_version = 0  # incrémenté à chaque ajout: invalide les résultats parsés réutilisables
+
+# GET conditionnels: validateurs HTTP + hash du body + dernier résultat parsé, par URL
+_http_validators: Dict[str, Dict[str, Any]] = {}
+_conditional_stats: Dict[str, Dict[str, int]] = {}  # dex -> compteurs
+NOT_MODIFIED = object()  # Sentinelle: payload inchangé, réutiliser get_reusable_parsed(url)
 
 
 def _get_cache_key(chain: str, dex: str, token: str = "") -> str:
@@ -110,6 +163,115 @@ def _set_cached_data(cache_key: str, data: List[Dict[str, Any]], avg_liquidity:
     logger.debug(f"[CACHE] Cached {len(data)} items for {cache_key} (TTL: {ttl}s)")
 
 
+# ============================================================================
+# WATCHLIST DES MINTS (PARSING ÉLAGUÉ)
+# ============================================================================
+
+def get_pool_watchlist() -> Set[str]:
+    """
+    Retourne les mints dont les pools sont conservées au parsing.
+
+    Initialisée depuis tokens.json (Solana) + SOL/USDC si vide.
+    """
+    if not _pool_watchlist:
+        from token_loader import get_solana_tokens  # import retardé (lecture fichier)
+        _pool_watchlist.update(get_solana_tokens())
+        _pool_watchlist.update((SOL_MINT, USDC_MINT))
+    return _pool_watchlist
+
+
+def watch_mints(mints: Iterable[str]) -> bool:
+    """
+    Ajoute des mints à la watchlist.
+
+    Returns:
+        True si la watchlist a changé: le snapshot en cache ne contient pas
+        les pools de ces mints et est invalidé.
+    """
+    global _cache_timestamp, _watchlist_version
+
+    watchlist = get_pool_watchlist()
+    new_mints = {m for m in mints if m and m not in watchlist}
+    if not new_mints:
+        return False
+    watchlist.update(new_mints)
+    _watchlist_version += 1
+    _cache_timestamp = 0.0
+    request_refresh()  # refreshers actifs: refetch immédiat au lieu d'attendre leur cadence
+    logger.info(f"[WATCHLIST] Added {len(new_mints)} mints (total: {len(watchlist)}), pool cache invalidated")
+    return True
+
+
+def get_stream_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats du dernier parsing streaming par DEX (bytes, pools_seen, pools_kept, stream_ms)."""
+    return {dex: dict(stats) for dex, stats in _stream_stats.items()}
+
+
+# ============================================================================
+# GET CONDITIONNELS (ETag / Last-Modified / hash du body)
+# ============================================================================
+
+def _conditional_counter(dex_name: str) -> Dict[str, int]:
+    return _conditional_stats.setdefault(dex_name.lower(), {
+        "requests": 0,
+        "not_modified": 0,
+        "hash_unchanged": 0,
+        "bytes_saved": 0,
+        "parses_skipped": 0,
+    })
+
+
+def _conditional_headers(url: str) -> Dict[str, str]:
+    """Headers If-None-Match / If-Modified-Since si un résultat parsé réutilisable existe."""
+    entry = _http_validators.get(url)
+    if not entry or get_reusable_parsed(url) is None:
+        return {}
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def get_reusable_parsed(url: str) -> Optional[Any]:
+    """Dernier résultat parsé pour cette URL, s'il a été produit avec la watchlist courante."""
+    entry = _http_validators.get(url)
+    if not entry or entry.get("watchlist_version") != _watchlist_version:
+        return None
+    return entry.get("parsed")
+
+
+def _body_unchanged(url: str, dex_name: str, digest: str) -> bool:
+    """
+    True si le body a le même hash que le dernier body parsé (endpoints sans
+    validateurs HTTP): le parsing / la normalisation peuvent être évités.
+    """
+    if get_reusable_parsed(url) is None or _http_validators[url].get("digest") != digest:
+        return False
+    counter = _conditional_counter(dex_name)
+    counter["hash_unchanged"] += 1
+    counter["parses_skipped"] += 1
+    logger.debug(f"{dex_name} payload unchanged (sha1 {digest[:8]}), reusing parsed pools")
+    return True
+
+
+def remember_parsed(url: str, parsed: Any):
+    """
+    Associe le résultat parsé aux validateurs/hash de la dernière réponse 200.
+    À appeler par le fetcher une fois la normalisation terminée.
+    """
+    entry = _http_validators.setdefault(url, {})
+    entry["watchlist_version"] = _watchlist_version
+    entry.update(entry.pop("pending", {}))  # version capturée au début de la réponse
+    entry["parsed"] = parsed
+
+
+def get_conditional_stats() -> Dict[str, Dict[str, int]]:
+    """Compteurs par DEX: requests, not_modified, hash_unchanged, bytes_saved, parses_skipped."""
+    return {dex: dict(counter) for dex, counter in _conditional_stats.items()}
+
+
 # ============================================================================
 # HELPER: RETRY WITH EXPONENTIAL BACKOFF
 # ============================================================================
@@ -119,38 +281,95 @@ async def fetch_with_retry(
     url: str,
     dex_name: str,
     timeout: int = 20,
-    max_retries: int = MAX_RETRIES
-) -> Optional[Dict]:
+    max_retries: int = MAX_RETRIES,
+    reader: Optional[Callable[[aiohttp.ClientResponse], Awaitable[Any]]] = None,
+    conditional: bool = False,
+    priority: int = PRIORITY_NORMAL
+) -> Optional[Any]:
     """
     Fetch avec retry exponentiel et gestion d'erreurs robuste.
     
+    Args:
+        reader: Lecture du body 200 (défaut: resp.json()). Une erreur pendant
+            la lecture déclenche un retry comme une erreur réseau.
+        conditional: Envoie If-None-Match / If-Modified-Since et compare le
+            hash du body au précédent. Le fetcher doit appeler
+            remember_parsed(url, ...) après normalisation.
+        priority: Priorité dans la file du rate limiter de l'hôte
+    
+    Chaque tentative passe par le circuit breaker de la source (dex_name en
+    minuscules): breaker ouvert, on abandonne sans requête.
+
     Returns:
-        Response JSON ou None si toutes les tentatives ont échoué
+        Response JSON (ou résultat de `reader`), NOT_MODIFIED si le payload
+        est inchangé (304 ou même hash), ou None si toutes les tentatives ont
+        échoué ou si le breaker est ouvert
     """
+    headers = _conditional_headers(url) if conditional else {}
+    breaker = dex_name.lower()
+
     for attempt in range(max_retries):
+        if not breaker_allows(breaker):
+            logger.debug(f"{dex_name} skipped (circuit open)")
+            return None
         try:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout, connect=5)) as resp:
+            await acquire_rate_limit(url, priority)
+            started = time.monotonic()
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout, connect=5)) as resp:
+                observe_rate_limit(url, resp.status, resp.headers)
+                if resp.status != 200:
+                    breaker_status(breaker, resp.status, time.monotonic() - started)
+                if conditional:
+                    _conditional_counter(dex_name)["requests"] += 1
+                if resp.status == 304 and conditional and headers:
+                    counter = _conditional_counter(dex_name)
+                    counter["not_modified"] += 1
+                    counter["parses_skipped"] += 1
+                    counter["bytes_saved"] += _http_validators[url].get("size", 0)
+                    logger.debug(f"{dex_name} not modified (304), reusing parsed pools")
+                    return NOT_MODIFIED
                 if resp.status == 200:
-                    data = await resp.json()
-                    return data
-                elif resp.status == 429:  # Rate limit
-                    wait_time = INITIAL_RETRY_DELAY * (2 ** attempt) + 1
-                    logger.warning(f"{dex_name} rate limited (429), retrying in {wait_time}s...")
-                    await asyncio.sleep(wait_time)
+                    if conditional:
+                        _http_validators.setdefault(url, {})["pending"] = {
+                            "etag": resp.headers.get("ETag"),
+                            "last_modified": resp.headers.get("Last-Modified"),
+                            "watchlist_version": _watchlist_version,
+                        }
+                    if reader is not None:
+                        result = await reader(resp)
+                        breaker_success(breaker, time.monotonic() - started)
+                        return result
+                    if not conditional:
+                        data = await resp.json()
+                        breaker_success(breaker, time.monotonic() - started)
+                        return data
+                    body = await resp.read()
+                    breaker_success(breaker, time.monotonic() - started)
+                    digest = hashlib.sha1(body).hexdigest()
+                    if _body_unchanged(url, dex_name, digest):
+                        remember_parsed(url, get_reusable_parsed(url))
+                        return NOT_MODIFIED
+                    _http_validators[url]["pending"].update({"digest": digest, "size": len(body)})
+                    return json.loads(body)
+                elif resp.status == 429:  # Rate limit: le limiter de l'hôte applique la pause
+                    logger.warning(f"{dex_name} rate limited (429), retrying (attempt {attempt + 1}/{max_retries})")
                     continue
                 else:
                     logger.warning(f"{dex_name} API returned status {resp.status} (attempt {attempt + 1}/{max_retries})")
                     if attempt < max_retries - 1:
                         await asyncio.sleep(INITIAL_RETRY_DELAY * (2 ** attempt))
         except asyncio.TimeoutError:
+            breaker_failure(breaker)
             logger.warning(f"{dex_name} timeout (attempt {attempt + 1}/{max_retries})")
             if attempt < max_retries - 1:
                 await asyncio.sleep(INITIAL_RETRY_DELAY * (2 ** attempt))
         except aiohttp.ClientError as e:
+            breaker_failure(breaker)
             logger.warning(f"{dex_name} client error: {e} (attempt {attempt + 1}/{max_retries})")
             if attempt < max_retries - 1:
                 await asyncio.sleep(INITIAL_RETRY_DELAY * (2 ** attempt))
         except Exception as e:
+            breaker_failure(breaker)
             logger.error(f"{dex_name} unexpected error: {e} (attempt {attempt + 1}/{max_retries})")
             if attempt < max_retries - 1:
                 await asyncio.sleep(INITIAL_RETRY_DELAY * (2 ** attempt))
@@ -158,13 +377,147 @@ async def fetch_with_retry(
     return None
 
 
+async def fetch_pool_stream(
+    session: aiohttp.ClientSession,
+    url: str,
+    dex_name: str,
+    array_keys: Tuple[str, ...],
+    timeout: int = 20,
+    prune: bool = True
+) -> Optional[Any]:
+    """
+    Fetch d'un dump de pools puis normalisation (normalize_pool_batch).
+
+    Mode inline (défaut): le body est consommé par chunks de STREAM_CHUNK_SIZE,
+    les pools dont les mints ne sont pas dans la watchlist sont écartées sur
+    les octets bruts, sans construire de dict Python. stream_ms couvre
+    lecture + parsing (entrelacés).
+
+    Mode process (POOL_EXECUTOR_MODE=process): le body brut est envoyé à un
+    worker de pool_workers qui parse et normalise hors de la boucle asyncio.
+
+    Le body est haché au fil des chunks: s'il est identique au dernier dump
+    normalisé (ou si le serveur répond 304), NOT_MODIFIED est renvoyé et
+    l'appelant réutilise get_reusable_parsed(url) sans renormaliser.
+
+    Args:
+        prune: Élaguer sur la watchlist (False pour les petits univers)
+
+    Returns:
+        (pools normalisées, stats), NOT_MODIFIED, ou None si échec
+    """
+    dex = dex_name.lower()
+
+    async def read_stream(resp: aiohttp.ClientResponse):
+        watchlist = get_pool_watchlist() if prune else None
+        parser = PoolStreamParser(array_keys, watchlist)
+        hasher = hashlib.sha1()
+        started = time.perf_counter()
+        candidates: List[Dict[str, Any]] = []
+        async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+            hasher.update(chunk)
+            candidates.extend(parser.feed(chunk))
+        candidates.extend(parser.close())
+        digest = hasher.hexdigest()
+        if _body_unchanged(url, dex_name, digest):
+            remember_parsed(url, get_reusable_parsed(url))
+            return NOT_MODIFIED
+        _http_validators[url]["pending"].update({"digest": digest, "size": parser.stats["bytes"]})
+        stats = dict(parser.stats)
+        stats["stream_ms"] = (time.perf_counter() - started) * 1000
+        return normalize_pool_batch(dex, candidates, watchlist), stats
+
+    async def read_offloaded(resp: aiohttp.ClientResponse):
+        started = time.perf_counter()
+        # Hash au fil des chunks: pas de pic de hachage du dump complet sur la boucle
+        hasher = hashlib.sha1()
+        parts: List[bytes] = []
+        async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+            hasher.update(chunk)
+            parts.append(chunk)
+        body = b"".join(parts)
+        digest = hasher.hexdigest()
+        if _body_unchanged(url, dex_name, digest):
+            remember_parsed(url, get_reusable_parsed(url))
+            return NOT_MODIFIED
+        _http_validators[url]["pending"].update({"digest": digest, "size": len(body)})
+        pools, stats = await normalize_dump_offloaded(
+            dex, body, array_keys, get_pool_watchlist() if prune else None
+        )
+        stats["stream_ms"] = (time.perf_counter() - started) * 1000
+        return pools, stats
+
+    return await fetch_with_retry(
+        session, url, dex_name, timeout=timeout,
+        reader=read_offloaded if pool_executor_enabled() else read_stream,
+        conditional=True
+    )
+
+
+def _record_stream_stats(dex: str, stats: Dict[str, Any], kept: int):
+    """Enregistre et logge les stats de parsing streaming d'un DEX."""
+    stats["pools_kept"] = kept
+    _stream_stats[dex] = stats
+    logger.info(
+        f"[STREAM] {dex}: {stats['bytes'] / 1e6:.1f} MB, "
+        f"{stats['pools_seen']} pools seen, {stats['pools_decoded']} decoded, "
+        f"{kept} kept in {stats['stream_ms']:.0f} ms"
+        + (f" (worker {stats['worker_ms']:.0f} ms)" if "worker_ms" in stats else "")
+    )
+
+
 # ============================================================================
 # RAYDIUM CLMM v3
 # ============================================================================
 
+def _parse_raydium_pool(pool: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Normalise une pool Raydium brute (None si incomplète)."""
+    pool_id = pool.get("poolId") or pool.get("id") or pool.get("address")
+    token_a = pool.get("tokenA") or pool.get("mintA") or pool.get("mint0")
+    token_b = pool.get("tokenB") or pool.get("mintB") or pool.get("mint1")
+    
+    # Prix peut être direct ou calculé depuis reserves
+    price = pool.get("price")
+    if not price:
+        # Calcul depuis reserves si disponible
+        reserve_a = pool.get("reserveA") or pool.get("reserve0")
+        reserve_b = pool.get("reserveB") or pool.get("reserve1")
+        if reserve_a and reserve_b and float(reserve_a) > 0:
+            price = float(reserve_b) / float(reserve_a)
+    
+    liquidity = float(pool.get("liquidity", 0) or pool.get("tvl", 0) or 0)
+    
+    # Frais en bps ou en pourcentage
+    fee_rate = pool.get("feeRate") or pool.get("fee") or 0
+    if isinstance(fee_rate, str):
+        fee_rate = float(fee_rate)
+    
+    # Convertir en bps si nécessaire (0.25% = 25 bps)
+    if fee_rate < 1:  # Probablement en pourcentage (0.0025)
+        fee_bps = int(fee_rate * 10000)
+    else:
+        fee_bps = int(fee_rate)
+    
+    fee_pct = fee_bps / 10000.0
+    
+    if not (pool_id and token_a and token_b):
+        return None
+    return {
+        "pool_id": pool_id,
+        "dex": "raydium",
+        "token_a": token_a,
+        "token_b": token_b,
+        "price": float(price) if price else None,
+        "liquidity_usd": liquidity,
+        "fee_bps": fee_bps,
+        "fee_pct": fee_pct,
+        "pool_type": "CLMM",
+    }
+
+
 async def fetch_raydium_pools(session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
     """
-    Récupère toutes les pools Raydium CLMM v3.
+    Récupère les pools Raydium CLMM v3 de la watchlist (parsing streaming élagué).
     
     Endpoint: https://api.raydium.io/v2/amm/pools (ou v3)
     
@@ -174,56 +527,14 @@ async def fetch_raydium_pools(session: aiohttp.ClientSession) -> List[Dict[str,
     url = RAYDIUM_POOLS_API
     pools = []
     
-    data = await fetch_with_retry(session, url, "Raydium", timeout=15)
-    if data:
-        # Format peut varier selon l'API
-        pools_data = data.get("data", []) if isinstance(data, dict) else data
-        
-        for pool in pools_data:
-                    try:
-                        pool_id = pool.get("poolId") or pool.get("id") or pool.get("address")
-                        token_a = pool.get("tokenA") or pool.get("mintA") or pool.get("mint0")
-                        token_b = pool.get("tokenB") or pool.get("mintB") or pool.get("mint1")
-                        
-                        # Prix peut être direct ou calculé depuis reserves
-                        price = pool.get("price")
-                        if not price:
-                            # Calcul depuis reserves si disponible
-                            reserve_a = pool.get("reserveA") or pool.get("reserve0")
-                            reserve_b = pool.get("reserveB") or pool.get("reserve1")
-                            if reserve_a and reserve_b and float(reserve_a) > 0:
-                                price = float(reserve_b) / float(reserve_a)
-                        
-                        liquidity = float(pool.get("liquidity", 0) or pool.get("tvl", 0) or 0)
-                        
-                        # Frais en bps ou en pourcentage
-                        fee_rate = pool.get("feeRate") or pool.get("fee") or 0
-                        if isinstance(fee_rate, str):
-                            fee_rate = float(fee_rate)
-                        
-                        # Convertir en bps si nécessaire (0.25% = 25 bps)
-                        if fee_rate < 1:  # Probablement en pourcentage (0.0025)
-                            fee_bps = int(fee_rate * 10000)
-                        else:
-                            fee_bps = int(fee_rate)
-                        
-                        fee_pct = fee_bps / 10000.0
-                        
-                        if pool_id and token_a and token_b:
-                            pools.append({
-                                "pool_id": pool_id,
-                                "dex": "raydium",
-                                "token_a": token_a,
-                                "token_b": token_b,
-                                "price": float(price) if price else None,
-                                "liquidity_usd": liquidity,
-                                "fee_bps": fee_bps,
-                                "fee_pct": fee_pct,
-                                "pool_type": "CLMM",
-                            })
-                    except Exception as e:
-                        logger.debug(f"Error parsing Raydium pool: {e}")
-                        continue
+    result = await fetch_pool_stream(session, url, "Raydium", ("data",), timeout=15)
+    if result is NOT_MODIFIED:
+        pools = get_reusable_parsed(url)
+    elif result is not None:
+        pools, stats = result
+        pools = PoolTable.from_dicts(pools)
+        _record_stream_stats("raydium", stats, len(pools))
+        remember_parsed(url, pools)
     else:
         logger.warning("Raydium: All retry attempts failed")
     
@@ -235,9 +546,68 @@ async def fetch_raydium_pools(session: aiohttp.ClientSession) -> List[Dict[str,
 # ORCA WHIRLPOOL
 # ============================================================================
 
+def _parse_orca_whirlpool(wp: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Normalise une Whirlpool Orca brute (None si incomplète)."""
+    pool_id = wp.get("address") or wp.get("whirlpool")
+    token_a = wp.get("tokenA") or wp.get("tokenMintA")
+    token_b = wp.get("tokenB") or wp.get("tokenMintB")
+    # L'API v1 renvoie tokenA/tokenB sous forme d'objets {mint, decimals, ...}
+    decimals_a = wp.get("tokenADecimals", 9)
+    decimals_b = wp.get("tokenBDecimals", 9)
+    if isinstance(token_a, dict):
+        decimals_a = token_a.get("decimals", decimals_a)
+        token_a = token_a.get("mint")
+    if isinstance(token_b, dict):
+        decimals_b = token_b.get("decimals", decimals_b)
+        token_b = token_b.get("mint")
+    
+    # Orca utilise sqrtPrice (Q64.64 format)
+    sqrt_price = wp.get("sqrtPrice") or wp.get("price")
+    price = None
+    
+    if sqrt_price:
+        try:
+            # Conversion sqrtPrice → price
+            # sqrtPrice est en Q64.64, il faut le convertir
+            sqrt_val = float(sqrt_price)
+            # Approximation: price ≈ (sqrtPrice / 2^64)^2
+            # Simplification pour le calcul
+            price = (sqrt_val / (2**64))**2
+            
+            # Ajuster selon les decimals si disponibles
+            decimals_a = int(decimals_a)
+            decimals_b = int(decimals_b)
+            if decimals_a != decimals_b:
+                price *= (10 ** (decimals_a - decimals_b))
+        except (ValueError, TypeError):
+            pass
+    
+    liquidity = float(wp.get("liquidity", 0) or wp.get("tvl", 0) or 0)
+    
+    # Fee tier en bps (300 = 0.3%, 2200 = 0.22%, etc.)
+    fee_tier = int(wp.get("feeTier", 0) or wp.get("fee", 300))
+    fee_bps = fee_tier if fee_tier > 0 else 300  # Default 0.3%
+    fee_pct = fee_bps / 10000.0
+    
+    if not (pool_id and token_a and token_b):
+        return None
+    return {
+        "pool_id": pool_id,
+        "dex": "orca",
+        "token_a": token_a,
+        "token_b": token_b,
+        "price": price,
+        "liquidity_usd": liquidity,
+        "fee_bps": fee_bps,
+        "fee_pct": fee_pct,
+        "pool_type": "Whirlpool",
+        "sqrt_price": sqrt_price,
+    }
+
+
 async def fetch_orca_whirlpools(session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
     """
-    Récupère toutes les Whirlpools Orca.
+    Récupère les Whirlpools Orca de la watchlist (parsing streaming élagué).
     
     Endpoint: https://api.mainnet.orca.so/v1/whirlpool/list
     
@@ -247,60 +617,14 @@ async def fetch_orca_whirlpools(session: aiohttp.ClientSession) -> List[Dict[str
     url = ORCA_WHIRLPOOLS_API
     pools = []
     
-    data = await fetch_with_retry(session, url, "Orca", timeout=15)
-    if data:
-        whirlpools = data.get("whirlpools", []) if isinstance(data, dict) else data
-        
-        for wp in whirlpools:
-                    try:
-                        pool_id = wp.get("address") or wp.get("whirlpool")
-                        token_a = wp.get("tokenA") or wp.get("tokenMintA")
-                        token_b = wp.get("tokenB") or wp.get("tokenMintB")
-                        
-                        # Orca utilise sqrtPrice (Q64.64 format)
-                        sqrt_price = wp.get("sqrtPrice") or wp.get("price")
-                        price = None
-                        
-                        if sqrt_price:
-                            try:
-                                # Conversion sqrtPrice → price
-                                # sqrtPrice est en Q64.64, il faut le convertir
-                                sqrt_val = float(sqrt_price)
-                                # Approximation: price ≈ (sqrtPrice / 2^64)^2
-                                # Simplification pour le calcul
-                                price = (sqrt_val / (2**64))**2
-                                
-                                # Ajuster selon les decimals si disponibles
-                                decimals_a = int(wp.get("tokenADecimals", 9))
-                                decimals_b = int(wp.get("tokenBDecimals", 9))
-                                if decimals_a != decimals_b:
-                                    price *= (10 ** (decimals_a - decimals_b))
-                            except (ValueError, TypeError):
-                                pass
-                        
-                        liquidity = float(wp.get("liquidity", 0) or wp.get("tvl", 0) or 0)
-                        
-                        # Fee tier en bps (300 = 0.3%, 2200 = 0.22%, etc.)
-                        fee_tier = int(wp.get("feeTier", 0) or wp.get("fee", 300))
-                        fee_bps = fee_tier if fee_tier > 0 else 300  # Default 0.3%
-                        fee_pct = fee_bps / 10000.0
-                        
-                        if pool_id and token_a and token_b:
-                            pools.append({
-                                "pool_id": pool_id,
-                                "dex": "orca",
-                                "token_a": token_a,
-                                "token_b": token_b,
-                                "price": price,
-                                "liquidity_usd": liquidity,
-                                "fee_bps": fee_bps,
-                                "fee_pct": fee_pct,
-                                "pool_type": "Whirlpool",
-                                "sqrt_price": sqrt_price,
-                            })
-                    except Exception as e:
-                        logger.debug(f"Error parsing Orca pool: {e}")
-                        continue
+    result = await fetch_pool_stream(session, url, "Orca", ("whirlpools",), timeout=15)
+    if result is NOT_MODIFIED:
+        pools = get_reusable_parsed(url)
+    elif result is not None:
+        pools, stats = result
+        pools = PoolTable.from_dicts(pools)
+        _record_stream_stats("orca", stats, len(pools))
+        remember_parsed(url, pools)
     else:
         logger.warning("Orca: All retry attempts failed")
     
@@ -312,9 +636,40 @@ async def fetch_orca_whirlpools(session: aiohttp.ClientSession) -> List[Dict[str
 # METEORA DLMM
 # ============================================================================
 
+def _parse_meteora_pool(pool: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Normalise une pool Meteora DLMM brute (None si incomplète)."""
+    pool_id = pool.get("address") or pool.get("pool_id")
+    mint_x = pool.get("mint_x") or pool.get("tokenMintX")
+    mint_y = pool.get("mint_y") or pool.get("tokenMintY")
+    
+    # Meteora utilise current_price directement
+    current_price = pool.get("current_price") or pool.get("price")
+    price = float(current_price) if current_price else None
+    
+    liquidity = float(pool.get("liquidity", 0) or pool.get("tvl", 0) or 0)
+    
+    # Fee en bps
+    fee_bps = int(pool.get("fee_bps", 0) or pool.get("feeBps", 0) or 100)  # Default 0.1%
+    fee_pct = fee_bps / 10000.0
+    
+    if not (pool_id and mint_x and mint_y and price):
+        return None
+    return {
+        "pool_id": pool_id,
+        "dex": "meteora",
+        "token_a": mint_x,
+        "token_b": mint_y,
+        "price": price,
+        "liquidity_usd": liquidity,
+        "fee_bps": fee_bps,
+        "fee_pct": fee_pct,
+        "pool_type": "DLMM",
+    }
+
+
 async def fetch_meteora_pools(session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
     """
-    Récupère toutes les pools Meteora DLMM.
+    Récupère les pools Meteora DLMM de la watchlist (parsing streaming élagué).
     
     Endpoint: https://dlmm-api.meteora.ag/pools
     
@@ -324,41 +679,14 @@ async def fetch_meteora_pools(session: aiohttp.ClientSession) -> List[Dict[str,
     url = "https://dlmm-api.meteora.ag/pools"
     pools = []
     
-    data = await fetch_with_retry(session, url, "Meteora", timeout=15)
-    if data:
-        pools_data = data if isinstance(data, list) else data.get("pools", [])
-        
-        for pool in pools_data:
-                    try:
-                        pool_id = pool.get("address") or pool.get("pool_id")
-                        mint_x = pool.get("mint_x") or pool.get("tokenMintX")
-                        mint_y = pool.get("mint_y") or pool.get("tokenMintY")
-                        
-                        # Meteora utilise current_price directement
-                        current_price = pool.get("current_price") or pool.get("price")
-                        price = float(current_price) if current_price else None
-                        
-                        liquidity = float(pool.get("liquidity", 0) or pool.get("tvl", 0) or 0)
-                        
-                        # Fee en bps
-                        fee_bps = int(pool.get("fee_bps", 0) or pool.get("feeBps", 0) or 100)  # Default 0.1%
-                        fee_pct = fee_bps / 10000.0
-                        
-                        if pool_id and mint_x and mint_y and price:
-                            pools.append({
-                                "pool_id": pool_id,
-                                "dex": "meteora",
-                                "token_a": mint_x,
-                                "token_b": mint_y,
-                                "price": price,
-                                "liquidity_usd": liquidity,
-                                "fee_bps": fee_bps,
-                                "fee_pct": fee_pct,
-                                "pool_type": "DLMM",
-                            })
-                    except Exception as e:
-                        logger.debug(f"Error parsing Meteora pool: {e}")
-                        continue
+    result = await fetch_pool_stream(session, url, "Meteora", ("pools",), timeout=15)
+    if result is NOT_MODIFIED:
+        pools = get_reusable_parsed(url)
+    elif result is not None:
+        pools, stats = result
+        pools = PoolTable.from_dicts(pools)
+        _record_stream_stats("meteora", stats, len(pools))
+        remember_parsed(url, pools)
     else:
         logger.warning("Meteora: All retry attempts failed")
     
@@ -370,6 +698,52 @@ async def fetch_meteora_pools(session: aiohttp.ClientSession) -> List[Dict[str,
 # LIFINITY v2
 # ============================================================================
 
+def _parse_lifinity_pool(pool: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Normalise une pool Lifinity brute (None si incomplète)."""
+    pool_id = pool.get("poolId") or pool.get("address") or pool.get("id")
+    token_a = pool.get("tokenAMint") or pool.get("tokenA")
+    token_b = pool.get("tokenBMint") or pool.get("tokenB")
+    
+    # Prix peut être direct
+    price = pool.get("price")
+    if price:
+        price = float(price)
+    else:
+        # Calcul depuis reserves
+        reserve_a = pool.get("reserveA")
+        reserve_b = pool.get("reserveB")
+        if reserve_a and reserve_b and float(reserve_a) > 0:
+            price = float(reserve_b) / float(reserve_a)
+    
+    liquidity = float(pool.get("liquidity", 0) or pool.get("tvl", 0) or 0)
+    
+    # Fee en pourcentage ou bps
+    fee = pool.get("fee") or pool.get("feeRate") or 0.002  # Default 0.2%
+    if isinstance(fee, str):
+        fee = float(fee)
+    
+    if fee < 1:  # Probablement en pourcentage
+        fee_bps = int(fee * 10000)
+    else:
+        fee_bps = int(fee)
+    
+    fee_pct = fee_bps / 10000.0
+    
+    if not (pool_id and token_a and token_b):
+        return None
+    return {
+        "pool_id": pool_id,
+        "dex": "lifinity",
+        "token_a": token_a,
+        "token_b": token_b,
+        "price": price,
+        "liquidity_usd": liquidity,
+        "fee_bps": fee_bps,
+        "fee_pct": fee_pct,
+        "pool_type": "PMM",
+    }
+
+
 async def fetch_lifinity_pools(session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
     """
     Récupère toutes les pools Lifinity v2.
@@ -382,56 +756,15 @@ async def fetch_lifinity_pools(session: aiohttp.ClientSession) -> List[Dict[str,
     url = "https://lifinity.io/api/getPools"
     pools = []
     
-    data = await fetch_with_retry(session, url, "Lifinity", timeout=15)
-    if data:
-        pools_data = data if isinstance(data, list) else data.get("pools", [])
-        
-        for pool in pools_data:
-                    try:
-                        pool_id = pool.get("poolId") or pool.get("address") or pool.get("id")
-                        token_a = pool.get("tokenAMint") or pool.get("tokenA")
-                        token_b = pool.get("tokenBMint") or pool.get("tokenB")
-                        
-                        # Prix peut être direct
-                        price = pool.get("price")
-                        if price:
-                            price = float(price)
-                        else:
-                            # Calcul depuis reserves
-                            reserve_a = pool.get("reserveA")
-                            reserve_b = pool.get("reserveB")
-                            if reserve_a and reserve_b and float(reserve_a) > 0:
-                                price = float(reserve_b) / float(reserve_a)
-                        
-                        liquidity = float(pool.get("liquidity", 0) or pool.get("tvl", 0) or 0)
-                        
-                        # Fee en pourcentage ou bps
-                        fee = pool.get("fee") or pool.get("feeRate") or 0.002  # Default 0.2%
-                        if isinstance(fee, str):
-                            fee = float(fee)
-                        
-                        if fee < 1:  # Probablement en pourcentage
-                            fee_bps = int(fee * 10000)
-                        else:
-                            fee_bps = int(fee)
-                        
-                        fee_pct = fee_bps / 10000.0
-                        
-                        if pool_id and token_a and token_b:
-                            pools.append({
-                                "pool_id": pool_id,
-                                "dex": "lifinity",
-                                "token_a": token_a,
-                                "token_b": token_b,
-                                "price": price,
-                                "liquidity_usd": liquidity,
-                                "fee_bps": fee_bps,
-                                "fee_pct": fee_pct,
-                                "pool_type": "PMM",
-                            })
-                    except Exception as e:
-                        logger.debug(f"Error parsing Lifinity pool: {e}")
-                        continue
+    # Univers réduit: pas d'élagage sur la watchlist
+    result = await fetch_pool_stream(session, url, "Lifinity", ("pools",), timeout=15, prune=False)
+    if result is NOT_MODIFIED:
+        pools = get_reusable_parsed(url)
+    elif result is not None:
+        pools, stats = result
+        pools = PoolTable.from_dicts(pools)
+        _record_stream_stats("lifinity", stats, len(pools))
+        remember_parsed(url, pools)
     else:
         logger.warning("Lifinity: All retry attempts failed")
     
@@ -443,6 +776,35 @@ async def fetch_lifinity_pools(session: aiohttp.ClientSession) -> List[Dict[str,
 # PHOENIX AMM (optionnel)
 # ============================================================================
 
+def _parse_phoenix_market(market: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Normalise un market Phoenix brut (None si incomplet)."""
+    pool_id = market.get("address") or market.get("marketId")
+    base_mint = market.get("baseMint")
+    quote_mint = market.get("quoteMint")
+    mid_price = market.get("midPrice") or market.get("price")
+    
+    if not (pool_id and base_mint and quote_mint and mid_price):
+        return None
+    price = float(mid_price)
+    liquidity = float(market.get("liquidity", 0) or 0)
+    
+    # Phoenix a des frais très faibles (0.04%)
+    fee_bps = 4  # 0.04%
+    fee_pct = 0.0004
+    
+    return {
+        "pool_id": pool_id,
+        "dex": "phoenix",
+        "token_a": base_mint,
+        "token_b": quote_mint,
+        "price": price,
+        "liquidity_usd": liquidity,
+        "fee_bps": fee_bps,
+        "fee_pct": fee_pct,
+        "pool_type": "OrderBook",
+    }
+
+
 async def fetch_phoenix_pools(session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
     """
     Récupère les markets Phoenix (order book, mais on peut extraire des infos).
@@ -455,40 +817,15 @@ async def fetch_phoenix_pools(session: aiohttp.ClientSession) -> List[Dict[str,
     url = PHOENIX_MARKETS_API
     pools = []
     
-    markets = await fetch_with_retry(session, url, "Phoenix", timeout=10)
-    if markets:
-        # markets est déjà une liste ou dict
-        markets_list = markets if isinstance(markets, list) else []
-        
-        for market in markets_list:
-                    try:
-                        pool_id = market.get("address") or market.get("marketId")
-                        base_mint = market.get("baseMint")
-                        quote_mint = market.get("quoteMint")
-                        mid_price = market.get("midPrice") or market.get("price")
-                        
-                        if pool_id and base_mint and quote_mint and mid_price:
-                            price = float(mid_price)
-                            liquidity = float(market.get("liquidity", 0) or 0)
-                            
-                            # Phoenix a des frais très faibles (0.04%)
-                            fee_bps = 4  # 0.04%
-                            fee_pct = 0.0004
-                            
-                            pools.append({
-                                "pool_id": pool_id,
-                                "dex": "phoenix",
-                                "token_a": base_mint,
-                                "token_b": quote_mint,
-                                "price": price,
-                                "liquidity_usd": liquidity,
-                                "fee_bps": fee_bps,
-                                "fee_pct": fee_pct,
-                                "pool_type": "OrderBook",
-                            })
-                    except Exception as e:
-                        logger.debug(f"Error parsing Phoenix market: {e}")
-                        continue
+    # markets est une liste racine (un dict ne contient pas de markets exploitables)
+    result = await fetch_pool_stream(session, url, "Phoenix", (), timeout=10, prune=False)
+    if result is NOT_MODIFIED:
+        pools = get_reusable_parsed(url)
+    elif result is not None:
+        pools, stats = result
+        pools = PoolTable.from_dicts(pools)
+        _record_stream_stats("phoenix", stats, len(pools))
+        remember_parsed(url, pools)
     else:
         logger.debug("Phoenix: All retry attempts failed")
     
@@ -496,6 +833,48 @@ async def fetch_phoenix_pools(session: aiohttp.ClientSession) -> List[Dict[str,
     return pools
 
 
+# ============================================================================
+# NORMALISATION PAR LOTS (INLINE OU PROCESS POOL)
+# ============================================================================
+
+_POOL_PARSERS: Dict[str, Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = {
+    "raydium": _parse_raydium_pool,
+    "orca": _parse_orca_whirlpool,
+    "meteora": _parse_meteora_pool,
+    "lifinity": _parse_lifinity_pool,
+    "phoenix": _parse_phoenix_market,
+}
+
+
+def normalize_pool_batch(
+    dex: str,
+    raw_pools: Iterable[Dict[str, Any]],
+    watchlist: Optional[Set[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Normalise un lot de pools brutes d'un DEX.
+
+    Utilisé inline (boucle asyncio) ou dans un worker de pool_workers.
+
+    Args:
+        watchlist: Si fourni, ne garde que les pools dont les deux mints y sont
+    """
+    parse = _POOL_PARSERS[dex]
+    pools = []
+    for raw in raw_pools:
+        try:
+            parsed = parse(raw)
+        except Exception as e:
+            logger.debug(f"Error parsing {dex} pool: {e}")
+            continue
+        if not parsed:
+            continue
+        if watchlist is not None and not (parsed["token_a"] in watchlist and parsed["token_b"] in watchlist):
+            continue
+        pools.append(parsed)
+    return pools
+
+
 # ============================================================================
 # FONCTION PRINCIPALE: FETCH ALL POOLS
 # ============================================================================
@@ -504,9 +883,13 @@ async def fetch_all_pools(session: aiohttp.ClientSession, use_cache: bool = True
     """
     Récupère toutes les pools de tous les DEX en parallèle avec cache.
     
+    Si les refreshers par DEX tournent (pool_refresher.start_pool_refreshers),
+    renvoie directement leur dernier snapshot publié, sans I/O réseau.
+    Sinon (scripts, tests), fetch groupé des 5 DEX avec cache TTL.
+    
     Args:
         session: aiohttp session
-        use_cache: Si True, utilise le cache si valide (TTL 30s)
+        use_cache: Si True, utilise le snapshot des refreshers ou le cache si valide (TTL 30s)
     
     Returns:
         {
@@ -519,6 +902,13 @@ async def fetch_all_pools(session: aiohttp.ClientSession, use_cache: bool = True
     """
     global _pools_cache, _cache_timestamp
     
+    # Refreshers actifs: chaque DEX publie à sa cadence, lecture sans attente réseau
+    if use_cache and refreshers_running():
+        await wait_until_ready()  # immédiat hors démarrage à froid
+        snapshot = get_pools_snapshot()
+        get_pool_index(snapshot)
+        return snapshot
+    
     # Vérifier le cache
     current_time = time.time()
     if use_cache and _pools_cache is not None and (current_time - _cache_timestamp) < CACHE_TTL_SECONDS:
@@ -526,6 +916,19 @@ async def fetch_all_pools(session: aiohttp.ClientSession, use_cache: bool = True
         logger.debug(f"Using cached pools (age: {cache_age:.1f}s)")
         return _pools_cache
     
+    # Cache froid/expiré: les appelants concurrents partagent un seul fetch.
+    # La clé inclut la version de la watchlist (les dumps sont élagués dessus).
+    return await singleflight(
+        f"solana_pools:v{_watchlist_version}",
+        lambda: _fetch_all_pools_uncached(session),
+    )
+
+
+async def _fetch_all_pools_uncached(session: aiohttp.ClientSession) -> Dict[str, List[Dict[str, Any]]]:
+    """Fetch groupé des 5 DEX, puis mise à jour du cache global et de l'index."""
+    global _pools_cache, _cache_timestamp
+    
+    current_time = time.time()
     logger.info("Fetching all pools from DEX...")
     
     # Récupérer toutes les pools en parallèle
@@ -569,10 +972,66 @@ async def fetch_all_pools(session: aiohttp.ClientSession, use_cache: bool = True
     
     _pools_cache = result
     _cache_timestamp = current_time
+
+    # Construire l'index une seule fois pour ce snapshot
+    get_pool_index(result)
     
     return result
 
 
+# ============================================================================
+# INDEX INVERSÉ: (TOKEN_MINT, BASE_MINT) -> POOLS
+# ============================================================================
+
+def build_pool_index(
+    all_pools: Dict[str, List[Dict[str, Any]]]
+) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+    """
+    Construit un index (token_mint, base_mint) -> pools sur un snapshot complet.
+
+    Chaque pool est enregistrée sous (token_a, token_b) et (token_b, token_a),
+    dans l'ordre de parcours des DEX: une recherche par paire renvoie donc les
+    mêmes pools, dans le même ordre, qu'un parcours complet du snapshot.
+    """
+    index: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for pools_list in all_pools.values():
+        if isinstance(pools_list, PoolTable):
+            entries = pools_list.iter_pairs()  # mints lus depuis les colonnes, vues partagées
+        else:
+            entries = ((pool.get("token_a"), pool.get("token_b"), pool) for pool in pools_list)
+        for token_a, token_b, pool in entries:
+            if not token_a or not token_b:
+                continue
+            index.setdefault((token_a, token_b), []).append(pool)
+            if token_a != token_b:
+                index.setdefault((token_b, token_a), []).append(pool)
+    return index
+
+
+def get_pool_index(
+    all_pools: Dict[str, List[Dict[str, Any]]]
+) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+    """
+    Retourne l'index du snapshot donné, reconstruit uniquement si le snapshot a changé.
+    """
+    global _pools_index, _pools_index_source
+
+    if _pools_index is None or _pools_index_source is not all_pools:
+        _pools_index = build_pool_index(all_pools)
+        _pools_index_source = all_pools
+        logger.debug(f"[INDEX] Built pool index: {len(_pools_index)} pairs")
+    return _pools_index
+
+
+def get_pools_for_pair(
+    all_pools: Dict[str, List[Dict[str, Any]]],
+    token_mint: str,
+    base_mint: str
+) -> List[Dict[str, Any]]:
+    """Retourne les pools brutes du snapshot pour la paire (token_mint, base_mint)."""
+    return get_pool_index(all_pools).get((token_mint, base_mint), [])
+
+
 # ============================================================================
 # HELPERS: THEGRAPH GENERIC QUERY
 # ============================================================================
@@ -590,23 +1049,40 @@ async def query_thegraph_pools(
     headers = {"Content-Type": "application/json"}
 
     async def post_graph(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Même requête déjà en vol (autre appelant concurrent): partager la réponse
+        return await singleflight(
+            graphql_key("thegraph", subgraph_url, payload),
+            lambda: post_graph_uncached(payload),
+        )
+
+    breaker = subgraph_breaker_name(subgraph_url)
+
+    async def post_graph_uncached(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         for attempt in range(MAX_RETRIES):
+            if not breaker_allows(breaker):
+                logger.debug("[thegraph] skipped (circuit open)")
+                return None
             try:
+                await acquire_rate_limit(subgraph_url)
+                started = time.monotonic()
                 async with session.post(
                     subgraph_url,
                     json=payload,
                     headers=headers,
                     timeout=aiohttp.ClientTimeout(total=20),
                 ) as resp:
+                    observe_rate_limit(subgraph_url, resp.status, resp.headers)
                     if resp.status == 200:
-                        return await resp.json()
+                        data = await resp.json()
+                        breaker_success(breaker, time.monotonic() - started)
+                        return data
+                    breaker_status(breaker, resp.status, time.monotonic() - started)
                     if resp.status == 429:
-                        wait = INITIAL_RETRY_DELAY * (2 ** attempt) + 1
-                        logger.warning(f"[thegraph] 429 on {subgraph_url}, retry in {wait}s")
-                        await asyncio.sleep(wait)
+                        logger.warning(f"[thegraph] 429 on {subgraph_url}, retrying")
                         continue
                     logger.warning(f"[thegraph] status {resp.status} on {subgraph_url}")
             except Exception as e:
+                breaker_failure(breaker)
                 logger.warning(f"[thegraph] error {e} (attempt {attempt+1}/{MAX_RETRIES})")
             await asyncio.sleep(INITIAL_RETRY_DELAY * (2 ** attempt))
         return None
@@ -639,35 +1115,191 @@ async def query_thegraph_pools(
     return pools
 
 
+# ============================================================================
+# SURCOUCHE ON-CHAIN (RPC getMultipleAccounts)
+# ============================================================================
+RPC_OVERLAY_DEXES = ("raydium", "orca", "meteora")
+ONCHAIN_UPDATE_TTL_SECONDS = 120  # mise à jour streamée ré-appliquée aux snapshots republiés
+
+# Dernier état on-chain streamé par pool: {pool_id: (timestamp, record)}
+_onchain_latest: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+# pool_id -> (dex, index de ligne), reconstruit une fois par snapshot
+_pool_locator: Dict[str, Tuple[str, int]] = {}
+_pool_locator_source: Optional[Dict[str, List[Dict[str, Any]]]] = None
+
+
+def watched_pool_ids(
+    all_pools: Dict[str, List[Dict[str, Any]]],
+    tokens: Iterable[str],
+    base_mint: Optional[str] = None
+) -> List[str]:
+    """
+    Adresses des pools (token, base_mint) lisibles on-chain (RPC_OVERLAY_DEXES).
+    base_mint None: toutes les quotes scannées (solana_quote_mints).
+    """
+    index = get_pool_index(all_pools)
+    bases = solana_quote_mints() if base_mint is None else (base_mint,)
+    pool_ids = [
+        pool.get("pool_id")
+        for token in tokens
+        for base in bases
+        for pool in index.get((token, base), [])
+        if pool.get("dex") in RPC_OVERLAY_DEXES and pool.get("pool_id")
+    ]
+    return list(dict.fromkeys(pool_ids))
+
+
+def _fresh_update(pool_id: str) -> bool:
+    entry = _onchain_latest.get(pool_id)
+    return entry is not None and time.time() - entry[0] < ONCHAIN_UPDATE_TTL_SECONDS
+
+
+def _current_pools() -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """Snapshot servi par fetch_all_pools (refreshers ou cache legacy)."""
+    return get_pools_snapshot() if refreshers_running() else _pools_cache
+
+
+def _write_row(pools: List[Dict[str, Any]], idx: int, record: Dict[str, Any]):
+    fields = dict(record)
+    if fields.get("liquidity_usd") is None:
+        fields.pop("liquidity_usd", None)  # garder la valeur REST
+    if isinstance(pools, PoolTable):
+        pools.update_row(idx, fields)
+    else:
+        pools[idx].update(fields)
+
+
+def _locate_pools(all_pools: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Tuple[str, int]]:
+    """
+    Locator pool_id -> (dex, ligne) du snapshot. Un nouveau snapshot (DEX
+    republié par son refresher) repart de l'état REST: les mises à jour
+    streamées encore fraîches y sont ré-appliquées.
+    """
+    global _pool_locator, _pool_locator_source
+
+    if _pool_locator_source is all_pools:
+        return _pool_locator
+    locator = {}
+    for dex in RPC_OVERLAY_DEXES:
+        for idx, pool in enumerate(all_pools.get(dex) or []):
+            pool_id = pool.get("pool_id")
+            if pool_id:
+                locator[pool_id] = (dex, idx)
+    _pool_locator, _pool_locator_source = locator, all_pools
+
+    now = time.time()
+    for pool_id, (updated_at, record) in list(_onchain_latest.items()):
+        if now - updated_at >= ONCHAIN_UPDATE_TTL_SECONDS:
+            del _onchain_latest[pool_id]
+        elif pool_id in locator:
+            dex, idx = locator[pool_id]
+            _write_row(all_pools[dex], idx, record)
+    return locator
+
+
+def apply_pool_update(record: Dict[str, Any]) -> bool:
+    """
+    Écrit en place un état on-chain (solana_rpc_reader.build_record) dans la
+    ligne de la pool du snapshot courant: les vues et l'index existants voient
+    le nouveau prix sans reconstruction.
+
+    Returns:
+        False si la pool n'est pas dans le snapshot (l'état est tout de même
+        retenu et appliqué au prochain snapshot qui la contient)
+    """
+    pool_id = record["pool_id"]
+    previous = _onchain_latest.get(pool_id)
+    if previous is not None and previous[1].get("slot", 0) > record.get("slot", 0):
+        return False  # notification plus ancienne que l'état retenu
+    _onchain_latest[pool_id] = (time.time(), record)
+
+    all_pools = _current_pools()
+    if not all_pools:
+        return False
+    location = _locate_pools(all_pools).get(pool_id)
+    if location is None:
+        return False
+    dex, idx = location
+    _write_row(all_pools[dex], idx, record)
+    return True
+
+
+async def overlay_onchain_pools(
+    session: aiohttp.ClientSession,
+    all_pools: Dict[str, List[Dict[str, Any]]],
+    tokens: Iterable[str],
+    base_mint: Optional[str] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Remplace l'état REST des pools (token, base_mint) par leur état on-chain
+    (base_mint None: toutes les quotes scannées).
+
+    Seules les pools des paires demandées sont lues (solana_rpc_reader, par
+    lots de 100). Les pools non lues ou non décodables gardent leur ligne
+    REST; liquidity_usd REST est conservée si l'état on-chain ne peut pas
+    être valorisé en USD.
+
+    Returns:
+        Nouveau snapshot (les DEX modifiés sont des PoolTable reconstruites),
+        ou all_pools inchangé si aucune pool n'a été lue
+    """
+    # Pools suivies en streaming: déjà à jour dans le snapshot
+    pool_ids = [pool_id for pool_id in watched_pool_ids(all_pools, tokens, base_mint) if not _fresh_update(pool_id)]
+    if not pool_ids:
+        return all_pools
+
+    fresh = {record["pool_id"]: record for record in await read_onchain_pools(session, pool_ids)}
+    if not fresh:
+        return all_pools
+
+    overlaid = dict(all_pools)
+    for dex in RPC_OVERLAY_DEXES:
+        pools = all_pools.get(dex) or []
+        if not any(pool.get("pool_id") in fresh for pool in pools):
+            continue
+        merged = []
+        for pool in pools:
+            record = fresh.get(pool.get("pool_id"))
+            if record is None:
+                merged.append(dict(pool))
+                continue
+            row = {**pool, **record}
+            if record["liquidity_usd"] is None:
+                row["liquidity_usd"] = pool.get("liquidity_usd")
+            merged.append(row)
+        overlaid[dex] = PoolTable.from_dicts(merged)
+    logger.info(f"[RPC] {len(fresh)}/{len(pool_ids)} watched pools refreshed on-chain")
+    return overlaid
+
+
 # ============================================================================
 # HELPERS: POOLS APLATIES PAR TOKEN (SOLANA / BASE)
 
 async def fetch_solana_pools(tokens: List[str], session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
     """
     Retourne toutes les pools SOLANA contenant les tokens demandés,
-    sous forme aplatie avec prix buy/sell, URLs et métadonnées.
+    sous forme aplatie avec prix buy/sell (en SOL, pools USDC converties
+    si CROSS_QUOTE_POOLS), URLs et métadonnées.
     """
-    from pool_prices import get_pool_prices_for_token  # import retardé pour éviter les cycles
+    from pool_prices import get_cross_quote_pool_prices  # import retardé pour éviter les cycles
 
+    # Les dumps DEX sont élagués sur la watchlist: s'assurer que ces tokens y sont
+    watch_mints(tokens)
     all_pools = await fetch_all_pools(session, use_cache=True)
-    results: List[Dict[str, Any]] = []
-
-    for token in tokens:
+    if SOLANA_RPC_POOLS:
         try:
-            token_pools = await get_pool_prices_for_token(
-                session=session,
-                token_mint=token,
-                base_mint=SOL_MINT,
-                all_pools=all_pools
-            )
-            for p in token_pools:
-                enriched = dict(p)
-                enriched["token"] = token
-                enriched["chain"] = "solana"
-                results.append(enriched)
+            all_pools = await overlay_onchain_pools(session, all_pools, tokens)
         except Exception as e:
-            logger.error(f"[fetch_solana_pools] Error for token {token[:8]}: {e}")
-            continue
+            logger.warning(f"[fetch_solana_pools] on-chain overlay failed, using REST pools: {e}")
+    results: List[Dict[str, Any]] = []
+
+    # Toutes les quotes en une passe sur l'index, mid SOL/USDC du même snapshot
+    quotes = solana_quote_mints()
+    pools_by_token = get_cross_quote_pool_prices(
+        all_pools, tokens, quotes[0], quotes[1:], extra_fields={"chain": "solana"}
+    )
+    for token_pools in pools_by_token.values():
+        results.extend(token_pools)
 
     logger.info(f"[fetch_solana_pools] Total pools flatten: {len(results)}")
     return results
@@ -683,32 +1315,103 @@ async def fetch_base_pools(tokens: List[str], session: aiohttp.ClientSession) ->
         logger.debug("[fetch_base_pools] Using Base cache")
         return list(_base_cache.get("data", []))
 
-    MIN_LIQ_USD = 100.0
-    results: List[Dict[str, Any]] = []
-    seen = set()
+    # Démarrage à chaud: servir le snapshot disque pendant que la cascade tourne
+    if _base_cache.get("stale") and _base_cache.get("data"):
+        _revalidate_base_pools(tokens, session)
+        logger.debug("[fetch_base_pools] Serving stale snapshot while revalidating")
+        return list(_base_cache["data"])
 
-    async def fetch_with_backoff(url: str, dex_name: str, timeout: int = 10) -> Optional[Dict[str, Any]]:
-        if _dex_down_until.get(dex_name, 0) > time.time():
-            logger.debug(f"[{dex_name}] skipped (down TTL)")
-            return None
+    # Appels concurrents pour les mêmes tokens: une seule cascade réseau
+    results = await singleflight(
+        "base_pools:" + ",".join(sorted(tokens)),
+        lambda: _fetch_base_pools_uncached(tokens, session),
+    )
+    return list(results)
 
-        for attempt in range(MAX_RETRIES):
-            try:
+
+def _on_base_revalidation_done(task: asyncio.Task):
+    # Tâche de fond sans appelant: l'exception doit être lue et loguée ici
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        logger.warning(f"[fetch_base_pools] Background revalidation failed: {error!r}")
+
+
+def _revalidate_base_pools(tokens: List[str], session: aiohttp.ClientSession):
+    """Lance (une fois) la cascade Base en tâche de fond."""
+    global _base_revalidation
+
+    if _base_revalidation is None or _base_revalidation.done():
+        _base_revalidation = asyncio.ensure_future(singleflight(
+            "base_pools:" + ",".join(sorted(tokens)),
+            lambda: _fetch_base_pools_uncached(tokens, session),
+        ))
+        _base_revalidation.add_done_callback(_on_base_revalidation_done)
+
+
+def _base_provider_slots() -> Dict[str, asyncio.Semaphore]:
+    """
+    Sémaphores par API de repli Base: BASE_PROVIDER_CONCURRENCY pour les
+    fournisseurs configurés, BASE_DISCOVERY_CONCURRENCY pour les autres.
+    """
+    slots: Dict[str, asyncio.Semaphore] = defaultdict(
+        lambda: asyncio.Semaphore(max(1, BASE_DISCOVERY_CONCURRENCY))
+    )
+    for provider, limit in BASE_PROVIDER_CONCURRENCY.items():
+        slots[provider] = asyncio.Semaphore(max(1, limit))
+    return slots
+
+
+async def _fetch_base_api(
+    session: aiohttp.ClientSession,
+    url: str,
+    dex_name: str,
+    provider_slots: Dict[str, asyncio.Semaphore],
+    timeout: int = 10
+) -> Optional[Dict[str, Any]]:
+    """GET JSON d'une API de repli Base avec breaker, rate limiter et backoff."""
+    for attempt in range(MAX_RETRIES):
+        if not breaker_allows(dex_name):
+            logger.debug(f"[{dex_name}] skipped (circuit open)")
+            return None
+        try:
+            async with provider_slots[dex_name]:
+                await acquire_rate_limit(url, PRIORITY_LOW)
+                started = time.monotonic()
                 async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+                    observe_rate_limit(url, resp.status, resp.headers)
                     if resp.status == 200:
-                        return await resp.json()
-                    if resp.status == 429:
-                        wait = INITIAL_RETRY_DELAY * (2 ** attempt) + 1
-                        logger.warning(f"[{dex_name}] 429 rate limit, retry in {wait}s")
-                        await asyncio.sleep(wait)
-                        continue
-                    logger.warning(f"[{dex_name}] status {resp.status} on {url}")
-            except Exception as e:
-                logger.warning(f"[{dex_name}] error {e} (attempt {attempt+1}/{MAX_RETRIES})")
-            await asyncio.sleep(INITIAL_RETRY_DELAY * (2 ** attempt))
+                        data = await resp.json()
+                        breaker_success(dex_name, time.monotonic() - started)
+                        return data
+                    breaker_status(dex_name, resp.status, time.monotonic() - started)
+            if resp.status == 429:
+                logger.warning(f"[{dex_name}] 429 rate limit, retrying")
+                continue
+            logger.warning(f"[{dex_name}] status {resp.status} on {url}")
+        except Exception as e:
+            breaker_failure(dex_name)
+            logger.warning(f"[{dex_name}] error {e} (attempt {attempt+1}/{MAX_RETRIES})")
+        await asyncio.sleep(INITIAL_RETRY_DELAY * (2 ** attempt))
 
-        _dex_down_until[dex_name] = time.time() + DEX_DOWN_TTL_SECONDS
-        return None
+    return None
+
+
+async def _fetch_base_pools_uncached(tokens: List[str], session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
+    """Cascade subgraphs → APIs → statique pour Base, puis mise à jour du cache."""
+    now = time.time()
+    MIN_LIQ_USD = 100.0
+    results: List[Dict[str, Any]] = []
+    seen = set()
+
+    # Tokens découverts en parallèle (BASE_DISCOVERY_CONCURRENCY), appels
+    # simultanés plafonnés par API de repli (BASE_PROVIDER_CONCURRENCY)
+    token_slots = asyncio.Semaphore(max(1, BASE_DISCOVERY_CONCURRENCY))
+    provider_slots = _base_provider_slots()
+
+    async def fetch_with_backoff(url: str, dex_name: str, timeout: int = 10) -> Optional[Dict[str, Any]]:
+        return await _fetch_base_api(session, url, dex_name, provider_slots, timeout)
 
     async def fetch_kyber_for_token(token: str) -> List[Dict[str, Any]]:
         pools: List[Dict[str, Any]] = []
@@ -763,72 +1466,56 @@ async def fetch_base_pools(tokens: List[str], session: aiohttp.ClientSession) ->
         return pools
 
     async def fetch_aerodrome_for_token(token: str) -> List[Dict[str, Any]]:
+        # Univers Aerodrome téléchargé une fois par cycle, indexé par token
         pools: List[Dict[str, Any]] = []
-        url = AERODROME_POOLS_API
-        data = await fetch_with_backoff(url, "aerodrome", timeout=15)
-        if not data:
+        universe = await get_aerodrome_universe(session)
+        if universe is None:
             return pools
-        items = data.get("data", []) if isinstance(data, dict) else data if isinstance(data, list) else []
-        for p in items:
-            try:
-                pid = p.get("address") or p.get("id")
-                t0 = p.get("token0", {})
-                t1 = p.get("token1", {})
-                token0 = t0.get("address")
-                token1 = t1.get("address")
-                if token0 != token and token1 != token:
-                    continue
-                price = None
-                reserve0 = float(p.get("reserve0", 0) or 0)
-                reserve1 = float(p.get("reserve1", 0) or 0)
-                if reserve0 > 0 and reserve1 > 0:
-                    price = reserve1 / reserve0
-                if not pid or not price or price <= 0:
-                    continue
-                fee_raw = float(p.get("fee", 0) or 0)
-                fee_bps = int(fee_raw * 10000) if fee_raw < 1 else int(fee_raw)
-                fee_pct = max(0.0, min(fee_bps / 10000.0, 0.05))
-                tvl = float(p.get("tvlUsd", 0) or p.get("liquidityUsd", 0) or 0)
-                if tvl < MIN_LIQ_USD:
-                    continue
-                buy_price = price if token == token0 else 1 / price
-                sell_price = 1 / price if token == token0 else price
-                key = f"{pid}-aerodrome-{token}"
-                if key in seen:
-                    continue
-                seen.add(key)
-                pools.append({
-                    "token": token,
-                    "pool_id": pid,
-                    "dex": "aerodrome",
-                    "buy_price": buy_price,
-                    "sell_price": sell_price,
-                    "fee_pct": fee_pct,
-                    "liquidity_usd": max(tvl, 0.0),
-                    "url": f"https://aerodrome.finance/pools/{pid}",
-                    "chain": "base",
-                })
-            except Exception as e:
-                logger.debug(f"[aerodrome] parse error: {e}")
+        for p in universe.pools_for_token(token):
+            pid = p["pool_id"]
+            price = p["price"]
+            tvl = p["liquidity_usd"]
+            if tvl < MIN_LIQ_USD:
+                continue
+            is_token0 = p["token0"].lower() == token.lower()
+            buy_price = price if is_token0 else 1 / price
+            sell_price = 1 / price if is_token0 else price
+            key = f"{pid}-aerodrome-{token}"
+            if key in seen:
                 continue
+            seen.add(key)
+            pools.append({
+                "token": token,
+                "pool_id": pid,
+                "dex": "aerodrome",
+                "buy_price": buy_price,
+                "sell_price": sell_price,
+                "fee_pct": p["fee_pct"],
+                "liquidity_usd": max(tvl, 0.0),
+                "url": f"https://aerodrome.finance/pools/{pid}",
+                "chain": "base",
+            })
         return pools
 
-    for token in tokens:
-        token_results: List[Dict[str, Any]] = []
+    # Niveau 1 : subgraphs (Uniswap / Pancake), une requête aliasée par
+    # subgraph pour tous les tokens au lieu de 2 requêtes par token
+    uni_pools, cake_pools = await asyncio.gather(
+        get_pools_from_subgraph_batch(session, tokens, BASE_USDC, "uniswap_v3", "base"),
+        get_pools_from_subgraph_batch(session, tokens, BASE_USDC, "pancake_v3", "base"),
+    )
 
-        # Niveau 1 : subgraphs (Uniswap / Pancake)
-        uni_pool = await get_pool_from_subgraph(session, token, BASE_USDC, "uniswap_v3", "base")
-        if uni_pool and uni_pool.get("liquidity_usd", 0) >= MIN_LIQ_USD:
-            token_results.append(uni_pool)
+    async def discover_token(token: str) -> List[Dict[str, Any]]:
+        token_results: List[Dict[str, Any]] = []
 
-        cake_pool = await get_pool_from_subgraph(session, token, BASE_USDC, "pancake_v3", "base")
-        if cake_pool and cake_pool.get("liquidity_usd", 0) >= MIN_LIQ_USD:
-            token_results.append(cake_pool)
+        for subgraph_pool in (uni_pools.get(token), cake_pools.get(token)):
+            if subgraph_pool and subgraph_pool.get("liquidity_usd", 0) >= MIN_LIQ_USD:
+                token_results.append(subgraph_pool)
 
         # Niveau 2 : APIs directes si rien
         if not token_results:
-            token_results.extend(await fetch_kyber_for_token(token))
-            token_results.extend(await fetch_aerodrome_for_token(token))
+            async with token_slots:
+                token_results.extend(await fetch_kyber_for_token(token))
+                token_results.extend(await fetch_aerodrome_for_token(token))
 
         # Niveau 3 : fallback statique
         if not token_results:
@@ -839,10 +1526,25 @@ async def fetch_base_pools(tokens: List[str], session: aiohttp.ClientSession) ->
 
         if not token_results:
             logger.warning(f"[fetch_base_pools] No pools for token {token[:8]}...")
+        return token_results
+
+    # Cascade par token inchangée; `seen` reste partagé (test + ajout sans
+    # await entre les deux). Résultats concaténés dans l'ordre des tokens.
+    for token_results in await asyncio.gather(*(discover_token(token) for token in tokens)):
         results.extend(token_results)
 
+    # Surcouche on-chain: état de toutes les pools découvertes en un multicall
+    if BASE_RPC_POOLS and results:
+        try:
+            fresh = {(r["token"], r["pool_id"]): r for r in await read_base_pools(session, results)}
+            results = [fresh.get((p["token"], p["pool_id"]), p) for p in results]
+            logger.info(f"[BASE RPC] {len(fresh)}/{len(results)} pools refreshed on-chain")
+        except Exception as e:
+            logger.warning(f"[fetch_base_pools] on-chain overlay failed, using API pools: {e}")
+
     _base_cache["timestamp"] = now
     _base_cache["data"] = list(results)
+    _base_cache["stale"] = False
 
     counts = {}
     for p in results:
@@ -858,3 +1560,45 @@ async def fetch_base_pools(tokens: List[str], session: aiohttp.ClientSession) ->
 
     return results
 
+
+# ============================================================================
+# SNAPSHOT DISQUE (DÉMARRAGE À CHAUD)
+# ============================================================================
+
+def get_snapshot_sections() -> Dict[str, Dict[str, Any]]:
+    """
+    Dernières pools normalisées par section pour snapshot_persistence:
+    {"solana/<dex>": {"updated_at", "pools"}, "base/pools": {...}}
+    """
+    sections: Dict[str, Dict[str, Any]] = {}
+    if refreshers_running():
+        timestamps = get_snapshot_timestamps()
+        for dex, pools in get_pools_snapshot().items():
+            sections[f"solana/{dex}"] = {"updated_at": timestamps.get(dex, 0.0), "pools": pools}
+    elif _pools_cache is not None:
+        for dex, pools in _pools_cache.items():
+            sections[f"solana/{dex}"] = {"updated_at": _cache_timestamp, "pools": pools}
+    if _base_cache.get("data"):
+        sections["base/pools"] = {"updated_at": _base_cache["timestamp"], "pools": _base_cache["data"]}
+    return sections
+
+
+def seed_pools_from_snapshot(sections: Dict[str, Dict[str, Any]]):
+    """
+    Injecte un snapshot disque (pools marquées "stale") dans le snapshot des
+    refreshers et le cache Base. Les fetchs frais les remplacent dès leur arrivée.
+    """
+    solana = {
+        name.split("/", 1)[1]: section
+        for name, section in sections.items()
+        if name.startswith("solana/")
+    }
+    if solana:
+        seed_snapshot(
+            {dex: PoolTable.from_dicts(section["pools"]) for dex, section in solana.items()},
+            {dex: section["updated_at"] for dex, section in solana.items()},
+        )
+
+    base = sections.get("base/pools")
+    if base and base["pools"] and not _base_cache.get("data"):
+        _base_cache.update({"timestamp": base["updated_at"], "data": base["pools"], "stale": True})
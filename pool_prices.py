@@ -3,13 +3,24 @@
 Module pour structurer les prix pool-to-pool.
 
 Ce module prend les pools récupérées par pool_fetchers.py et:
-1. Filtre les pools contenant un token spécifique
+1. Filtre les pools contenant un token spécifique (via l'index par paire)
 2. Calcule les prix buy/sell pour chaque pool
 3. Génère les URLs directes vers les pools
 4. Structure les données pour l'arbitrage pool-to-pool
+5. Convertit les pools TOKEN/USDC dans la quote SOL (cross-quote), pour
+   comparer toutes les pools d'un token entre elles
 """
-from typing import List, Dict, Optional, Any
-from pool_fetchers import fetch_all_pools, USDC_MINT, SOL_MINT
+from typing import Iterable, List, Dict, Optional, Any, Tuple
+from config import CROSS_QUOTE_MIN_BRIDGE_LIQUIDITY_USD
+from pool_fetchers import (
+    fetch_all_pools,
+    get_pool_index,
+    get_pools_for_pair,
+    watch_mints,
+    USDC_MINT,
+    SOL_MINT,
+)
+from pool_table import PoolRow, PoolTable
 from utils import logger
 
 
@@ -76,18 +87,33 @@ def get_pool_url(dex: str, pool_id: str, chain: str = "solana") -> str:
 # PRICE CALCULATION FROM POOLS
 # ============================================================================
 
+def _pool_url_column(table: PoolTable) -> List[Optional[str]]:
+    """URLs de toutes les pools d'une PoolTable (calculées une fois par table)."""
+    return [
+        get_pool_url(dex, pool_id) if dex else None
+        for dex, pool_id in zip(table.column("dex"), table.column("pool_id"))
+    ]
+
+
 def normalize_price_for_token(
     pool: Dict[str, Any],
     token_mint: str,
-    base_mint: str = SOL_MINT
+    base_mint: str = SOL_MINT,
+    extra_fields: Optional[Dict[str, Any]] = None,
+    bridge: Optional[Tuple[float, float]] = None
 ) -> Optional[Dict[str, Any]]:
     """
     Normalise le prix d'une pool pour un token spécifique.
     
     Args:
-        pool: Pool dict depuis pool_fetchers
+        pool: Pool dict (ou PoolRow) depuis pool_fetchers
         token_mint: Token à évaluer
         base_mint: Token de base (SOL ou USDC)
+        extra_fields: Champs ajoutés au résultat (ex: token, chain), sans recopie
+        bridge: (unités de quote commune par base_mint, fee de la pool de
+            conversion) si la pool est cotée dans une autre base que la quote
+            commune (voir get_quote_bridge); prix convertis, fee composée et
+            champ converted_from = base_mint
     
     Returns:
         {
@@ -126,7 +152,26 @@ def normalize_price_for_token(
     if buy_price is None or sell_price is None or buy_price <= 0 or sell_price <= 0:
         return None
     
-    return {
+    conversion = None
+    if bridge is not None:
+        # buy_price en token par base, sell_price en base par token
+        rate, bridge_fee_pct = bridge
+        buy_price /= rate
+        sell_price *= rate
+        fee_pct = 1 - (1 - (pool.get("fee_pct") or 0)) * (1 - bridge_fee_pct)
+        conversion = {"fee_pct": fee_pct, "fee_bps": round(fee_pct * 10000), "converted_from": base_mint}
+    
+    if isinstance(pool, PoolRow):
+        # Vue sur la ligne de la PoolTable: seuls les champs dérivés sont ajoutés
+        return pool.with_fields(
+            buy_price=buy_price,
+            sell_price=sell_price,
+            url=pool.table.derived("url", _pool_url_column)[pool.index],
+            **(conversion or {}),
+            **(extra_fields or {}),
+        )
+    
+    normalized = {
         "pool_id": pool.get("pool_id"),
         "dex": pool.get("dex"),
         "buy_price": buy_price,
@@ -137,6 +182,13 @@ def normalize_price_for_token(
         "url": get_pool_url(pool.get("dex"), pool.get("pool_id")),
         "pool_type": pool.get("pool_type"),
     }
+    if pool.get("stale"):
+        normalized["stale"] = True  # pool issue du snapshot disque, pas encore rafraîchie
+    if conversion:
+        normalized.update(conversion)
+    if extra_fields:
+        normalized.update(extra_fields)
+    return normalized
 
 
 # ============================================================================
@@ -147,7 +199,8 @@ async def get_pool_prices_for_token(
     session,
     token_mint: str,
     base_mint: str = SOL_MINT,
-    all_pools: Optional[Dict[str, List[Dict[str, Any]]]] = None
+    all_pools: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+    extra_fields: Optional[Dict[str, Any]] = None
 ) -> List[Dict[str, Any]]:
     """
     Retourne toutes les pools contenant un token avec leurs prix buy/sell.
@@ -157,6 +210,7 @@ async def get_pool_prices_for_token(
         token_mint: Token à analyser
         base_mint: Token de base (SOL ou USDC)
         all_pools: Pools déjà récupérées (optionnel, pour éviter de refetch)
+        extra_fields: Champs ajoutés à chaque pool retournée (voir normalize_price_for_token)
     
     Returns:
         Liste de pools structurées:
@@ -176,22 +230,115 @@ async def get_pool_prices_for_token(
     """
     # Récupérer toutes les pools si non fournies
     if all_pools is None:
+        # Les dumps sont élagués sur la watchlist: enregistrer la paire avant le fetch
+        watch_mints((token_mint, base_mint))
         all_pools = await fetch_all_pools(session)
     
     result = []
     
-    # Parcourir tous les DEX
-    for dex_name, pools_list in all_pools.items():
-        for pool in pools_list:
-            normalized = normalize_price_for_token(pool, token_mint, base_mint)
-            if normalized:
-                result.append(normalized)
+    # Lookup dans l'index du snapshot: seules les pools de la paire sont parcourues
+    for pool in get_pools_for_pair(all_pools, token_mint, base_mint):
+        normalized = normalize_price_for_token(pool, token_mint, base_mint, extra_fields)
+        if normalized:
+            result.append(normalized)
     
     logger.debug(f"Found {len(result)} pools for token {token_mint[:8]}...")
     
     return result
 
 
+# ============================================================================
+# CROSS-QUOTE: TOUTES LES POOLS D'UN TOKEN DANS UNE MÊME QUOTE
+# ============================================================================
+
+def get_quote_bridge(
+    all_pools: Dict[str, List[Dict[str, Any]]],
+    base_mint: str = USDC_MINT,
+    quote_mint: str = SOL_MINT,
+    min_liquidity_usd: float = CROSS_QUOTE_MIN_BRIDGE_LIQUIDITY_USD
+) -> Optional[Tuple[float, float]]:
+    """
+    Mid base_mint -> quote_mint du snapshot (ex. SOL par USDC): médiane des
+    pools de la paire pondérée par leur liquidité, robuste à une pool isolée
+    au prix décalé.
+    
+    Returns:
+        (unités de quote_mint par base_mint, fee de la pool la plus liquide),
+        ou None si aucune pool de la paire n'est assez liquide
+    """
+    samples = []
+    for pool in get_pools_for_pair(all_pools, base_mint, quote_mint):
+        price = pool.get("price")
+        liquidity = pool.get("liquidity_usd") or 0
+        if not price or price <= 0 or liquidity < min_liquidity_usd:
+            continue
+        # price = token_b par token_a
+        rate = price if pool.get("token_a") == base_mint else 1.0 / price
+        samples.append((rate, liquidity, pool.get("fee_pct") or 0))
+    if not samples:
+        return None
+    
+    samples.sort()
+    half = sum(liquidity for _, liquidity, _ in samples) / 2
+    cumulative = 0.0
+    for rate, liquidity, _ in samples:
+        cumulative += liquidity
+        if cumulative >= half:
+            break
+    return rate, max(samples, key=lambda sample: sample[1])[2]
+
+
+def get_cross_quote_pool_prices(
+    all_pools: Dict[str, List[Dict[str, Any]]],
+    tokens: Iterable[str],
+    quote_mint: str = SOL_MINT,
+    other_quotes: Iterable[str] = (USDC_MINT,),
+    extra_fields: Optional[Dict[str, Any]] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Pools de chaque token cotées dans quote_mint ou dans other_quotes, toutes
+    exprimées dans quote_mint.
+    
+    Les mids de conversion sont lus une fois dans le snapshot (get_quote_bridge);
+    chaque token est ensuite normalisé en une passe sur ses entrées de l'index,
+    toutes bases confondues. Une quote sans mid (pas de pool de conversion
+    liquide) est ignorée pour ce snapshot.
+    
+    Args:
+        extra_fields: Champs ajoutés à chaque pool, en plus de "token"
+    
+    Returns:
+        {token: [pools normalisées]}, pools de quote_mint d'abord
+    """
+    index = get_pool_index(all_pools)
+    bridges: Dict[str, Optional[Tuple[float, float]]] = {quote_mint: None}
+    for base in other_quotes:
+        bridge = get_quote_bridge(all_pools, base, quote_mint)
+        if bridge is None:
+            logger.warning(f"[CROSS-QUOTE] No liquid {base[:8]}/{quote_mint[:8]} pool, {base[:8]} pools skipped")
+            continue
+        bridges[base] = bridge
+    
+    direct_only = {quote_mint: None}
+    result: Dict[str, List[Dict[str, Any]]] = {}
+    for token in tokens:
+        if token == quote_mint:
+            # quote_mint coté en quote_mint: prix ~1 après conversion, rien à comparer
+            result[token] = []
+            continue
+        fields = {**(extra_fields or {}), "token": token}
+        pools = []
+        # Une autre quote (USDC) ne passe que par ses pools directes avec
+        # quote_mint: la convertir via un mid de quote fausserait prix et frais
+        for base, bridge in (direct_only if token in bridges else bridges).items():
+            for pool in index.get((token, base), ()):
+                normalized = normalize_price_for_token(pool, token, base, fields, bridge)
+                if normalized:
+                    pools.append(normalized)
+        result[token] = pools
+    return result
+
+
 # ============================================================================
 # HELPER: FILTER POOLS BY LIQUIDITY
 # ============================================================================
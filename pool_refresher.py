@@ -0,0 +1,282 @@
+# pool_refresher.py
+"""
+Rafraîchisseurs de pools indépendants par DEX Solana.
+
+Chaque DEX (Raydium, Orca, Meteora, Lifinity, Phoenix) tourne dans sa propre
+tâche asyncio avec sa cadence, son timeout et son backoff. Chaque fetch
+réussi publie les pools du DEX dans un snapshot partagé et versionné:
+- un DEX lent (Raydium) ne retarde plus les autres
+- les DEX rapides sont rafraîchis plus souvent
+- les lecteurs (fetch_all_pools) lisent le dernier snapshot sans I/O réseau
+
+Le snapshot est copy-on-write: chaque publication crée un nouveau dict, un
+lecteur qui a récupéré un snapshot le garde cohérent pendant son calcul, et
+l'index par paire de pool_fetchers est reconstruit une fois par version.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import aiohttp
+
+from utils import logger
+
+# ============================================================================
+# CONFIGURATION PAR DEX
+# ============================================================================
+# interval: cadence nominale (s) entre deux fetchs réussis
+# timeout: durée max d'un fetch complet, retries internes compris (s)
+# max_backoff: délai max entre deux tentatives après échecs consécutifs (s)
+REFRESH_CONFIG: Dict[str, Dict[str, float]] = {
+    "raydium": {"interval": 30, "timeout": 60, "max_backoff": 300},
+    "orca": {"interval": 10, "timeout": 30, "max_backoff": 120},
+    "meteora": {"interval": 10, "timeout": 30, "max_backoff": 120},
+    "lifinity": {"interval": 20, "timeout": 30, "max_backoff": 300},
+    "phoenix": {"interval": 10, "timeout": 20, "max_backoff": 300},
+}
+
+# Temps max d'attente du premier snapshot par les lecteurs (démarrage à froid)
+READY_TIMEOUT_SECONDS = 20
+
+# ============================================================================
+# ÉTAT GLOBAL
+# ============================================================================
+_snapshot: Dict[str, List[Dict[str, Any]]] = {dex: [] for dex in REFRESH_CONFIG}
+_snapshot_version = 0
+_refresh_stats: Dict[str, Dict[str, Any]] = {}
+_refresh_tasks: Dict[str, asyncio.Task] = {}
+_wakeup_events: Dict[str, asyncio.Event] = {}
+_ready_event: Optional[asyncio.Event] = None
+_published_at: Dict[str, float] = {}  # dex -> epoch des pools publiées
+_seeded = False  # snapshot pré-rempli (disque): les lecteurs n'attendent pas
+
+
+def _get_fetchers() -> Dict[str, Callable[[aiohttp.ClientSession], Awaitable[List[Dict[str, Any]]]]]:
+    # import retardé: pool_fetchers importe ce module depuis fetch_all_pools
+    from pool_fetchers import (
+        fetch_raydium_pools,
+        fetch_orca_whirlpools,
+        fetch_meteora_pools,
+        fetch_lifinity_pools,
+        fetch_phoenix_pools,
+    )
+    return {
+        "raydium": fetch_raydium_pools,
+        "orca": fetch_orca_whirlpools,
+        "meteora": fetch_meteora_pools,
+        "lifinity": fetch_lifinity_pools,
+        "phoenix": fetch_phoenix_pools,
+    }
+
+
+# ============================================================================
+# SNAPSHOT
+# ============================================================================
+
+def get_pools_snapshot() -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Retourne le dernier snapshot {dex: [pools]} sans I/O.
+
+    Le dict retourné n'est jamais modifié: une publication en crée un nouveau.
+    """
+    return _snapshot
+
+
+def get_snapshot_version() -> int:
+    """Version du snapshot, incrémentée à chaque publication d'un DEX."""
+    return _snapshot_version
+
+
+def publish_pools(dex: str, pools: List[Dict[str, Any]], published_at: Optional[float] = None):
+    """Publie les pools d'un DEX dans un nouveau snapshot (copy-on-write)."""
+    global _snapshot, _snapshot_version
+
+    snapshot = dict(_snapshot)
+    snapshot[dex] = pools
+    _snapshot = snapshot
+    _snapshot_version += 1
+    _published_at[dex] = time.time() if published_at is None else published_at
+
+
+def get_snapshot_timestamps() -> Dict[str, float]:
+    """Date (epoch) des pools publiées par DEX."""
+    return dict(_published_at)
+
+
+def seed_snapshot(pools_by_dex: Dict[str, List[Dict[str, Any]]], timestamps: Optional[Dict[str, float]] = None):
+    """
+    Pré-remplit le snapshot (ex: snapshot disque marqué stale) pour que les
+    lecteurs n'attendent pas le premier fetch. Les DEX déjà publiés ne sont
+    pas écrasés; les refreshers remplacent les pools seedées au premier succès.
+    """
+    global _seeded
+
+    timestamps = timestamps or {}
+    for dex, pools in pools_by_dex.items():
+        if pools and not _snapshot.get(dex):
+            publish_pools(dex, pools, timestamps.get(dex, 0.0))
+    _seeded = True
+
+
+def get_refresher_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Stats par DEX: refreshes, failures (consécutifs), last_success (epoch),
+    last_duration_ms, pools, next_delay.
+    """
+    return {dex: dict(stats) for dex, stats in _refresh_stats.items()}
+
+
+# ============================================================================
+# REFRESHERS
+# ============================================================================
+
+def refreshers_running() -> bool:
+    """True si au moins un refresher est actif."""
+    return any(not task.done() for task in _refresh_tasks.values())
+
+
+def request_refresh(dexes: Optional[Iterable[str]] = None):
+    """
+    Réveille les refreshers (tous par défaut) sans attendre leur cadence,
+    par exemple après un ajout de mints à la watchlist.
+    """
+    for dex in (dexes or list(_wakeup_events)):
+        event = _wakeup_events.get(dex)
+        if event is not None:
+            event.set()
+
+
+def _next_delay(dex: str, failures: int) -> float:
+    """Cadence nominale si succès, backoff exponentiel plafonné sinon."""
+    config = REFRESH_CONFIG[dex]
+    if failures == 0:
+        return config["interval"]
+    return min(config["interval"] * (2 ** failures), config["max_backoff"])
+
+
+def _mark_ready():
+    """Débloque les lecteurs dès que chaque DEX a terminé une première tentative."""
+    if _ready_event is None or _ready_event.is_set():
+        return
+    if all(_refresh_stats.get(dex, {}).get("attempts", 0) > 0 for dex in _refresh_tasks):
+        _ready_event.set()
+
+
+async def _refresh_loop(dex: str, session: aiohttp.ClientSession, fetcher):
+    """Boucle de rafraîchissement d'un DEX: fetch, publication, attente."""
+    config = REFRESH_CONFIG[dex]
+    stats = _refresh_stats.setdefault(dex, {
+        "attempts": 0,
+        "refreshes": 0,
+        "failures": 0,
+        "last_success": 0.0,
+        "last_duration_ms": 0.0,
+        "pools": 0,
+        "next_delay": config["interval"],
+    })
+    wakeup = _wakeup_events[dex]
+
+    while True:
+        wakeup.clear()
+        started = time.perf_counter()
+        pools = None
+        try:
+            pools = await asyncio.wait_for(fetcher(session), timeout=config["timeout"])
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning(f"[REFRESH] {dex} timed out after {config['timeout']}s")
+        except Exception as e:
+            logger.error(f"[REFRESH] {dex} fetch error: {e}")
+
+        stats["attempts"] += 1
+        stats["last_duration_ms"] = (time.perf_counter() - started) * 1000
+
+        # Les fetchers renvoient [] quand tous les retries échouent: garder
+        # les dernières pools connues plutôt que publier un DEX vide
+        if pools or (pools is not None and not _snapshot.get(dex)):
+            publish_pools(dex, pools)
+            stats["refreshes"] += 1
+            stats["failures"] = 0
+            stats["last_success"] = time.time()
+            stats["pools"] = len(pools)
+        else:
+            stats["failures"] += 1
+
+        _mark_ready()
+
+        delay = _next_delay(dex, stats["failures"])
+        stats["next_delay"] = delay
+        logger.debug(
+            f"[REFRESH] {dex}: {stats['pools']} pools, {stats['last_duration_ms']:.0f} ms, "
+            f"failures={stats['failures']}, next in {delay:.0f}s (v{_snapshot_version})"
+        )
+
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_pool_refreshers(
+    session: aiohttp.ClientSession,
+    dexes: Optional[Iterable[str]] = None
+) -> Dict[str, asyncio.Task]:
+    """
+    Démarre un refresher par DEX (idempotent: un refresher actif n'est pas relancé).
+
+    Args:
+        session: Session aiohttp partagée, doit rester ouverte tant que les refreshers tournent
+        dexes: Sous-ensemble de REFRESH_CONFIG (défaut: tous)
+
+    Returns:
+        {dex: task}
+    """
+    global _ready_event
+
+    fetchers = _get_fetchers()
+    if _ready_event is None or not refreshers_running():
+        _ready_event = asyncio.Event()
+
+    for dex in (dexes or REFRESH_CONFIG):
+        task = _refresh_tasks.get(dex)
+        if task is not None and not task.done():
+            continue
+        _wakeup_events[dex] = asyncio.Event()
+        _refresh_tasks[dex] = asyncio.create_task(
+            _refresh_loop(dex, session, fetchers[dex]), name=f"pool-refresher-{dex}"
+        )
+        logger.info(f"[REFRESH] Started {dex} refresher (every {REFRESH_CONFIG[dex]['interval']}s)")
+
+    return dict(_refresh_tasks)
+
+
+async def stop_pool_refreshers():
+    """Arrête tous les refreshers et attend leur terminaison."""
+    tasks = list(_refresh_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _refresh_tasks.clear()
+    _wakeup_events.clear()
+
+
+async def wait_until_ready(timeout: float = READY_TIMEOUT_SECONDS) -> bool:
+    """
+    Attend que chaque refresher ait terminé sa première tentative.
+
+    Immédiat une fois le démarrage passé ou si le snapshot a été seedé.
+    Returns: False si timeout.
+    """
+    if _seeded:
+        return True
+    if _ready_event is None:
+        return False
+    if _ready_event.is_set():
+        return True
+    try:
+        await asyncio.wait_for(_ready_event.wait(), timeout=timeout)
+        return True
+    except asyncio.TimeoutError:
+        logger.warning(f"[REFRESH] Snapshot not complete after {timeout}s, serving partial data")
+        return False
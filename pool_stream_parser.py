@@ -0,0 +1,293 @@
+# pool_stream_parser.py
+"""
+Parser JSON incrémental pour les dumps de pools des DEX Solana.
+
+Les APIs Raydium / Orca / Meteora renvoient l'univers complet des pools
+(plusieurs dizaines de Mo). Plutôt que de faire `resp.json()` puis de
+construire un dict Python par pool, ce module:
+- consomme le body par chunks (`feed`)
+- découpe chaque élément du tableau de pools sur les octets bruts
+- élimine les pools sans mint surveillé AVANT tout décodage JSON
+- ne décode (json.loads) que les pools candidates
+
+Formats supportés:
+- tableau racine: [ {...}, {...} ]
+- objet racine avec tableau sous une clé connue: {"data": [ {...} ], ...}
+"""
+import json
+import re
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+# Compaction du buffer au-delà de cette taille consommée (octets)
+_COMPACT_THRESHOLD = 1 << 20
+
+# Profondeur maximale d'imbrication reconnue par la regex d'objet.
+# Au-delà, l'élément est décodé via json (chemin lent mais correct).
+_MAX_REGEX_DEPTH = 4
+
+# Python >= 3.11: quantificateurs possessifs (pas de backtracking, ~20x plus rapide).
+# Avant 3.11: une alternative = un caractère, linéaire mais plus lent.
+_POSSESSIVE = sys.version_info >= (3, 11)
+if _POSSESSIVE:
+    _STRING_PATTERN = rb'"(?:[^"\\]++|\\.)*+"'
+    _CHARS_PATTERN = rb'[^{}"]++'
+    _SCAN_CHARS_PATTERN = rb'[^{}\[\]"]++'
+    _REPEAT = rb')*+'
+else:
+    _STRING_PATTERN = rb'"(?:[^"\\]|\\.)*"'
+    _CHARS_PATTERN = rb'[^{}"]'
+    _SCAN_CHARS_PATTERN = rb'[^{}\[\]"]+'
+    _REPEAT = rb')*'
+# Chaînes JSON ayant la forme d'un mint Solana (base58, 32-44 caractères).
+# Extraire ces chaînes puis tester l'appartenance à un set est bien plus
+# rapide qu'une alternation regex sur toute la watchlist.
+_MINT_LIKE_RE = re.compile(rb'"([0-9A-Za-z]{32,44})"')
+_WS_SEP_RE = re.compile(rb'[\s,]*')
+_WS_RE = re.compile(rb'\s*')
+# Chemin lent (éléments trop imbriqués pour _OBJECT_RE, non-objets): un jeton
+# = caractères hors structure, chaîne complète ou crochet/accolade
+_SCAN_RE = re.compile(_SCAN_CHARS_PATTERN + rb'|' + _STRING_PATTERN + rb'|[{}\[\]]', re.DOTALL)
+_STRING_RE = re.compile(_STRING_PATTERN, re.DOTALL)
+_SCALAR_RE = re.compile(rb'[^,\]}\s]*')
+
+
+def _nested_object_pattern(depth: int) -> bytes:
+    """
+    Construit une regex qui reconnaît un objet JSON complet jusqu'à `depth`
+    niveaux d'imbrication. Les alternatives ne se recouvrent pas (caractères
+    hors accolades/guillemets, chaîne complète, sous-objet): pas de
+    backtracking exponentiel sur un élément tronqué.
+    """
+    pattern = rb'\{(?:' + _CHARS_PATTERN + rb'|' + _STRING_PATTERN + _REPEAT + rb'\}'
+    for _ in range(depth - 1):
+        pattern = rb'\{(?:' + _CHARS_PATTERN + rb'|' + _STRING_PATTERN + rb'|' + pattern + _REPEAT + rb'\}'
+    return pattern
+
+
+_OBJECT_RE = re.compile(_nested_object_pattern(_MAX_REGEX_DEPTH), re.DOTALL)
+
+
+class PoolStreamParser:
+    """
+    Parser push-style: `feed(chunk)` renvoie les pools candidates complètes
+    reçues jusqu'ici, `close()` termine le flux.
+
+    Args:
+        array_keys: Clés racines pouvant contenir le tableau de pools
+        watch_mints: Mints autorisés (watchlist + SOL/USDC). None = tout garder.
+        min_mint_hits: Nombre minimal de mints autorisés DISTINCTS présents
+            dans les octets d'une pool pour qu'elle soit décodée (2 = les deux
+            côtés de la paire doivent être autorisés)
+
+    Stats (self.stats):
+        bytes: octets reçus
+        pools_seen: éléments du tableau rencontrés
+        pools_decoded: éléments passés au décodage JSON
+        pools_malformed: éléments complets mais JSON invalide (ignorés)
+        pools_kept: à incrémenter par l'appelant après normalisation
+    """
+
+    def __init__(
+        self,
+        array_keys: Iterable[str] = ("data",),
+        watch_mints: Optional[Iterable[str]] = None,
+        min_mint_hits: int = 2,
+    ):
+        keys = [re.escape(k.encode()) for k in array_keys]
+        self._key_re = re.compile(rb'"(?:' + b"|".join(keys) + rb')"\s*:\s*\[') if keys else None
+        self._watch_mints = {m.encode() for m in watch_mints if m} if watch_mints else None
+        self._min_mint_hits = min_mint_hits
+        self._array_keys = list(array_keys)
+
+        self._buf = bytearray()
+        self._pos = 0
+        self._state = "start"  # start -> seek -> array -> ... -> done
+        self._seek_from = 0  # évite de re-scanner le préfixe à chaque chunk
+        self._root_is_array = False
+
+        self.stats: Dict[str, int] = {
+            "bytes": 0,
+            "pools_seen": 0,
+            "pools_decoded": 0,
+            "pools_malformed": 0,
+            "pools_kept": 0,
+        }
+
+    # ------------------------------------------------------------------ #
+    # API publique
+    # ------------------------------------------------------------------ #
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        """Ajoute un chunk du body et renvoie les pools candidates complètes."""
+        if not chunk or self._state == "done":
+            return []
+        self.stats["bytes"] += len(chunk)
+        self._buf += chunk
+        return self._drain(final=False)
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Termine le flux et renvoie les dernières pools candidates."""
+        out = self._drain(final=True)
+        if self._state in ("start", "seek") and not self._root_is_array and self.stats["pools_seen"] == 0:
+            # Aucun tableau reconnu: format inattendu, repli sur un décodage complet
+            out.extend(self._fallback_full_decode())
+        self._state = "done"
+        self._buf = bytearray()
+        self._pos = 0
+        return out
+
+    def parse_bytes(self, body: bytes) -> List[Dict[str, Any]]:
+        """Raccourci non-streaming: parse un body complet."""
+        pools = self.feed(body)
+        pools.extend(self.close())
+        return pools
+
+    # ------------------------------------------------------------------ #
+    # Interne
+    # ------------------------------------------------------------------ #
+
+    def _drain(self, final: bool) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        buf = self._buf
+
+        while self._state != "done":
+            if self._state == "start":
+                pos = _WS_RE.match(buf, self._pos).end()
+                if pos >= len(buf):
+                    break
+                if buf[pos:pos + 3] == b"\xef\xbb\xbf":  # BOM UTF-8
+                    self._pos = pos + 3
+                    continue
+                if buf[pos:pos + 1] == b"[":
+                    self._root_is_array = True
+                    self._pos = pos + 1
+                    self._state = "array"
+                else:
+                    self._pos = pos
+                    self._state = "seek"
+                continue
+
+            if self._state == "seek":
+                start = max(self._pos, self._seek_from)
+                m = self._key_re.search(buf, start) if self._key_re else None
+                if not m:
+                    # Une clé peut être coupée entre deux chunks: garder une marge
+                    self._seek_from = max(self._pos, len(buf) - 256)
+                    break
+                self._pos = m.end()
+                self._state = "array"
+                continue
+
+            # state == "array"
+            pos = _WS_SEP_RE.match(buf, self._pos).end()
+            if pos >= len(buf):
+                self._pos = pos
+                break
+
+            c = buf[pos]
+            if c == 0x5D:  # ']'
+                self._pos = pos + 1
+                self._state = "done" if self._root_is_array else "seek"
+                continue
+
+            if c == 0x7B:  # '{'
+                m = _OBJECT_RE.match(buf, pos)
+                if m:
+                    self._pos = m.end()
+                    self.stats["pools_seen"] += 1
+                    pool = self._decode_candidate(buf, pos, m.end())
+                    if pool is not None:
+                        out.append(pool)
+                    continue
+
+            # Élément trop imbriqué, non-objet ou tronqué: bornes trouvées par
+            # un scan des jetons de l'élément seul, pas du reste du buffer
+            end = self._element_end(buf, pos, final)
+            if end is None:
+                if final:
+                    self._state = "done"  # body tronqué: rien après cet élément
+                break
+            self._pos = end
+            self.stats["pools_seen"] += 1
+            if c == 0x7B:
+                pool = self._decode_candidate(buf, pos, end)
+                if pool is not None:
+                    out.append(pool)
+
+        # Libérer les octets déjà consommés
+        if self._pos > _COMPACT_THRESHOLD:
+            del buf[:self._pos]
+            self._pos = 0
+
+        return out
+
+    def _is_candidate(self, buf: bytearray, start: int, end: int) -> bool:
+        """Pré-filtre sur les octets bruts: assez de mints autorisés distincts."""
+        if self._watch_mints is None:
+            return True
+        watch = self._watch_mints
+        hits = {m for m in _MINT_LIKE_RE.findall(buf, start, end) if m in watch}
+        return len(hits) >= self._min_mint_hits
+
+    def _decode_candidate(self, buf: bytearray, start: int, end: int) -> Optional[Dict[str, Any]]:
+        """Pré-filtre sur les octets bruts puis décode la pool si elle est candidate."""
+        if not self._is_candidate(buf, start, end):
+            return None
+        self.stats["pools_decoded"] += 1
+        try:
+            pool = json.loads(bytes(buf[start:end]))
+        except ValueError:
+            pool = None
+        if not isinstance(pool, dict):
+            # Élément complet mais invalide: ignoré, le flux continue après lui
+            self.stats["pools_malformed"] += 1
+            return None
+        return pool
+
+    @staticmethod
+    def _element_end(buf: bytearray, pos: int, final: bool) -> Optional[int]:
+        """
+        Fin de l'élément qui commence à `pos` (objet, tableau ou scalaire);
+        None si l'élément n'est pas encore complet dans le buffer.
+        """
+        c = buf[pos]
+        if c == 0x22:  # '"'
+            m = _STRING_RE.match(buf, pos)
+            return m.end() if m else None
+        if c != 0x7B and c != 0x5B:  # nombre, true/false/null (ou invalide)
+            end = _SCALAR_RE.match(buf, pos).end()
+            # Un nombre peut être coupé entre deux chunks
+            return end if end < len(buf) or final else None
+        depth = 0
+        n = len(buf)
+        while pos < n:
+            m = _SCAN_RE.match(buf, pos)
+            if m is None:
+                return None  # chaîne non terminée
+            c = buf[pos]
+            pos = m.end()
+            if c == 0x7B or c == 0x5B:
+                depth += 1
+            elif c == 0x7D or c == 0x5D:
+                depth -= 1
+                if depth == 0:
+                    return pos
+        return None
+
+    def _fallback_full_decode(self) -> List[Dict[str, Any]]:
+        try:
+            data = json.loads(bytes(self._buf))
+        except ValueError:
+            return []
+        if isinstance(data, dict):
+            for key in self._array_keys:
+                if isinstance(data.get(key), list):
+                    data = data[key]
+                    break
+        if not isinstance(data, list):
+            return []
+        pools = [p for p in data if isinstance(p, dict)]
+        self.stats["pools_seen"] += len(pools)
+        self.stats["pools_decoded"] += len(pools)
+        return pools
@@ -0,0 +1,274 @@
+# pool_table.py
+"""
+Stockage columnaire des pools normalisées (tableau structuré NumPy).
+
+Une pool en dict Python coûte plusieurs centaines d'octets (10 clés) et était
+recopiée à chaque étape (normalize_price_for_token, fetch_solana_pools). Ici:
+- une PoolTable par DEX: une ligne de POOL_DTYPE (~50 octets) par pool
+- mints, pool_id, dex et type de pool stockés en codes int32 vers une table
+  de chaînes internées (sys.intern: partagées entre tables et snapshots)
+- price / liquidity_usd / fee_pct en float64 (NaN = None)
+- les colonnes lues à chaque cycle sont aussi gardées décodées en listes
+  Python (références vers les chaînes internées): lire un champ d'une vue
+  est un simple index, sans conversion NumPy -> Python
+
+PoolRow est une vue légère (Mapping) sur une ligne: pool["price"],
+pool.get("fee_pct", 0), dict(pool) et l'itération fonctionnent comme avec un
+dict, donc pool_prices, arbitrage et telegram_bot lisent les champs sans
+changement. Les champs dérivés (buy_price, url, token...) sont ajoutés par
+PoolRow.with_fields() dans un petit dict de surcharge, sans copier la ligne.
+
+Seule exception à l'immuabilité: update_row() réécrit en place les champs
+numériques d'une ligne (mises à jour on-chain en streaming). Les champs
+chaînes (mints, pool_id, dex) ne changent jamais: l'index par paire reste
+valide.
+"""
+import sys
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+STRING_FIELDS = ("pool_id", "dex", "token_a", "token_b", "pool_type")
+FLOAT_FIELDS = ("price", "liquidity_usd", "fee_pct")
+
+POOL_DTYPE = np.dtype(
+    [(field, np.int32) for field in STRING_FIELDS]
+    + [(field, np.float64) for field in FLOAT_FIELDS]
+    + [("fee_bps", np.int32), ("stale", np.bool_)]
+)
+POOL_FIELDS: Tuple[str, ...] = POOL_DTYPE.names
+
+_NONE_CODE = -1  # code de chaîne pour None
+
+
+class PoolTable:
+    """
+    Table de pools d'un DEX (ou d'un lot quelconque), immuable hors update_row().
+
+    Se comporte comme une séquence de PoolRow: len(), table[i], itération.
+    Les clés hors schéma (rares) sont conservées dans un dict creux par ligne.
+    """
+
+    __slots__ = ("rows", "strings", "extras", "_views", "_columns", "_derived")
+
+    def __init__(self, rows: np.ndarray, strings: List[Optional[str]], extras: Optional[Dict[int, Dict[str, Any]]] = None):
+        self.rows = rows
+        self.strings = strings
+        self.extras = extras or {}
+        self._views: Optional[List["PoolRow"]] = None
+        self._columns: Dict[str, List[Any]] = {}  # colonnes décodées (voir column())
+        self._derived: Dict[str, List[Any]] = {}
+
+    @classmethod
+    def from_dicts(cls, pools: Iterable[Mapping]) -> "PoolTable":
+        """Construit une table depuis des dicts normalisés (ou des PoolRow)."""
+        pools = list(pools)
+        rows = np.zeros(len(pools), dtype=POOL_DTYPE)
+        strings: List[Optional[str]] = []
+        codes: Dict[str, int] = {}
+        extras: Dict[int, Dict[str, Any]] = {}
+
+        def code(value: Optional[str]) -> int:
+            if value is None:
+                return _NONE_CODE
+            c = codes.get(value)
+            if c is None:
+                c = codes[value] = len(strings)
+                strings.append(sys.intern(value))
+            return c
+
+        columns = {field: [] for field in POOL_FIELDS}
+        for i, pool in enumerate(pools):
+            for field in STRING_FIELDS:
+                value = pool.get(field)
+                columns[field].append(code(value if value is None else str(value)))
+            for field in FLOAT_FIELDS:
+                value = pool.get(field)
+                columns[field].append(np.nan if value is None else float(value))
+            columns["fee_bps"].append(int(pool.get("fee_bps") or 0))
+            columns["stale"].append(bool(pool.get("stale")))
+            extra = {key: pool[key] for key in pool if key not in POOL_DTYPE.fields}
+            if extra:
+                extras[i] = extra
+
+        for field in POOL_FIELDS:
+            rows[field] = columns[field]
+        table = cls(rows, strings, extras)
+        # Colonnes lues à chaque cycle: décodées ici, pendant le refresh, plutôt
+        # qu'au premier accès dans le cycle (références vers les chaînes internées)
+        for field in _HOT_FIELDS:
+            table.column(field)
+        return table
+
+    # ------------------------------------------------------------------ #
+    # Séquence de vues
+    # ------------------------------------------------------------------ #
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, idx: int) -> "PoolRow":
+        return self.views()[idx]
+
+    def __iter__(self) -> Iterator["PoolRow"]:
+        return iter(self.views())
+
+    def __repr__(self) -> str:
+        return f"PoolTable({len(self)} pools, {len(self.strings)} strings)"
+
+    def views(self) -> List["PoolRow"]:
+        """Une PoolRow par ligne (créées une seule fois, partagées par l'index)."""
+        if self._views is None:
+            self._views = [PoolRow(self, i) for i in range(len(self.rows))]
+        return self._views
+
+    def column(self, field: str) -> List[Any]:
+        """
+        Colonne décodée en liste Python (None pour code -1 / NaN), mise en
+        cache: les champs chaînes ne coûtent qu'une référence par ligne vers
+        la chaîne internée, les lectures de PoolRow deviennent un simple index.
+        """
+        values = self._columns.get(field)
+        if values is None:
+            raw = self.rows[field].tolist()
+            if field in _STRING_SET:
+                strings = self.strings
+                values = [None if c == _NONE_CODE else strings[c] for c in raw]
+            elif field in _FLOAT_SET:
+                values = [None if v != v else v for v in raw]  # NaN -> None
+            else:
+                values = raw
+            self._columns[field] = values
+        return values
+
+    def derived(self, name: str, build: Callable[["PoolTable"], List[Any]]) -> List[Any]:
+        """
+        Colonne calculée une fois par table (ex: URL de pool), mise en cache.
+        La table étant immuable et remplacée à chaque refresh, le cache n'est
+        jamais périmé.
+        """
+        values = self._derived.get(name)
+        if values is None:
+            values = self._derived[name] = build(self)
+        return values
+
+    def value(self, idx: int, field: str) -> Any:
+        """Valeur décodée d'un champ (KeyError si hors schéma et absent des extras)."""
+        if field not in POOL_DTYPE.fields:
+            extra = self.extras.get(idx)
+            if extra is not None and field in extra:
+                return extra[field]
+            raise KeyError(field)
+        return self.column(field)[idx]
+
+    def update_row(self, idx: int, fields: Mapping) -> None:
+        """
+        Réécrit en place les champs numériques (price, liquidity_usd, fee_pct,
+        fee_bps, stale) et les extras d'une ligne; colonnes décodées à jour.
+        Les champs chaînes sont ignorés (identité de la pool, clés d'index).
+        """
+        rows = self.rows
+        for field, value in fields.items():
+            if field in _STRING_SET:
+                continue
+            if field in _FLOAT_SET:
+                value = None if value is None else float(value)
+                rows[field][idx] = np.nan if value is None else value
+            elif field == "fee_bps":
+                value = int(value or 0)
+                rows[field][idx] = value
+            elif field == "stale":
+                value = bool(value)
+                rows[field][idx] = value
+            else:
+                self.extras.setdefault(idx, {})[field] = value
+                continue
+            values = self._columns.get(field)
+            if values is not None:
+                values[idx] = value
+
+    def iter_pairs(self) -> Iterator[Tuple[Optional[str], Optional[str], "PoolRow"]]:
+        """(token_a, token_b, vue) pour chaque ligne, sans décoder les autres champs."""
+        return zip(self.column("token_a"), self.column("token_b"), self.views())
+
+    @property
+    def nbytes(self) -> int:
+        """Octets des colonnes NumPy (hors chaînes internées et vues)."""
+        return self.rows.nbytes
+
+
+_STRING_SET = frozenset(STRING_FIELDS)
+_FLOAT_SET = frozenset(FLOAT_FIELDS)
+_HOT_FIELDS = ("token_a", "token_b", "price", "dex", "pool_id")
+
+
+class PoolRow(Mapping):
+    """
+    Vue en lecture seule sur une ligne de PoolTable, avec surcharge optionnelle
+    de champs (buy_price, url, token, chain...). Compatible dict en lecture.
+    """
+
+    __slots__ = ("_table", "_idx", "_extra")
+
+    def __init__(self, table: PoolTable, idx: int, extra: Optional[Dict[str, Any]] = None):
+        self._table = table
+        self._idx = idx
+        self._extra = extra
+
+    def __getitem__(self, key: str) -> Any:
+        extra = self._extra
+        if extra is not None and key in extra:
+            return extra[key]
+        table = self._table
+        values = table._columns.get(key)
+        if values is not None:
+            return values[self._idx]
+        return table.value(self._idx, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        extra = self._extra
+        if extra is not None and key in extra:
+            return extra[key]
+        values = self._table._columns.get(key)
+        if values is not None:
+            return values[self._idx]
+        try:
+            return self._table.value(self._idx, key)
+        except KeyError:
+            return default
+
+    def __iter__(self) -> Iterator[str]:
+        yield from POOL_FIELDS
+        row_extra = self._table.extras.get(self._idx)
+        if row_extra:
+            yield from row_extra
+        if self._extra:
+            for key in self._extra:
+                if key not in POOL_DTYPE.fields and not (row_extra and key in row_extra):
+                    yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __bool__(self) -> bool:
+        # Une ligne a toujours les champs du schéma: éviter __len__ (itération)
+        return True
+
+    def __repr__(self) -> str:
+        return f"PoolRow({dict(self)!r})"
+
+    @property
+    def table(self) -> PoolTable:
+        return self._table
+
+    @property
+    def index(self) -> int:
+        return self._idx
+
+    def with_fields(self, **fields: Any) -> "PoolRow":
+        """Nouvelle vue sur la même ligne avec des champs ajoutés/surchargés."""
+        if self._extra:
+            fields = {**self._extra, **fields}
+        return PoolRow(self._table, self._idx, fields)
+
@@ -0,0 +1,117 @@
+# pool_workers.py
+"""
+Normalisation des dumps de pools hors de la boucle asyncio.
+
+En mode POOL_EXECUTOR_MODE=process, pool_fetchers envoie le body HTTP brut
+(bytes) à un ProcessPoolExecutor. Le worker parse le dump (PoolStreamParser,
+élagué sur la watchlist), le normalise (normalize_pool_batch) et renvoie un
+lot compact: noms de champs + tuples de valeurs, moins coûteux à sérialiser
+qu'une liste de dicts. La boucle asyncio ne fait que reconstruire les dicts
+des pools conservées.
+
+La sérialisation des bytes vers le worker est faite par le thread de gestion
+de l'executor, pas par la boucle.
+"""
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from config import POOL_EXECUTOR_MODE, POOL_EXECUTOR_WORKERS
+from utils import logger
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_mode = POOL_EXECUTOR_MODE
+
+
+def pool_executor_enabled() -> bool:
+    """True si la normalisation des dumps est déportée dans le process pool."""
+    return _executor_mode == "process"
+
+
+def set_pool_executor_mode(mode: str):
+    """Change le mode à chaud ("inline" ou "process"), ex: benchmark."""
+    global _executor_mode
+    if mode not in ("inline", "process"):
+        raise ValueError(f"Unknown pool executor mode: {mode}")
+    _executor_mode = mode
+
+
+def get_pool_executor() -> ProcessPoolExecutor:
+    """Retourne le process pool (créé au premier usage)."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=POOL_EXECUTOR_WORKERS)
+        logger.info(f"[WORKERS] Started pool normalization executor ({POOL_EXECUTOR_WORKERS} processes)")
+    return _executor
+
+
+async def warm_pool_executor():
+    """
+    Démarre tous les process workers maintenant (ProcessPoolExecutor les crée
+    à la demande). Un fork tardif, avec un gros tas Python, bloque la boucle.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_pool_executor()
+    await asyncio.gather(*(
+        loop.run_in_executor(executor, time.sleep, 0.05)
+        for _ in range(POOL_EXECUTOR_WORKERS)
+    ))
+
+
+def shutdown_pool_executor():
+    """Arrête le process pool (les workers en cours terminent leur lot)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+def _normalize_dump_worker(
+    dex: str,
+    body: bytes,
+    array_keys: Tuple[str, ...],
+    watchlist: Optional[FrozenSet[str]]
+) -> Tuple[Tuple[str, ...], List[tuple], Dict[str, Any]]:
+    """
+    Exécuté dans un process worker: parse + normalise un dump complet.
+
+    Returns:
+        (champs, lignes, stats du parser + worker_ms)
+    """
+    from pool_stream_parser import PoolStreamParser
+    from pool_fetchers import normalize_pool_batch  # import retardé (côté worker)
+
+    started = time.perf_counter()
+    parser = PoolStreamParser(array_keys, watchlist)
+    pools = normalize_pool_batch(dex, parser.parse_bytes(body), watchlist)
+
+    fields: Tuple[str, ...] = tuple(pools[0]) if pools else ()
+    rows = [tuple(pool.get(field) for field in fields) for pool in pools]
+    stats = dict(parser.stats)
+    stats["worker_ms"] = (time.perf_counter() - started) * 1000
+    return fields, rows, stats
+
+
+async def normalize_dump_offloaded(
+    dex: str,
+    body: bytes,
+    array_keys: Iterable[str],
+    watchlist: Optional[Iterable[str]] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Parse + normalise un dump dans le process pool sans bloquer la boucle.
+
+    Returns:
+        (pools normalisées, stats)
+    """
+    loop = asyncio.get_running_loop()
+    fields, rows, stats = await loop.run_in_executor(
+        get_pool_executor(),
+        _normalize_dump_worker,
+        dex,
+        body,
+        tuple(array_keys),
+        frozenset(watchlist) if watchlist is not None else None,
+    )
+    return [dict(zip(fields, row)) for row in rows], stats
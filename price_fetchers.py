@@ -18,12 +18,12 @@ BASE (4 DEX):
 
 🚀 OPTIMISATION RUST:
 Ce module peut utiliser un binaire Rust pour récupérer les prix ultra-rapidement.
-Si le binaire Rust n'est pas disponible, le fallback Python est utilisé.
+Le binaire tourne en worker persistant (price_worker.py), interrogé sans
+bloquer la boucle asyncio. Si le binaire n'est pas disponible ou si le
+worker n'est pas sain, le fallback Python est utilisé.
 """
 import asyncio
 import aiohttp
-import subprocess
-import json
 import os
 from typing import Optional, Dict, Any, List
 from config import (
@@ -32,6 +32,8 @@ from config import (
     RPC_ENDPOINT
 )
 from utils import logger
+from circuit_breaker import allow_request, track
+from price_worker import get_price_worker
 
 # Import Base DEX fetchers
 try:
@@ -79,15 +81,20 @@ def is_rust_binary_available() -> bool:
     
     return _rust_binary_available
 
-def fetch_prices_with_rust(
+def _rust_worker_command() -> List[str]:
+    """Binaire en mode serveur: api_key --serve (protocole dans price_worker.py)."""
+    return [RUST_BINARY_PATH, JUPITER_API_KEY, "--serve"]
+
+async def fetch_prices_with_rust(
     solana_tokens: List[str], 
     base_tokens: List[str] = None
 ) -> Optional[Dict[str, Dict[str, Dict[str, float]]]]:
     """
-    Appelle le binaire Rust pour récupérer les prix ultra-rapidement.
+    Interroge le worker Rust persistant pour récupérer les prix ultra-rapidement.
     
     Returns:
-        {"solana": {token: {dex: price}}, "base": {token: {dex: price}}}
+        {"solana": {token: {dex: price}}, "base": {token: {dex: price}}},
+        None si le binaire est absent, le worker non sain ou la requête en échec
     """
     if not is_rust_binary_available():
         return None
@@ -95,54 +102,38 @@ def fetch_prices_with_rust(
     if base_tokens is None:
         base_tokens = []
     
-    try:
-        # Build arguments: api_key chain:token1 chain:token2 ...
-        args = [RUST_BINARY_PATH, JUPITER_API_KEY]
-        
-        for token in solana_tokens:
-            args.append(f"solana:{token}")
-        for token in base_tokens:
-            args.append(f"base:{token}")
-        
-        result = subprocess.run(
-            args,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        
-        if result.returncode != 0:
-            logger.warning(f"Rust binary error: {result.stderr}")
-            return None
-        
-        output = json.loads(result.stdout)
-        
-        if not output.get("success"):
-            return None
-        
-        # Transform to expected format
-        prices = {"solana": {}, "base": {}}
-        
-        for token_data in output.get("solana_tokens", []):
-            token = token_data.get("token")
-            token_prices = token_data.get("prices", {})
-            if token and token_prices:
-                prices["solana"][token] = token_prices
-        
-        for token_data in output.get("base_tokens", []):
-            token = token_data.get("token")
-            token_prices = token_data.get("prices", {})
-            if token and token_prices:
-                prices["base"][token] = token_prices
-        
-        fetch_time_ms = output.get("fetch_time_ms", 0)
-        logger.info(f"🦀 Rust: {len(prices['solana'])} Solana + {len(prices['base'])} Base tokens en {fetch_time_ms}ms")
-        
-        return prices
-        
-    except Exception as e:
-        logger.warning(f"Error calling Rust binary: {e}")
+    worker = get_price_worker(_rust_worker_command())
+    if not worker.healthy:
+        logger.debug("Rust worker unhealthy - Python fallback")
+        return None
+    
+    tokens = [f"solana:{token}" for token in solana_tokens] + [f"base:{token}" for token in base_tokens]
+    output = await worker.request("fetch_prices", tokens=tokens)
+    
+    if not output or not output.get("success"):
+        if output:
+            logger.warning(f"Rust worker error: {output.get('error')}")
         return None
+    
+    # Transform to expected format
+    prices = {"solana": {}, "base": {}}
+    
+    for token_data in output.get("solana_tokens", []):
+        token = token_data.get("token")
+        token_prices = token_data.get("prices", {})
+        if token and token_prices:
+            prices["solana"][token] = token_prices
+    
+    for token_data in output.get("base_tokens", []):
+        token = token_data.get("token")
+        token_prices = token_data.get("prices", {})
+        if token and token_prices:
+            prices["base"][token] = token_prices
+    
+    fetch_time_ms = output.get("fetch_time_ms", 0)
+    logger.info(f"🦀 Rust: {len(prices['solana'])} Solana + {len(prices['base'])} Base tokens en {fetch_time_ms}ms")
+    
+    return prices
 
 # ============================================================================
 # JUPITER (Aggregator - Primary source for Solana)
@@ -165,19 +156,23 @@ async def get_jupiter_prices(
     
     headers = {"x-api-key": JUPITER_API_KEY} if JUPITER_API_KEY else {}
     
+    if not allow_request("jupiter_price"):
+        return {}
     try:
-        async with session.get(url, headers=headers, timeout=10) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                for mint, info in data.get("data", {}).items():
-                    price = info.get("price")
-                    if price:
-                        try:
-                            prices[mint] = float(price)
-                        except (ValueError, TypeError):
-                            pass
-            else:
-                logger.debug(f"Jupiter API status: {resp.status}")
+        with track("jupiter_price") as call:
+            async with session.get(url, headers=headers, timeout=10) as resp:
+                call.status = resp.status
+                if resp.status == 200:
+                    data = await resp.json()
+                    for mint, info in data.get("data", {}).items():
+                        price = info.get("price")
+                        if price:
+                            try:
+                                prices[mint] = float(price)
+                            except (ValueError, TypeError):
+                                pass
+                else:
+                    logger.debug(f"Jupiter API status: {resp.status}")
     except Exception as e:
         logger.debug(f"Jupiter error: {e}")
     
@@ -199,12 +194,16 @@ async def get_jupiter_quote(
     }
     headers = {"x-api-key": JUPITER_API_KEY} if JUPITER_API_KEY else {}
     
+    if not allow_request("jupiter_quote"):
+        return None
     try:
-        async with session.get(JUPITER_QUOTE_API, params=params, headers=headers, timeout=10) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                if "outAmount" in data:
-                    return data
+        with track("jupiter_quote") as call:
+            async with session.get(JUPITER_QUOTE_API, params=params, headers=headers, timeout=10) as resp:
+                call.status = resp.status
+                if resp.status == 200:
+                    data = await resp.json()
+                    if "outAmount" in data:
+                        return data
     except Exception as e:
         logger.debug(f"Jupiter quote error: {e}")
     return None
@@ -225,19 +224,23 @@ async def get_raydium_prices(
     ids = ",".join(token_mints)
     url = f"{RAYDIUM_API}/mint/price?mints={ids}"
     
+    if not allow_request("raydium_price"):
+        return {}
     try:
-        async with session.get(url, timeout=10) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                for mint, price_str in data.get("data", {}).items():
-                    try:
-                        price = float(price_str)
-                        if price > 0:
-                            prices[mint] = price
-                    except (ValueError, TypeError):
-                        pass
-            else:
-                logger.debug(f"Raydium API status: {resp.status}")
+        with track("raydium_price") as call:
+            async with session.get(url, timeout=10) as resp:
+                call.status = resp.status
+                if resp.status == 200:
+                    data = await resp.json()
+                    for mint, price_str in data.get("data", {}).items():
+                        try:
+                            price = float(price_str)
+                            if price > 0:
+                                prices[mint] = price
+                        except (ValueError, TypeError):
+                            pass
+                else:
+                    logger.debug(f"Raydium API status: {resp.status}")
     except Exception as e:
         logger.debug(f"Raydium error: {e}")
     
@@ -258,18 +261,22 @@ async def get_orca_prices(
     prices = {}
     url = f"{ORCA_API}/v1/token/list"
     
+    if not allow_request("orca_price"):
+        return {}
     try:
-        async with session.get(url, timeout=10) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                for mint in token_mints:
-                    if mint in data:
-                        token_info = data[mint]
-                        price = token_info.get("price")
-                        if price and price > 0:
-                            prices[mint] = float(price)
-            else:
-                logger.debug(f"Orca API status: {resp.status}")
+        with track("orca_price") as call:
+            async with session.get(url, timeout=10) as resp:
+                call.status = resp.status
+                if resp.status == 200:
+                    data = await resp.json()
+                    for mint in token_mints:
+                        if mint in data:
+                            token_info = data[mint]
+                            price = token_info.get("price")
+                            if price and price > 0:
+                                prices[mint] = float(price)
+                else:
+                    logger.debug(f"Orca API status: {resp.status}")
     except Exception as e:
         logger.debug(f"Orca error: {e}")
     
@@ -294,47 +301,51 @@ async def get_meteora_prices(
     url = f"{METEORA_API}/pair/all"
     usdc = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
     
+    if not allow_request("meteora_price"):
+        return {}
     try:
-        async with session.get(url, timeout=15) as resp:
-            if resp.status == 200:
-                pools = await resp.json()
+        with track("meteora_price") as call:
+            async with session.get(url, timeout=15) as resp:
+                call.status = resp.status
+                if resp.status == 200:
+                    pools = await resp.json()
                 
-                # Pour chaque token, trouver le meilleur pool (plus de liquidité)
-                best_pools = {}  # {mint: {"price": x, "liq": y}}
+                    # Pour chaque token, trouver le meilleur pool (plus de liquidité)
+                    best_pools = {}  # {mint: {"price": x, "liq": y}}
                 
-                for pool in pools:
-                    # IMPORTANT: utiliser underscore (mint_x, mint_y, current_price)
-                    mint_x = pool.get("mint_x", "")
-                    mint_y = pool.get("mint_y", "")
-                    current_price = pool.get("current_price")
-                    liquidity = float(pool.get("liquidity", 0) or 0)
-                    
-                    # Rejeter pools trop petits pour éviter des prix obsolètes
-                    if not current_price or liquidity < 20000:
-                        continue
+                    for pool in pools:
+                        # IMPORTANT: utiliser underscore (mint_x, mint_y, current_price)
+                        mint_x = pool.get("mint_x", "")
+                        mint_y = pool.get("mint_y", "")
+                        current_price = pool.get("current_price")
+                        liquidity = float(pool.get("liquidity", 0) or 0)
                     
-                    try:
-                        price = float(current_price)
-                        if price <= 0:
+                        # Rejeter pools trop petits pour éviter des prix obsolètes
+                        if not current_price or liquidity < 20000:
                             continue
+                    
+                        try:
+                            price = float(current_price)
+                            if price <= 0:
+                                continue
                         
-                        for mint in token_mints:
-                            if mint_x == mint and mint_y == usdc:
-                                if mint not in best_pools or liquidity > best_pools[mint]["liq"]:
-                                    best_pools[mint] = {"price": price, "liq": liquidity}
-                            elif mint_x == usdc and mint_y == mint:
-                                inverted_price = 1.0 / price
-                                if mint not in best_pools or liquidity > best_pools[mint]["liq"]:
-                                    best_pools[mint] = {"price": inverted_price, "liq": liquidity}
-                    except (ValueError, TypeError):
-                        pass
+                            for mint in token_mints:
+                                if mint_x == mint and mint_y == usdc:
+                                    if mint not in best_pools or liquidity > best_pools[mint]["liq"]:
+                                        best_pools[mint] = {"price": price, "liq": liquidity}
+                                elif mint_x == usdc and mint_y == mint:
+                                    inverted_price = 1.0 / price
+                                    if mint not in best_pools or liquidity > best_pools[mint]["liq"]:
+                                        best_pools[mint] = {"price": inverted_price, "liq": liquidity}
+                        except (ValueError, TypeError):
+                            pass
                 
-                # Extraire les prix
-                for mint, data in best_pools.items():
-                    prices[mint] = data["price"]
+                    # Extraire les prix
+                    for mint, data in best_pools.items():
+                        prices[mint] = data["price"]
                     
-            else:
-                logger.debug(f"Meteora API status: {resp.status}")
+                else:
+                    logger.debug(f"Meteora API status: {resp.status}")
     except Exception as e:
         logger.debug(f"Meteora error: {e}")
     
@@ -356,31 +367,35 @@ async def get_phoenix_prices(
     url = f"{PHOENIX_API}/v1/markets"
     usdc = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
     
+    if not allow_request("phoenix_price"):
+        return {}
     try:
-        async with session.get(url, timeout=10) as resp:
-            if resp.status == 200:
-                markets = await resp.json()
+        with track("phoenix_price") as call:
+            async with session.get(url, timeout=10) as resp:
+                call.status = resp.status
+                if resp.status == 200:
+                    markets = await resp.json()
                 
-                for market in markets:
-                    base_mint = market.get("baseMint")
-                    quote_mint = market.get("quoteMint")
-                    mid_price = market.get("midPrice")
+                    for market in markets:
+                        base_mint = market.get("baseMint")
+                        quote_mint = market.get("quoteMint")
+                        mid_price = market.get("midPrice")
                     
-                    if not all([base_mint, quote_mint, mid_price]):
-                        continue
-                    
-                    try:
-                        price = float(mid_price)
-                        if price <= 0:
+                        if not all([base_mint, quote_mint, mid_price]):
                             continue
+                    
+                        try:
+                            price = float(mid_price)
+                            if price <= 0:
+                                continue
                         
-                        for mint in token_mints:
-                            if base_mint == mint and quote_mint == usdc:
-                                prices[mint] = price
-                    except (ValueError, TypeError):
-                        pass
-            else:
-                logger.debug(f"Phoenix API status: {resp.status}")
+                            for mint in token_mints:
+                                if base_mint == mint and quote_mint == usdc:
+                                    prices[mint] = price
+                        except (ValueError, TypeError):
+                            pass
+                else:
+                    logger.debug(f"Phoenix API status: {resp.status}")
     except Exception as e:
         logger.debug(f"Phoenix error: {e}")
     
@@ -402,33 +417,37 @@ async def get_lifinity_prices(
     url = f"{LIFINITY_API}/pools"
     usdc = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
     
+    if not allow_request("lifinity_price"):
+        return {}
     try:
-        async with session.get(url, timeout=10) as resp:
-            if resp.status == 200:
-                pools = await resp.json()
+        with track("lifinity_price") as call:
+            async with session.get(url, timeout=10) as resp:
+                call.status = resp.status
+                if resp.status == 200:
+                    pools = await resp.json()
                 
-                for pool in pools:
-                    mint_a = pool.get("tokenAMint")
-                    mint_b = pool.get("tokenBMint")
-                    pool_price = pool.get("price")
+                    for pool in pools:
+                        mint_a = pool.get("tokenAMint")
+                        mint_b = pool.get("tokenBMint")
+                        pool_price = pool.get("price")
                     
-                    if not all([mint_a, mint_b, pool_price]):
-                        continue
-                    
-                    try:
-                        price = float(pool_price)
-                        if price <= 0:
+                        if not all([mint_a, mint_b, pool_price]):
                             continue
+                    
+                        try:
+                            price = float(pool_price)
+                            if price <= 0:
+                                continue
                         
-                        for mint in token_mints:
-                            if mint_a == mint and mint_b == usdc:
-                                prices[mint] = price
-                            elif mint_a == usdc and mint_b == mint:
-                                prices[mint] = 1.0 / price
-                    except (ValueError, TypeError):
-                        pass
-            else:
-                logger.debug(f"Lifinity API status: {resp.status}")
+                            for mint in token_mints:
+                                if mint_a == mint and mint_b == usdc:
+                                    prices[mint] = price
+                                elif mint_a == usdc and mint_b == mint:
+                                    prices[mint] = 1.0 / price
+                        except (ValueError, TypeError):
+                            pass
+                else:
+                    logger.debug(f"Lifinity API status: {resp.status}")
     except Exception as e:
         logger.debug(f"Lifinity error: {e}")
     
@@ -601,7 +620,7 @@ async def get_all_prices_batch(
         base_tokens = []
     
     # Try Rust first (10x faster)
-    rust_result = fetch_prices_with_rust(solana_tokens, base_tokens)
+    rust_result = await fetch_prices_with_rust(solana_tokens, base_tokens)
     if rust_result is not None:
         return rust_result
     
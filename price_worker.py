@@ -0,0 +1,287 @@
+# price_worker.py
+"""
+Worker persistant autour du binaire Rust price_fetcher.
+
+fetch_prices_with_rust lançait le binaire à chaque cycle via un
+subprocess.run(timeout=30) bloquant, appelé depuis la boucle asyncio: tout
+le bot (Telegram, streams, autres fetchs) était figé pendant le fetch, et
+chaque cycle payait le démarrage du process et de son client HTTP.
+
+Ici le binaire est démarré une fois en mode serveur (argument --serve) et
+piloté par ses pipes stdin/stdout via asyncio.subprocess.
+
+Protocole (trames: longueur u32 big-endian + JSON UTF-8, dans les deux sens):
+- requête:  {"id": 7, "method": "fetch_prices", "tokens": ["solana:<mint>", "base:<addr>"]}
+- réponse:  {"id": 7, "success": true, "solana_tokens": [...], "base_tokens": [...], "fetch_time_ms": 42}
+            (même contenu que la sortie JSON du mode one-shot)
+- santé:    {"id": 8, "method": "ping"} -> {"id": 8, "ok": true}
+
+Les réponses peuvent arriver dans le désordre: elles sont appariées aux
+requêtes en attente par id.
+
+Robustesse:
+- process terminé (EOF sur stdout): requêtes en attente en échec immédiat,
+  relance automatique avec backoff (RESPAWN_MIN_SECONDS -> RESPAWN_MAX_SECONDS)
+- ping toutes les HEALTH_INTERVAL_SECONDS (relance le process s'il est mort)
+- MAX_CONSECUTIVE_FAILURES échecs de suite (timeout, crash): worker marqué
+  non sain et process tué; l'appelant repasse sur le chemin Python jusqu'à
+  ce qu'un ping réussisse
+"""
+import asyncio
+import itertools
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from utils import logger
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+REQUEST_TIMEOUT_SECONDS = 30.0
+HEALTH_INTERVAL_SECONDS = 15.0
+HEALTH_TIMEOUT_SECONDS = 5.0
+RESPAWN_MIN_SECONDS = 1.0
+RESPAWN_MAX_SECONDS = 60.0
+MAX_CONSECUTIVE_FAILURES = 3
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+STOP_TIMEOUT_SECONDS = 5.0
+
+
+class WorkerExited(ConnectionError):
+    """Le process worker s'est terminé avant de répondre."""
+
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    payload = json.dumps(message, separators=(",", ":")).encode()
+    return len(payload).to_bytes(4, "big") + payload
+
+
+class PriceWorker:
+    """Process worker persistant: requêtes par id, ping, relance automatique."""
+
+    def __init__(
+        self,
+        command: List[str],
+        request_timeout: Optional[float] = None,
+        health_interval: Optional[float] = None,
+    ):
+        self.command = command
+        self.request_timeout = request_timeout or REQUEST_TIMEOUT_SECONDS
+        self.health_interval = health_interval or HEALTH_INTERVAL_SECONDS
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._request_ids = itertools.count(1)
+        self._spawn_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._failures = 0
+        self._respawn_delay = RESPAWN_MIN_SECONDS
+        self._next_spawn_at = 0.0
+        self.stats = {
+            "spawns": 0,
+            "exits": 0,
+            "requests": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "orphans": 0,
+            "pings": 0,
+        }
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    @property
+    def healthy(self) -> bool:
+        """False après MAX_CONSECUTIVE_FAILURES échecs, jusqu'au prochain succès."""
+        return self._failures < MAX_CONSECUTIVE_FAILURES
+
+    # ------------------------------------------------------------------
+    # Cycle de vie du process
+    # ------------------------------------------------------------------
+    def start(self):
+        """Démarre la surveillance (ping + relance); le process démarre à la première requête."""
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_loop(), name="price-worker-health")
+
+    async def stop(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        process = self._process
+        if process is not None and process.returncode is None:
+            process.stdin.close()
+            try:
+                await asyncio.wait_for(process.wait(), STOP_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                process.kill()
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+        self._process = None
+
+    async def _ensure_process(self) -> bool:
+        if self.alive:
+            return True
+        async with self._spawn_lock:
+            if self.alive:
+                return True
+            if time.monotonic() < self._next_spawn_at:
+                return False
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *self.command,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                )
+            except OSError as e:
+                logger.warning(f"[PRICE WORKER] spawn failed: {e}")
+                self._schedule_respawn()
+                return False
+            self._process = process
+            self._reader_task = asyncio.create_task(self._read_loop(process), name="price-worker-reader")
+            self.stats["spawns"] += 1
+            logger.info(f"[PRICE WORKER] started pid {process.pid}")
+            return True
+
+    def _schedule_respawn(self):
+        self._next_spawn_at = time.monotonic() + self._respawn_delay
+        self._respawn_delay = min(self._respawn_delay * 2, RESPAWN_MAX_SECONDS)
+
+    def _kill(self):
+        if self.alive:
+            self._process.kill()
+
+    async def _read_loop(self, process: asyncio.subprocess.Process):
+        try:
+            while True:
+                size = int.from_bytes(await process.stdout.readexactly(4), "big")
+                if size > MAX_FRAME_BYTES:
+                    raise ValueError(f"frame too large ({size} bytes)")
+                message = json.loads(await process.stdout.readexactly(size))
+                future = self._pending.get(message.get("id"))
+                if future is not None and not future.done():
+                    future.set_result(message)
+                else:
+                    self.stats["orphans"] += 1
+        except asyncio.IncompleteReadError:
+            pass  # EOF: process terminé
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[PRICE WORKER] invalid frame from pid {process.pid}: {e}")
+        finally:
+            # Sans await avant d'avoir libéré la place: une requête arrivée
+            # ensuite part vers le process suivant, pas vers celui-ci
+            if self._process is process:
+                self._process = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(WorkerExited(f"worker pid {process.pid} exited"))
+            self.stats["exits"] += 1
+            self._schedule_respawn()
+            if process.returncode is None:
+                process.kill()
+            returncode = await process.wait()
+            logger.warning(f"[PRICE WORKER] pid {process.pid} exited ({returncode})")
+
+    # ------------------------------------------------------------------
+    # Requêtes
+    # ------------------------------------------------------------------
+    async def request(self, method: str, timeout: Optional[float] = None, **params) -> Optional[Dict[str, Any]]:
+        """
+        Envoie une requête et attend sa réponse (appariée par id).
+
+        Returns:
+            Réponse décodée, None si le worker est indisponible, a expiré ou
+            s'est terminé (l'échec est compté pour l'état de santé)
+        """
+        if not await self._ensure_process():
+            return None
+
+        process = self._process
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self.stats["requests"] += 1
+        try:
+            frame = encode_frame({"id": request_id, "method": method, **params})
+            async with self._write_lock:
+                process.stdin.write(frame)
+                await process.stdin.drain()
+            response = await asyncio.wait_for(future, timeout or self.request_timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            self._record_failure(f"{method} timed out")
+            return None
+        except (ConnectionError, OSError) as e:
+            self._record_failure(f"{method} failed: {e}")
+            return None
+        finally:
+            self._pending.pop(request_id, None)
+
+        self._failures = 0
+        self._respawn_delay = RESPAWN_MIN_SECONDS
+        return response
+
+    def _record_failure(self, reason: str):
+        self.stats["failures"] += 1
+        self._failures += 1
+        logger.warning(f"[PRICE WORKER] {reason} ({self._failures}/{MAX_CONSECUTIVE_FAILURES})")
+        if self._failures >= MAX_CONSECUTIVE_FAILURES:
+            if self._failures == MAX_CONSECUTIVE_FAILURES:
+                logger.warning("[PRICE WORKER] unhealthy, restarting process (Python fallback meanwhile)")
+            self._kill()
+
+    async def ping(self) -> bool:
+        self.stats["pings"] += 1
+        response = await self.request("ping", timeout=HEALTH_TIMEOUT_SECONDS)
+        return bool(response and response.get("ok"))
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            if self.alive or time.monotonic() >= self._next_spawn_at:
+                await self.ping()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "alive": self.alive,
+            "healthy": self.healthy,
+            "pid": self._process.pid if self.alive else None,
+            "pending": len(self._pending),
+        }
+
+
+# ============================================================================
+# INSTANCE PARTAGÉE
+# ============================================================================
+_worker: Optional[PriceWorker] = None
+
+
+def get_price_worker(command: List[str]) -> PriceWorker:
+    """Worker partagé (créé et surveillé au premier appel)."""
+    global _worker
+
+    if _worker is None:
+        _worker = PriceWorker(command)
+    _worker.start()
+    return _worker
+
+
+async def stop_price_worker():
+    """Arrête le worker partagé (fin du process et de la surveillance)."""
+    global _worker
+
+    if _worker is not None:
+        await _worker.stop()
+        _worker = None
+
+
+def get_price_worker_stats() -> Dict[str, Any]:
+    """Stats: spawns, exits, requests, failures, timeouts, healthy, pid..."""
+    return _worker.snapshot() if _worker is not None else {"alive": False}
@@ -0,0 +1,288 @@
+# rate_limiter.py
+"""
+Limiteur de débit central, un token bucket par hôte.
+
+Remplace les sleeps fixes dispersés (backoff sur 429 dans fetch_with_retry,
+fetch_with_backoff, post_graph, _check_rate_limit de Solana FM, délai entre
+tokens de main.py):
+- chaque requête prend un jeton du bucket de son hôte (acquire) puis
+  rapporte le statut de la réponse (observe)
+- le débit s'adapte (AIMD): +ADDITIVE_INCREASE req/s par succès, divisé par
+  2 sur un 429. Le débit réellement envoyé lors du 429 devient un plafond
+  (x0.9) vers lequel on remonte vite: on reste juste sous la limite du
+  fournisseur au lieu d'osciller autour
+- Retry-After (secondes ou date HTTP) bloque l'hôte jusqu'à l'échéance
+- les requêtes en attente sont servies par priorité (HIGH avant LOW), puis
+  dans l'ordre d'arrivée
+
+Aucune tâche ne dort pour un créneau entier: les requêtes en attente
+attendent une future, et un seul timer par hôte (loop.call_at) réveille la
+suivante exactement quand un jeton est disponible. Quand le bucket a des
+jetons et personne en file, acquire() ne suspend pas la tâche.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+from utils import logger
+
+PRIORITY_HIGH = 0     # alertes, chemin critique d'une opportunité
+PRIORITY_NORMAL = 1   # dumps de pools, quotes
+PRIORITY_LOW = 2      # découverte, métadonnées, tâches de fond
+
+# ============================================================================
+# CONFIGURATION PAR HÔTE
+# ============================================================================
+# rate: débit initial (req/s), burst: jetons max accumulés,
+# max_rate: débit max atteignable par augmentation additive
+HOST_RATE_LIMITS: Dict[str, Dict[str, float]] = {
+    "api.raydium.io": {"rate": 2.0, "burst": 2, "max_rate": 5.0},
+    "api-v3.raydium.io": {"rate": 5.0, "burst": 5, "max_rate": 10.0},
+    "api.mainnet.orca.so": {"rate": 2.0, "burst": 2, "max_rate": 5.0},
+    "dlmm-api.meteora.ag": {"rate": 2.0, "burst": 2, "max_rate": 5.0},
+    "lifinity.io": {"rate": 1.0, "burst": 2, "max_rate": 3.0},
+    "api.phoenix.so": {"rate": 1.0, "burst": 2, "max_rate": 3.0},
+    "api.jup.ag": {"rate": 1.0, "burst": 1, "max_rate": 1.0},  # clé gratuite: 1 req/s
+    "quote-api.jup.ag": {"rate": 1.0, "burst": 1, "max_rate": 1.0},
+    "aggregator-api.kyberswap.com": {"rate": 5.0, "burst": 5, "max_rate": 10.0},
+    "api.studio.thegraph.com": {"rate": 5.0, "burst": 10, "max_rate": 20.0},
+    "interface.gateway.uniswap.org": {"rate": 3.0, "burst": 3, "max_rate": 10.0},
+    "api.aerodrome.finance": {"rate": 3.0, "burst": 3, "max_rate": 10.0},
+    "api.telegram.org": {"rate": 1.0, "burst": 3, "max_rate": 1.0},  # 1 msg/s par chat
+}
+DEFAULT_RATE_LIMIT = {"rate": 10.0, "burst": 10, "max_rate": 50.0}
+
+MIN_RATE = 0.05             # req/s minimal (1 requête / 20s)
+ADDITIVE_INCREASE = 0.05    # req/s gagnés par réponse réussie
+MULTIPLICATIVE_DECREASE = 0.5
+RECOVERY_FRACTION = 0.1     # sous le plafond appris: +10% de l'écart par succès
+CEILING_MARGIN = 0.9        # plafond = débit envoyé lors du dernier 429 x marge
+DECREASE_COOLDOWN_SECONDS = 1.0  # 429 de requêtes envoyées avant la réduction: ignorés
+RATE_WINDOW_SECONDS = 1.0   # fenêtre de mesure du débit réellement envoyé
+CEILING_TTL_SECONDS = 600   # le plafond est oublié sans nouveau 429
+MAX_RETRY_AFTER_SECONDS = 300
+
+
+def _host_of(url_or_host: str) -> str:
+    if "://" in url_or_host:
+        return urlsplit(url_or_host).hostname or url_or_host
+    return url_or_host
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After en secondes (délai ou date HTTP), None si absent/invalide."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER_SECONDS)
+
+
+# ============================================================================
+# TOKEN BUCKET
+# ============================================================================
+
+class HostBucket:
+    """Token bucket adaptatif d'un hôte, avec file d'attente par priorité."""
+
+    def __init__(self, host: str, rate: float, burst: float, max_rate: float):
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max_rate
+        self.ceiling = max_rate
+        self.ceiling_set_at = 0.0
+        self.decreased_at = float("-inf")
+        self._sent = deque()  # instants des derniers jetons attribués
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_at = 0.0
+        self.stats = {
+            "granted": 0,
+            "queued": 0,
+            "wait_ms": 0.0,
+            "throttled": 0,
+            "retry_after_s": 0.0,
+        }
+
+    def _grant(self, now: float):
+        self.tokens -= 1
+        self.stats["granted"] += 1
+        sent = self._sent
+        sent.append(now)
+        while now - sent[0] > RATE_WINDOW_SECONDS:
+            sent.popleft()
+
+    def sent_rate(self, now: float) -> float:
+        """Débit réellement envoyé sur la dernière fenêtre (req/s)."""
+        while self._sent and now - self._sent[0] > RATE_WINDOW_SECONDS:
+            self._sent.popleft()
+        return len(self._sent) / RATE_WINDOW_SECONDS
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL):
+        """Prend un jeton; attend (sans polling) si le bucket est vide ou bloqué."""
+        now = time.monotonic()
+        if not self._waiters and now >= self.blocked_until:
+            self._refill(now)
+            if self.tokens >= 1:
+                self._grant(now)
+                return
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self.stats["queued"] += 1
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.tokens += 1  # jeton attribué à une tâche annulée: le rendre
+                self._schedule()
+            raise
+        self.stats["wait_ms"] += (time.monotonic() - now) * 1000
+
+    def _schedule(self):
+        """Arme le timer sur l'instant où le prochain jeton sera disponible."""
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)  # tâches annulées pendant l'attente
+        if not self._waiters:
+            return
+        now = time.monotonic()
+        self._refill(now)
+        ready_at = max(self.blocked_until, now + max(0.0, 1 - self.tokens) / self.rate)
+        if self._timer is not None:
+            if abs(self._timer_at - ready_at) < 1e-4:
+                return
+            self._timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timer_at = ready_at
+        self._timer = loop.call_at(loop.time() + (ready_at - now), self._dispatch)
+
+    def _dispatch(self):
+        self._timer = None
+        now = time.monotonic()
+        if now >= self.blocked_until:
+            self._refill(now)
+            while self._waiters and self.tokens >= 1:
+                _, _, future = heapq.heappop(self._waiters)
+                if future.done():
+                    continue
+                self._grant(now)
+                future.set_result(None)
+        self._schedule()
+
+    def on_success(self):
+        """Augmentation additive, bornée par max_rate et le plafond appris."""
+        now = time.monotonic()
+        if self.ceiling < self.max_rate and now - self.ceiling_set_at > CEILING_TTL_SECONDS:
+            self.ceiling = self.max_rate
+        if self.rate < self.ceiling:
+            self._refill(now)
+            step = ADDITIVE_INCREASE
+            if self.ceiling < self.max_rate:
+                # Sous un plafond appris (zone sûre): remonter vite vers lui
+                step = max(step, RECOVERY_FRACTION * (self.ceiling - self.rate))
+            self.rate = min(self.ceiling, self.rate + step)
+
+    def on_throttled(self, retry_after: Optional[float] = None):
+        """429: plafond juste sous le débit courant, débit divisé, pause Retry-After."""
+        now = time.monotonic()
+        self._refill(now)
+        self.stats["throttled"] += 1
+        # Les requêtes déjà en vol reçoivent leurs 429 en rafale: une seule
+        # réduction par épisode, les suivantes ne font qu'étendre la pause
+        first_in_episode = (
+            now >= self.blocked_until and now - self.decreased_at >= DECREASE_COOLDOWN_SECONDS
+        )
+        if first_in_episode:
+            # Plafond appris sur le débit réellement envoyé (pas le débit du bucket)
+            self.ceiling = max(MIN_RATE, min(self.rate, self.sent_rate(now)) * CEILING_MARGIN)
+            self.ceiling_set_at = now
+            self.decreased_at = now
+            self.rate = max(MIN_RATE, self.rate * MULTIPLICATIVE_DECREASE)
+        self.tokens = 0.0
+        pause = retry_after if retry_after is not None else 1.0 / self.rate
+        if now + pause > self.blocked_until:
+            self.stats["retry_after_s"] += now + pause - max(now, self.blocked_until)
+            self.blocked_until = now + pause
+        if first_in_episode:
+            logger.warning(
+                f"[RATE] {self.host} throttled: rate {self.rate:.2f} req/s "
+                f"(ceiling {self.ceiling:.2f}), paused {pause:.1f}s"
+            )
+        if self._waiters:
+            self._schedule()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "rate": round(self.rate, 3),
+            "ceiling": round(self.ceiling, 3),
+            "waiting": sum(1 for _, _, f in self._waiters if not f.done()),
+            "blocked_for_s": round(max(0.0, self.blocked_until - time.monotonic()), 1),
+        }
+
+
+# ============================================================================
+# API PAR HÔTE
+# ============================================================================
+_buckets: Dict[str, HostBucket] = {}
+
+
+def get_bucket(url_or_host: str) -> HostBucket:
+    """Bucket de l'hôte (créé depuis HOST_RATE_LIMITS au premier appel)."""
+    host = _host_of(url_or_host)
+    bucket = _buckets.get(host)
+    if bucket is None:
+        conf = HOST_RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT)
+        bucket = _buckets[host] = HostBucket(host, conf["rate"], conf["burst"], conf["max_rate"])
+    return bucket
+
+
+async def acquire(url_or_host: str, priority: int = PRIORITY_NORMAL):
+    """À appeler juste avant chaque requête vers l'hôte."""
+    await get_bucket(url_or_host).acquire(priority)
+
+
+def observe(url_or_host: str, status: int, headers: Optional[Mapping[str, str]] = None):
+    """
+    Rapporte le statut d'une réponse: 429 (ou 503 avec Retry-After) réduit le
+    débit et bloque l'hôte, un succès l'augmente.
+    """
+    bucket = get_bucket(url_or_host)
+    retry_after = parse_retry_after(headers.get("Retry-After")) if headers else None
+    if status == 429 or (status == 503 and retry_after is not None):
+        bucket.on_throttled(retry_after)
+    elif status < 400:
+        bucket.on_success()
+
+
+def throttled(url_or_host: str, retry_after: Optional[float] = None):
+    """429 signalé hors aiohttp (ex: telegram.error.RetryAfter)."""
+    get_bucket(url_or_host).on_throttled(retry_after)
+
+
+def get_rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats par hôte: granted, queued, wait_ms, throttled, rate, ceiling, waiting."""
+    return {host: bucket.snapshot() for host, bucket in _buckets.items()}
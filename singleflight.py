@@ -0,0 +1,89 @@
+# singleflight.py
+"""
+Coalescence des requêtes concurrentes ("singleflight").
+
+Quand plusieurs coroutines demandent la même ressource (même clé) pendant
+qu'un fetch est déjà en cours, elles attendent ce fetch unique au lieu d'en
+lancer un nouveau. Typique: asyncio.gather sur N tokens avec un cache de
+pools froid -> 1 téléchargement des univers DEX au lieu de N.
+
+Le fetch tourne dans une tâche dédiée protégée par asyncio.shield: l'annulation
+d'un appelant n'annule pas le travail partagé par les autres.
+"""
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from utils import logger
+
+T = TypeVar("T")
+
+_inflight: Dict[str, asyncio.Task] = {}
+_singleflight_stats: Dict[str, Dict[str, int]] = {}  # namespace -> compteurs
+
+
+def _namespace(key: str) -> str:
+    """Préfixe de la clé avant ':' (ex: "solana_pools:v3" -> "solana_pools")."""
+    return key.split(":", 1)[0]
+
+
+def _counter(key: str) -> Dict[str, int]:
+    return _singleflight_stats.setdefault(_namespace(key), {
+        "calls": 0,
+        "fetches": 0,
+        "deduplicated": 0,
+    })
+
+
+def _on_done(key: str, task: asyncio.Task):
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    # Marquer l'exception comme lue si tous les appelants ont été annulés
+    if not task.cancelled():
+        task.exception()
+
+
+async def singleflight(key: str, fn: Callable[[], Awaitable[T]]) -> T:
+    """
+    Exécute fn() une seule fois pour tous les appelants concurrents de `key`.
+
+    Args:
+        key: Clé de coalescence, "namespace:détail" (le namespace regroupe les stats)
+        fn: Fabrique de la coroutine à exécuter (appelée seulement par le premier appelant)
+
+    Returns:
+        Le résultat de fn(), partagé entre les appelants (ne pas le muter).
+        Une exception de fn() est propagée à tous les appelants.
+    """
+    counter = _counter(key)
+    counter["calls"] += 1
+
+    task = _inflight.get(key)
+    if task is not None:
+        counter["deduplicated"] += 1
+        logger.debug(f"[SINGLEFLIGHT] {key[:60]} joined in-flight fetch")
+    else:
+        counter["fetches"] += 1
+        task = asyncio.ensure_future(fn())
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _on_done(key, t))
+
+    return await asyncio.shield(task)
+
+
+def graphql_key(namespace: str, url: str, payload: Dict[str, Any]) -> str:
+    """Clé de coalescence pour une requête GraphQL (url + query + variables)."""
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha1(f"{url}|{body}".encode()).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+def get_singleflight_stats() -> Dict[str, Dict[str, int]]:
+    """Compteurs par namespace: calls, fetches (réels), deduplicated (appelants coalescés)."""
+    return {ns: dict(counter) for ns, counter in _singleflight_stats.items()}
+
+
+def inflight_count() -> int:
+    """Nombre de fetchs actuellement en cours."""
+    return len(_inflight)
@@ -0,0 +1,287 @@
+# snapshot_persistence.py
+"""
+Snapshot disque des pools normalisées pour les démarrages à chaud.
+
+Après un redémarrage (run_forever.sh, Docker), le bot n'a aucune pool tant
+que le premier fetch de chaque DEX n'est pas terminé (20-40s). Le dernier
+snapshot est donc écrit à chaque cycle dans un fichier binaire compact, puis
+rechargé au démarrage (via mmap) et servi marqué "stale" le temps que les
+fetchs frais arrivent.
+
+Format (little-endian, version FORMAT_VERSION):
+    header   : magic b"ABRSNAP\\0" | version u16 | flags u16 | meta_len u32
+    meta     : JSON utf-8 (written_at, table de chaînes, sections)
+    strings  : offsets u32 (count + 1) | blob utf-8. Index 0 = None.
+    sections : lignes de taille fixe (struct), une par pool
+
+Chaque champ d'une section a un type: "s" (index de chaîne u32), "f" (f64,
+NaN = None), "i" (i64, minimum = None), "b" (u8, 2 = None) ou "j" (JSON
+dans la table de chaînes, pour les valeurs composites). Les mints, DEX et
+types de pool sont dédupliqués par la table de chaînes.
+
+L'écriture est atomique: fichier temporaire dans le même dossier, fsync,
+puis os.replace.
+"""
+import gc
+import json
+import math
+from itertools import repeat
+from operator import itemgetter
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import POOL_SNAPSHOT_PATH
+from utils import logger
+
+MAGIC = b"ABRSNAP\x00"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sHHI")
+_INT_NONE, _INT_MAX = -(1 << 63), (1 << 63) - 1  # i64 minimal réservé à None
+
+# type de champ -> code struct
+_STRUCT_CODES = {"s": "I", "f": "d", "i": "q", "b": "B", "j": "I"}
+
+
+# ============================================================================
+# ENCODAGE
+# ============================================================================
+
+def _infer_field_type(values: List[Any]) -> str:
+    """Type le plus précis couvrant toutes les valeurs non-None d'un champ."""
+    kinds = {type(v) for v in values if v is not None}
+    if not kinds:
+        return "s"
+    if kinds == {bool}:
+        return "b"
+    if kinds == {int} and all(_INT_NONE < v <= _INT_MAX for v in values if v is not None):
+        return "i"
+    if kinds <= {int, float}:
+        return "f"
+    if kinds == {str}:
+        return "s"
+    return "j"
+
+
+def _encode_snapshot(sections: Dict[str, Dict[str, Any]]) -> bytes:
+    strings: List[str] = [""]  # index 0 réservé à None
+    string_index: Dict[str, int] = {}
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        idx = string_index.get(value)
+        if idx is None:
+            idx = string_index[value] = len(strings)
+            strings.append(value)
+        return idx
+
+    section_meta = []
+    section_blobs = []
+    for name, section in sections.items():
+        pools = section.get("pools") or []
+        fields: List[str] = []
+        seen = set()
+        for pool in pools:
+            for key in pool:
+                if key not in seen and key != "stale":
+                    seen.add(key)
+                    fields.append(key)
+
+        columns = [[pool.get(field) for pool in pools] for field in fields]
+        types = [_infer_field_type(column) for column in columns]
+
+        encoded_columns = []
+        for column, kind in zip(columns, types):
+            if kind == "s":
+                encoded_columns.append([intern(v) for v in column])
+            elif kind == "j":
+                encoded_columns.append([0 if v is None else intern(json.dumps(v)) for v in column])
+            elif kind == "f":
+                encoded_columns.append([math.nan if v is None else float(v) for v in column])
+            elif kind == "i":
+                encoded_columns.append([_INT_NONE if v is None else v for v in column])
+            else:  # "b"
+                encoded_columns.append([2 if v is None else int(v) for v in column])
+
+        row = struct.Struct("<" + "".join(_STRUCT_CODES[kind] for kind in types))
+        blob = bytearray(row.size * len(pools))
+        for i, values in enumerate(zip(*encoded_columns)):
+            row.pack_into(blob, i * row.size, *values)
+
+        section_meta.append({
+            "name": name,
+            "updated_at": section.get("updated_at", 0.0),
+            "count": len(pools),
+            # [nom, type, nullable]: sans None, le décodage saute la conversion
+            "fields": [
+                [field, kind, any(v is None for v in column)]
+                for field, kind, column in zip(fields, types, columns)
+            ],
+            "row_size": row.size,
+            "length": len(blob),
+        })
+        section_blobs.append(bytes(blob))
+
+    encoded_strings = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for s in encoded_strings:
+        offsets.append(offsets[-1] + len(s))
+    strings_blob = struct.pack(f"<{len(offsets)}I", *offsets) + b"".join(encoded_strings)
+
+    meta = {
+        "written_at": time.time(),
+        "strings": {"count": len(strings), "length": len(strings_blob)},
+        "sections": section_meta,
+    }
+    meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(meta_bytes))
+    return b"".join([header, meta_bytes, strings_blob, *section_blobs])
+
+
+def save_pool_snapshot(
+    sections: Dict[str, Dict[str, Any]],
+    path: str = POOL_SNAPSHOT_PATH
+) -> int:
+    """
+    Écrit le snapshot de façon atomique.
+
+    Args:
+        sections: {"solana/raydium": {"updated_at": epoch, "pools": [...]}, ...}
+
+    Returns:
+        Taille écrite en octets (0 en cas d'erreur, loggée)
+    """
+    try:
+        data = _encode_snapshot(sections)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".pool_snapshot.", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        logger.debug(f"[SNAPSHOT] Saved {len(data) / 1024:.0f} KB to {path}")
+        return len(data)
+    except Exception as e:
+        logger.error(f"[SNAPSHOT] Save failed ({path}): {e}")
+        return 0
+
+
+# ============================================================================
+# DÉCODAGE (MMAP)
+# ============================================================================
+
+def _decode_strings(buf, offset: int, count: int) -> Tuple[List[Optional[str]], int]:
+    offsets = struct.unpack_from(f"<{count + 1}I", buf, offset)
+    start = offset + 4 * (count + 1)
+    blob = bytes(buf[start:start + offsets[-1]])
+    if blob.isascii():
+        # Cas courant (mints base58, ids hex): offsets octets == offsets caractères
+        text = blob.decode("ascii")
+        strings: List[Optional[str]] = [text[offsets[i]:offsets[i + 1]] for i in range(count)]
+    else:
+        strings = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(count)]
+    strings[0] = None
+    return strings, start + offsets[-1]
+
+
+def _decode_section(buf, offset: int, meta: Dict[str, Any], strings: List[Optional[str]], mark_stale: bool):
+    fields = [field[0] for field in meta["fields"]]
+    types = [field[1] for field in meta["fields"]]
+    nullable = [field[2] for field in meta["fields"]]
+    count = meta["count"]
+    if count == 0:
+        return []
+
+    columns = []
+    if fields:
+        row = struct.Struct("<" + "".join(_STRUCT_CODES[kind] for kind in types))
+        rows = row.iter_unpack(buf[offset:offset + meta["length"]])
+
+        for kind, has_none, column in zip(types, nullable, zip(*rows)):
+            if kind == "s":
+                columns.append(itemgetter(*column)(strings) if count > 1 else (strings[column[0]],))
+            elif kind == "j":
+                columns.append([None if i == 0 else json.loads(strings[i]) for i in column])
+            elif kind == "b":
+                columns.append([None if v == 2 else bool(v) for v in column])
+            elif not has_none:
+                columns.append(column)
+            elif kind == "f":
+                columns.append([v if v == v else None for v in column])  # NaN -> None
+            else:
+                columns.append([None if v == _INT_NONE else v for v in column])
+
+    if mark_stale:
+        fields.append("stale")
+        columns.append(repeat(True, count))
+    if not columns:
+        return [{} for _ in range(count)]
+    return [dict(zip(fields, values)) for values in zip(*columns)]
+
+
+def load_pool_snapshot(
+    path: str = POOL_SNAPSHOT_PATH,
+    mark_stale: bool = True
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Charge le snapshot via mmap.
+
+    Args:
+        mark_stale: Ajoute "stale": True à chaque pool chargée
+
+    Returns:
+        {section: {"updated_at": epoch, "pools": [...]}}, ou None si le
+        fichier est absent, corrompu ou d'une autre version de format
+    """
+    # Construire des milliers de dicts déclenche le GC cyclique sans rien à
+    # collecter: le suspendre pendant le décodage (~25% du temps de chargement)
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                buf = memoryview(mm)
+                try:
+                    magic, version, _flags, meta_len = _HEADER.unpack_from(buf, 0)
+                    if magic != MAGIC or version != FORMAT_VERSION:
+                        logger.warning(f"[SNAPSHOT] Ignoring {path}: format {magic!r} v{version}")
+                        return None
+                    offset = _HEADER.size
+                    meta = json.loads(bytes(buf[offset:offset + meta_len]))
+                    offset += meta_len
+                    strings, offset = _decode_strings(buf, offset, meta["strings"]["count"])
+
+                    result = {}
+                    for section in meta["sections"]:
+                        result[section["name"]] = {
+                            "updated_at": section["updated_at"],
+                            "pools": _decode_section(buf, offset, section, strings, mark_stale),
+                        }
+                        offset += section["length"]
+                finally:
+                    buf.release()
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"[SNAPSHOT] Failed to load {path}: {e}")
+        return None
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    total = sum(len(s["pools"]) for s in result.values())
+    logger.info(f"[SNAPSHOT] Loaded {total} pools from {path} ({len(result)} sections, written {time.time() - meta['written_at']:.0f}s ago)")
+    return result
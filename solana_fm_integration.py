@@ -18,6 +18,8 @@ import os
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 from utils import logger
+from http_transport import create_session
+from rate_limiter import HOST_RATE_LIMITS, PRIORITY_LOW, acquire as acquire_rate_limit, observe as observe_rate_limit
 
 # Configuration Solana FM
 SOLANA_FM_API_KEY = os.getenv("SOLANA_FM_API_KEY", "")
@@ -31,37 +33,23 @@ RATE_LIMIT_WINDOW = 4 # secondes
 HIGH_SLIPPAGE_THRESHOLD = 0.001
 CRITICAL_SLIPPAGE_THRESHOLD = 0.05  # 5%
 
+# Bucket de l'hôte dans le limiter central: RATE_LIMIT_REQUESTS par RATE_LIMIT_WINDOW
+HOST_RATE_LIMITS["api.solana.fm"] = {
+    "rate": RATE_LIMIT_REQUESTS / RATE_LIMIT_WINDOW,
+    "burst": RATE_LIMIT_REQUESTS / RATE_LIMIT_WINDOW,
+    "max_rate": RATE_LIMIT_REQUESTS / RATE_LIMIT_WINDOW,
+}
+
 # Cache pour éviter trop de requêtes
 _cache = {}
-_request_count = 0
-_request_window_start = datetime.utcnow()
 
 # ============================================================================
 # Gestion du Rate Limiting
 # ============================================================================
 
 async def _check_rate_limit():
-    """Vérifie et applique les limites de rate"""
-    global _request_count, _request_window_start
-    
-    now = datetime.utcnow()
-    time_since_window_start = (now - _request_window_start).total_seconds()
-    
-    # Reset du compteur si nouvelle fenêtre
-    if time_since_window_start >= RATE_LIMIT_WINDOW:
-        _request_count = 0
-        _request_window_start = now
-        return
-    
-    # Si limite atteinte, attendre
-    if _request_count >= RATE_LIMIT_REQUESTS:
-        wait_time = RATE_LIMIT_WINDOW - time_since_window_start
-        logger.warning(f"Solana FM rate limit reached, waiting {wait_time:.0f}s")
-        await asyncio.sleep(wait_time)
-        _request_count = 0
-        _request_window_start = datetime.utcnow()
-    
-    _request_count += 1
+    """Prend un jeton dans le bucket Solana FM (limiter central, basse priorité)"""
+    await acquire_rate_limit(SOLANA_FM_BASE_URL, PRIORITY_LOW)
 
 # ============================================================================
 # Fonctions API Solana FM
@@ -103,6 +91,7 @@ async def get_token_info(
     
     try:
         async with session.get(url, headers=headers, timeout=10) as resp:
+            observe_rate_limit(url, resp.status, resp.headers)
             if resp.status == 200:
                 data = await resp.json()
                 
@@ -150,6 +139,7 @@ async def get_transaction_details(
     
     try:
         async with session.get(url, headers=headers, timeout=10) as resp:
+            observe_rate_limit(url, resp.status, resp.headers)
             if resp.status == 200:
                 data = await resp.json()
                 return data
@@ -360,7 +350,7 @@ async def test_solana_fm():
     
     print("🧪 Testing Solana FM integration...")
     
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         # Test avec SOL
         sol_address = "So11111111111111111111111111111111111111112"
         
@@ -0,0 +1,537 @@
+# solana_rpc_reader.py
+"""
+Lecture directe de l'état des pools Solana via RPC (getMultipleAccounts).
+
+Les dumps REST des DEX sont énormes et en retard sur la chaîne. Pour les
+pools des paires surveillées (pool_id déjà connus par les dumps), ce module
+lit les comptes on-chain par lots de SOLANA_RPC_BATCH_SIZE (max 100, limite
+de getMultipleAccounts) et décode:
+- Orca Whirlpool (sqrt_price Q64.64)
+- Raydium CLMM (PoolState, frais dans le compte AmmConfig)
+- Raydium AMM v4 (réserves = vaults - PnL à prélever)
+- Meteora DLMM (LbPair, prix = (1 + bin_step/10000)^active_id)
+
+Le layout est choisi d'après le programme propriétaire du compte. Un
+second lot lit les dépendances: vaults (réserves, liquidité), mints
+(décimales, en cache) et AmmConfig Raydium (frais, en cache).
+
+Les enregistrements produits ont les mêmes champs que ceux de pool_fetchers
+(pool_id, dex, token_a, token_b, price = prix de A en B, liquidity_usd,
+fee_bps, fee_pct, pool_type) plus slot et source="rpc". liquidity_usd vaut
+None si aucun des deux tokens n'a de prix USD connu (usd_prices).
+"""
+import asyncio
+import base64
+import hashlib
+import struct
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from circuit_breaker import allow_request, track
+from config import SOLANA_RPC_BATCH_SIZE, SOLANA_RPC_COMMITMENT, SOLANA_RPC_URL
+from rate_limiter import acquire as acquire_rate_limit, observe as observe_rate_limit
+from utils import logger
+
+# ============================================================================
+# PROGRAMMES ET CONSTANTES
+# ============================================================================
+WHIRLPOOL_PROGRAM_ID = "whirLbMiicVdio4qvUfM5KAg6Ct8VwpYzGff3uctyCc"
+RAYDIUM_CLMM_PROGRAM_ID = "CAMMCzo5YL8w4VFF8KVHrK22GGUsp5VTaW7grrKgrWqK"
+RAYDIUM_AMM_V4_PROGRAM_ID = "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8"
+METEORA_DLMM_PROGRAM_ID = "LBUZKhRxPF3XUpBCjp4YzTKgLccjZhTSDM9YuVaPwxo"
+
+MAX_ACCOUNTS_PER_CALL = 100  # limite de getMultipleAccounts
+RPC_TIMEOUT_SECONDS = 10
+RPC_BREAKER = "solana_rpc"
+
+# Prix USD connus sans source externe (stablecoins)
+DEFAULT_USD_PRICES: Dict[str, float] = {
+    "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": 1.0,  # USDC
+    "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": 1.0,  # USDT
+}
+
+Q64 = float(2 ** 64)
+
+# ============================================================================
+# BASE58
+# ============================================================================
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_B58_INDEX = {c: i for i, c in enumerate(_B58_ALPHABET)}
+
+
+def b58encode(raw: bytes) -> str:
+    n = int.from_bytes(raw, "big")
+    out = []
+    while n:
+        n, rem = divmod(n, 58)
+        out.append(_B58_ALPHABET[rem])
+    pad = len(raw) - len(raw.lstrip(b"\0"))
+    return "1" * pad + "".join(reversed(out))
+
+
+def b58decode(text: str) -> bytes:
+    n = 0
+    for c in text:
+        n = n * 58 + _B58_INDEX[c]
+    pad = len(text) - len(text.lstrip("1"))
+    body = n.to_bytes((n.bit_length() + 7) // 8, "big") if n else b""
+    return b"\0" * pad + body
+
+
+def _pubkey(data: bytes, offset: int) -> str:
+    return b58encode(data[offset:offset + 32])
+
+
+def _u128(data: bytes, offset: int) -> int:
+    return int.from_bytes(data[offset:offset + 16], "little")
+
+
+def anchor_discriminator(account_name: str) -> bytes:
+    """8 premiers octets de sha256("account:<Nom>") (comptes Anchor)."""
+    return hashlib.sha256(f"account:{account_name}".encode()).digest()[:8]
+
+
+# ============================================================================
+# LAYOUTS
+# ============================================================================
+# Chaque décodeur renvoie un état brut:
+#   pool_id, dex, pool_type, token_a, token_b, vault_a, vault_b,
+#   decimals_a/decimals_b (None: lire le mint), raw_price (B atomique par
+#   A atomique, None: calculé depuis les réserves), fee (fraction) ou
+#   fee_config (compte à lire), reserve_offset_a/b (montants à déduire)
+
+WHIRLPOOL_DISCRIMINATOR = anchor_discriminator("Whirlpool")
+WHIRLPOOL_SIZE = 653
+
+
+def decode_whirlpool(pool_id: str, data: bytes) -> Optional[Dict[str, Any]]:
+    """Orca Whirlpool: fee_rate en millionièmes, sqrt_price Q64.64."""
+    if len(data) < WHIRLPOOL_SIZE or data[:8] != WHIRLPOOL_DISCRIMINATOR:
+        return None
+    fee_rate, = struct.unpack_from("<H", data, 45)
+    sqrt_price = _u128(data, 65)
+    return {
+        "pool_id": pool_id,
+        "dex": "orca",
+        "pool_type": "Whirlpool",
+        "token_a": _pubkey(data, 101),
+        "vault_a": _pubkey(data, 133),
+        "token_b": _pubkey(data, 181),
+        "vault_b": _pubkey(data, 213),
+        "decimals_a": None,
+        "decimals_b": None,
+        "raw_price": (sqrt_price / Q64) ** 2,
+        "fee": fee_rate / 1_000_000,
+        "sqrt_price": sqrt_price,
+    }
+
+
+RAYDIUM_CLMM_DISCRIMINATOR = anchor_discriminator("PoolState")
+RAYDIUM_CLMM_MIN_SIZE = 273
+RAYDIUM_AMM_CONFIG_DISCRIMINATOR = anchor_discriminator("AmmConfig")
+
+
+def decode_raydium_clmm(pool_id: str, data: bytes) -> Optional[Dict[str, Any]]:
+    """Raydium CLMM PoolState: décimales incluses, frais dans AmmConfig."""
+    if len(data) < RAYDIUM_CLMM_MIN_SIZE or data[:8] != RAYDIUM_CLMM_DISCRIMINATOR:
+        return None
+    decimals_0, decimals_1 = data[233], data[234]
+    sqrt_price = _u128(data, 253)
+    return {
+        "pool_id": pool_id,
+        "dex": "raydium",
+        "pool_type": "CLMM",
+        "fee_config": _pubkey(data, 9),
+        "token_a": _pubkey(data, 73),
+        "token_b": _pubkey(data, 105),
+        "vault_a": _pubkey(data, 137),
+        "vault_b": _pubkey(data, 169),
+        "decimals_a": decimals_0,
+        "decimals_b": decimals_1,
+        "raw_price": (sqrt_price / Q64) ** 2,
+    }
+
+
+def decode_raydium_amm_config(data: bytes) -> Optional[float]:
+    """trade_fee_rate (millionièmes) d'un AmmConfig Raydium CLMM, en fraction."""
+    if len(data) < 51 or data[:8] != RAYDIUM_AMM_CONFIG_DISCRIMINATOR:
+        return None
+    trade_fee_rate, = struct.unpack_from("<I", data, 47)
+    return trade_fee_rate / 1_000_000
+
+
+RAYDIUM_AMM_V4_SIZE = 752
+# 32 u64 en tête (status, nonce, ..., orderbookToInitTime)
+_AMM_V4_HEADER = struct.Struct("<32Q")
+
+
+def decode_raydium_amm(pool_id: str, data: bytes) -> Optional[Dict[str, Any]]:
+    """Raydium AMM v4 (LIQUIDITY_STATE_LAYOUT_V4, sans discriminateur)."""
+    if len(data) != RAYDIUM_AMM_V4_SIZE:
+        return None
+    header = _AMM_V4_HEADER.unpack_from(data, 0)
+    base_decimals, quote_decimals = header[4], header[5]
+    swap_fee_numerator, swap_fee_denominator = header[22], header[23]
+    base_need_take_pnl, quote_need_take_pnl = header[24], header[25]
+    if base_decimals > 32 or quote_decimals > 32:
+        return None
+    return {
+        "pool_id": pool_id,
+        "dex": "raydium",
+        "pool_type": "AMM",
+        "vault_a": _pubkey(data, 336),
+        "vault_b": _pubkey(data, 368),
+        "token_a": _pubkey(data, 400),
+        "token_b": _pubkey(data, 432),
+        "decimals_a": base_decimals,
+        "decimals_b": quote_decimals,
+        "raw_price": None,
+        "fee": swap_fee_numerator / swap_fee_denominator if swap_fee_denominator else 0.0025,
+        "reserve_offset_a": base_need_take_pnl,
+        "reserve_offset_b": quote_need_take_pnl,
+    }
+
+
+METEORA_DLMM_DISCRIMINATOR = anchor_discriminator("LbPair")
+METEORA_DLMM_MIN_SIZE = 216
+
+
+def decode_meteora_dlmm(pool_id: str, data: bytes) -> Optional[Dict[str, Any]]:
+    """Meteora DLMM LbPair: frais de base = base_factor x bin_step x 10 x 10^power / 1e9."""
+    if len(data) < METEORA_DLMM_MIN_SIZE or data[:8] != METEORA_DLMM_DISCRIMINATOR:
+        return None
+    base_factor, = struct.unpack_from("<H", data, 8)
+    base_fee_power_factor = data[34]  # StaticParameters: 4 x u16, 2 x u32, 2 x i32, u16 puis ce u8
+    active_id, bin_step = struct.unpack_from("<iH", data, 76)
+    return {
+        "pool_id": pool_id,
+        "dex": "meteora",
+        "pool_type": "DLMM",
+        "token_a": _pubkey(data, 88),
+        "token_b": _pubkey(data, 120),
+        "vault_a": _pubkey(data, 152),
+        "vault_b": _pubkey(data, 184),
+        "decimals_a": None,
+        "decimals_b": None,
+        "raw_price": (1 + bin_step / 10_000) ** active_id,
+        "fee": base_factor * bin_step * 10 * (10 ** base_fee_power_factor) / 1e9,
+        "active_id": active_id,
+        "bin_step": bin_step,
+    }
+
+
+DECODERS: Dict[str, Callable[[str, bytes], Optional[Dict[str, Any]]]] = {
+    WHIRLPOOL_PROGRAM_ID: decode_whirlpool,
+    RAYDIUM_CLMM_PROGRAM_ID: decode_raydium_clmm,
+    RAYDIUM_AMM_V4_PROGRAM_ID: decode_raydium_amm,
+    METEORA_DLMM_PROGRAM_ID: decode_meteora_dlmm,
+}
+
+
+def decode_mint_decimals(data: bytes) -> Optional[int]:
+    """Décimales d'un mint SPL (offset 44)."""
+    return data[44] if len(data) >= 45 else None
+
+
+def decode_token_amount(data: bytes) -> Optional[int]:
+    """Montant d'un compte token SPL (u64 à l'offset 64)."""
+    if len(data) < 72:
+        return None
+    return struct.unpack_from("<Q", data, 64)[0]
+
+
+# ============================================================================
+# RPC
+# ============================================================================
+_mint_decimals: Dict[str, int] = {}
+_fee_configs: Dict[str, float] = {}
+_rpc_stats: Dict[str, Any] = {
+    "calls": 0,
+    "accounts": 0,
+    "missing": 0,
+    "bytes": 0,
+    "decoded": 0,
+    "undecoded": 0,
+    "last_slot": 0,
+    "last_read_ms": 0.0,
+}
+
+
+def get_rpc_reader_stats() -> Dict[str, Any]:
+    """Stats: calls, accounts, missing, bytes, decoded, undecoded, last_slot, last_read_ms."""
+    return dict(_rpc_stats)
+
+
+async def _get_accounts_batch(
+    session: aiohttp.ClientSession,
+    rpc_url: str,
+    keys: List[str]
+) -> Tuple[int, Dict[str, Tuple[str, bytes]]]:
+    """Un appel getMultipleAccounts: (slot, {clé: (owner, data)}), comptes absents omis."""
+    if not allow_request(RPC_BREAKER):
+        return 0, {}
+    payload = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "getMultipleAccounts",
+        "params": [keys, {"encoding": "base64", "commitment": SOLANA_RPC_COMMITMENT}],
+    }
+    await acquire_rate_limit(rpc_url)
+    with track(RPC_BREAKER) as call:
+        async with session.post(
+            rpc_url,
+            json=payload,
+            timeout=aiohttp.ClientTimeout(total=RPC_TIMEOUT_SECONDS),
+        ) as resp:
+            call.status = resp.status
+            observe_rate_limit(rpc_url, resp.status, resp.headers)
+            if resp.status != 200:
+                logger.warning(f"[RPC] getMultipleAccounts status {resp.status}")
+                return 0, {}
+            body = await resp.json()
+        if "error" in body:
+            raise RuntimeError(f"getMultipleAccounts error: {body['error']}")
+
+    _rpc_stats["calls"] += 1
+    result = body.get("result") or {}
+    slot = (result.get("context") or {}).get("slot", 0)
+    accounts: Dict[str, Tuple[str, bytes]] = {}
+    for key, value in zip(keys, result.get("value") or []):
+        if not value:
+            _rpc_stats["missing"] += 1
+            continue
+        data = base64.b64decode(value["data"][0])
+        _rpc_stats["bytes"] += len(data)
+        accounts[key] = (value.get("owner"), data)
+    _rpc_stats["accounts"] += len(accounts)
+    return slot, accounts
+
+
+async def get_multiple_accounts(
+    session: aiohttp.ClientSession,
+    keys: Iterable[str],
+    rpc_url: Optional[str] = None
+) -> Tuple[int, Dict[str, Tuple[str, bytes]]]:
+    """
+    Lit des comptes par lots de SOLANA_RPC_BATCH_SIZE (lots en parallèle).
+
+    Returns:
+        (slot le plus ancien des lots, {clé: (owner, data)}). Un lot en
+        échec est journalisé et ses comptes omis.
+    """
+    rpc_url = rpc_url or SOLANA_RPC_URL
+    keys = list(dict.fromkeys(keys))
+    batch_size = max(1, min(SOLANA_RPC_BATCH_SIZE, MAX_ACCOUNTS_PER_CALL))
+    batches = [keys[i:i + batch_size] for i in range(0, len(keys), batch_size)]
+    results = await asyncio.gather(
+        *(_get_accounts_batch(session, rpc_url, batch) for batch in batches),
+        return_exceptions=True
+    )
+    accounts: Dict[str, Tuple[str, bytes]] = {}
+    slots = []
+    for result in results:
+        if isinstance(result, BaseException):
+            logger.warning(f"[RPC] getMultipleAccounts batch failed: {result}")
+            continue
+        slot, batch_accounts = result
+        if batch_accounts:
+            slots.append(slot)
+            accounts.update(batch_accounts)
+    return (min(slots) if slots else 0), accounts
+
+
+# ============================================================================
+# LECTURE DES POOLS
+# ============================================================================
+
+def _liquidity_usd(
+    state: Dict[str, Any],
+    price: float,
+    amount_a: float,
+    amount_b: float,
+    usd_prices: Dict[str, float]
+) -> Optional[float]:
+    usd_a = usd_prices.get(state["token_a"])
+    usd_b = usd_prices.get(state["token_b"])
+    if usd_a is None and usd_b is None:
+        return None
+    if usd_a is None:
+        usd_a = price * usd_b
+    elif usd_b is None:
+        usd_b = usd_a / price if price else 0.0
+    return amount_a * usd_a + amount_b * usd_b
+
+
+def build_record(
+    state: Dict[str, Any],
+    accounts: Dict[str, Tuple[str, bytes]],
+    slot: int,
+    usd_prices: Dict[str, float]
+) -> Optional[Dict[str, Any]]:
+    """État brut + dépendances lues -> enregistrement au format pool_fetchers."""
+    decimals_a = state["decimals_a"] if state["decimals_a"] is not None else _mint_decimals.get(state["token_a"])
+    decimals_b = state["decimals_b"] if state["decimals_b"] is not None else _mint_decimals.get(state["token_b"])
+    if decimals_a is None or decimals_b is None:
+        return None
+
+    fee = state.get("fee")
+    if fee is None:
+        fee = _fee_configs.get(state["fee_config"])
+        if fee is None:
+            return None
+
+    vault_a = accounts.get(state["vault_a"])
+    vault_b = accounts.get(state["vault_b"])
+    reserve_a = decode_token_amount(vault_a[1]) if vault_a else None
+    reserve_b = decode_token_amount(vault_b[1]) if vault_b else None
+    if reserve_a is not None and reserve_b is not None:
+        reserve_a = max(0, reserve_a - state.get("reserve_offset_a", 0))
+        reserve_b = max(0, reserve_b - state.get("reserve_offset_b", 0))
+
+    raw_price = state["raw_price"]
+    if raw_price is None:
+        # AMM à produit constant: prix = réserves
+        if not reserve_a or reserve_b is None:
+            return None
+        raw_price = reserve_b / reserve_a
+    price = raw_price * 10 ** (decimals_a - decimals_b)
+    if not price or price <= 0:
+        return None
+
+    liquidity = None
+    if reserve_a is not None and reserve_b is not None:
+        liquidity = _liquidity_usd(
+            state, price, reserve_a / 10 ** decimals_a, reserve_b / 10 ** decimals_b, usd_prices
+        )
+
+    fee_bps = int(round(fee * 10_000))
+    record = {
+        "pool_id": state["pool_id"],
+        "dex": state["dex"],
+        "token_a": state["token_a"],
+        "token_b": state["token_b"],
+        "price": price,
+        "liquidity_usd": liquidity,
+        "fee_bps": fee_bps,
+        "fee_pct": fee_bps / 10000.0,
+        "pool_type": state["pool_type"],
+        "slot": slot,
+        "source": "rpc",
+    }
+    if "sqrt_price" in state:
+        record["sqrt_price"] = state["sqrt_price"]
+    return record
+
+
+def decode_pool_account(pool_id: str, owner: str, data: bytes) -> Optional[Dict[str, Any]]:
+    """État brut d'un compte de pool (layout choisi par le programme), None si inconnu."""
+    decoder = DECODERS.get(owner)
+    state = decoder(pool_id, data) if decoder else None
+    if state is None:
+        _rpc_stats["undecoded"] += 1
+        logger.debug(f"[RPC] {pool_id[:8]}: unsupported account (owner {owner})")
+    return state
+
+
+def dependency_keys(states: Iterable[Dict[str, Any]]) -> List[str]:
+    """Comptes à lire pour finaliser les états: vaults, mints et AmmConfig hors cache."""
+    keys = []
+    for state in states:
+        keys += [state["vault_a"], state["vault_b"]]
+        for mint, decimals in ((state["token_a"], state["decimals_a"]), (state["token_b"], state["decimals_b"])):
+            if decimals is None and mint not in _mint_decimals:
+                keys.append(mint)
+        if "fee_config" in state and state["fee_config"] not in _fee_configs:
+            keys.append(state["fee_config"])
+    return list(dict.fromkeys(keys))
+
+
+def cache_dependencies(states: Iterable[Dict[str, Any]], accounts: Dict[str, Tuple[str, bytes]]):
+    """Met en cache les décimales de mints et les frais AmmConfig lus."""
+    for state in states:
+        for mint in (state["token_a"], state["token_b"]):
+            if mint in accounts and mint not in _mint_decimals:
+                decimals = decode_mint_decimals(accounts[mint][1])
+                if decimals is not None:
+                    _mint_decimals[mint] = decimals
+        config = state.get("fee_config")
+        if config in accounts and config not in _fee_configs:
+            fee = decode_raydium_amm_config(accounts[config][1])
+            if fee is not None:
+                _fee_configs[config] = fee
+
+
+async def load_pool_states(
+    session: aiohttp.ClientSession,
+    pool_ids: Iterable[str],
+    rpc_url: Optional[str] = None
+) -> Tuple[int, Dict[str, Dict[str, Any]], Dict[str, Tuple[str, bytes]]]:
+    """
+    Lit les comptes des pools puis leurs dépendances (deux séries de lots).
+
+    Returns:
+        (slot, {pool_id: état brut}, {clé: (owner, data)} des dépendances)
+    """
+    slot, pool_accounts = await get_multiple_accounts(session, pool_ids, rpc_url)
+    states = {}
+    for pool_id, (owner, data) in pool_accounts.items():
+        state = decode_pool_account(pool_id, owner, data)
+        if state is not None:
+            states[pool_id] = state
+
+    # Vaults à chaque lecture, mints et AmmConfig une seule fois (cache)
+    keys = dependency_keys(states.values())
+    _, accounts = await get_multiple_accounts(session, keys, rpc_url) if keys else (0, {})
+    cache_dependencies(states.values(), accounts)
+    return slot, states, accounts
+
+
+def usd_price_table(usd_prices: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    prices = dict(DEFAULT_USD_PRICES)
+    if usd_prices:
+        prices.update(usd_prices)
+    return prices
+
+
+async def read_pools(
+    session: aiohttp.ClientSession,
+    pool_ids: Iterable[str],
+    usd_prices: Optional[Dict[str, float]] = None,
+    rpc_url: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Lit et décode l'état on-chain des pools données.
+
+    Args:
+        pool_ids: Adresses des pools (Whirlpool, Raydium CLMM/AMM v4, Meteora DLMM)
+        usd_prices: Prix USD par mint pour liquidity_usd (stablecoins par défaut)
+
+    Returns:
+        Enregistrements au format pool_fetchers, dans l'ordre de pool_ids.
+        Les comptes absents, d'un autre programme ou non décodables sont omis.
+    """
+    started = time.perf_counter()
+    pool_ids = list(dict.fromkeys(pool_ids))
+    prices = usd_price_table(usd_prices)
+
+    slot, states, accounts = await load_pool_states(session, pool_ids, rpc_url)
+    records = []
+    for pool_id in pool_ids:
+        state = states.get(pool_id)
+        if state is None:
+            continue
+        record = build_record(state, accounts, slot, prices)
+        if record is None:
+            _rpc_stats["undecoded"] += 1
+            continue
+        records.append(record)
+    _rpc_stats["decoded"] += len(records)
+    _rpc_stats["last_slot"] = slot
+    _rpc_stats["last_read_ms"] = (time.perf_counter() - started) * 1000
+    logger.debug(
+        f"[RPC] {len(records)}/{len(pool_ids)} pools read at slot {slot} "
+        f"in {_rpc_stats['last_read_ms']:.0f} ms"
+    )
+    return records
@@ -0,0 +1,358 @@
+# solana_ws_stream.py
+"""
+Streaming WebSocket de l'état des pools Solana surveillées (accountSubscribe).
+
+En polling, un changement de prix est vu jusqu'à CHECK_INTERVAL_SECONDS
+(30s) en retard. Ici chaque pool surveillée et ses deux vaults sont
+abonnés via accountSubscribe: à chaque notification le compte est décodé
+(solana_rpc_reader), la ligne de la pool est réécrite en place dans le
+snapshot (pool_fetchers.apply_pool_update) et on_update reçoit les seuls
+tokens de la pool, que l'appelant réévalue sans attendre le cycle suivant.
+
+accountSubscribe plutôt que programSubscribe: un abonnement programme
+(Whirlpool, Raydium, Meteora) pousse chaque swap de milliers de pools
+non surveillées, soit des centaines de notifications par seconde à filtrer
+pour quelques dizaines de pools utiles.
+
+Robustesse:
+- connexion perdue (fermeture, erreur, heartbeat sans réponse): reconnexion
+  avec backoff exponentiel (RECONNECT_MIN_SECONDS -> RECONNECT_MAX_SECONDS)
+- à chaque (re)connexion, l'état des pools est relu par getMultipleAccounts
+  (mises à jour manquées pendant la coupure) puis tout est réabonné
+- notifications d'un slot plus ancien que l'état retenu: ignorées
+- watch_pools() modifie l'ensemble surveillé à chaud (abonnements et
+  désabonnements incrémentaux)
+"""
+import asyncio
+import base64
+import itertools
+import json
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+import aiohttp
+
+from config import SOLANA_RPC_COMMITMENT, SOLANA_WS_URL
+from solana_rpc_reader import build_record, decode_pool_account, load_pool_states, usd_price_table
+from utils import logger
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+RECONNECT_MIN_SECONDS = 1.0
+RECONNECT_MAX_SECONDS = 30.0
+HEARTBEAT_SECONDS = 30.0  # ping WebSocket: détecte une connexion morte sans fermeture
+
+
+class PoolStream:
+    """Abonnements accountSubscribe d'un ensemble de pools, reconnexion comprise."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        on_update: Callable[[Set[str]], None],
+        ws_url: Optional[str] = None,
+        rpc_url: Optional[str] = None,
+        usd_prices: Optional[Dict[str, float]] = None,
+    ):
+        self.session = session
+        self.on_update = on_update
+        self.ws_url = ws_url or SOLANA_WS_URL
+        self.rpc_url = rpc_url
+        self.usd_prices = usd_price_table(usd_prices)
+        self.watched: Set[str] = set()
+        self.states: Dict[str, Dict[str, Any]] = {}             # pool_id -> état brut décodé
+        self.accounts: Dict[str, Tuple[str, bytes]] = {}         # vault -> (owner, data)
+        self.slots: Dict[str, int] = {}                          # compte -> slot du dernier état
+        self._dependents: Dict[str, Set[str]] = {}               # compte -> pools qui en dépendent
+        self._subscribed: Dict[str, Optional[int]] = {}          # compte -> id d'abonnement (None: en attente)
+        self._subscriptions: Dict[int, str] = {}                 # id d'abonnement -> compte
+        self._pending: Dict[int, Tuple[str, str]] = {}           # id de requête -> (méthode, compte)
+        self._request_ids = itertools.count(1)
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            "connects": 0,
+            "disconnects": 0,
+            "subscriptions": 0,
+            "notifications": 0,
+            "stale": 0,
+            "updates": 0,
+            "errors": 0,
+            "last_slot": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Ensemble surveillé
+    # ------------------------------------------------------------------
+    def watch(self, pool_ids: Iterable[str]):
+        """Remplace l'ensemble des pools surveillées (appliqué sur la connexion en cours)."""
+        watched = set(pool_ids)
+        if watched != self.watched:
+            self.watched = watched
+            self._changed.set()
+
+    def _account_keys(self, pool_id: str) -> Tuple[str, ...]:
+        state = self.states[pool_id]
+        return pool_id, state["vault_a"], state["vault_b"]
+
+    def _rebuild_dependents(self):
+        dependents: Dict[str, Set[str]] = {}
+        for pool_id in self.states:
+            for key in self._account_keys(pool_id):
+                dependents.setdefault(key, set()).add(pool_id)
+        self._dependents = dependents
+
+    # ------------------------------------------------------------------
+    # Boucle de connexion
+    # ------------------------------------------------------------------
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="solana-ws-stream")
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _run(self):
+        delay = RECONNECT_MIN_SECONDS
+        while True:
+            try:
+                async with self.session.ws_connect(self.ws_url, heartbeat=HEARTBEAT_SECONDS) as ws:
+                    self.stats["connects"] += 1
+                    logger.info(f"[WS] Connected to {self.ws_url} ({len(self.watched)} pools)")
+                    delay = RECONNECT_MIN_SECONDS
+                    await self._serve(ws)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"[WS] Stream error: {e}")
+            self.stats["disconnects"] += 1
+            logger.warning(f"[WS] Disconnected, reconnecting in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+    async def _serve(self, ws: aiohttp.ClientWebSocketResponse):
+        """Une connexion: resynchronise, abonne, puis lit jusqu'à la coupure."""
+        self._subscribed.clear()
+        self._subscriptions.clear()
+        self._pending.clear()
+        self._changed.clear()
+        reader = asyncio.create_task(self._read(ws))
+        try:
+            await self._sync(ws, reload=True)
+            while True:
+                changed = asyncio.create_task(self._changed.wait())
+                done, _ = await asyncio.wait({reader, changed}, return_when=asyncio.FIRST_COMPLETED)
+                if reader in done:
+                    changed.cancel()
+                    reader.result()  # propage l'erreur de lecture éventuelle
+                    return
+                self._changed.clear()
+                await self._sync(ws, reload=False)
+        finally:
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+
+    async def _sync(self, ws: aiohttp.ClientWebSocketResponse, reload: bool):
+        """
+        Aligne états et abonnements sur self.watched.
+
+        reload=True (nouvelle connexion): relit toutes les pools pour
+        rattraper les notifications manquées pendant la coupure.
+        """
+        watched = set(self.watched)
+        for pool_id in set(self.states) - watched:
+            del self.states[pool_id]
+        to_load = watched if reload else watched - set(self.states)
+        if to_load:
+            slot, states, accounts = await load_pool_states(self.session, to_load, self.rpc_url)
+            for key, account in itertools.chain(states.items(), accounts.items()):
+                if self.slots.get(key, 0) > slot:
+                    continue  # notification plus récente reçue pendant la lecture
+                if key in states:
+                    self.states[key] = account
+                else:
+                    self.accounts[key] = account
+                self.slots[key] = slot
+            self._publish(set(states), slot)
+
+        self._rebuild_dependents()
+        for key in set(self.accounts) - set(self._dependents):
+            del self.accounts[key]
+        for key in list(self._subscribed):
+            if key not in self._dependents:
+                await self._unsubscribe(ws, key)
+        for key in self._dependents:
+            if key not in self._subscribed:
+                await self._subscribe(ws, key)
+
+    async def _subscribe(self, ws: aiohttp.ClientWebSocketResponse, key: str):
+        request_id = next(self._request_ids)
+        self._pending[request_id] = ("accountSubscribe", key)
+        self._subscribed[key] = None
+        await ws.send_json({
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "accountSubscribe",
+            "params": [key, {"encoding": "base64", "commitment": SOLANA_RPC_COMMITMENT}],
+        })
+
+    async def _unsubscribe(self, ws: aiohttp.ClientWebSocketResponse, key: str):
+        subscription = self._subscribed.pop(key, None)
+        self.accounts.pop(key, None)
+        self.slots.pop(key, None)
+        if subscription is None:
+            return  # réponse en attente: ignorée à réception (compte plus surveillé)
+        self._subscriptions.pop(subscription, None)
+        request_id = next(self._request_ids)
+        self._pending[request_id] = ("accountUnsubscribe", key)
+        await ws.send_json({
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "accountUnsubscribe",
+            "params": [subscription],
+        })
+
+    # ------------------------------------------------------------------
+    # Lecture des messages
+    # ------------------------------------------------------------------
+    async def _read(self, ws: aiohttp.ClientWebSocketResponse):
+        async for msg in ws:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                try:
+                    self._handle(json.loads(msg.data))
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    logger.warning(f"[WS] Bad message: {e}")
+            elif msg.type == aiohttp.WSMsgType.ERROR:
+                raise ws.exception() or ConnectionError("WebSocket error")
+
+    def _handle(self, message: Dict[str, Any]):
+        if "id" in message:
+            method, key = self._pending.pop(message["id"], (None, None))
+            if "error" in message:
+                self.stats["errors"] += 1
+                logger.warning(f"[WS] {method} {str(key)[:8]} failed: {message['error']}")
+                if method == "accountSubscribe" and self._subscribed.get(key, 0) is None:
+                    del self._subscribed[key]  # retenté au prochain _sync
+                return
+            if method == "accountSubscribe":
+                if key in self._subscribed:
+                    self._subscribed[key] = message["result"]
+                    self._subscriptions[message["result"]] = key
+                    self.stats["subscriptions"] += 1
+            return
+
+        if message.get("method") != "accountNotification":
+            return
+        params = message["params"]
+        key = self._subscriptions.get(params["subscription"])
+        if key is None:
+            return
+        self.stats["notifications"] += 1
+        result = params["result"]
+        slot = result["context"]["slot"]
+        if slot < self.slots.get(key, 0):
+            self.stats["stale"] += 1
+            return
+        value = result["value"]
+        if not value:
+            return  # compte fermé
+        account = (value["owner"], base64.b64decode(value["data"][0]))
+        self.slots[key] = slot
+        self.stats["last_slot"] = max(self.stats["last_slot"], slot)
+
+        if key in self.states:
+            state = decode_pool_account(key, *account)
+            if state is None:
+                return
+            self.states[key] = state
+        else:
+            self.accounts[key] = account
+        self._publish(self._dependents.get(key, ()), slot)
+
+    def _publish(self, pool_ids: Iterable[str], slot: int):
+        """Réécrit les pools dans le snapshot et signale leurs tokens à on_update."""
+        from pool_fetchers import apply_pool_update  # import retardé pour éviter les cycles
+
+        tokens: Set[str] = set()
+        for pool_id in pool_ids:
+            state = self.states.get(pool_id)
+            if state is None:
+                continue
+            record = build_record(state, self.accounts, slot, self.usd_prices)
+            if record is None:
+                continue
+            apply_pool_update(record)
+            self.stats["updates"] += 1
+            tokens.update((record["token_a"], record["token_b"]))
+        if tokens:
+            self.on_update(tokens)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "running": self.running,
+            "watched": len(self.watched),
+            "subscribed": sum(1 for sub in self._subscribed.values() if sub is not None),
+        }
+
+
+# ============================================================================
+# INSTANCE PARTAGÉE
+# ============================================================================
+_stream: Optional[PoolStream] = None
+
+
+def start_pool_stream(
+    session: aiohttp.ClientSession,
+    on_update: Callable[[Set[str]], None],
+    ws_url: Optional[str] = None,
+    rpc_url: Optional[str] = None,
+) -> PoolStream:
+    """
+    Démarre le stream partagé (idempotent).
+
+    Args:
+        session: Session aiohttp partagée (WebSocket + relectures RPC)
+        on_update: Appelé (synchrone, dans la boucle de lecture) avec les
+            mints des pools mises à jour; doit rester rapide
+    """
+    global _stream
+
+    if _stream is None or not _stream.running:
+        _stream = PoolStream(session, on_update, ws_url, rpc_url)
+        _stream.start()
+    return _stream
+
+
+def watch_pools(pool_ids: Iterable[str]):
+    """Ensemble des pools à suivre (sans effet si le stream n'est pas démarré)."""
+    if _stream is not None:
+        _stream.watch(pool_ids)
+
+
+def pool_stream_running() -> bool:
+    return _stream is not None and _stream.running
+
+
+async def stop_pool_stream():
+    """Arrête le stream et ferme la connexion."""
+    global _stream
+
+    if _stream is not None:
+        await _stream.stop()
+        _stream = None
+
+
+def get_pool_stream_stats() -> Dict[str, Any]:
+    """Stats: connects, disconnects, notifications, stale, updates, subscribed..."""
+    return _stream.snapshot() if _stream is not None else {"running": False}
@@ -12,14 +12,19 @@ Commandes disponibles:
 """
 import asyncio
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional, List, Dict
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.constants import ParseMode
 from telegram.ext import Application, CommandHandler, ContextTypes
+from telegram.error import RetryAfter
 from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+from rate_limiter import PRIORITY_HIGH, acquire as acquire_rate_limit, throttled
+from circuit_breaker import CLOSED, OPEN, get_breaker_states
 from utils import logger, format_percentage, truncate_address
 
+TELEGRAM_API_HOST = "api.telegram.org"
+
 # Store global pour l'historique des opportunités
 opportunities_history: List[Dict] = []
 
@@ -144,8 +149,25 @@ _Le bot scanne le marché en continu !_"""
 
 _Le bot scanne le marché en continu !_"""
     
+    status_msg += "\n\n" + format_breaker_status()
     await update.message.reply_text(status_msg, parse_mode=ParseMode.MARKDOWN)
 
+def format_breaker_status() -> str:
+    """Résumé des circuit breakers: sources coupées et en sonde."""
+    states = get_breaker_states()
+    if not states:
+        return "🔌 *Sources:* aucune requête encore"
+    down = [
+        f"• `{name}`: coupée ({state['retry_in_s']:.0f}s)" if state["state"] == OPEN
+        else f"• `{name}`: en sonde"
+        for name, state in sorted(states.items())
+        if state["state"] != CLOSED
+    ]
+    healthy = len(states) - len(down)
+    if not down:
+        return f"🔌 *Sources:* {healthy}/{len(states)} OK"
+    return f"🔌 *Sources:* {healthy}/{len(states)} OK\n" + "\n".join(down)
+
 async def cmd_command3(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Commande /command3 - Liste de TOUS les tokens (Solana + Base)"""
     msg_lines = ["📋 *TOUS LES TOKENS SURVEILLÉS*\n"]
@@ -425,6 +447,11 @@ async def send_opportunity(app: Application, chat_id: int, opp: dict):
     buy_price = opp.get("buy_price", 0)
     sell_price = opp.get("sell_price", 0)
     
+    # Pools cotées en USDC, prix convertis en SOL (cross-quote)
+    pools = opp.get("details") or {}
+    buy_via = " _(via USDC)_" if (pools.get("pool_a") or {}).get("converted_from") else ""
+    sell_via = " _(via USDC)_" if (pools.get("pool_b") or {}).get("converted_from") else ""
+    
     spread_brut = opp.get("spread_brut", 0)
     spread_net = opp.get("spread_net", 0)
     
@@ -479,8 +506,8 @@ async def send_opportunity(app: Application, chat_id: int, opp: dict):
         f"   _Basé sur {dex_count} DEX avec prix_",
         "",
         f"{emoji_dex} *Stratégie Pool-to-Pool:*",
-        f"  • Acheter sur *{buy_dex}* @ `{buy_price:.8f}`",
-        f"  • Vendre sur *{sell_dex}* @ `{sell_price:.8f}`",
+        f"  • Acheter sur *{buy_dex}* @ `{buy_price:.8f}`{buy_via}",
+        f"  • Vendre sur *{sell_dex}* @ `{sell_price:.8f}`{sell_via}",
         "",
         f"{emoji_chart} *Spreads:*",
         f"  • Spread brut: `{spread_brut*100:.2f}%`",
@@ -515,8 +542,14 @@ async def send_opportunity(app: Application, chat_id: int, opp: dict):
         "",
         f"{emoji_money} *Profit estimé (1000 USD):*",
         f"  • Net: `${spread_net * 1000:.2f}` USD",
-        "",
     ])
+    # Taille optimale (trade_sizing): profit maximal selon la liquidité des pools
+    if opp.get("optimal_size_usd"):
+        text.append(
+            f"  • Taille optimale: `${opp['optimal_size_usd']:,.0f}` → "
+            f"`${opp.get('expected_profit_usd', 0):.2f}` USD"
+        )
+    text.append("")
     
     # Ajouter les liens de pools si disponibles
     if buy_pool_url or sell_pool_url:
@@ -612,8 +645,9 @@ async def send_opportunity(app: Application, chat_id: int, opp: dict):
 
     reply_markup = InlineKeyboardMarkup(buttons) if buttons else None
     
-    # Envoyer le message
+    # Envoyer le message (bucket api.telegram.org, prioritaire sur les fetchs)
     try:
+        await acquire_rate_limit(TELEGRAM_API_HOST, PRIORITY_HIGH)
         await app.bot.send_message(
             chat_id=chat_id, 
             text=full_text, 
@@ -625,5 +659,12 @@ async def send_opportunity(app: Application, chat_id: int, opp: dict):
         add_to_history(opp)
         
         logger.info(f"✅ [{chain_name}] Alert sent for {token_short} | Spread: {spread_net*100:.2f}%")
+    except RetryAfter as e:
+        # 429 Telegram: les alertes suivantes attendent dans le limiter
+        retry_after = e.retry_after
+        if isinstance(retry_after, timedelta):
+            retry_after = retry_after.total_seconds()
+        throttled(TELEGRAM_API_HOST, float(retry_after))
+        logger.warning(f"⏳ Telegram rate limited, alert for {token_short} dropped (retry after {e.retry_after})")
     except Exception as e:
         logger.exception(f"❌ Failed to send telegram message: {e}")
@@ -0,0 +1,140 @@
+# test_aerodrome_universe.py
+"""
+Tests de l'univers Aerodrome par cycle (aerodrome_universe) contre un faux
+AERODROME_POOLS_API local.
+
+Tests:
+1. Appels concurrents et répétés dans le cycle -> un seul téléchargement,
+   index token -> pools, temps de téléchargement/parsing enregistrés
+2. get_aerodrome_price servi depuis l'univers (produit constant), sans appel
+   aux agrégateurs
+3. TTL écoulé -> nouveau téléchargement
+
+Usage:
+    SAVE_LOGS=false python test_aerodrome_universe.py
+"""
+import asyncio
+
+from aiohttp import web
+
+import aerodrome_universe
+from base_dex_fetchers import USDC_BASE, WETH_BASE, get_aerodrome_price
+from http_transport import create_session
+
+TOKENS = [f"0x{i:040x}" for i in range(1, 41)]
+
+RAW_POOLS = [
+    {
+        "address": f"0xpool{i:04d}",
+        "token0": {"address": token},
+        "token1": {"address": USDC_BASE},
+        "reserve0": 1_000.0,
+        "reserve1": 2_000.0 * (i + 1),
+        "fee": 0.003,
+        "tvlUsd": 10_000.0 * (i + 1),
+    }
+    for i, token in enumerate(TOKENS)
+] + [
+    # WETH/USDC: pool volatile principale + petite pool stable
+    {"address": "0xweth-vol", "token0": {"address": WETH_BASE}, "token1": {"address": USDC_BASE},
+     "reserve0": 1_000.0, "reserve1": 3_000_000.0, "fee": 0.003, "tvlUsd": 6_000_000.0},
+    {"address": "0xweth-stable", "token0": {"address": WETH_BASE}, "token1": {"address": USDC_BASE},
+     "reserve0": 10.0, "reserve1": 30_000.0, "fee": 0.0005, "tvlUsd": 60_000.0, "stable": True},
+    # Entrée incomplète: ignorée
+    {"address": "0xbroken", "token0": {"address": WETH_BASE}, "reserve0": 0},
+]
+
+
+async def start_pools_stand_in():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.path)
+        await asyncio.sleep(0.05)
+        return web.json_response({"data": RAW_POOLS})
+
+    app = web.Application()
+    app.router.add_get("/pools", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/pools", calls
+
+
+async def _with_stand_in(check):
+    runner, url, calls = await start_pools_stand_in()
+    original = aerodrome_universe.AERODROME_POOLS_API
+    aerodrome_universe.AERODROME_POOLS_API = url
+    aerodrome_universe.clear_aerodrome_universe()
+    try:
+        async with create_session() as session:
+            await check(session, calls)
+    finally:
+        aerodrome_universe.AERODROME_POOLS_API = original
+        aerodrome_universe.clear_aerodrome_universe()
+        await runner.cleanup()
+
+
+async def _check_single_download(session, calls):
+    universes = await asyncio.gather(*(aerodrome_universe.get_aerodrome_universe(session) for _ in TOKENS))
+    again = await aerodrome_universe.get_aerodrome_universe(session)
+    assert len(calls) == 1, calls
+    assert all(u is again for u in universes)
+
+    assert len(again.pools) == len(TOKENS) + 2
+    assert [p["pool_id"] for p in again.pools_for_token(TOKENS[3].upper())] == ["0xpool0003"]
+    assert len(again.pools_for_token(USDC_BASE)) == len(TOKENS) + 2
+    assert again.best_pool_for_pair(WETH_BASE, USDC_BASE)["pool_id"] == "0xweth-vol"
+
+    stats = aerodrome_universe.get_aerodrome_universe_stats()
+    assert stats["pools"] == len(TOKENS) + 2 and stats["bytes"] > 0
+    assert stats["last_download_ms"] > 0 and stats["last_parse_ms"] >= 0
+    print(
+        f"✅ {len(TOKENS) + 1} appels -> 1 téléchargement "
+        f"({stats['last_download_ms']:.0f} ms, parse {stats['last_parse_ms']:.1f} ms)"
+    )
+
+
+async def _check_price_from_universe(session, calls):
+    quote = await get_aerodrome_price(session, WETH_BASE, USDC_BASE, str(10 ** 18))
+    assert quote is not None and quote["source"] == "aerodrome_pools"
+    # 1 WETH dans 1000 WETH / 3M USDC, 0.3% de frais
+    net = 1 - 0.003
+    expected = 3_000_000.0 * net / (1_000.0 + net)
+    assert abs(quote["price"] - expected) < 1e-6
+    assert quote["output"] == int(expected * 10 ** 6)
+    assert 0 < quote["price_impact"] < 0.002
+    assert len(calls) == 1
+    print(f"✅ get_aerodrome_price depuis l'univers: {quote['price']:.2f} USDC/WETH")
+
+
+async def _check_ttl(session, calls):
+    await aerodrome_universe.get_aerodrome_universe(session)
+    original_ttl = aerodrome_universe.UNIVERSE_TTL_SECONDS
+    aerodrome_universe.UNIVERSE_TTL_SECONDS = 0
+    try:
+        await aerodrome_universe.get_aerodrome_universe(session)
+    finally:
+        aerodrome_universe.UNIVERSE_TTL_SECONDS = original_ttl
+    assert len(calls) == 2, calls
+    print("✅ Nouveau téléchargement au cycle suivant (TTL écoulé)")
+
+
+def test_single_download_per_cycle():
+    asyncio.run(_with_stand_in(_check_single_download))
+
+
+def test_aerodrome_price_from_universe():
+    asyncio.run(_with_stand_in(_check_price_from_universe))
+
+
+def test_universe_expires():
+    asyncio.run(_with_stand_in(_check_ttl))
+
+
+if __name__ == "__main__":
+    test_single_download_per_cycle()
+    test_aerodrome_price_from_universe()
+    test_universe_expires()
@@ -0,0 +1,132 @@
+# test_arbitrage_kernel.py
+"""
+Tests du kernel NumPy (arbitrage_kernel) contre la référence scalaire
+evaluate_pools_for_token (arbitrage), token par token.
+
+Tests:
+1. Seuil MIN_SPREAD_AFTER_FEES réel: mêmes tokens retenus, mêmes dicts
+2. Seuil relâché (presque tous les tokens passent les filtres de spread):
+   toutes les métriques (pools choisies, slippage, MEV, confiance...)
+   identiques sur des milliers de tokens couvrant les paliers et garde-fous
+   (tokens majeurs/moyens, DEX en double, pool_id identiques, prix
+   incohérents, fee_bps absents ou nuls, liquidité par palier)
+3. Lot vide et tokens sans pool
+
+Usage:
+    SAVE_LOGS=false LOG_LEVEL=ERROR python test_arbitrage_kernel.py
+"""
+import asyncio
+import math
+import random
+
+import arbitrage
+import arbitrage_kernel
+from arbitrage import MAJOR_TOKENS, MEDIUM_TOKENS, evaluate_pools_for_token
+from arbitrage_kernel import find_batch_opportunities
+from pool_prices import filter_pools_by_liquidity
+
+DEXES = ["raydium", "orca", "meteora", "lifinity", "phoenix"]
+
+
+def random_token_pools(rng: random.Random, n_tokens: int):
+    specials = sorted(MAJOR_TOKENS) + sorted(MEDIUM_TOKENS)
+    token_pools = {}
+    for t in range(n_tokens):
+        token = specials[t] if t < len(specials) else f"TOKEN{t:05d}"
+        mid = 10 ** rng.uniform(-6, 3)
+        spread = rng.choice([0.001, 0.01, 0.03, 0.08, 0.3])
+        pools = []
+        for i in range(rng.randint(0, 8)):
+            buy = mid * (1 + rng.uniform(-spread, spread))
+            pool = {
+                "pool_id": f"{token}-{rng.randint(0, 5) if rng.random() < 0.2 else i}",
+                "dex": rng.choice(DEXES[:rng.randint(1, 5)]),
+                "buy_price": buy,
+                "sell_price": buy * (1 + rng.uniform(-spread, spread)),
+                "liquidity_usd": 10 ** rng.uniform(3, 6.8),
+                "url": f"https://example/{token}/{i}",
+            }
+            if rng.random() < 0.9:
+                pool["fee_pct"] = rng.choice([0.0001, 0.0005, 0.0025, 0.003, 0.01])
+            fee_bps = rng.choice([0, 1, 25, 99, 100, 300, 400, None, "missing"])
+            if fee_bps != "missing":
+                pool["fee_bps"] = fee_bps
+            pools.append(pool)
+        token_pools[token] = filter_pools_by_liquidity(pools, min_liquidity_usd=10000)
+    return token_pools
+
+
+def _same(a, b, path="") -> bool:
+    if isinstance(a, float) and isinstance(b, float):
+        assert math.isclose(a, b, rel_tol=1e-12, abs_tol=1e-15), (path, a, b)
+    elif isinstance(a, dict) and isinstance(b, dict):
+        assert a.keys() == b.keys(), (path, a.keys() ^ b.keys())
+        for key in a:
+            if key != "timestamp":
+                _same(a[key], b[key], f"{path}.{key}")
+    else:
+        assert a == b and type(a) is type(b), (path, a, b)
+    return True
+
+
+def _compare(token_pools):
+    expected = []
+    for token, pools in token_pools.items():
+        opp = evaluate_pools_for_token(token, pools)
+        if opp:
+            expected.append(opp)
+    got = find_batch_opportunities(token_pools)
+    assert [o["token"] for o in got] == [o["token"] for o in expected]
+    for a, b in zip(got, expected):
+        _same(a, b, a["token"])
+    return len(expected)
+
+
+def _with_min_spread(value, check):
+    original = arbitrage.MIN_SPREAD_AFTER_FEES
+    arbitrage.MIN_SPREAD_AFTER_FEES = arbitrage_kernel.MIN_SPREAD_AFTER_FEES = value
+    try:
+        return check()
+    finally:
+        arbitrage.MIN_SPREAD_AFTER_FEES = arbitrage_kernel.MIN_SPREAD_AFTER_FEES = original
+
+
+async def _check_real_threshold():
+    token_pools = random_token_pools(random.Random(11), 3000)
+    found = _compare(token_pools)
+    assert found > 0
+    print(f"✅ Seuil réel: {found}/{len(token_pools)} tokens retenus, dicts identiques")
+
+
+async def _check_relaxed_threshold():
+    token_pools = random_token_pools(random.Random(12), 3000)
+    found = _with_min_spread(-1.0, lambda: _compare(token_pools))
+    assert found > 400
+    print(f"✅ Seuil relâché: {found}/{len(token_pools)} tokens, toutes métriques identiques")
+
+
+async def _check_empty():
+    assert find_batch_opportunities({}) == []
+    assert find_batch_opportunities({"A": [], "B": []}) == []
+    token_pools = random_token_pools(random.Random(13), 50)
+    token_pools["EMPTY"] = []
+    _with_min_spread(-1.0, lambda: _compare(token_pools))
+    print("✅ Lot vide et tokens sans pool")
+
+
+def test_kernel_matches_scalar():
+    asyncio.run(_check_real_threshold())
+
+
+def test_kernel_metrics_match_scalar():
+    asyncio.run(_check_relaxed_threshold())
+
+
+def test_kernel_empty_batches():
+    asyncio.run(_check_empty())
+
+
+if __name__ == "__main__":
+    test_kernel_matches_scalar()
+    test_kernel_metrics_match_scalar()
+    test_kernel_empty_batches()
@@ -11,7 +11,6 @@ Tests:
 Run: python test_base_dex.py
 """
 import asyncio
-import aiohttp
 import sys
 
 # Add project root to path
@@ -32,6 +31,7 @@ from base_dex_fetchers import (
     BASE_DEX_FEES,
 )
 from dex_links import get_swap_link, get_arbitrage_links
+from http_transport import create_session
 
 
 # Popular Base tokens for testing
@@ -48,7 +48,7 @@ async def test_individual_dex():
     print("TEST: Individual Base DEX Price Fetchers")
     print("=" * 70)
     
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         # Test with WETH -> USDC
         print(f"\n[INFO] Testing WETH -> USDC quote")
         print(f"   WETH: {WETH}")
@@ -113,7 +113,7 @@ async def test_batch_fetch():
     print("TEST: Batch Fetch All Base DEX")
     print("=" * 70)
     
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         print(f"\n[INFO] Fetching WETH prices from all 4 DEX...")
         
         all_prices = await get_all_base_dex_prices(session, WETH, USDC)
@@ -132,7 +132,7 @@ async def test_arbitrage_evaluation():
     print("TEST: Base Arbitrage Evaluation")
     print("=" * 70)
     
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         tokens = [WETH, BRETT]
         
         for token in tokens:
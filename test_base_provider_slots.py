@@ -0,0 +1,85 @@
+# test_base_provider_slots.py
+"""
+Tests des appels aux APIs de repli Base (pool_fetchers._fetch_base_api)
+contre un serveur aiohttp.web local.
+
+Tests:
+1. Fournisseur absent de BASE_PROVIDER_CONCURRENCY: l'appel aboutit (pas de
+   KeyError comptée comme échec du breaker), appels simultanés plafonnés à
+   BASE_DISCOVERY_CONCURRENCY
+2. Fournisseur configuré (kyber): plafonné à BASE_PROVIDER_CONCURRENCY
+
+Usage:
+    SAVE_LOGS=false LOG_LEVEL=ERROR python test_base_provider_slots.py
+"""
+import asyncio
+
+import aiohttp
+from aiohttp import web
+
+from circuit_breaker import get_breaker
+from config import BASE_DISCOVERY_CONCURRENCY, BASE_PROVIDER_CONCURRENCY
+from pool_fetchers import _base_provider_slots, _fetch_base_api
+from rate_limiter import get_bucket
+
+HANDLER_DELAY_SECONDS = 0.05
+
+
+async def _run(dex_name: str, calls: int):
+    state = {"active": 0, "max_active": 0}
+
+    async def handle(request: web.Request) -> web.Response:
+        state["active"] += 1
+        state["max_active"] = max(state["max_active"], state["active"])
+        try:
+            await asyncio.sleep(HANDLER_DELAY_SECONDS)
+            return web.json_response({"data": {"pools": [{"id": request.query["i"]}]}})
+        finally:
+            state["active"] -= 1
+
+    app = web.Application()
+    app.router.add_get("/pools", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    bucket = get_bucket("127.0.0.1")
+    bucket.rate = bucket.burst = bucket.tokens = float(calls)  # pas de limite de débit ici
+
+    slots = _base_provider_slots()
+    try:
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+            results = await asyncio.gather(*(
+                _fetch_base_api(session, f"http://127.0.0.1:{port}/pools?i={i}", dex_name, slots)
+                for i in range(calls)
+            ))
+    finally:
+        await runner.cleanup()
+    assert [r["data"]["pools"][0]["id"] for r in results] == [str(i) for i in range(calls)]
+    return state["max_active"]
+
+
+def test_unconfigured_provider():
+    dex_name = "test_aerodrome_api"
+    assert dex_name not in BASE_PROVIDER_CONCURRENCY
+    calls = BASE_DISCOVERY_CONCURRENCY * 2
+    max_active = asyncio.run(_run(dex_name, calls))
+    assert max_active == BASE_DISCOVERY_CONCURRENCY, max_active
+    stats = get_breaker(dex_name).snapshot()
+    assert stats["failures"] == 0 and stats["calls"] == calls and stats["state"] == "closed"
+    print(f"✅ Fournisseur non configuré: {calls} appels aboutis, max {max_active} simultanés "
+          f"(BASE_DISCOVERY_CONCURRENCY)")
+
+
+def test_configured_provider():
+    limit = BASE_PROVIDER_CONCURRENCY["kyber"]
+    max_active = asyncio.run(_run("kyber", limit * 3))
+    assert max_active == limit, max_active
+    assert get_breaker("kyber").snapshot()["failures"] == 0
+    print(f"✅ kyber: max {max_active} appels simultanés (BASE_PROVIDER_CONCURRENCY)")
+
+
+if __name__ == "__main__":
+    test_unconfigured_provider()
+    test_configured_provider()
@@ -0,0 +1,219 @@
+# test_base_rpc_reader.py
+"""
+Tests du lecteur on-chain Base (base_rpc_reader) contre un faux nœud
+JSON-RPC local qui exécute Multicall3.aggregate3 sur des contrats simulés
+(pools V3 et V2/Aerodrome, tokens ERC-20).
+
+Tests:
+1. Pools V3 (slot0, liquidity, balanceOf) et Aerodrome (getReserves) ->
+   pools au format fetch_base_pools; appel en échec et DEX non lisible omis
+2. Métadonnées en cache: une seule requête HTTP par cycle ensuite
+3. Au-delà de MAX_CALLS_PER_MULTICALL: plusieurs eth_call dans une seule
+   requête JSON-RPC batch
+
+Usage:
+    SAVE_LOGS=false python test_base_rpc_reader.py
+"""
+import asyncio
+import math
+
+from aiohttp import web
+
+import base_rpc_reader as rpc
+from http_transport import create_session
+
+BLOCK = 21_000_000
+WETH = "0x4200000000000000000000000000000000000006"
+USDC = "0x833589fcd6edb6e08f4c7c32d4f71b54bda02913"
+DEGEN = "0x4ed4e862860bed51a9570b96d89af5e1b0efefed"
+V3_POOL = "0xd0b53d9277642d899df5c87a3966a349a798f224"
+AERO_POOL = "0x2c4909355b0c036840819484c3a882a95659abf3"
+BROKEN_POOL = "0x00000000000000000000000000000000000000b0"
+
+ETH_USD = 3000.0
+SQRT_PRICE_X96 = int(math.sqrt(ETH_USD * 10 ** (6 - 18)) * 2 ** 96)
+
+
+def _word(value: int) -> bytes:
+    return value.to_bytes(32, "big")
+
+
+def _addr(address: str) -> bytes:
+    return bytes(12) + bytes.fromhex(address[2:])
+
+
+# (contrat, sélecteur hex, argument) -> returnData; absent = revert
+CONTRACTS = {
+    (rpc.MULTICALL3_ADDRESS.lower(), "42cbb15c"): _word(BLOCK),
+    # Uniswap V3 WETH/USDC 0.05%
+    (V3_POOL, "0dfe1681"): _addr(WETH),
+    (V3_POOL, "d21220a7"): _addr(USDC),
+    (V3_POOL, "ddca3f43"): _word(500),
+    (V3_POOL, "3850c7bd"): _word(SQRT_PRICE_X96) + _word(0) * 6,
+    (V3_POOL, "1a686502"): _word(10 ** 18),
+    # Aerodrome DEGEN/USDC: 1M DEGEN contre 20k USDC
+    (AERO_POOL, "0dfe1681"): _addr(DEGEN),
+    (AERO_POOL, "d21220a7"): _addr(USDC),
+    (AERO_POOL, "0902f1ac"): _word(10 ** 6 * 10 ** 18) + _word(20_000 * 10 ** 6) + _word(1),
+    # Pool V3 dont slot0() revert
+    (BROKEN_POOL, "0dfe1681"): _addr(WETH),
+    (BROKEN_POOL, "d21220a7"): _addr(USDC),
+    (BROKEN_POOL, "ddca3f43"): _word(3000),
+    (WETH, "313ce567"): _word(18),
+    (USDC, "313ce567"): _word(6),
+    (DEGEN, "313ce567"): _word(18),
+}
+BALANCES = {
+    (WETH, V3_POOL): 100 * 10 ** 18,
+    (USDC, V3_POOL): 300_000 * 10 ** 6,
+}
+
+
+def _execute(target: str, calldata: bytes):
+    selector, argument = calldata[:4].hex(), calldata[4:]
+    if selector == "70a08231":
+        owner = "0x" + argument[12:32].hex()
+        return _word(BALANCES.get((target, owner), 0))
+    return CONTRACTS.get((target, selector))
+
+
+def _run_aggregate3(data: bytes) -> bytes:
+    """Décodage indépendant de aggregate3(Call3[]) puis encodage de Result[]."""
+    assert data[:4].hex() == "82ad56cb"
+    body = data[4:]
+    start = int.from_bytes(body[:32], "big")
+    count = int.from_bytes(body[start:start + 32], "big")
+    base = start + 32
+    results = []
+    for i in range(count):
+        tuple_at = base + int.from_bytes(body[base + 32 * i:base + 32 * (i + 1)], "big")
+        target = "0x" + body[tuple_at + 12:tuple_at + 32].hex()
+        assert int.from_bytes(body[tuple_at + 32:tuple_at + 64], "big") == 1  # allowFailure
+        data_at = tuple_at + int.from_bytes(body[tuple_at + 64:tuple_at + 96], "big")
+        length = int.from_bytes(body[data_at:data_at + 32], "big")
+        results.append(_execute(target, body[data_at + 32:data_at + 32 + length]))
+
+    encoded = []
+    for result in results:
+        payload = result or b""
+        padded = payload + bytes(-len(payload) % 32)
+        encoded.append(_word(result is not None) + _word(0x40) + _word(len(payload)) + padded)
+    offsets, offset = [], 32 * len(encoded)
+    for item in encoded:
+        offsets.append(_word(offset))
+        offset += len(item)
+    return _word(0x20) + _word(len(encoded)) + b"".join(offsets) + b"".join(encoded)
+
+
+async def start_node_stand_in():
+    posts = []
+
+    async def handler(request):
+        body = await request.json()
+        batch = body if isinstance(body, list) else [body]
+        posts.append(len(batch))
+        responses = []
+        for item in batch:
+            assert item["method"] == "eth_call"
+            call, tag = item["params"]
+            assert call["to"] == rpc.MULTICALL3_ADDRESS and tag == "latest"
+            result = _run_aggregate3(bytes.fromhex(call["data"][2:]))
+            responses.append({"jsonrpc": "2.0", "id": item["id"], "result": "0x" + result.hex()})
+        return web.json_response(responses[::-1] if isinstance(body, list) else responses[0])
+
+    app = web.Application()
+    app.router.add_post("/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/", posts
+
+
+def _api_pools():
+    """Pools telles que fetch_base_pools les renvoie (prix API périmés)."""
+    return [
+        {"token": WETH, "pool_id": V3_POOL, "dex": "uniswap_v3", "buy_price": 1 / 2500, "sell_price": 2500.0,
+         "fee_pct": 0.05, "liquidity_usd": 1.0, "url": "u", "chain": "base"},
+        {"token": DEGEN, "pool_id": AERO_POOL, "dex": "aerodrome", "buy_price": 0.01, "sell_price": 100.0,
+         "fee_pct": 0.003, "liquidity_usd": 1.0, "url": "a", "chain": "base"},
+        {"token": WETH, "pool_id": BROKEN_POOL, "dex": "pancake_v3", "buy_price": 1.0, "sell_price": 1.0,
+         "fee_pct": 0.003, "liquidity_usd": 1.0, "url": "b", "chain": "base"},
+        {"token": WETH, "pool_id": "0xkyber", "dex": "kyber", "buy_price": 1.0, "sell_price": 1.0,
+         "fee_pct": 0.003, "liquidity_usd": 1.0, "url": "k", "chain": "base"},
+    ]
+
+
+def _close(a, b, rel=1e-6):
+    return abs(a - b) <= rel * max(abs(a), abs(b))
+
+
+def _reset_caches():
+    rpc._pool_meta.clear()
+    rpc._token_decimals.clear()
+
+
+async def _check_pools():
+    _reset_caches()
+    runner, url, posts = await start_node_stand_in()
+    try:
+        async with create_session() as session:
+            records = await rpc.read_base_pools(session, _api_pools(), rpc_url=url)
+            first_cycle = len(posts)
+            again = await rpc.read_base_pools(session, _api_pools(), rpc_url=url)
+    finally:
+        await runner.cleanup()
+
+    assert [r["pool_id"] for r in records] == [V3_POOL, AERO_POOL]
+    v3, aero = records
+    for record in records:
+        assert record["source"] == "rpc" and record["block"] == BLOCK and record["chain"] == "base"
+
+    # V3: WETH = token0, même orientation que normalize_pools (buy = 1/prix)
+    assert _close(v3["sell_price"], ETH_USD, 1e-9) and _close(v3["buy_price"], 1 / ETH_USD, 1e-9)
+    assert v3["fee_pct"] == 0.0005 and v3["liquidity"] == 10 ** 18
+    assert _close(v3["liquidity_usd"], 100 * ETH_USD + 300_000, 1e-6)
+
+    # Aerodrome: DEGEN = token0, même orientation que fetch_aerodrome_for_token
+    assert _close(aero["buy_price"], 0.02) and _close(aero["sell_price"], 50.0)
+    assert aero["fee_pct"] == 0.003  # frais API conservés
+    assert _close(aero["liquidity_usd"], 40_000.0)
+
+    # Cycle 1: métadonnées + decimals + état; ensuite état seul
+    assert first_cycle == 3 and len(posts) == 4, posts
+    assert [r["buy_price"] for r in again] == [r["buy_price"] for r in records]
+    print(f"✅ V3 {v3['sell_price']:.1f} USDC/WETH, Aerodrome {aero['buy_price']:.3f}, 1 requête/cycle en régime établi")
+
+
+async def _check_batching():
+    _reset_caches()
+    original = rpc.MAX_CALLS_PER_MULTICALL
+    rpc.MAX_CALLS_PER_MULTICALL = 4
+    runner, url, posts = await start_node_stand_in()
+    try:
+        async with create_session() as session:
+            calls = [(V3_POOL, bytes.fromhex("1a686502"))] * 10 + [(BROKEN_POOL, bytes.fromhex("3850c7bd"))]
+            block, results = await rpc.multicall(session, calls, rpc_url=url)
+    finally:
+        rpc.MAX_CALLS_PER_MULTICALL = original
+        await runner.cleanup()
+    # 11 appels, 3 par lot (+ getBlockNumber) -> 4 eth_call dans 1 POST
+    assert posts == [4], posts
+    assert block == BLOCK
+    assert [int.from_bytes(r, "big") for r in results[:10]] == [10 ** 18] * 10
+    assert results[10] is None
+    print(f"✅ 11 appels -> {posts[0]} eth_call en 1 requête batch, appel en échec isolé")
+
+
+def test_read_base_pools():
+    asyncio.run(_check_pools())
+
+
+def test_multicall_batches():
+    asyncio.run(_check_batching())
+
+
+if __name__ == "__main__":
+    test_read_base_pools()
+    test_multicall_batches()
@@ -0,0 +1,184 @@
+# test_circuit_breaker.py
+"""
+Tests des circuit breakers (circuit_breaker) avec une horloge simulée.
+
+Tests:
+1. Ouverture après CONSECUTIVE_FAILURES échecs d'affilée (sans attendre
+   MIN_CALLS), requêtes refusées sans réseau pendant open_seconds
+2. Ouverture sur le taux d'échec et sur le taux d'appels lents, seulement
+   à partir de MIN_CALLS appels
+3. Half-open: une seule sonde; sonde en échec = open_seconds doublé jusqu'à
+   MAX_OPEN_SECONDS; sonde jamais rapportée = nouvelle sonde après
+   PROBE_TIMEOUT_SECONDS; sonde réussie = closed, durée réinitialisée
+4. track(): exception = échec, CancelledError = ni échec ni succès,
+   429 = succès, 5xx = échec
+
+Usage:
+    SAVE_LOGS=false LOG_LEVEL=ERROR python test_circuit_breaker.py
+"""
+import asyncio
+from types import SimpleNamespace
+
+import circuit_breaker
+from circuit_breaker import (
+    CLOSED,
+    CONSECUTIVE_FAILURES,
+    FAILURE_RATE_THRESHOLD,
+    HALF_OPEN,
+    MAX_OPEN_SECONDS,
+    MIN_CALLS,
+    OPEN,
+    OPEN_SECONDS,
+    PROBE_TIMEOUT_SECONDS,
+    SLOW_CALL_SECONDS,
+    CircuitBreaker,
+    get_breaker,
+    track,
+)
+
+
+class FakeClock:
+    """Remplace time.monotonic dans circuit_breaker le temps d'un bloc with."""
+
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+    def __enter__(self):
+        self._original = circuit_breaker.time
+        circuit_breaker.time = SimpleNamespace(monotonic=lambda: self.now)
+        return self
+
+    def __exit__(self, *exc):
+        circuit_breaker.time = self._original
+
+
+def test_consecutive_failures():
+    with FakeClock() as clock:
+        breaker = CircuitBreaker("test_consecutive")
+        breaker.record_success()
+        for _ in range(CONSECUTIVE_FAILURES - 1):
+            breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN and breaker.stats["calls"] < MIN_CALLS
+
+        clock.advance(OPEN_SECONDS - 0.1)
+        assert not breaker.allow_request() and not breaker.allow_request()
+        assert breaker.stats["rejected"] == 2
+        breaker.record_success()  # réponse d'une requête partie avant l'ouverture
+        assert breaker.state == OPEN
+    print(f"✅ {CONSECUTIVE_FAILURES} échecs d'affilée: open, requêtes refusées pendant {OPEN_SECONDS:.0f}s")
+
+
+def test_rate_thresholds():
+    with FakeClock():
+        # Taux d'échec: échecs alternés (jamais CONSECUTIVE_FAILURES d'affilée)
+        breaker = CircuitBreaker("test_failure_rate")
+        outcomes = [i % 2 == 0 for i in range(MIN_CALLS)]
+        assert sum(outcomes) / MIN_CALLS >= FAILURE_RATE_THRESHOLD
+        for i, failed in enumerate(outcomes):
+            assert breaker.state == CLOSED, i  # taux atteint mais moins de MIN_CALLS appels
+            if failed:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        assert breaker.state == OPEN, breaker.snapshot()
+
+        # Appels lents: succès au-delà de SLOW_CALL_SECONDS
+        breaker = CircuitBreaker("test_slow_rate")
+        for _ in range(MIN_CALLS - 1):
+            breaker.record_success(latency=SLOW_CALL_SECONDS + 1)
+        assert breaker.state == CLOSED
+        breaker.record_success(latency=SLOW_CALL_SECONDS + 1)
+        assert breaker.state == OPEN and breaker.stats["slow_calls"] == MIN_CALLS
+
+        # Sous les seuils: reste fermé
+        breaker = CircuitBreaker("test_healthy")
+        for i in range(50):
+            if i % 4 == 0:
+                breaker.record_failure()
+            else:
+                breaker.record_success(latency=SLOW_CALL_SECONDS - 1 if i % 2 else SLOW_CALL_SECONDS + 1)
+        assert breaker.state == CLOSED, breaker.snapshot()
+    print(f"✅ Taux d'échec et d'appels lents: open à partir de {MIN_CALLS} appels seulement")
+
+
+def test_half_open_probe():
+    with FakeClock() as clock:
+        breaker = CircuitBreaker("test_probe")
+        for _ in range(CONSECUTIVE_FAILURES):
+            breaker.record_failure()
+        expected = OPEN_SECONDS
+        while expected < MAX_OPEN_SECONDS:
+            assert breaker.open_seconds == expected
+            clock.advance(expected)
+            assert breaker.allow_request()  # la sonde
+            assert breaker.state == HALF_OPEN
+            assert not breaker.allow_request() and not breaker.allow_request()
+            breaker.record_failure()  # sonde en échec
+            expected = min(expected * 2, MAX_OPEN_SECONDS)
+        assert breaker.state == OPEN and breaker.open_seconds == MAX_OPEN_SECONDS
+
+        # Encore un échec: reste plafonné
+        clock.advance(MAX_OPEN_SECONDS)
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.open_seconds == MAX_OPEN_SECONDS
+
+        # Sonde jamais rapportée (tâche annulée): nouvelle sonde après le timeout
+        clock.advance(MAX_OPEN_SECONDS)
+        assert breaker.allow_request()
+        clock.advance(PROBE_TIMEOUT_SECONDS - 1)
+        assert not breaker.allow_request()
+        clock.advance(1)
+        probes = breaker.stats["probes"]
+        assert breaker.allow_request() and breaker.stats["probes"] == probes + 1
+        assert not breaker.allow_request()
+
+        # Sonde réussie: closed, durée réinitialisée
+        breaker.record_success(latency=0.2)
+        assert breaker.state == CLOSED and breaker.open_seconds == OPEN_SECONDS
+        assert breaker.allow_request() and breaker.allow_request()
+    print(f"✅ Half-open: une sonde, durée doublée jusqu'à {MAX_OPEN_SECONDS:.0f}s, "
+          f"nouvelle sonde après {PROBE_TIMEOUT_SECONDS:.0f}s")
+
+
+def _tracked(name, status=None, error=None):
+    try:
+        with track(name) as call:
+            call.status = status
+            if error is not None:
+                raise error
+    except BaseException as e:
+        assert e is error  # track() ne consomme pas l'exception
+
+
+def test_track():
+    with FakeClock():
+        name = "test_track"
+        breaker = get_breaker(name)
+        for _ in range(CONSECUTIVE_FAILURES + 2):
+            _tracked(name, error=asyncio.CancelledError())
+        assert breaker.state == CLOSED and breaker.stats["calls"] == 0
+
+        for _ in range(CONSECUTIVE_FAILURES + 2):
+            _tracked(name, status=429)
+        assert breaker.state == CLOSED
+        assert breaker.stats["calls"] == CONSECUTIVE_FAILURES + 2 and breaker.stats["failures"] == 0
+
+        _tracked(name, error=asyncio.TimeoutError())
+        _tracked(name, status=503)
+        assert breaker.state == CLOSED and breaker.stats["failures"] == 2
+        _tracked(name, status=408)
+        assert breaker.state == OPEN
+    print("✅ track(): CancelledError ignorée, 429 = succès, exception/5xx/408 = échec")
+
+
+if __name__ == "__main__":
+    test_consecutive_failures()
+    test_rate_thresholds()
+    test_half_open_probe()
+    test_track()
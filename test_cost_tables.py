@@ -0,0 +1,168 @@
+# test_cost_tables.py
+"""
+Tests des tables du modèle de coûts (cost_tables) contre l'évaluation
+directe des paliers de arbitrage.py.
+
+Tests:
+1. Tables exactes: slippage, impact, confiance et MEV identiques à la
+   lecture palier par palier, sur les seuils (et leurs voisins immédiats),
+   des valeurs aléatoires, NaN, 0, négatifs, fee_bps None/0
+2. Buckets et lookups vectorisés (kernel) = scalaires
+3. Constante réassignée (palier de fee, seuil MEV): tables reconstruites,
+   fonctions scalaires et kernel suivent la nouvelle valeur
+
+Usage:
+    SAVE_LOGS=false LOG_LEVEL=ERROR python test_cost_tables.py
+"""
+import math
+import random
+
+import numpy as np
+
+import arbitrage
+import cost_tables
+from arbitrage import (
+    MAJOR_TOKENS,
+    MEDIUM_TOKENS,
+    assess_mev_risk,
+    calculate_confidence_score,
+    estimate_price_impact,
+    estimate_slippage,
+)
+from arbitrage_kernel import find_batch_opportunities
+from cost_tables import get_cost_table_stats, get_cost_tables
+
+TOKENS = [next(iter(MAJOR_TOKENS)), next(iter(MEDIUM_TOKENS)), "MICROCAP"]
+
+
+def _tier(tiers, value):
+    for threshold, tier_value in tiers:
+        if value >= threshold:
+            return tier_value
+    return tiers[-1][1]
+
+
+def reference_slippage(token, liquidity, swap, fee_bps, coherence, pool_count):
+    slippage = arbitrage.CATEGORY_BASE_SLIPPAGE[arbitrage.token_category(token)]
+    slippage *= _tier(arbitrage.SLIPPAGE_LIQUIDITY_TIERS, liquidity)
+    slippage *= _tier(arbitrage.SLIPPAGE_FEE_TIERS, fee_bps) if fee_bps else 1.0
+    slippage *= max(0.5, 2.0 - coherence)
+    slippage *= max(1.0, 2.0 - (pool_count * 0.2))
+    if liquidity > 0:
+        slippage *= 1 + (min(swap / liquidity, 0.1) ** 0.7) * 2.0
+    else:
+        slippage *= 2.0
+    return min(max(slippage, 0.0005), 0.015)
+
+
+def reference_impact(liquidity, swap):
+    impact = _tier(arbitrage.IMPACT_LIQUIDITY_TIERS, liquidity) * (swap / 1000) ** 0.5
+    return min(max(impact, 0.0005), 0.02)
+
+
+def _liquidity_grid(rng):
+    grid = [math.nan, -1.0, 0.0, math.inf, 1e12]
+    for threshold in get_cost_tables().liquidity_breaks:
+        grid += [threshold, math.nextafter(threshold, -math.inf), math.nextafter(threshold, math.inf)]
+    return grid + [10 ** rng.uniform(0, 8) for _ in range(200)]
+
+
+def test_tables_exact():
+    rng = random.Random(4)
+    liquidities = _liquidity_grid(rng)
+    spreads = [math.nan, -0.1, 0.0, 0.2]
+    for threshold in (arbitrage.MEV_BAIT_SPREAD, arbitrage.MEV_MEDIUM_SPREAD):
+        spreads += [threshold, math.nextafter(threshold, -math.inf), math.nextafter(threshold, math.inf)]
+    fees = [None, 0, -5, 1, 99, 100, 299, 300, 1000, math.nan]
+    checked = 0
+    for liquidity in liquidities:
+        for token in TOKENS:
+            for fee_bps in fees:
+                swap = rng.choice([100, 1000, 5000, 25_000])
+                args = (token, liquidity, swap, fee_bps, rng.random(), rng.randint(1, 8))
+                assert math.isclose(estimate_slippage(*args), reference_slippage(*args), rel_tol=1e-14), args
+            category = arbitrage.token_category(token)
+            for spread in spreads:
+                mev = assess_mev_risk(token, liquidity, spread)
+                expected = arbitrage.mev_rule(category, liquidity, spread)
+                assert tuple(mev.values()) == expected, (token, liquidity, spread)
+                checked += 1
+        for swap in (100, 1000, 5000, 1e6):
+            assert estimate_price_impact(liquidity, swap) == reference_impact(liquidity, swap)
+        for n_dex in range(7):
+            for volume in (0, 9_999, 10_000, 1e5, 1e6, math.nan):
+                prices = {f"dex{i}": 1 + 0.001 * i for i in range(n_dex)}
+                assert get_cost_tables().confidence_points(liquidity, n_dex, volume) == (
+                    _tier(arbitrage.CONFIDENCE_LIQUIDITY_TIERS, liquidity),
+                    _tier(arbitrage.CONFIDENCE_DEX_TIERS, n_dex),
+                    _tier(arbitrage.CONFIDENCE_VOLUME_TIERS, volume),
+                )
+                score = calculate_confidence_score(prices, liquidity, volume, 0.01)
+                assert 0 <= score <= 100
+    print(f"✅ Tables exactes sur {len(liquidities)} liquidités ({checked} cellules MEV vérifiées)")
+
+
+def test_vector_buckets():
+    rng = random.Random(5)
+    tables = get_cost_tables()
+    liquidities = np.array(_liquidity_grid(rng))
+    assert tables.liquidity_buckets(liquidities).tolist() == [tables.liquidity_bucket(x) for x in liquidities]
+    fees = np.array([0.0, -5, 1, 99, 100, 299, 300, 1000, math.nan])
+    assert tables.fee_tiers(fees).tolist() == [tables.fee_tier(x) for x in fees.tolist()]
+    spreads = np.array([math.nan, -0.1, 0.0, 0.03, 0.0300001, 0.05, 0.0500001, 0.2])
+    assert tables.spread_buckets(spreads).tolist() == [tables.spread_bucket(x) for x in spreads.tolist()]
+
+    # Lookups vectorisés = lookups scalaires
+    rng_np = np.random.default_rng(5)
+    categories = rng_np.integers(0, 3, len(liquidities))
+    fee_bps = rng_np.choice(fees, len(liquidities))
+    spread = rng_np.choice(spreads, len(liquidities))
+    buckets = tables.liquidity_buckets(liquidities)
+    assert tables.slippage_bases(categories, buckets, tables.fee_tiers(fee_bps)).tolist() == [
+        tables.slippage_base(*args) for args in zip(categories.tolist(), liquidities.tolist(), fee_bps.tolist())]
+    levels, buffers, rejects = tables.mev_decisions(categories, buckets, tables.spread_buckets(spread))
+    expected = [tables.mev_decision(*args) for args in zip(categories.tolist(), liquidities.tolist(), spread.tolist())]
+    assert [cost_tables.MEV_LEVELS[level] for level in levels] == [cell[0] for cell in expected]
+    assert buffers.tolist() == [cell[1] for cell in expected] and rejects.tolist() == [cell[2] for cell in expected]
+    assert tables.price_impacts(buckets, 2500).tolist() == [tables.price_impact(x, 2500) for x in liquidities.tolist()]
+    print("✅ Buckets et lookups vectorisés = scalaires (liquidité, fee, spread, slippage, MEV, impact)")
+
+
+def _token_pools(liquidity, spread):
+    pools = []
+    for i, dex in enumerate(("raydium", "orca", "meteora")):
+        price = 1.0 * (1 + spread) if i == 2 else 1.0
+        pools.append({"dex": dex, "pool_id": f"P{i}", "buy_price": price, "sell_price": price,
+                      "fee_pct": 0.0001, "fee_bps": 1, "liquidity_usd": liquidity})
+    return {"MICROCAP": pools}
+
+
+def test_rebuild_on_reassignment():
+    builds = get_cost_table_stats()["builds"]
+    originals = (arbitrage.SLIPPAGE_FEE_TIERS, arbitrage.MEV_MIN_LIQUIDITY)
+    args = ("MICROCAP", 250_000, 1000, 50, 0.9, 3)
+    before = estimate_slippage(*args)
+    try:
+        arbitrage.SLIPPAGE_FEE_TIERS = ((300, 1.2), (100, 1.0), (0, 1.8))
+        assert math.isclose(estimate_slippage(*args), before * 2, rel_tol=1e-14)
+        assert get_cost_table_stats()["builds"] == builds + 1
+
+        # Seuil MEV relevé: une liquidité de 30k devient "trop faible", scalaire et kernel
+        assert not assess_mev_risk("MICROCAP", 30_000, 0.01)["should_reject"]
+        arbitrage.MEV_MIN_LIQUIDITY = 40_000
+        assert assess_mev_risk("MICROCAP", 30_000, 0.01)["should_reject"]
+        assert get_cost_tables().liquidity_bucket(39_999) != get_cost_tables().liquidity_bucket(40_000)
+        assert find_batch_opportunities(_token_pools(30_000, 0.03)) == []
+        assert get_cost_table_stats()["builds"] == builds + 2
+    finally:
+        arbitrage.SLIPPAGE_FEE_TIERS, arbitrage.MEV_MIN_LIQUIDITY = originals
+    assert estimate_slippage(*args) == before
+    assert not assess_mev_risk("MICROCAP", 30_000, 0.01)["should_reject"]
+    assert cost_tables.size_multiplier.cache_info().hits > 0
+    print(f"✅ Constantes réassignées: tables reconstruites ({get_cost_table_stats()['builds']} builds)")
+
+
+if __name__ == "__main__":
+    test_tables_exact()
+    test_vector_buckets()
+    test_rebuild_on_reassignment()
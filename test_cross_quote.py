@@ -0,0 +1,150 @@
+# test_cross_quote.py
+"""
+Tests de la normalisation cross-quote (pool_prices.get_cross_quote_pool_prices):
+pools TOKEN/SOL et TOKEN/USDC d'un même snapshot exprimées en SOL.
+
+Tests:
+1. Mid SOL/USDC (get_quote_bridge): les deux sens de pool, médiane pondérée
+   par la liquidité, pools peu liquides ignorées, None sans pool de la paire
+2. Conversion: pool USDC au prix cohérent = mêmes buy/sell que la pool SOL,
+   fee composée avec la pool de conversion, PoolTable et dicts; sans mid,
+   seules les pools SOL restent; SOL lui-même ignoré, une quote jamais
+   convertie via une autre quote
+3. fetch_solana_pools: deux fois plus de pools comparables par token, écart
+   entre une pool SOL et une pool USDC détecté par find_pool_opportunities;
+   CROSS_QUOTE_POOLS=false: pools SOL seules
+
+Usage:
+    SAVE_LOGS=false LOG_LEVEL=ERROR python test_cross_quote.py
+"""
+import asyncio
+import math
+
+import pool_fetchers
+from arbitrage import find_pool_opportunities
+from pool_fetchers import SOL_MINT, USDC_MINT, fetch_solana_pools
+from pool_prices import get_cross_quote_pool_prices, get_quote_bridge
+from pool_table import PoolTable
+
+TOKENS = ["MINTA", "MINTB", "MINTC"]
+USD = {SOL_MINT: 150.0, USDC_MINT: 1.0, "MINTA": 2.0, "MINTB": 0.001, "MINTC": 151.0}
+
+
+def _pool(pool_id, dex, token_a, token_b, price=None, fee_pct=0.0025, liquidity_usd=5e5):
+    return {
+        "pool_id": pool_id,
+        "dex": dex,
+        "token_a": token_a,
+        "token_b": token_b,
+        "price": USD[token_a] / USD[token_b] if price is None else price,  # token_b par token_a
+        "fee_pct": fee_pct,
+        "fee_bps": round(fee_pct * 10000),
+        "liquidity_usd": liquidity_usd,
+        "pool_type": "AMM",
+    }
+
+
+def build_snapshot():
+    """Chaque token: une pool SOL (orca) et une pool USDC (raydium), sens alternés."""
+    orca, raydium = [], []
+    for i, token in enumerate(TOKENS):
+        sol = (token, SOL_MINT) if i % 2 else (SOL_MINT, token)
+        usdc = (USDC_MINT, token) if i % 2 else (token, USDC_MINT)
+        orca.append(_pool(f"{token}-SOL", "orca", *sol))
+        raydium.append(_pool(f"{token}-USDC", "raydium", *usdc))
+    bridge = [
+        _pool("SOL-USDC-1", "meteora", SOL_MINT, USDC_MINT, 150.0, 0.0004, 5e7),
+        _pool("SOL-USDC-2", "meteora", USDC_MINT, SOL_MINT, 1 / 150.3, 0.0025, 2e7),
+        _pool("SOL-USDC-3", "meteora", SOL_MINT, USDC_MINT, 120.0, 0.003, 1e7),      # décalée
+        _pool("SOL-USDC-4", "meteora", SOL_MINT, USDC_MINT, 10.0, 0.003, 5e4),       # trop petite
+    ]
+    return {"orca": PoolTable.from_dicts(orca), "raydium": raydium, "meteora": bridge}
+
+
+def test_quote_bridge():
+    snapshot = build_snapshot()
+    rate, fee = get_quote_bridge(snapshot)
+    # SOL par USDC: 1/150 porte plus de la moitié de la liquidité
+    assert math.isclose(rate, 1 / 150.0) and fee == 0.0004
+    assert math.isclose(get_quote_bridge(snapshot, SOL_MINT, USDC_MINT)[0], 150.0)
+    # Nouveaux snapshots (l'index est construit une fois par snapshot)
+    without_main = dict(snapshot, meteora=snapshot["meteora"][1:])
+    assert math.isclose(get_quote_bridge(without_main)[0], 1 / 150.3)  # 2e7 sur 3e7 liquides
+    illiquid = dict(snapshot, meteora=snapshot["meteora"][3:])
+    assert get_quote_bridge(illiquid) is None
+    print(f"✅ Mid SOL/USDC: médiane pondérée {1 / rate:.2f} USDC/SOL, pools peu liquides ignorées")
+
+
+def test_conversion():
+    snapshot = build_snapshot()
+    result = get_cross_quote_pool_prices(snapshot, TOKENS + [USDC_MINT], extra_fields={"chain": "solana"})
+    for token in TOKENS:
+        sol_pool, usdc_pool = result[token]
+        assert "converted_from" not in sol_pool and usdc_pool["converted_from"] == USDC_MINT
+        assert sol_pool["token"] == usdc_pool["token"] == token and usdc_pool["chain"] == "solana"
+        # Prix USD cohérents: mêmes prix en SOL des deux côtés
+        assert math.isclose(usdc_pool["buy_price"], sol_pool["buy_price"], rel_tol=1e-12)
+        assert math.isclose(usdc_pool["sell_price"], sol_pool["sell_price"], rel_tol=1e-12)
+        assert math.isclose(usdc_pool["fee_pct"], 1 - 0.9975 * 0.9996) and usdc_pool["fee_bps"] == 29
+        assert sol_pool["fee_pct"] == 0.0025
+    # USDC lui-même: seulement ses pools contre SOL, non converties
+    assert {p["pool_id"] for p in result[USDC_MINT]} == {"SOL-USDC-1", "SOL-USDC-2", "SOL-USDC-3", "SOL-USDC-4"}
+    assert not any("converted_from" in p for p in result[USDC_MINT])
+
+    # SOL lui-même: rien (ses pools USDC converties via le mid SOL/USDC vaudraient ~1 SOL);
+    # une quote (USDC) n'est jamais convertie via une autre quote (USDT)
+    usdt = "USDTMINT"
+    with_usdt = dict(snapshot, lifinity=[
+        _pool("USDT-SOL", "lifinity", usdt, SOL_MINT, 1 / 150.0, liquidity_usd=5e7),
+        _pool("USDC-USDT", "lifinity", USDC_MINT, usdt, 1.0, liquidity_usd=5e7),
+    ])
+    result = get_cross_quote_pool_prices(with_usdt, [SOL_MINT, USDC_MINT, "MINTA"], SOL_MINT, (USDC_MINT, usdt))
+    assert result[SOL_MINT] == []
+    assert "USDC-USDT" not in {p["pool_id"] for p in result[USDC_MINT]}
+    assert len(result[USDC_MINT]) == 4 and len(result["MINTA"]) == 2
+
+    # Sans pool de conversion liquide: pools SOL seules
+    result = get_cross_quote_pool_prices(dict(snapshot, meteora=[]), TOKENS)
+    assert all([p["pool_id"] for p in result[token]] == [f"{token}-SOL"] for token in TOKENS)
+    print("✅ Pools USDC converties en SOL (PoolTable et dicts), fee composée, repli sans mid")
+
+
+async def _fetch(snapshot, cross_quote):
+    async def fake_fetch_all_pools(session, use_cache=True):
+        return snapshot
+
+    originals = (pool_fetchers.fetch_all_pools, pool_fetchers.CROSS_QUOTE_POOLS, pool_fetchers.SOLANA_RPC_POOLS)
+    pool_fetchers.fetch_all_pools = fake_fetch_all_pools
+    pool_fetchers.CROSS_QUOTE_POOLS = cross_quote
+    pool_fetchers.SOLANA_RPC_POOLS = False
+    try:
+        return await fetch_solana_pools(TOKENS, None)
+    finally:
+        pool_fetchers.fetch_all_pools, pool_fetchers.CROSS_QUOTE_POOLS, pool_fetchers.SOLANA_RPC_POOLS = originals
+
+
+def test_fetch_solana_pools():
+    snapshot = build_snapshot()
+    # MINTC (~1 SOL): la pool USDC paie 3% de plus que la pool SOL
+    snapshot["raydium"][2]["price"] *= 1.03
+    pools = asyncio.run(_fetch(snapshot, True))
+    sol_only = asyncio.run(_fetch(snapshot, False))
+    assert len(pools) == 2 * len(sol_only) == 2 * len(TOKENS)
+    assert not any("converted_from" in pool for pool in sol_only)
+
+    by_token = {}
+    for pool in pools:
+        by_token.setdefault(pool["token"], []).append(pool)
+    assert find_pool_opportunities(by_token["MINTA"], "MINTA") == []
+    opportunities = find_pool_opportunities(by_token["MINTC"], "MINTC")
+    assert len(opportunities) == 1
+    opp = opportunities[0]
+    assert {opp["buy_pool_id"], opp["sell_pool_id"]} == {"MINTC-SOL", "MINTC-USDC"}
+    print(f"✅ fetch_solana_pools: {len(pools)} pools (vs {len(sol_only)} en SOL seul), "
+          f"écart SOL/USDC détecté ({opp['spread_net']:.2%} net)")
+
+
+if __name__ == "__main__":
+    test_quote_bridge()
+    test_conversion()
+    test_fetch_solana_pools()
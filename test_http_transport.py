@@ -0,0 +1,106 @@
+# test_http_transport.py
+"""
+Tests du transport HTTP partagé (http_transport) contre un serveur
+aiohttp.web local.
+
+HostLimitedConnector surcharge une méthode privée de aiohttp.TCPConnector:
+ces tests vérifient que la limite par hôte tient toujours avec la version
+d'aiohttp installée (voir la borne dans requirements.txt).
+
+Tests:
+1. Hôte listé dans HOST_POOL_LIMITS: N requêtes concurrentes, jamais plus
+   de connexions simultanées (ni de connexions ouvertes au total, grâce au
+   keep-alive) que sa limite
+2. Hôte non listé: limite par défaut HTTP_POOL_LIMIT_PER_HOST; stats de
+   réutilisation des connexions par hôte
+
+Usage:
+    SAVE_LOGS=false LOG_LEVEL=ERROR python test_http_transport.py
+"""
+import asyncio
+
+from aiohttp import web
+
+import http_transport
+from config import HTTP_POOL_LIMIT_PER_HOST
+from http_transport import create_session, get_transport_stats, reset_transport_stats
+
+REQUESTS = 24
+HANDLER_DELAY_SECONDS = 0.02
+
+
+class _ConnectionCounter:
+    """Serveur local comptant les connexions occupées simultanément."""
+
+    def __init__(self):
+        self.active = set()
+        self.peers = set()
+        self.max_active = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        peer = request.transport.get_extra_info("peername")
+        assert peer not in self.active  # HTTP/1.1: une requête à la fois par connexion
+        self.active.add(peer)
+        self.peers.add(peer)
+        self.max_active = max(self.max_active, len(self.active))
+        try:
+            await asyncio.sleep(HANDLER_DELAY_SECONDS)
+            return web.json_response({"ok": True})
+        finally:
+            self.active.discard(peer)
+
+
+async def _run(host: str, host_limits=None):
+    counter = _ConnectionCounter()
+    app = web.Application()
+    app.router.add_get("/pools", counter.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+
+    originals = dict(http_transport.HOST_POOL_LIMITS)
+    http_transport.HOST_POOL_LIMITS.update(host_limits or {})
+    try:
+        async with create_session() as session:
+            async def fetch():
+                async with session.get(f"http://{host}:{port}/pools") as resp:
+                    assert resp.status == 200
+                    return await resp.json()
+
+            results = await asyncio.gather(*(fetch() for _ in range(REQUESTS)))
+            assert all(r == {"ok": True} for r in results)
+    finally:
+        http_transport.HOST_POOL_LIMITS.clear()
+        http_transport.HOST_POOL_LIMITS.update(originals)
+        await runner.cleanup()
+    return counter
+
+
+def test_listed_host_limit():
+    limit = 2
+    counter = asyncio.run(_run("127.0.0.1", {"127.0.0.1": {"limit": limit, "warm": False}}))
+    assert counter.max_active == limit, counter.max_active
+    assert len(counter.peers) <= limit, counter.peers
+    print(f"✅ Hôte listé: {REQUESTS} requêtes concurrentes, max {counter.max_active} connexions "
+          f"simultanées (limite {limit})")
+
+
+def test_default_host_limit():
+    reset_transport_stats()
+    counter = asyncio.run(_run("localhost"))
+    assert "localhost" not in http_transport.HOST_POOL_LIMITS
+    assert 1 <= counter.max_active <= HTTP_POOL_LIMIT_PER_HOST, counter.max_active
+    assert len(counter.peers) <= HTTP_POOL_LIMIT_PER_HOST, counter.peers
+    stats = get_transport_stats()["localhost"]
+    assert stats["requests"] == REQUESTS
+    assert stats["connections_created"] == len(counter.peers)
+    assert stats["connections_reused"] == REQUESTS - len(counter.peers)
+    print(f"✅ Hôte non listé: max {counter.max_active} connexions (défaut {HTTP_POOL_LIMIT_PER_HOST}), "
+          f"reuse_ratio {stats['reuse_ratio']:.2f}")
+
+
+if __name__ == "__main__":
+    test_listed_host_limit()
+    test_default_host_limit()
@@ -0,0 +1,122 @@
+# test_pool_opportunities.py
+"""
+Tests de find_pool_opportunities (arbitrage): mêmes résultats que la boucle
+par paires de compute_pool_arbitrage utilisée auparavant par main.py.
+
+Tests:
+1. Tokens aléatoires (2 à 60 pools, prix proches, fees variés, pools
+   invalides): toutes les opportunités identiques, triées par spread_net
+2. top_k: préfixe exact de la liste complète (paires distinctes), y compris
+   une paire rentable dans les deux sens et des spreads à égalité
+3. compute_pool_arbitrage n'est appelé que pour les paires rentables
+
+Usage:
+    SAVE_LOGS=false python test_pool_opportunities.py
+"""
+import random
+
+import arbitrage
+from arbitrage import compute_pool_arbitrage, find_pool_opportunities
+
+FEES = [0.0001, 0.0004, 0.0005, 0.0025, 0.003, 0.01, None]
+
+
+def pairwise(pools, token):
+    """Référence: l'ancienne double boucle de main.py, puis tri stable par spread_net."""
+    opportunities = []
+    for ii in range(len(pools)):
+        for jj in range(ii + 1, len(pools)):
+            opp = compute_pool_arbitrage(pools[ii], pools[jj], token)
+            if opp:
+                opportunities.append(opp)
+    return sorted(opportunities, key=lambda o: -o["spread_net"])
+
+
+def random_pools(rng: random.Random, n: int):
+    pools = []
+    mid = rng.uniform(1e-6, 1e4)
+    for i in range(n):
+        buy = mid * (1 + rng.gauss(0, 0.001))
+        if rng.random() < 0.5:
+            sell = buy * (1 + rng.gauss(0, 0.001))
+        else:
+            sell = mid * mid / buy  # prix symétriques autour du mid
+        pools.append({
+            "pool_id": f"pool{i}",
+            "dex": rng.choice(["orca", "raydium", "meteora"]),
+            "buy_price": buy,
+            "sell_price": sell,
+            "fee_pct": rng.choice(FEES),
+            "liquidity_usd": rng.uniform(1e3, 1e6),
+            "chain": "solana",
+        })
+    # Pools ignorées par les deux méthodes
+    if n > 4:
+        pools[rng.randrange(n)]["buy_price"] = 0
+        pools[rng.randrange(n)]["sell_price"] = None
+        pools[rng.randrange(n)]["buy_price"] = str(mid)  # chaîne numérique: acceptée
+    return pools
+
+
+def test_matches_pairwise_loop():
+    rng = random.Random(1234)
+    total = 0
+    for _ in range(300):
+        pools = random_pools(rng, rng.randint(2, 60))
+        expected = pairwise(pools, "TOKEN")
+        assert find_pool_opportunities(pools, "TOKEN") == expected
+        total += len(expected)
+    assert total > 100  # le jeu de données contient bien des opportunités
+    print(f"✅ 300 tokens aléatoires: {total} opportunités identiques à la boucle par paires")
+
+
+def test_top_k_prefix():
+    rng = random.Random(99)
+    for _ in range(200):
+        pools = random_pools(rng, rng.randint(2, 40))
+        full = find_pool_opportunities(pools, "TOKEN")
+        for k in (1, 2, 5):
+            assert find_pool_opportunities(pools, "TOKEN", top_k=k) == full[:k]
+
+    # Paire rentable dans les deux sens (prix de vente > prix d'achat partout)
+    # et deux paires à égalité: une seule entrée par paire, ordre des paires
+    pools = [
+        {"pool_id": "a", "dex": "orca", "buy_price": 1.0, "sell_price": 1.05, "fee_pct": 0.001},
+        {"pool_id": "b", "dex": "raydium", "buy_price": 1.0, "sell_price": 1.04, "fee_pct": 0.001},
+        {"pool_id": "c", "dex": "meteora", "buy_price": 1.0, "sell_price": 1.05, "fee_pct": 0.001},
+    ]
+    best = find_pool_opportunities(pools, "TOKEN", top_k=2)
+    assert best == pairwise(pools, "TOKEN")[:2]
+    assert [(o["buy_pool_id"], o["sell_pool_id"]) for o in best] == [("b", "a"), ("a", "c")]
+    assert find_pool_opportunities(pools, "TOKEN", top_k=0) == []
+    print("✅ top_k = préfixe de la liste complète, paires distinctes, égalités dans l'ordre des paires")
+
+
+def test_only_profitable_pairs_built():
+    rng = random.Random(7)
+    pools = random_pools(rng, 40)
+    expected = pairwise(pools, "TOKEN")
+
+    calls = 0
+    original = arbitrage.compute_pool_arbitrage
+
+    def counting(*args):
+        nonlocal calls
+        calls += 1
+        return original(*args)
+
+    arbitrage.compute_pool_arbitrage = counting
+    try:
+        result = find_pool_opportunities(pools, "TOKEN")
+        best = find_pool_opportunities(pools, "TOKEN", top_k=1)
+    finally:
+        arbitrage.compute_pool_arbitrage = original
+    assert result == expected and best == expected[:1]
+    assert calls == len(expected) + 1, calls
+    print(f"✅ 40 pools, 2 évaluations: {calls} appels à compute_pool_arbitrage au lieu de 2 x 780")
+
+
+if __name__ == "__main__":
+    test_matches_pairwise_loop()
+    test_top_k_prefix()
+    test_only_profitable_pairs_built()
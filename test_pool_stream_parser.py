@@ -0,0 +1,188 @@
+# test_pool_stream_parser.py
+"""
+Tests du parser incrémental (pool_stream_parser) contre json.loads + filtre
+watchlist sur le même dump.
+
+Tests:
+1. Tableau racine et objet racine {"data": [...]}, découpés en chunks de
+   1, 7, 64 octets et en un seul bloc: mêmes pools gardées que json.loads
+   suivi du filtre (deux mints surveillés distincts), dans le même ordre;
+   chaînes avec accolades et guillemets échappés, pool imbriquée au-delà de
+   4 niveaux (chemin de décodage direct)
+2. Sans watchlist: toutes les pools; éléments non-objets (nombre, chaîne,
+   null) ignorés sans bloquer la suite du flux
+3. Élément complet mais JSON invalide (imbriqué ou non): ignoré et compté
+   (pools_malformed), les pools suivantes sont gardées
+4. Body complet de pools imbriquées au-delà de 4 niveaux (parse_bytes):
+   coût linéaire, chaque élément est décodé seul et non le reste du buffer
+
+Usage:
+    SAVE_LOGS=false LOG_LEVEL=ERROR python test_pool_stream_parser.py
+"""
+import json
+import random
+import time
+
+from pool_stream_parser import PoolStreamParser
+
+SOL = "So11111111111111111111111111111111111111112"
+USDC = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+BONK = "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263"
+WATCH = {SOL, USDC, BONK}
+CHUNK_SIZES = (1, 7, 64, None)  # None: body entier
+
+
+def _mint(rng: random.Random) -> str:
+    alphabet = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+    return "".join(rng.choice(alphabet) for _ in range(44))
+
+
+def build_pools(seed: int = 3) -> list:
+    """Pools au format Raydium, moitié sur deux mints surveillés, cas pièges en plus."""
+    rng = random.Random(seed)
+    pools = []
+    for i in range(40):
+        watched = i % 2 == 0
+        mint_a = rng.choice(sorted(WATCH)) if watched else _mint(rng)
+        mint_b = SOL if watched and mint_a != SOL else (USDC if watched else rng.choice([SOL, _mint(rng)]))
+        pools.append({
+            "id": f"pool-{i}",
+            "type": "Standard",
+            "mintA": {"address": mint_a, "symbol": f"T{i}", "decimals": 9},
+            "mintB": {"address": mint_b, "symbol": "SOL", "decimals": 9},
+            "price": rng.uniform(1e-6, 1e3),
+            "tvl": rng.uniform(1e3, 1e7),
+            "feeRate": rng.choice([0.0001, 0.0025]),
+            "rewardDefaultInfos": [],
+        })
+    # Accolades et guillemets échappés dans les chaînes
+    pools.append({
+        "id": "tricky-strings",
+        "name": 'a "quoted" {brace} } name \\ with [brackets]',
+        "mintA": {"address": BONK},
+        "mintB": {"address": USDC, "note": "}}}{{{\"\\\""},
+        "price": 1e-5,
+    })
+    pools.append({
+        "id": "tricky-unwatched",
+        "name": "{\"mintA\": \"" + SOL + "\"}",  # un seul mint surveillé, dans une chaîne
+        "mintA": {"address": _mint(rng)},
+        "mintB": {"address": _mint(rng)},
+    })
+    # Imbrication > 4 niveaux: hors regex, décodage direct
+    pools.append({
+        "id": "deep-watched",
+        "mintA": {"address": SOL},
+        "config": {"a": {"b": {"c": {"d": {"mint": USDC}}}}},
+    })
+    pools.append({
+        "id": "deep-unwatched",
+        "mintA": {"address": SOL},
+        "config": {"a": {"b": {"c": {"d": {"mint": _mint(rng)}}}}},
+    })
+    return pools
+
+
+def _strings(value):
+    """Toutes les chaînes (clés comprises) d'une valeur JSON."""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield key
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+
+def reference(body: bytes, min_mint_hits: int = 2) -> list:
+    data = json.loads(body)
+    pools = data["data"] if isinstance(data, dict) else data
+    return [p for p in pools
+            if isinstance(p, dict) and len({s for s in _strings(p) if s in WATCH}) >= min_mint_hits]
+
+
+def _stream(body: bytes, chunk_size, watch_mints=WATCH) -> list:
+    parser = PoolStreamParser(watch_mints=watch_mints)
+    if chunk_size is None:
+        return parser.parse_bytes(body)
+    pools = []
+    for start in range(0, len(body), chunk_size):
+        pools.extend(parser.feed(body[start:start + chunk_size]))
+    pools.extend(parser.close())
+    return pools
+
+
+def test_chunked_matches_json_loads():
+    pools = build_pools()
+    bodies = {
+        "root list": json.dumps(pools).encode(),
+        "root object": json.dumps({"success": True, "count": len(pools), "data": pools, "next": None},
+                                  indent=1).encode(),
+    }
+    for label, body in bodies.items():
+        expected = reference(body)
+        ids = [p["id"] for p in expected]
+        assert "tricky-strings" in ids and "deep-watched" in ids
+        assert "tricky-unwatched" not in ids and "deep-unwatched" not in ids
+        for chunk_size in CHUNK_SIZES:
+            assert _stream(body, chunk_size) == expected, (label, chunk_size)
+    print(f"✅ {len(pools)} pools, chunks {CHUNK_SIZES}: mêmes pools que json.loads + filtre "
+          f"({len(expected)} gardées, tableau et objet racine)")
+
+
+def test_without_watchlist():
+    pools = build_pools()
+    body = json.dumps({"data": pools[:5] + [42, "x", None] + pools[5:]}).encode()
+    for chunk_size in CHUNK_SIZES:
+        assert _stream(body, chunk_size, watch_mints=None) == pools, chunk_size
+    print("✅ Sans watchlist: toutes les pools, éléments non-objets ignorés")
+
+
+def test_malformed_element_skipped():
+    pools = build_pools()
+    good = [json.dumps(p).encode() for p in pools]
+    pair = f'"mintA": "{SOL}", "mintB": "{USDC}"'.encode()
+    malformed = [
+        b'{' + pair + b', "a": {"b": {"c": {"d": {"e": [1, }}}}}}',  # chemin lent
+        b'{' + pair + b', "price": 1.5.2}',                          # chemin regex
+    ]
+    body = b'{"data": [' + b", ".join(good[:10] + malformed + good[10:]) + b']}'
+    expected = reference(json.dumps({"data": pools}).encode())
+    for chunk_size in CHUNK_SIZES:
+        parser = PoolStreamParser(watch_mints=WATCH)
+        if chunk_size is None:
+            kept = parser.parse_bytes(body)
+        else:
+            kept = [p for i in range(0, len(body), chunk_size) for p in parser.feed(body[i:i + chunk_size])]
+            kept += parser.close()
+        assert kept == expected, chunk_size
+        assert parser.stats["pools_malformed"] == 2
+        assert parser.stats["pools_seen"] == len(pools) + 2
+    print("✅ Éléments invalides ignorés et comptés, pools suivantes gardées")
+
+
+def test_deep_pools_linear():
+    rng = random.Random(11)
+    pools = [{
+        "id": f"deep-{i}",
+        "mintA": {"address": SOL},
+        "mintB": {"address": USDC if i % 2 else _mint(rng)},
+        "config": {"a": {"b": {"c": {"d": {"fee": i, "note": '}{"' * 10}}}}},
+        "rewards": [{"mint": _mint(rng), "apr": [1, 2.5, None]}],
+    } for i in range(8000)]
+    body = json.dumps({"data": pools}).encode()
+    started = time.perf_counter()
+    kept = PoolStreamParser(watch_mints=WATCH).parse_bytes(body)
+    elapsed = time.perf_counter() - started
+    assert kept == reference(body)
+    assert elapsed < 4.0, elapsed  # quadratique (décodage du reste du buffer): > 10 s
+    print(f"✅ {len(pools)} pools imbriquées ({len(body) / 2 ** 20:.1f} Mo) en {elapsed:.2f}s via parse_bytes")
+
+
+if __name__ == "__main__":
+    test_chunked_matches_json_loads()
+    test_without_watchlist()
+    test_malformed_element_skipped()
+    test_deep_pools_linear()
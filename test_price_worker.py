@@ -0,0 +1,208 @@
+# test_price_worker.py
+"""
+Tests du worker persistant price_fetcher (price_worker) contre un faux
+binaire: un script Python qui parle le même protocole (trames longueur u32
+big-endian + JSON) sur stdin/stdout.
+
+Tests:
+1. Requêtes concurrentes sur un seul process, réponses dans le désordre
+   appariées par id, boucle asyncio jamais bloquée
+2. fetch_prices_with_rust via le worker partagé: format {"solana", "base"}
+3. Crash du process: requête en attente en échec immédiat, relance
+   automatique à la requête suivante
+4. Worker qui ne répond plus: non sain après MAX_CONSECUTIVE_FAILURES,
+   fetch_prices_with_rust rend None (fallback Python) sans l'interroger
+
+Usage:
+    SAVE_LOGS=false python test_price_worker.py
+"""
+import asyncio
+import os
+import stat
+import sys
+import tempfile
+import time
+
+import price_fetchers
+import price_worker
+from price_worker import PriceWorker
+
+STAND_IN = '''
+import json, sys, threading, time
+
+args = sys.argv[1:]
+crash_after = int(args[args.index("--crash-after") + 1]) if "--crash-after" in args else None
+mute = "--mute" in args
+lock = threading.Lock()
+served = 0
+
+
+def send(message):
+    payload = json.dumps(message).encode()
+    with lock:
+        sys.stdout.buffer.write(len(payload).to_bytes(4, "big") + payload)
+        sys.stdout.buffer.flush()
+
+
+def fetch(request):
+    time.sleep(request.get("delay", 0))
+    groups = {"solana": [], "base": []}
+    for i, item in enumerate(request["tokens"]):
+        chain, token = item.split(":", 1)
+        groups[chain].append({"token": token, "prices": {"jupiter" if chain == "solana" else "uniswap": 1.0 + i}})
+    send({"id": request["id"], "success": True, "solana_tokens": groups["solana"],
+          "base_tokens": groups["base"], "fetch_time_ms": 3, "pid": __import__("os").getpid()})
+
+
+while True:
+    header = sys.stdin.buffer.read(4)
+    if len(header) < 4:
+        break
+    request = json.loads(sys.stdin.buffer.read(int.from_bytes(header, "big")))
+    if mute:
+        continue
+    if request["method"] == "ping":
+        send({"id": request["id"], "ok": True})
+        continue
+    served += 1
+    if crash_after is not None and served > crash_after:
+        sys.exit(3)
+    threading.Thread(target=fetch, args=(request,), daemon=True).start()
+'''
+
+
+def _write_stand_in(directory: str) -> str:
+    path = os.path.join(directory, "price_fetcher")
+    with open(path, "w") as f:
+        f.write(f"#!{sys.executable}\n{STAND_IN}")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+async def _check_concurrent(path):
+    worker = PriceWorker([path])
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticking = asyncio.create_task(ticker())
+    try:
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(
+            worker.request("fetch_prices", tokens=[f"solana:mint{i}"], delay=delay)
+            for i, delay in enumerate([0.3, 0.1, 0.2])
+        ))
+        elapsed = time.perf_counter() - started
+    finally:
+        ticking.cancel()
+        await worker.stop()
+
+    assert [r["solana_tokens"][0]["token"] for r in responses] == ["mint0", "mint1", "mint2"]
+    assert len({r["pid"] for r in responses}) == 1
+    assert worker.stats["spawns"] == 1 and worker.stats["orphans"] == 0
+    assert elapsed < 0.55, elapsed  # servies en parallèle, pas 0.6s en série
+    assert ticks >= 20, ticks       # la boucle a continué de tourner
+    print(f"✅ 3 requêtes concurrentes, 1 process, {elapsed:.2f}s, {ticks} ticks de boucle")
+
+
+async def _check_fetch_prices(path):
+    original = price_fetchers.RUST_BINARY_PATH
+    price_fetchers.RUST_BINARY_PATH = path
+    price_fetchers._rust_binary_available = None
+    try:
+        first = await price_fetchers.fetch_prices_with_rust(["mintA", "mintB"], ["0xbase"])
+        second = await price_fetchers.fetch_prices_with_rust(["mintA"])
+        stats = price_worker.get_price_worker_stats()
+    finally:
+        await price_worker.stop_price_worker()
+        price_fetchers.RUST_BINARY_PATH = original
+        price_fetchers._rust_binary_available = None
+
+    assert first == {
+        "solana": {"mintA": {"jupiter": 1.0}, "mintB": {"jupiter": 2.0}},
+        "base": {"0xbase": {"uniswap": 3.0}},
+    }
+    assert second == {"solana": {"mintA": {"jupiter": 1.0}}, "base": {}}
+    assert stats["spawns"] == 1 and stats["requests"] == 2 and stats["healthy"]
+    print("✅ fetch_prices_with_rust: 2 cycles, 1 seul démarrage du binaire")
+
+
+async def _check_respawn(path):
+    original = price_worker.RESPAWN_MIN_SECONDS
+    price_worker.RESPAWN_MIN_SECONDS = 0.05
+    worker = PriceWorker([path, "--crash-after", "1"])
+    try:
+        ok = await worker.request("fetch_prices", tokens=["solana:a"])
+        started = time.perf_counter()
+        crashed = await worker.request("fetch_prices", tokens=["solana:b"])
+        failed_in = time.perf_counter() - started
+        await asyncio.sleep(0.1)
+        again = await worker.request("fetch_prices", tokens=["solana:c"])
+    finally:
+        price_worker.RESPAWN_MIN_SECONDS = original
+        await worker.stop()
+
+    assert ok is not None and crashed is None
+    assert failed_in < 1.0, failed_in  # pas d'attente du timeout de requête
+    assert again is not None and again["pid"] != ok["pid"]
+    assert worker.stats["spawns"] == 2 and worker.stats["exits"] >= 1
+    assert worker.healthy
+    print(f"✅ Crash détecté en {failed_in * 1000:.0f} ms, process relancé (pid {ok['pid']} -> {again['pid']})")
+
+
+async def _check_unhealthy(path):
+    original = price_fetchers.RUST_BINARY_PATH
+    price_fetchers.RUST_BINARY_PATH = path
+    price_fetchers._rust_binary_available = None
+    worker = price_worker.get_price_worker([path, "--mute"])
+    worker.request_timeout = 0.1
+    try:
+        for _ in range(price_worker.MAX_CONSECUTIVE_FAILURES):
+            assert await worker.request("fetch_prices", tokens=["solana:a"]) is None
+        assert not worker.healthy
+        requests = worker.stats["requests"]
+
+        started = time.perf_counter()
+        result = await price_fetchers.fetch_prices_with_rust(["mintA"])
+        elapsed = time.perf_counter() - started
+        assert result is None and worker.stats["requests"] == requests
+        assert elapsed < 0.05, elapsed
+        await asyncio.sleep(0.05)
+        assert not worker.alive  # process bloqué tué
+    finally:
+        await price_worker.stop_price_worker()
+        price_fetchers.RUST_BINARY_PATH = original
+        price_fetchers._rust_binary_available = None
+    print(f"✅ Worker non sain après {price_worker.MAX_CONSECUTIVE_FAILURES} timeouts: fallback Python immédiat")
+
+
+def _run(check):
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(check(_write_stand_in(directory)))
+
+
+def test_concurrent_requests_one_process():
+    _run(_check_concurrent)
+
+
+def test_fetch_prices_with_rust_worker():
+    _run(_check_fetch_prices)
+
+
+def test_respawn_after_crash():
+    _run(_check_respawn)
+
+
+def test_unhealthy_worker_falls_back():
+    _run(_check_unhealthy)
+
+
+if __name__ == "__main__":
+    test_concurrent_requests_one_process()
+    test_fetch_prices_with_rust_worker()
+    test_respawn_after_crash()
+    test_unhealthy_worker_falls_back()
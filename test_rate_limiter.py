@@ -0,0 +1,215 @@
+# test_rate_limiter.py
+"""
+Tests du limiteur de débit par hôte (rate_limiter) avec une horloge simulée.
+
+L'horloge du module est remplacée (rate_limiter.time) plutôt que
+time.monotonic lui-même, que la boucle asyncio utilise aussi. Les réveils
+des requêtes en attente sont déclenchés à la main (_dispatch, ce que fait le
+timer de la boucle) après avoir avancé l'horloge.
+
+Tests:
+1. 429: débit divisé par 2, plafond à 90% du débit envoyé, une seule
+   réduction par épisode, jetons vidés et hôte en pause
+2. Succès: remontée vers le plafond appris sans le dépasser, puis
+   augmentation additive jusqu'à max_rate une fois le plafond expiré
+3. Retry-After en secondes et en date HTTP (bornes, valeurs invalides);
+   l'hôte reste bloqué jusqu'à l'échéance, 503 seulement avec Retry-After
+4. File par priorité: une requête PRIORITY_HIGH arrivée après une
+   PRIORITY_LOW est servie en premier
+
+Usage:
+    SAVE_LOGS=false LOG_LEVEL=ERROR python test_rate_limiter.py
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import rate_limiter
+from rate_limiter import (
+    ADDITIVE_INCREASE,
+    CEILING_MARGIN,
+    CEILING_TTL_SECONDS,
+    MAX_RETRY_AFTER_SECONDS,
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    HostBucket,
+    get_bucket,
+    observe,
+    parse_retry_after,
+)
+
+
+class FakeClock:
+    """Remplace time.monotonic dans rate_limiter le temps d'un bloc with."""
+
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+    def __enter__(self):
+        self._original = rate_limiter.time
+        rate_limiter.time = SimpleNamespace(monotonic=lambda: self.now, time=time.time)
+        return self
+
+    def __exit__(self, *exc):
+        rate_limiter.time = self._original
+
+
+async def _drain(bucket: HostBucket, n: int):
+    for _ in range(n):
+        await bucket.acquire()
+
+
+async def _settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_throttle_halves_rate():
+    with FakeClock() as clock:
+        bucket = HostBucket("test.throttle", rate=4.0, burst=4, max_rate=10.0)
+        asyncio.run(_drain(bucket, 4))  # 4 req envoyées dans la fenêtre d'1s
+        assert bucket.sent_rate(clock.now) == 4.0
+
+        bucket.on_throttled()
+        assert bucket.rate == 2.0
+        assert abs(bucket.ceiling - 4.0 * CEILING_MARGIN) < 1e-12
+        assert bucket.tokens == 0.0 and bucket.blocked_until == clock.now + 1 / bucket.rate
+
+        # Les 429 des requêtes déjà en vol: pas de nouvelle réduction
+        clock.advance(0.1)
+        bucket.on_throttled()
+        bucket.on_throttled()
+        assert bucket.rate == 2.0 and bucket.stats["throttled"] == 3
+
+        # Nouvel épisode après la pause et le cooldown: nouvelle réduction
+        clock.advance(2.0)
+        bucket.on_throttled()
+        assert bucket.rate == 1.0
+    print("✅ 429: débit divisé par 2, plafond à 90% du débit envoyé, une réduction par épisode")
+
+
+def test_additive_recovery():
+    with FakeClock() as clock:
+        bucket = HostBucket("test.recovery", rate=4.0, burst=4, max_rate=6.0)
+        asyncio.run(_drain(bucket, 4))
+        bucket.on_throttled()
+        ceiling = bucket.ceiling
+        rates = []
+        for _ in range(200):
+            clock.advance(0.01)
+            bucket.on_success()
+            rates.append(bucket.rate)
+        assert rates == sorted(rates) and max(rates) == ceiling  # jamais au-dessus du plafond
+        # Sous le plafond appris: premier pas >= ADDITIVE_INCREASE (10% de l'écart)
+        assert rates[0] - 2.0 >= ADDITIVE_INCREASE
+
+        # Plafond expiré: augmentation additive jusqu'à max_rate
+        clock.advance(CEILING_TTL_SECONDS + 1)
+        bucket.on_success()
+        assert bucket.ceiling == bucket.max_rate
+        assert abs(bucket.rate - (ceiling + ADDITIVE_INCREASE)) < 1e-9
+        for _ in range(200):
+            bucket.on_success()
+        assert bucket.rate == bucket.max_rate
+
+        fresh = HostBucket("test.fresh", rate=1.0, burst=1, max_rate=1.2)
+        fresh.on_success()
+        assert abs(fresh.rate - (1.0 + ADDITIVE_INCREASE)) < 1e-12
+        for _ in range(10):
+            fresh.on_success()
+        assert fresh.rate == 1.2
+    print("✅ Succès: remontée jusqu'au plafond appris, puis additive jusqu'à max_rate")
+
+
+async def _blocked_until_retry_after(clock: FakeClock, host: str):
+    bucket = get_bucket(host)
+    observe(host, 429, {"Retry-After": "7"})
+    assert bucket.blocked_until == clock.now + 7
+    waiter = asyncio.create_task(bucket.acquire())
+    await _settle()
+    assert not waiter.done()
+
+    clock.advance(6.9)
+    bucket._dispatch()
+    await _settle()
+    assert not waiter.done()  # pas avant l'échéance, même avec des jetons
+
+    clock.advance(1 / bucket.rate)
+    bucket._dispatch()
+    await _settle()
+    assert waiter.done()
+
+
+def test_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after(" 2.5 ") == 2.5
+    assert parse_retry_after("-3") == 0.0
+    assert parse_retry_after("99999") == MAX_RETRY_AFTER_SECONDS
+    assert parse_retry_after(None) is None and parse_retry_after("") is None
+    assert parse_retry_after("soon") is None
+
+    in_30s = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 28 <= parse_retry_after(in_30s) <= 30
+    past = format_datetime(datetime.now(timezone.utc) - timedelta(hours=1), usegmt=True)
+    assert parse_retry_after(past) == 0.0
+    far = format_datetime(datetime.now(timezone.utc) + timedelta(days=1), usegmt=True)
+    assert parse_retry_after(far) == MAX_RETRY_AFTER_SECONDS
+
+    with FakeClock() as clock:
+        asyncio.run(_blocked_until_retry_after(clock, "test.retry-after"))
+
+        bucket = get_bucket("https://test.http-date/pools?x=1")
+        observe("https://test.http-date/pools", 429, {"Retry-After": in_30s})
+        assert 28 <= bucket.blocked_until - clock.now <= 30
+
+        bucket = get_bucket("test.503")
+        observe("test.503", 503)
+        assert bucket.stats["throttled"] == 0
+        observe("test.503", 503, {"Retry-After": "4"})
+        assert bucket.stats["throttled"] == 1 and bucket.blocked_until == clock.now + 4
+    print("✅ Retry-After (secondes et date HTTP): hôte bloqué jusqu'à l'échéance")
+
+
+async def _priority_order(clock: FakeClock):
+    bucket = HostBucket("test.priority", rate=1.0, burst=1, max_rate=1.0)
+    await bucket.acquire()  # bucket vide
+    order = []
+
+    async def request(name, priority):
+        await bucket.acquire(priority)
+        order.append(name)
+
+    low = asyncio.create_task(request("low", PRIORITY_LOW))
+    await _settle()
+    high = asyncio.create_task(request("high", PRIORITY_HIGH))
+    await _settle()
+    assert bucket.snapshot()["waiting"] == 2
+
+    clock.advance(1.0)  # un seul jeton disponible
+    bucket._dispatch()
+    await _settle()
+    assert order == ["high"] and not low.done()
+
+    clock.advance(1.0)
+    bucket._dispatch()
+    await asyncio.gather(low, high)
+    assert order == ["high", "low"]
+    assert bucket.stats["queued"] == 2 and bucket.stats["granted"] == 3
+
+
+def test_priority_queue():
+    with FakeClock() as clock:
+        asyncio.run(_priority_order(clock))
+    print("✅ File par priorité: PRIORITY_HIGH servie avant une PRIORITY_LOW déjà en attente")
+
+
+if __name__ == "__main__":
+    test_throttle_halves_rate()
+    test_additive_recovery()
+    test_retry_after()
+    test_priority_queue()
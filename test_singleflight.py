@@ -0,0 +1,111 @@
+# test_singleflight.py
+"""
+Tests de la coalescence des requêtes concurrentes (singleflight).
+
+Tests:
+1. N appelants concurrents d'une même clé: un seul appel de fn, même
+   résultat pour tous, clé libérée ensuite (nouvel appel = nouveau fetch);
+   l'annulation d'un appelant n'annule pas le fetch partagé
+2. Échec de fn: tous les appelants reçoivent la même exception, clé
+   libérée, l'appel suivant relance fn
+3. Clés distinctes: un fetch par clé, stats par namespace
+
+Usage:
+    SAVE_LOGS=false LOG_LEVEL=ERROR python test_singleflight.py
+"""
+import asyncio
+
+from singleflight import get_singleflight_stats, inflight_count, singleflight
+
+N = 20
+
+
+def _fetcher(result=None, error=None):
+    """fn comptant ses appels, bloquée jusqu'à release.set()."""
+    state = {"calls": 0, "release": asyncio.Event()}
+
+    async def fn():
+        state["calls"] += 1
+        await state["release"].wait()
+        if error is not None:
+            raise error
+        return result
+
+    return fn, state
+
+
+async def _settle():
+    """Laisse tourner les appelants puis la tâche de fetch qu'ils ont créée."""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+async def _concurrent_callers():
+    result = {"pools": [1, 2, 3]}
+    fn, state = _fetcher(result)
+    callers = [asyncio.create_task(singleflight("test_ok:key", fn)) for _ in range(N)]
+    await _settle()
+    assert inflight_count() == 1 and state["calls"] == 1
+
+    callers[0].cancel()  # un appelant abandonne: les autres attendent toujours
+    await _settle()
+    state["release"].set()
+    results = await asyncio.gather(*callers[1:])
+    assert all(r is result for r in results)
+    assert callers[0].cancelled()
+    assert state["calls"] == 1 and inflight_count() == 0
+
+    # Clé libérée: un nouvel appel relance fn
+    fn2, state2 = _fetcher("fresh")
+    state2["release"].set()
+    assert await singleflight("test_ok:key", fn2) == "fresh" and state2["calls"] == 1
+
+
+def test_concurrent_callers_share_one_call():
+    asyncio.run(_concurrent_callers())
+    stats = get_singleflight_stats()["test_ok"]
+    assert stats == {"calls": N + 1, "fetches": 2, "deduplicated": N - 1}
+    print(f"✅ {N} appelants concurrents: 1 appel, même résultat, clé libérée ensuite")
+
+
+async def _failure_propagates():
+    error = ValueError("upstream 500")
+    fn, state = _fetcher(error=error)
+    callers = [asyncio.create_task(singleflight("test_fail:key", fn)) for _ in range(N)]
+    await _settle()
+    state["release"].set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+    assert all(r is error for r in results)
+    assert state["calls"] == 1 and inflight_count() == 0
+
+    fn2, state2 = _fetcher("recovered")
+    state2["release"].set()
+    assert await singleflight("test_fail:key", fn2) == "recovered"
+
+
+def test_failure_reaches_every_caller():
+    asyncio.run(_failure_propagates())
+    print(f"✅ Échec: la même exception pour les {N} appelants, clé libérée, nouvel essai possible")
+
+
+async def _distinct_keys():
+    fns = {key: _fetcher(key) for key in ("test_keys:a", "test_keys:b")}
+    callers = [asyncio.create_task(singleflight(key, fns[key][0])) for key in fns for _ in range(3)]
+    await _settle()
+    assert inflight_count() == 2
+    for _, state in fns.values():
+        state["release"].set()
+    assert await asyncio.gather(*callers) == ["test_keys:a"] * 3 + ["test_keys:b"] * 3
+    assert all(state["calls"] == 1 for _, state in fns.values())
+
+
+def test_distinct_keys():
+    asyncio.run(_distinct_keys())
+    assert get_singleflight_stats()["test_keys"] == {"calls": 6, "fetches": 2, "deduplicated": 4}
+    print("✅ Clés distinctes: un fetch par clé, stats par namespace")
+
+
+if __name__ == "__main__":
+    test_concurrent_callers_share_one_call()
+    test_failure_reaches_every_caller()
+    test_distinct_keys()
@@ -8,13 +8,13 @@ Tests:
 3. Rendu du message Telegram (format texte, sans envoi)
 """
 import asyncio
-import aiohttp
 import json
 from arbitrage import compute_spread_and_metrics
 from pool_fetchers import fetch_all_pools
 from pool_prices import get_pool_prices_for_token
 from telegram_bot import send_opportunity
 from utils import logger
+from http_transport import create_session
 
 # Token de test (SOL)
 TEST_TOKEN = "So11111111111111111111111111111111111111112"
@@ -26,7 +26,7 @@ async def test_fetch_pools():
     print("TEST 1: Fetch pools depuis tous les DEX")
     print("="*70)
     
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         pools = await fetch_all_pools(session)
         
         total = sum(len(p) for p in pools.values())
@@ -43,7 +43,7 @@ async def test_get_pool_prices():
     print(f"TEST 2: Pools pour token {TEST_TOKEN[:8]}...")
     print("="*70)
     
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         pools = await get_pool_prices_for_token(session, TEST_TOKEN, BASE_TOKEN)
         
         print(f"✅ {len(pools)} pools trouvées pour le token")
@@ -66,7 +66,7 @@ async def test_compute_spread():
     print(f"TEST 3: Calcul spread d'arbitrage pour {TEST_TOKEN[:8]}...")
     print("="*70)
     
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         result = await compute_spread_and_metrics(
             session, 
             TEST_TOKEN, 
@@ -115,7 +115,7 @@ async def test_telegram_message_format():
     print("TEST 4: Format message Telegram (rendu texte)")
     print("="*70)
     
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         result = await compute_spread_and_metrics(
             session, 
             TEST_TOKEN, 
@@ -0,0 +1,163 @@
+# test_snapshot_persistence.py
+"""
+Tests du snapshot disque des pools (snapshot_persistence): aller-retour
+save_pool_snapshot / load_pool_snapshot.
+
+Tests:
+1. Aller-retour: section PoolTable et section liste de dicts, prix None,
+   colonne mixte int/float (relue en float), champ composite (repli JSON),
+   booléens et entiers nullables, chaînes non-ASCII; "stale": True ajouté
+   au chargement (et seulement si mark_stale)
+2. Fichier rejeté (None): tronqué, autre version de format, mauvais magic,
+   absent
+3. Démarrage à chaud Base: pools stale servies tout de suite, échec de la
+   revalidation en tâche de fond logué (pas d'exception jamais lue)
+
+Usage:
+    SAVE_LOGS=false LOG_LEVEL=ERROR python test_snapshot_persistence.py
+"""
+import asyncio
+import logging
+import os
+import struct
+import tempfile
+
+import pool_fetchers
+from pool_table import PoolTable
+from snapshot_persistence import _HEADER, FORMAT_VERSION, MAGIC, load_pool_snapshot, save_pool_snapshot
+from utils import logger
+
+SOL = "So11111111111111111111111111111111111111112"
+USDC = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+
+
+def build_sections():
+    table = PoolTable.from_dicts([
+        {"pool_id": "R1", "dex": "raydium", "token_a": SOL, "token_b": USDC, "pool_type": "CLMM",
+         "price": 150.25, "liquidity_usd": 2.5e6, "fee_pct": 0.0025, "fee_bps": 25},
+        {"pool_id": "R2", "dex": "raydium", "token_a": USDC, "token_b": SOL, "pool_type": "CLMM",
+         "price": None, "liquidity_usd": 1.0e4, "fee_pct": 0.0001, "fee_bps": 1},
+    ])
+    base_pools = [
+        {"pool_id": "0xabc", "dex": "aerodrome", "token_a": "0xweth", "token_b": "0xusdc",
+         "price": 3000.5, "liquidity_usd": 5000, "fee_bps": 30, "stable": False,
+         "rewards": [{"token": "0xaero", "apr": 0.12}], "tick_spacing": 100, "name": "WETH/USDC ✓"},
+        {"pool_id": "0xdef", "dex": "uniswap_v3", "token_a": "0xweth", "token_b": "0xdai",
+         "price": None, "liquidity_usd": 12345.75, "fee_bps": 5, "stable": None,
+         "rewards": None, "tick_spacing": None, "name": None},
+        {"pool_id": "0x123", "dex": "aerodrome", "token_a": "0xdai", "token_b": "0xusdc",
+         "price": 1.0001, "liquidity_usd": 7, "fee_bps": 1, "stable": True,
+         "rewards": {"nested": [1, 2.5, None]}, "tick_spacing": 1, "name": "DAI/USDC"},
+    ]
+    return {
+        "solana/raydium": {"updated_at": 1_700_000_000.5, "pools": table},
+        "base/pools": {"updated_at": 1_700_000_100.0, "pools": base_pools},
+        "solana/empty": {"updated_at": 0.0, "pools": []},
+    }
+
+
+def _expected(pools, stale: bool):
+    out = []
+    for pool in pools:
+        pool = {key: value for key, value in dict(pool).items() if key != "stale"}
+        out.append({**pool, "stale": True} if stale else pool)
+    return out
+
+
+def test_round_trip():
+    sections = build_sections()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "snapshot.bin")
+        assert save_pool_snapshot(sections, path) == os.path.getsize(path) > 0
+        for stale in (True, False):
+            loaded = load_pool_snapshot(path, mark_stale=stale)
+            assert set(loaded) == set(sections)
+            for name, section in sections.items():
+                assert loaded[name]["updated_at"] == section["updated_at"]
+                assert loaded[name]["pools"] == _expected(section["pools"], stale), (name, stale)
+
+        loaded = load_pool_snapshot(path)
+        raydium, base = loaded["solana/raydium"]["pools"], loaded["base/pools"]["pools"]
+        assert raydium[1]["price"] is None and base[1]["price"] is None
+        # Colonne mixte int/float: relue en float, valeurs exactes
+        assert [p["liquidity_usd"] for p in base] == [5000.0, 12345.75, 7.0]
+        assert all(type(p["liquidity_usd"]) is float for p in base)
+        assert base[0]["rewards"] == [{"token": "0xaero", "apr": 0.12}] and base[1]["rewards"] is None
+        assert [p["stable"] for p in base] == [False, None, True]
+        assert [p["tick_spacing"] for p in base] == [100, None, 1]
+        assert all(p["stale"] is True for p in raydium + base)
+    print("✅ Aller-retour: PoolTable + dicts, None, int/float, JSON, stale")
+
+
+def test_rejects_bad_files():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "snapshot.bin")
+        save_pool_snapshot(build_sections(), path)
+        with open(path, "rb") as f:
+            data = f.read()
+
+        def load(content: bytes):
+            with open(path, "wb") as f:
+                f.write(content)
+            return load_pool_snapshot(path)
+
+        assert load(data) is not None
+        for cut in (4, _HEADER.size + 3, len(data) // 2, len(data) - 1):
+            assert load(data[:cut]) is None, cut
+        magic, version, flags, meta_len = _HEADER.unpack_from(data, 0)
+        assert (magic, version) == (MAGIC, FORMAT_VERSION)
+        assert load(_HEADER.pack(MAGIC, FORMAT_VERSION + 1, flags, meta_len) + data[_HEADER.size:]) is None
+        assert load(struct.pack("<8s", b"NOTSNAP\x00") + data[8:]) is None
+        os.unlink(path)
+        assert load_pool_snapshot(path) is None
+    print("✅ Fichiers tronqués, autre version, mauvais magic ou absents: rejetés (None)")
+
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+async def _stale_base_revalidation_fails():
+    async def failing_cascade(tokens, session):
+        raise RuntimeError("subgraph down")
+
+    stale_pools = build_sections()["base/pools"]["pools"]
+    pool_fetchers._base_cache.update({"timestamp": 0.0, "data": stale_pools, "stale": True})
+    pool_fetchers._fetch_base_pools_uncached = failing_cascade
+    assert await pool_fetchers.fetch_base_pools(["0xweth"], session=None) == stale_pools
+    task = pool_fetchers._base_revalidation
+    await asyncio.gather(task, return_exceptions=True)
+    await asyncio.sleep(0)  # done-callbacks
+    return task
+
+
+def test_stale_base_revalidation_failure_logged():
+    records = _Records()
+    original_cascade = pool_fetchers._fetch_base_pools_uncached
+    original_cache = dict(pool_fetchers._base_cache)
+    original_level = logger.level
+    logger.addHandler(records)
+    logger.setLevel(logging.WARNING)
+    try:
+        task = asyncio.run(_stale_base_revalidation_fails())
+    finally:
+        logger.removeHandler(records)
+        logger.setLevel(original_level)
+        pool_fetchers._fetch_base_pools_uncached = original_cascade
+        pool_fetchers._base_cache.clear()
+        pool_fetchers._base_cache.update(original_cache)
+        pool_fetchers._base_revalidation = None
+    assert isinstance(task.exception(), RuntimeError)
+    assert any("revalidation failed" in m and "subgraph down" in m for m in records.messages), records.messages
+    print("✅ Snapshot Base stale servi, échec de la revalidation en fond logué")
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_rejects_bad_files()
+    test_stale_base_revalidation_failure_logged()
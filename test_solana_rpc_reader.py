@@ -0,0 +1,320 @@
+# test_solana_rpc_reader.py
+"""
+Tests du lecteur on-chain (solana_rpc_reader) contre un faux nœud JSON-RPC
+local qui sert des comptes enregistrés (blobs construits selon les layouts
+Whirlpool, Raydium CLMM/AMM v4, Meteora DLMM, mint et compte token SPL).
+
+Tests:
+1. Décodage des 4 layouts -> enregistrements au format pool_fetchers;
+   frais DLMM avec un base_fee_power_factor non nul
+2. Lots getMultipleAccounts de 100 comptes max, comptes absents omis
+3. Surcouche on-chain des pools REST (pool_fetchers.overlay_onchain_pools)
+
+Usage:
+    SAVE_LOGS=false python test_solana_rpc_reader.py
+"""
+import asyncio
+import base64
+import hashlib
+import math
+import struct
+
+from aiohttp import web
+
+import solana_rpc_reader as rpc
+from http_transport import create_session
+from pool_table import PoolTable
+
+SOL = "So11111111111111111111111111111111111111112"
+USDC = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+TOKEN_PROGRAM = "TokenkegQfeZyiNwAJbNbGkPFXZyuhZ8BJhK7x6p6VjZ"
+
+
+def key(label: str) -> str:
+    return rpc.b58encode(hashlib.sha256(label.encode()).digest())
+
+
+def _put_key(buf: bytearray, offset: int, pubkey: str):
+    raw = rpc.b58decode(pubkey)
+    buf[offset:offset + 32] = raw.rjust(32, b"\0")
+
+
+def mint_blob(decimals: int) -> bytes:
+    buf = bytearray(82)
+    buf[44] = decimals
+    return bytes(buf)
+
+
+def token_account_blob(mint: str, amount: int) -> bytes:
+    buf = bytearray(165)
+    _put_key(buf, 0, mint)
+    struct.pack_into("<Q", buf, 64, amount)
+    return bytes(buf)
+
+
+def whirlpool_blob(mint_a, vault_a, mint_b, vault_b, raw_price, fee_rate) -> bytes:
+    buf = bytearray(rpc.WHIRLPOOL_SIZE)
+    buf[:8] = rpc.WHIRLPOOL_DISCRIMINATOR
+    struct.pack_into("<H", buf, 45, fee_rate)
+    buf[65:81] = int(math.sqrt(raw_price) * 2 ** 64).to_bytes(16, "little")
+    _put_key(buf, 101, mint_a)
+    _put_key(buf, 133, vault_a)
+    _put_key(buf, 181, mint_b)
+    _put_key(buf, 213, vault_b)
+    return bytes(buf)
+
+
+def clmm_blob(config, mint_0, mint_1, vault_0, vault_1, dec_0, dec_1, raw_price) -> bytes:
+    buf = bytearray(1544)
+    buf[:8] = rpc.RAYDIUM_CLMM_DISCRIMINATOR
+    _put_key(buf, 9, config)
+    _put_key(buf, 73, mint_0)
+    _put_key(buf, 105, mint_1)
+    _put_key(buf, 137, vault_0)
+    _put_key(buf, 169, vault_1)
+    buf[233], buf[234] = dec_0, dec_1
+    buf[253:269] = int(math.sqrt(raw_price) * 2 ** 64).to_bytes(16, "little")
+    return bytes(buf)
+
+
+def amm_config_blob(trade_fee_rate: int) -> bytes:
+    buf = bytearray(117)
+    buf[:8] = rpc.RAYDIUM_AMM_CONFIG_DISCRIMINATOR
+    struct.pack_into("<I", buf, 47, trade_fee_rate)
+    return bytes(buf)
+
+
+def amm_v4_blob(base_mint, quote_mint, base_vault, quote_vault, base_dec, quote_dec,
+                base_pnl=0, quote_pnl=0) -> bytes:
+    buf = bytearray(rpc.RAYDIUM_AMM_V4_SIZE)
+    header = [0] * 32
+    header[4], header[5] = base_dec, quote_dec
+    header[22], header[23] = 25, 10000
+    header[24], header[25] = base_pnl, quote_pnl
+    struct.pack_into("<32Q", buf, 0, *header)
+    _put_key(buf, 336, base_vault)
+    _put_key(buf, 368, quote_vault)
+    _put_key(buf, 400, base_mint)
+    _put_key(buf, 432, quote_mint)
+    return bytes(buf)
+
+
+def dlmm_blob(mint_x, mint_y, reserve_x, reserve_y, active_id, bin_step, base_factor,
+              base_fee_power_factor=0) -> bytes:
+    buf = bytearray(904)
+    buf[:8] = rpc.METEORA_DLMM_DISCRIMINATOR
+    # StaticParameters: base_factor, filter_period, decay_period, reduction_factor (u16),
+    # variable_fee_control, max_volatility_accumulator (u32), min/max_bin_id (i32),
+    # protocol_share (u16), base_fee_power_factor (u8), padding [u8; 5]
+    struct.pack_into("<4H2I2iHB", buf, 8, base_factor, 30, 600, 5000, 40000, 350000,
+                     -443636, 443636, 2000, base_fee_power_factor)
+    struct.pack_into("<iH", buf, 76, active_id, bin_step)
+    _put_key(buf, 88, mint_x)
+    _put_key(buf, 120, mint_y)
+    _put_key(buf, 152, reserve_x)
+    _put_key(buf, 184, reserve_y)
+    return bytes(buf)
+
+
+# ============================================================================
+# COMPTES ENREGISTRÉS
+# ============================================================================
+BONK = key("bonk-mint")
+WP, WP_VA, WP_VB = key("wp"), key("wp-va"), key("wp-vb")
+CLMM, CLMM_CFG, CLMM_V0, CLMM_V1 = key("clmm"), key("clmm-cfg"), key("clmm-v0"), key("clmm-v1")
+AMM, AMM_VB, AMM_VQ = key("amm"), key("amm-vb"), key("amm-vq")
+DLMM, DLMM_RX, DLMM_RY = key("dlmm"), key("dlmm-rx"), key("dlmm-ry")
+FOREIGN = key("foreign")
+
+SOL_USD = 150.0
+DLMM_ACTIVE_ID, DLMM_BIN_STEP = -3200, 10  # ~4.1e-6 SOL par BONK
+
+ACCOUNTS = {
+    SOL: (TOKEN_PROGRAM, mint_blob(9)),
+    USDC: (TOKEN_PROGRAM, mint_blob(6)),
+    BONK: (TOKEN_PROGRAM, mint_blob(5)),
+    # Whirlpool SOL/USDC à 150 USDC, fee 0.04%
+    WP: (rpc.WHIRLPOOL_PROGRAM_ID, whirlpool_blob(SOL, WP_VA, USDC, WP_VB, SOL_USD * 10 ** (6 - 9), 400)),
+    WP_VA: (TOKEN_PROGRAM, token_account_blob(SOL, 1_000 * 10 ** 9)),
+    WP_VB: (TOKEN_PROGRAM, token_account_blob(USDC, 150_000 * 10 ** 6)),
+    # CLMM SOL/USDC à 151, fee 0.25% via AmmConfig
+    CLMM: (rpc.RAYDIUM_CLMM_PROGRAM_ID, clmm_blob(CLMM_CFG, SOL, USDC, CLMM_V0, CLMM_V1, 9, 6, 151.0 * 10 ** (6 - 9))),
+    CLMM_CFG: (rpc.RAYDIUM_CLMM_PROGRAM_ID, amm_config_blob(2500)),
+    CLMM_V0: (TOKEN_PROGRAM, token_account_blob(SOL, 10 * 10 ** 9)),
+    CLMM_V1: (TOKEN_PROGRAM, token_account_blob(USDC, 1_510 * 10 ** 6)),
+    # AMM v4 BONK/SOL: 2e9 BONK (+1e9 de PnL à prélever) contre 40 SOL
+    AMM: (rpc.RAYDIUM_AMM_V4_PROGRAM_ID, amm_v4_blob(BONK, SOL, AMM_VB, AMM_VQ, 5, 9, base_pnl=10 ** 14)),
+    AMM_VB: (TOKEN_PROGRAM, token_account_blob(BONK, 3 * 10 ** 14)),
+    AMM_VQ: (TOKEN_PROGRAM, token_account_blob(SOL, 40 * 10 ** 9)),
+    # DLMM BONK/SOL
+    DLMM: (rpc.METEORA_DLMM_PROGRAM_ID, dlmm_blob(BONK, SOL, DLMM_RX, DLMM_RY, DLMM_ACTIVE_ID, DLMM_BIN_STEP, 10000)),
+    DLMM_RX: (TOKEN_PROGRAM, token_account_blob(BONK, 10 ** 14)),
+    DLMM_RY: (TOKEN_PROGRAM, token_account_blob(SOL, 20 * 10 ** 9)),
+    # Compte d'un programme inconnu: ignoré
+    FOREIGN: ("11111111111111111111111111111111", b"\0" * 64),
+}
+
+
+async def start_rpc_stand_in(accounts):
+    """Faux nœud: getMultipleAccounts en base64, taille de chaque appel enregistrée."""
+    calls = []
+
+    async def handler(request):
+        body = await request.json()
+        keys, options = body["params"]
+        assert body["method"] == "getMultipleAccounts"
+        assert options["encoding"] == "base64"
+        if len(keys) > rpc.MAX_ACCOUNTS_PER_CALL:
+            return web.json_response({"jsonrpc": "2.0", "id": body["id"], "error": {"code": -32602, "message": "too many"}})
+        calls.append(len(keys))
+        value = []
+        for k in keys:
+            if k not in accounts:
+                value.append(None)
+                continue
+            owner, data = accounts[k]
+            value.append({
+                "data": [base64.b64encode(data).decode(), "base64"],
+                "owner": owner,
+                "lamports": 1,
+                "executable": False,
+                "rentEpoch": 0,
+            })
+        return web.json_response({"jsonrpc": "2.0", "id": body["id"], "result": {"context": {"slot": 250_000_000}, "value": value}})
+
+    app = web.Application()
+    app.router.add_post("/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/", calls
+
+
+def _close(a, b, rel=1e-6):
+    return abs(a - b) <= rel * max(abs(a), abs(b))
+
+
+def _reset_caches():
+    rpc._mint_decimals.clear()
+    rpc._fee_configs.clear()
+
+
+async def _check_layouts():
+    _reset_caches()
+    runner, url, calls = await start_rpc_stand_in(ACCOUNTS)
+    try:
+        async with create_session() as session:
+            records = await rpc.read_pools(session, [WP, CLMM, AMM, DLMM, FOREIGN], {SOL: SOL_USD}, rpc_url=url)
+    finally:
+        await runner.cleanup()
+
+    by_id = {r["pool_id"]: r for r in records}
+    assert [r["pool_id"] for r in records] == [WP, CLMM, AMM, DLMM]
+    for record in records:
+        assert record["source"] == "rpc" and record["slot"] == 250_000_000
+        assert set(("pool_id", "dex", "token_a", "token_b", "price", "liquidity_usd",
+                    "fee_bps", "fee_pct", "pool_type")) <= set(record)
+
+    wp = by_id[WP]
+    assert (wp["dex"], wp["pool_type"], wp["token_a"], wp["token_b"]) == ("orca", "Whirlpool", SOL, USDC)
+    assert _close(wp["price"], 150.0) and wp["fee_bps"] == 4
+    assert _close(wp["liquidity_usd"], 300_000.0)
+
+    clmm = by_id[CLMM]
+    assert (clmm["dex"], clmm["pool_type"]) == ("raydium", "CLMM")
+    assert _close(clmm["price"], 151.0) and clmm["fee_bps"] == 25 and clmm["fee_pct"] == 0.0025
+
+    amm = by_id[AMM]
+    assert (amm["pool_type"], amm["token_a"], amm["token_b"]) == ("AMM", BONK, SOL)
+    # Réserves nettes: 2e9 BONK contre 40 SOL
+    assert _close(amm["price"], 40 / 2e9) and amm["fee_bps"] == 25
+    assert _close(amm["liquidity_usd"], 2 * 40 * SOL_USD)
+
+    dlmm = by_id[DLMM]
+    expected = (1 + DLMM_BIN_STEP / 10_000) ** DLMM_ACTIVE_ID * 10 ** (5 - 9)
+    assert (dlmm["dex"], dlmm["pool_type"]) == ("meteora", "DLMM")
+    assert _close(dlmm["price"], expected)
+    assert dlmm["fee_bps"] == 10  # base_factor 10000 x bin_step 10 -> 0.1%
+
+    # Un lot pour les pools, un pour vaults + mints + AmmConfig
+    assert calls == [5, 12], calls
+    print(f"✅ 4 layouts décodés (WP {wp['price']:.2f}, CLMM {clmm['price']:.2f}, AMM {amm['price']:.3e}, DLMM {dlmm['price']:.3e})")
+
+
+async def _check_batches():
+    _reset_caches()
+    accounts = dict(ACCOUNTS)
+    pool_ids = [WP] + [key(f"missing-{i}") for i in range(249)]
+    runner, url, calls = await start_rpc_stand_in(accounts)
+    try:
+        async with create_session() as session:
+            records = await rpc.read_pools(session, pool_ids, rpc_url=url)
+    finally:
+        await runner.cleanup()
+    assert [r["pool_id"] for r in records] == [WP]
+    # 250 pools -> 100 + 100 + 50, puis 2 vaults + 2 mints
+    assert sorted(calls[:3]) == [50, 100, 100] and calls[3:] == [4], calls
+    print(f"✅ Lots getMultipleAccounts: {calls}")
+
+
+async def _check_overlay():
+    import pool_fetchers
+
+    rest = {
+        "orca": PoolTable.from_dicts([{
+            "pool_id": WP, "dex": "orca", "token_a": SOL, "token_b": USDC, "price": 140.0,
+            "liquidity_usd": 1.0, "fee_bps": 4, "fee_pct": 0.0004, "pool_type": "Whirlpool",
+        }]),
+        "meteora": PoolTable.from_dicts([{
+            "pool_id": DLMM, "dex": "meteora", "token_a": BONK, "token_b": SOL, "price": 1e-9,
+            "liquidity_usd": 12_345.0, "fee_bps": 10, "fee_pct": 0.001, "pool_type": "DLMM",
+        }]),
+        "lifinity": [],
+    }
+    runner, url, _ = await start_rpc_stand_in(ACCOUNTS)
+    original_url = rpc.SOLANA_RPC_URL
+    rpc.SOLANA_RPC_URL = url
+    try:
+        async with create_session() as session:
+            overlaid = await pool_fetchers.overlay_onchain_pools(session, rest, [BONK])
+    finally:
+        rpc.SOLANA_RPC_URL = original_url
+        await runner.cleanup()
+
+    # Seule la paire demandée (BONK/SOL) est relue
+    assert overlaid["orca"] is rest["orca"]
+    row = overlaid["meteora"][0]
+    assert row["source"] == "rpc" and not _close(row["price"], 1e-9)
+    # Sans prix USD pour BONK ni SOL: liquidité REST conservée
+    assert row["liquidity_usd"] == 12_345.0
+    print("✅ Surcouche on-chain appliquée aux pools de la paire surveillée")
+
+
+def test_decode_layouts():
+    asyncio.run(_check_layouts())
+
+
+def test_dlmm_fee_power_factor():
+    for power, base_factor, expected in ((0, 10000, 0.001), (1, 5000, 0.005), (2, 800, 0.008)):
+        blob = dlmm_blob(BONK, SOL, DLMM_RX, DLMM_RY, DLMM_ACTIVE_ID, DLMM_BIN_STEP, base_factor, power)
+        record = rpc.decode_meteora_dlmm(DLMM, blob)
+        assert _close(record["fee"], expected), (power, record["fee"])
+        assert (record["active_id"], record["bin_step"]) == (DLMM_ACTIVE_ID, DLMM_BIN_STEP)
+    print("✅ DLMM: base_fee_power_factor lu dans StaticParameters (frais x 10^power)")
+
+
+def test_get_multiple_accounts_batches():
+    asyncio.run(_check_batches())
+
+
+def test_onchain_overlay():
+    asyncio.run(_check_overlay())
+
+
+if __name__ == "__main__":
+    test_decode_layouts()
+    test_dlmm_fee_power_factor()
+    test_get_multiple_accounts_batches()
+    test_onchain_overlay()
@@ -0,0 +1,230 @@
+# test_solana_ws_stream.py
+"""
+Tests du streaming accountSubscribe (solana_ws_stream) contre un faux nœud
+local: JSON-RPC HTTP (getMultipleAccounts, comptes de test_solana_rpc_reader)
+et WebSocket (accountSubscribe / accountUnsubscribe / accountNotification).
+
+Tests:
+1. Notification d'une pool -> ligne réécrite en place dans le snapshot,
+   on_update reçoit les seuls tokens de cette pool; slot ancien ignoré
+2. Coupure du WebSocket -> reconnexion, relecture RPC, réabonnement
+
+Usage:
+    SAVE_LOGS=false python test_solana_ws_stream.py
+"""
+import asyncio
+import base64
+import itertools
+
+from aiohttp import WSMsgType, web
+
+import pool_fetchers
+import solana_rpc_reader as rpc
+import solana_ws_stream
+from http_transport import create_session
+from pool_table import PoolTable
+from test_solana_rpc_reader import (
+    ACCOUNTS,
+    BONK,
+    DLMM,
+    DLMM_RX,
+    DLMM_RY,
+    SOL,
+    SOL_USD,
+    TOKEN_PROGRAM,
+    USDC,
+    WP,
+    WP_VA,
+    WP_VB,
+    token_account_blob,
+    whirlpool_blob,
+)
+
+SLOT = 250_000_000
+
+
+async def start_node_stand_in(accounts):
+    """Faux nœud: POST / (getMultipleAccounts) et GET /ws (abonnements)."""
+    node = {"rpc_calls": 0, "sockets": [], "subscriptions": {}, "unsubscribed": []}
+    sub_ids = itertools.count(100)
+
+    async def rpc_handler(request):
+        body = await request.json()
+        keys = body["params"][0]
+        node["rpc_calls"] += 1
+        value = []
+        for k in keys:
+            if k not in accounts:
+                value.append(None)
+                continue
+            owner, data = accounts[k]
+            value.append({"data": [base64.b64encode(data).decode(), "base64"], "owner": owner})
+        return web.json_response({"jsonrpc": "2.0", "id": body["id"], "result": {"context": {"slot": SLOT}, "value": value}})
+
+    async def ws_handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        node["sockets"].append(ws)
+        node["subscriptions"] = {}
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            body = msg.json()
+            if body["method"] == "accountSubscribe":
+                assert body["params"][1]["encoding"] == "base64"
+                sub_id = next(sub_ids)
+                node["subscriptions"][body["params"][0]] = sub_id
+                await ws.send_json({"jsonrpc": "2.0", "id": body["id"], "result": sub_id})
+            elif body["method"] == "accountUnsubscribe":
+                node["unsubscribed"].append(body["params"][0])
+                await ws.send_json({"jsonrpc": "2.0", "id": body["id"], "result": True})
+        return ws
+
+    app = web.Application()
+    app.router.add_post("/", rpc_handler)
+    app.router.add_get("/ws", ws_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/", f"ws://127.0.0.1:{port}/ws", node
+
+
+async def notify(node, account_key, owner, data, slot):
+    """Pousse une accountNotification sur la connexion courante."""
+    await node["sockets"][-1].send_json({
+        "jsonrpc": "2.0",
+        "method": "accountNotification",
+        "params": {
+            "subscription": node["subscriptions"][account_key],
+            "result": {
+                "context": {"slot": slot},
+                "value": {"data": [base64.b64encode(data).decode(), "base64"], "owner": owner},
+            },
+        },
+    })
+
+
+async def wait_until(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timeout"
+        await asyncio.sleep(0.01)
+
+
+def _rest_snapshot():
+    return {
+        "orca": PoolTable.from_dicts([{
+            "pool_id": WP, "dex": "orca", "token_a": SOL, "token_b": USDC, "price": 140.0,
+            "liquidity_usd": 1.0, "fee_bps": 4, "fee_pct": 0.0004, "pool_type": "Whirlpool",
+        }]),
+        "meteora": PoolTable.from_dicts([{
+            "pool_id": DLMM, "dex": "meteora", "token_a": BONK, "token_b": SOL, "price": 1e-9,
+            "liquidity_usd": 12_345.0, "fee_bps": 10, "fee_pct": 0.001, "pool_type": "DLMM",
+        }]),
+    }
+
+
+def _reset(pools=None):
+    rpc._mint_decimals.clear()
+    rpc._fee_configs.clear()
+    pool_fetchers._onchain_latest.clear()
+    pool_fetchers._pool_locator_source = None
+    pool_fetchers._pools_cache = pools
+
+
+async def _start_stream(session, rpc_url, ws_url, updates):
+    stream = solana_ws_stream.PoolStream(session, updates.append, ws_url=ws_url, rpc_url=rpc_url)
+    stream.watch([WP, DLMM])
+    stream.start()
+    return stream
+
+
+async def _check_in_place_update():
+    _reset(_rest_snapshot())
+    runner, rpc_url, ws_url, node = await start_node_stand_in(dict(ACCOUNTS))
+    updates = []
+    try:
+        async with create_session() as session:
+            stream = await _start_stream(session, rpc_url, ws_url, updates)
+            # 2 pools + 4 vaults abonnés, état initial lu par RPC et publié
+            await wait_until(lambda: stream.snapshot()["subscribed"] == 6)
+            assert set(node["subscriptions"]) == {WP, WP_VA, WP_VB, DLMM, DLMM_RX, DLMM_RY}
+            table = pool_fetchers._pools_cache["orca"]
+            row = table[0]
+            assert abs(row["price"] - SOL_USD) < 1e-6
+            updates.clear()
+
+            # Swap sur la Whirlpool: nouveau prix 160
+            blob = whirlpool_blob(SOL, WP_VA, USDC, WP_VB, 160.0 * 10 ** (6 - 9), 400)
+            await notify(node, WP, rpc.WHIRLPOOL_PROGRAM_ID, blob, SLOT + 10)
+            await wait_until(lambda: updates)
+            assert updates == [{SOL, USDC}], updates
+            assert pool_fetchers._pools_cache["orca"] is table  # pas de reconstruction
+            assert abs(row["price"] - 160.0) < 1e-6 and row["slot"] == SLOT + 10
+
+            # Notification d'un slot plus ancien: ignorée
+            stale = whirlpool_blob(SOL, WP_VA, USDC, WP_VB, 120.0 * 10 ** (6 - 9), 400)
+            await notify(node, WP, rpc.WHIRLPOOL_PROGRAM_ID, stale, SLOT + 5)
+            await wait_until(lambda: stream.stats["stale"] == 1)
+            assert abs(row["price"] - 160.0) < 1e-6 and len(updates) == 1
+
+            # Vault de la DLMM: seuls BONK/SOL sont signalés
+            await notify(node, DLMM_RY, TOKEN_PROGRAM, token_account_blob(SOL, 30 * 10 ** 9), SLOT + 11)
+            await wait_until(lambda: len(updates) == 2)
+            assert updates[1] == {BONK, SOL}, updates
+
+            # Pool retirée: ses trois comptes sont désabonnés
+            stream.watch([WP])
+            await wait_until(lambda: len(node["unsubscribed"]) == 3)
+            await stream.stop()
+    finally:
+        await runner.cleanup()
+        _reset()
+    print("✅ Mise à jour en place, seuls les tokens de la pool signalés, notification ancienne ignorée")
+
+
+async def _check_reconnect():
+    _reset(_rest_snapshot())
+    solana_ws_stream.RECONNECT_MIN_SECONDS = 0.05
+    runner, rpc_url, ws_url, node = await start_node_stand_in(dict(ACCOUNTS))
+    updates = []
+    try:
+        async with create_session() as session:
+            stream = await _start_stream(session, rpc_url, ws_url, updates)
+            await wait_until(lambda: stream.snapshot()["subscribed"] == 6)
+            rpc_calls = node["rpc_calls"]
+
+            # Le nœud coupe la connexion
+            await node["sockets"][-1].close()
+            await wait_until(lambda: len(node["sockets"]) == 2 and len(node["subscriptions"]) == 6)
+            await wait_until(lambda: stream.snapshot()["subscribed"] == 6)
+            assert stream.stats["connects"] == 2 and stream.stats["disconnects"] == 1
+            assert node["rpc_calls"] > rpc_calls  # état relu après la coupure
+
+            # Les notifications de la nouvelle connexion sont appliquées
+            updates.clear()
+            blob = whirlpool_blob(SOL, WP_VA, USDC, WP_VB, 155.0 * 10 ** (6 - 9), 400)
+            await notify(node, WP, rpc.WHIRLPOOL_PROGRAM_ID, blob, SLOT + 20)
+            await wait_until(lambda: updates)
+            assert abs(pool_fetchers._pools_cache["orca"][0]["price"] - 155.0) < 1e-6
+            await stream.stop()
+    finally:
+        solana_ws_stream.RECONNECT_MIN_SECONDS = 1.0
+        await runner.cleanup()
+        _reset()
+    print("✅ Reconnexion, relecture RPC et réabonnement après coupure")
+
+
+def test_stream_updates_pool_in_place():
+    asyncio.run(_check_in_place_update())
+
+
+def test_stream_reconnects_and_resubscribes():
+    asyncio.run(_check_reconnect())
+
+
+if __name__ == "__main__":
+    test_stream_updates_pool_in_place()
+    test_stream_reconnects_and_resubscribes()
@@ -0,0 +1,133 @@
+# test_subgraph_batch.py
+"""
+Tests des requêtes subgraph groupées (thegraph_fetcher.get_pools_from_subgraph_batch)
+contre un faux endpoint GraphQL local qui résout les alias t0..tN.
+
+Tests:
+1. Même pool de plus grande TVL par token que get_pool_from_subgraph,
+   en une requête au lieu d'une par token
+2. Découpage en lots de SUBGRAPH_BATCH_TOKENS tokens
+
+Usage:
+    SAVE_LOGS=false python test_subgraph_batch.py
+"""
+import asyncio
+import re
+
+from aiohttp import web
+
+import thegraph_fetcher
+from http_transport import create_session
+
+USDC = "0x833589fcd6edb6e08f4c7c19962234ef8f82f18e"
+TOKENS = [f"0x{i:040x}" for i in range(1, 46)]
+
+
+def _pool(pid: int, token: str, tvl: float, sqrt_price: float) -> dict:
+    token0, token1 = sorted([token, USDC])
+    return {
+        "id": f"0xpool{pid:04d}",
+        "token0": {"id": token0, "decimals": "18" if token0 == token else "6"},
+        "token1": {"id": token1, "decimals": "18" if token1 == token else "6"},
+        "feeTier": "3000" if pid % 2 else "500",
+        "sqrtPrice": str(sqrt_price),
+        "liquidity": "1",
+        "totalValueLockedUSD": str(tvl),
+    }
+
+
+# Deux pools par token (TVL différentes), aucune pour les multiples de 7
+POOLS = []
+for n, token in enumerate(TOKENS):
+    if (n + 1) % 7 == 0:
+        continue
+    POOLS.append(_pool(2 * n, token, 1_000.0 * (n + 1), 2 ** 96 * 1e-6 * (n + 1)))
+    POOLS.append(_pool(2 * n + 1, token, 5_000.0 * (n + 1), 2 ** 96 * 1e-6 * (n + 2)))
+
+
+def _pair_pools(a: str, b: str) -> list:
+    pair = {a, b}
+    pools = [p for p in POOLS if {p["token0"]["id"], p["token1"]["id"]} <= pair]
+    return sorted(pools, key=lambda p: float(p["totalValueLockedUSD"]), reverse=True)[:20]
+
+
+async def start_graphql_stand_in():
+    requests = []
+
+    async def handler(request):
+        body = await request.json()
+        query, variables = body["query"], body["variables"]
+        requests.append(query)
+        if "BatchPools" in query:
+            aliases = re.findall(r"(t\d+): pools\(", query)
+            data = {alias: _pair_pools(variables[alias], variables["quote"]) for alias in aliases}
+        else:
+            data = {"pools": _pair_pools(variables["token0"], variables["token1"])}
+        return web.json_response({"data": data})
+
+    app = web.Application()
+    app.router.add_post("/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/", requests
+
+
+async def _check_batch_matches_per_token():
+    runner, url, requests = await start_graphql_stand_in()
+    original = thegraph_fetcher.SUBGRAPHS["base"]["uniswap_v3"]
+    thegraph_fetcher.SUBGRAPHS["base"]["uniswap_v3"] = url
+    tokens = TOKENS[:15]
+    try:
+        async with create_session() as session:
+            expected = {
+                token: await thegraph_fetcher.get_pool_from_subgraph(session, token, USDC, "uniswap_v3", "base")
+                for token in tokens
+            }
+            per_token_requests = len(requests)
+            requests.clear()
+            batched = await thegraph_fetcher.get_pools_from_subgraph_batch(session, tokens, USDC, "uniswap_v3", "base")
+    finally:
+        thegraph_fetcher.SUBGRAPHS["base"]["uniswap_v3"] = original
+        await runner.cleanup()
+
+    assert batched == expected, (batched, expected)
+    assert batched[TOKENS[6]] is None  # token sans pool
+    assert per_token_requests == 15 and len(requests) == 1, (per_token_requests, len(requests))
+    print(f"✅ Requête groupée: mêmes pools que {per_token_requests} requêtes par token, en 1 requête")
+
+
+async def _check_chunking():
+    runner, url, requests = await start_graphql_stand_in()
+    original = thegraph_fetcher.SUBGRAPHS["base"]["pancake_v3"]
+    thegraph_fetcher.SUBGRAPHS["base"]["pancake_v3"] = url
+    try:
+        async with create_session() as session:
+            batched = await thegraph_fetcher.get_pools_from_subgraph_batch(session, TOKENS, USDC, "pancake_v3", "base")
+    finally:
+        thegraph_fetcher.SUBGRAPHS["base"]["pancake_v3"] = original
+        await runner.cleanup()
+
+    sizes = sorted(len(re.findall(r"t\d+: pools\(", query)) for query in requests)
+    assert sizes == [5, 20, 20], sizes
+    assert set(batched) == set(TOKENS)
+    found = sum(1 for pool in batched.values() if pool)
+    assert found == len(TOKENS) - len(TOKENS) // 7
+    # Pool de plus grande TVL retenue
+    assert batched[TOKENS[0]]["pool_id"] == "0xpool0001"
+    print(f"✅ {len(TOKENS)} tokens en lots de {sizes}, {found} pools trouvées")
+
+
+def test_batch_matches_per_token_queries():
+    asyncio.run(_check_batch_matches_per_token())
+
+
+def test_batch_is_chunked():
+    asyncio.run(_check_chunking())
+
+
+if __name__ == "__main__":
+    test_batch_matches_per_token_queries()
+    test_batch_is_chunked()
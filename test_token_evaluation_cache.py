@@ -0,0 +1,158 @@
+# test_token_evaluation_cache.py
+"""
+Tests du cache d'évaluation par token (token_evaluation_cache) et de son
+usage dans la boucle principale (main.evaluate_token).
+
+Tests:
+1. Empreintes: cycle identique -> aucun token sale; prix, liquidité, frais,
+   flag stale ou ordre des pools modifiés -> seul ce token est sale; tokens
+   disparus oubliés; ratio de tokens sales par cycle dans les stats
+2. Expiration: résultat plus vieux que max_age_seconds -> token sale
+3. Boucle principale sur 3 cycles: find_pool_opportunities appelé pour les
+   seuls tokens sales, alertes envoyées depuis le cache identiques
+
+Usage:
+    SAVE_LOGS=false LOG_LEVEL=ERROR python test_token_evaluation_cache.py
+"""
+import asyncio
+import copy
+import random
+
+import main
+import token_evaluation_cache
+from arbitrage import find_pool_opportunities
+from token_evaluation_cache import TokenEvaluationCache
+
+
+def random_pools_by_token(rng: random.Random, n_tokens: int):
+    pools_by_token = {}
+    for t in range(n_tokens):
+        mid = rng.uniform(0.01, 100)
+        pools_by_token[f"TOKEN{t}"] = [
+            {
+                "pool_id": f"T{t}-{i}",
+                "dex": ["orca", "raydium", "meteora"][i % 3],
+                "buy_price": mid * (1 + rng.uniform(-0.02, 0.02)),
+                "sell_price": mid * (1 + rng.uniform(-0.02, 0.02)),
+                "liquidity_usd": rng.uniform(2e4, 2e6),
+                "fee_pct": 0.0025,
+                "fee_bps": 25,
+            }
+            for i in range(rng.randint(2, 6))
+        ]
+    return pools_by_token
+
+
+def _evaluate_all(cache, pools_by_token):
+    for token in cache.dirty_tokens(pools_by_token):
+        cache.store(token, pools_by_token[token], [])
+
+
+def test_fingerprint_changes():
+    cache = TokenEvaluationCache(max_age_seconds=3600)
+    pools_by_token = random_pools_by_token(random.Random(1), 20)
+    assert len(cache.dirty_tokens(pools_by_token)) == 20  # premier cycle: tout est sale
+    for token, pools in pools_by_token.items():
+        cache.store(token, pools, [{"token": token}])
+
+    # Nouveau snapshot, mêmes valeurs (nouveaux dicts)
+    assert cache.dirty_tokens(copy.deepcopy(pools_by_token)) == set()
+    assert cache.get("TOKEN3") == [{"token": "TOKEN3"}]
+
+    changes = {
+        "TOKEN0": ("buy_price", 1.5),
+        "TOKEN1": ("sell_price", 0.5),
+        "TOKEN2": ("liquidity_usd", 1.0),
+        "TOKEN3": ("fee_pct", 0.003),
+        "TOKEN4": ("fee_bps", 30),
+        "TOKEN5": ("stale", True),
+    }
+    updated = copy.deepcopy(pools_by_token)
+    for token, (key, value) in changes.items():
+        updated[token][0][key] = value
+    updated["TOKEN6"].reverse()
+    updated["TOKEN7"][0]["url"] = "https://example/other"  # hors empreinte
+    del updated["TOKEN19"]
+
+    dirty = cache.dirty_tokens(updated)
+    assert dirty == set(changes) | {"TOKEN6"}, dirty
+    assert cache.get("TOKEN19") is None
+    stats = cache.snapshot()
+    assert stats["last_dirty"] == 7 and stats["last_tokens"] == 19
+    assert abs(stats["last_dirty_ratio"] - 7 / 19) < 1e-12
+    assert stats["cycles"] == 3 and stats["dirty"] == 27 and stats["cached_tokens"] == 19
+    print(f"✅ Empreintes: 7/19 tokens sales ({stats['last_dirty_ratio']:.0%}), tokens disparus oubliés")
+
+
+def test_age_out():
+    cache = TokenEvaluationCache(max_age_seconds=0.05)
+    pools_by_token = random_pools_by_token(random.Random(2), 5)
+    _evaluate_all(cache, pools_by_token)
+    assert cache.dirty_tokens(pools_by_token) == set()
+    asyncio.run(asyncio.sleep(0.06))
+    assert cache.dirty_tokens(pools_by_token) == set(pools_by_token)
+    assert cache.stats["aged_out"] == 5
+    print("✅ Résultats expirés après max_age_seconds")
+
+
+async def _run_cycles():
+    rng = random.Random(3)
+    cycles = [random_pools_by_token(rng, 30)]
+    # Cycle 2: même état; cycle 3: 4 tokens changent de prix
+    cycles.append(copy.deepcopy(cycles[0]))
+    cycles.append(copy.deepcopy(cycles[0]))
+    for token in ("TOKEN1", "TOKEN5", "TOKEN9", "TOKEN20"):
+        cycles[2][token][1]["buy_price"] *= 0.97
+
+    evaluated, sent = [], []
+
+    def counting(pools, token, top_k=None):
+        evaluated.append(token)
+        return find_pool_opportunities(pools, token, top_k)
+
+    async def fake_send(app, chat_id, opp):
+        sent.append((opp["token"], opp["buy_pool_id"], opp["sell_pool_id"]))
+
+    originals = (main.find_pool_opportunities, main.send_opportunity, main.should_send_notification)
+    main.find_pool_opportunities = counting
+    main.send_opportunity = fake_send
+    main.should_send_notification = lambda token, opportunity_hash: True  # pas de cooldown
+    cache = TokenEvaluationCache(max_age_seconds=3600)
+    token_evaluation_cache._cache, original_cache = cache, token_evaluation_cache._cache
+    per_cycle = []
+    try:
+        for pools_by_token in cycles:
+            evaluated.clear()
+            sent.clear()
+            dirty = cache.dirty_tokens(pools_by_token)
+            for token, pools in pools_by_token.items():
+                cached = None if token in dirty else cache.get(token)
+                await main.evaluate_token(None, token, pools, cached)
+            per_cycle.append((sorted(evaluated), list(sent), cache.stats["last_dirty_ratio"]))
+    finally:
+        main.find_pool_opportunities, main.send_opportunity, main.should_send_notification = originals
+        token_evaluation_cache._cache = original_cache
+    return cycles, per_cycle
+
+
+def test_main_loop_reevaluates_dirty_tokens_only():
+    cycles, per_cycle = asyncio.run(_run_cycles())
+    (first, sent_1, ratio_1), (second, sent_2, ratio_2), (third, sent_3, ratio_3) = per_cycle
+    assert len(first) == 30 and ratio_1 == 1.0
+    assert second == [] and ratio_2 == 0.0
+    assert sent_2 == sent_1 and sent_1  # mêmes alertes, servies depuis le cache
+    assert third == ["TOKEN1", "TOKEN20", "TOKEN5", "TOKEN9"] and ratio_3 == 4 / 30
+
+    # Cycle 3: mêmes alertes qu'une réévaluation complète
+    expected = []
+    for token, pools in cycles[2].items():
+        best = find_pool_opportunities(pools, token, top_k=1)
+        expected += [(token, o["buy_pool_id"], o["sell_pool_id"]) for o in best]
+    assert sent_3 == expected
+    print(f"✅ 3 cycles: {len(first)}, {len(second)}, {len(third)} tokens réévalués, alertes identiques")
+
+
+if __name__ == "__main__":
+    test_fingerprint_changes()
+    test_age_out()
+    test_main_loop_reevaluates_dirty_tokens_only()
@@ -0,0 +1,206 @@
+# test_trade_sizing.py
+"""
+Tests du solveur de taille de trade (trade_sizing) contre une simulation
+scalaire indépendante, en unités réelles (réserves en SOL et en tokens, prix
+SOL/USD quelconque) et recherche ternaire.
+
+Tests:
+1. Constant product des deux côtés (forme close): taille et profit égaux à
+   l'optimum simulé, marginal_spread ≈ 0
+2. Liquidité concentrée (CLMM/Whirlpool/V3, un côté ou les deux): swap
+   dans la plage [p(1-r), p(1+r)] façon Uniswap V3, sortie plafonnée au bord
+3. Cas limites: pas de spread, frais réseau supérieurs au gain, plafond
+   max_size_usd, pools invalides
+4. size_opportunities sur les dicts de find_pool_opportunities: champs
+   ajoutés, une seule passe pour tout le lot
+
+Usage:
+    SAVE_LOGS=false python test_trade_sizing.py
+"""
+import math
+import random
+
+import numpy as np
+
+import trade_sizing
+from arbitrage import find_pool_opportunities
+from trade_sizing import CL_RANGE_PCT, size_opportunities, size_trades
+
+SOL_USD = 137.0
+
+
+def _cp_leg(liquidity_usd, price_sol):
+    """Réserves réelles (SOL, tokens) d'une pool constant product."""
+    return liquidity_usd / 2 / SOL_USD, liquidity_usd / 2 / (price_sol * SOL_USD)
+
+
+def _cl_leg(liquidity_usd, price_sol, r=CL_RANGE_PCT):
+    """Liquidité L et bornes (sqrt) d'une position sur [p(1-r), p(1+r)]."""
+    sp, sa, sb = math.sqrt(price_sol), math.sqrt(price_sol * (1 - r)), math.sqrt(price_sol * (1 + r))
+    value_sol = liquidity_usd / SOL_USD
+    liq = value_sol / (price_sol * (1 / sp - 1 / sb) + (sp - sa))
+    return liq, sp, sa, sb
+
+
+def simulate(size_usd, buy, sell):
+    """USD reçus: achat de tokens (SOL) sur la pool buy, revente sur la pool sell."""
+    sol_in = size_usd / SOL_USD
+    if buy["cl"]:
+        liq, sp, _, sb = _cl_leg(buy["liquidity"], buy["price"])
+        sp_new = min(sp + (1 - buy["fee"]) * sol_in / liq, sb)
+        tokens = liq * (1 / sp - 1 / sp_new)
+    else:
+        sol, tok = _cp_leg(buy["liquidity"], buy["price"])
+        tokens = tok * (1 - buy["fee"]) * sol_in / (sol + (1 - buy["fee"]) * sol_in)
+    if sell["cl"]:
+        liq, sp, sa, _ = _cl_leg(sell["liquidity"], sell["price"])
+        inv_new = min(1 / sp + (1 - sell["fee"]) * tokens / liq, 1 / sa)
+        sol_out = liq * (sp - 1 / inv_new)
+    else:
+        sol, tok = _cp_leg(sell["liquidity"], sell["price"])
+        sol_out = sol * (1 - sell["fee"]) * tokens / (tok + (1 - sell["fee"]) * tokens)
+    return sol_out * SOL_USD
+
+
+def best_by_search(buy, sell):
+    lo, hi = 0.0, 2 * (buy["liquidity"] + sell["liquidity"])
+    for _ in range(300):
+        m1, m2 = lo + (hi - lo) / 3, hi - (hi - lo) / 3
+        if simulate(m1, buy, sell) - m1 < simulate(m2, buy, sell) - m2:
+            lo = m1
+        else:
+            hi = m2
+    size = (lo + hi) / 2
+    return size, simulate(size, buy, sell) - size
+
+
+def random_pair(rng, buy_cl, sell_cl):
+    price = 10 ** rng.uniform(-6, 2)
+    return (
+        {"price": price, "liquidity": 10 ** rng.uniform(4, 7), "fee": rng.choice([0.0001, 0.0025, 0.003]), "cl": buy_cl},
+        {"price": price * (1 + rng.uniform(0.005, 0.06)), "liquidity": 10 ** rng.uniform(4, 7),
+         "fee": rng.choice([0.0001, 0.0025, 0.003]), "cl": sell_cl},
+    )
+
+
+def _solve(pairs, network_fee=0.0, max_size_usd=None):
+    def column(side, key):
+        return [pair[side][key] for pair in pairs]
+
+    return size_trades(
+        column(0, "price"), column(1, "price"), column(0, "fee"), column(1, "fee"),
+        column(0, "liquidity"), column(1, "liquidity"), column(0, "cl"), column(1, "cl"),
+        np.full(len(pairs), network_fee), max_size_usd,
+    )
+
+
+def _check_against_search(pairs, result, tolerance):
+    for i, (buy, sell) in enumerate(pairs):
+        size, profit = best_by_search(buy, sell)
+        assert math.isclose(result["profit"][i], profit, rel_tol=1e-7, abs_tol=1e-7), (i, result["profit"][i], profit)
+        assert math.isclose(result["size"][i], size, rel_tol=tolerance), (i, result["size"][i], size)
+        assert result["profit"][i] >= simulate(1000, buy, sell) - 1000 - 1e-9
+
+
+def test_constant_product_closed_form():
+    rng = random.Random(1)
+    pairs = [random_pair(rng, False, False) for _ in range(200)]
+    result = _solve(pairs)
+    assert not result["numeric"].any()
+    _check_against_search(pairs, result, 1e-3)
+    assert np.all(np.abs(result["marginal_spread"]) < 1e-9)
+    print(f"✅ Constant product: 200 paires, forme close = optimum simulé, profit médian "
+          f"${np.median(result['profit']):.0f} à ${np.median(result['size']):.0f}")
+
+
+def test_concentrated_numeric_search():
+    rng = random.Random(2)
+    pairs = [random_pair(rng, *sides) for sides in [(True, True), (True, False), (False, True)] * 70]
+    result = _solve(pairs)
+    assert result["numeric"].all()
+    _check_against_search(pairs, result, 1e-3)
+    # Optimum intérieur: marginal_spread ≈ 0; sinon optimum au bord de la
+    # plage (coude de la courbe), déjà validé par la simulation
+    interior = np.abs(result["marginal_spread"]) < 1e-6
+    assert interior.sum() >= len(pairs) - 5, interior.sum()
+
+    # Même TVL: la liquidité concentrée absorbe une taille plus grande
+    buy, sell = {"price": 1.0, "liquidity": 1e6, "fee": 0.0025, "cl": False}, \
+        {"price": 1.02, "liquidity": 1e6, "fee": 0.0025, "cl": False}
+    amm, clmm = _solve([(buy, sell), (dict(buy, cl=True), dict(sell, cl=True))])["size"]
+    assert clmm > 3 * amm
+    print(f"✅ Liquidité concentrée: 210 paires ({len(pairs) - interior.sum()} au bord de la plage), "
+          f"recherche = optimum simulé; même TVL: "
+          f"${amm:,.0f} (AMM) vs ${clmm:,.0f} (CLMM)")
+
+
+def test_edge_cases():
+    flat = ({"price": 1.0, "liquidity": 1e6, "fee": 0.003, "cl": False},
+            {"price": 1.004, "liquidity": 1e6, "fee": 0.003, "cl": True})   # spread < frais
+    good = ({"price": 1.0, "liquidity": 1e6, "fee": 0.0025, "cl": True},
+            {"price": 1.03, "liquidity": 5e5, "fee": 0.0025, "cl": False})
+    invalid = ({"price": 0.0, "liquidity": 1e6, "fee": 0.003, "cl": False},
+               {"price": 1.0, "liquidity": float("nan"), "fee": 0.003, "cl": False})
+    result = _solve([flat, good, invalid])
+    assert result["size"][0] == 0 and result["profit"][0] == 0 and result["marginal_spread"][0] < 0
+    assert result["size"][1] > 0 and result["profit"][1] > 0
+    assert result["size"][2] == 0 and result["profit"][2] == 0 and result["marginal_spread"][2] == 0
+
+    # Frais réseau plus grands que le meilleur gain: pas de trade
+    assert _solve([good], network_fee=result["profit"][1] + 1)["size"][0] == 0
+    # Plafond de capital: taille plafonnée, marginal_spread encore positif
+    capped = _solve([good], max_size_usd=1000)
+    assert math.isclose(capped["size"][0], 1000, rel_tol=1e-9) and capped["marginal_spread"][0] > 0
+    assert math.isclose(capped["profit"][0], simulate(1000, *good) - 1000, rel_tol=1e-7)
+    print("✅ Pas de spread, frais réseau, plafond max_size_usd, pools invalides")
+
+
+def test_size_opportunities_batch():
+    rng = random.Random(4)
+    opportunities = []
+    for t in range(40):
+        pools = [
+            {
+                "pool_id": f"T{t}-{i}",
+                "dex": rng.choice(["orca", "raydium", "meteora"]),
+                "pool_type": rng.choice(["AMM", "CLMM", "Whirlpool", "DLMM", "PMM"]),
+                "buy_price": 1 + rng.uniform(-0.02, 0.02),
+                "sell_price": 1 + rng.uniform(-0.02, 0.02),
+                "fee_pct": 0.0025,
+                "liquidity_usd": 10 ** rng.uniform(4, 6.5),
+                "chain": "solana",
+            }
+            for i in range(5)
+        ]
+        opportunities += find_pool_opportunities(pools, f"TOKEN{t}")
+    assert len(opportunities) > 40
+
+    batches = trade_sizing.get_trade_sizing_stats()["batches"]
+    assert size_opportunities(opportunities) is opportunities
+    stats = trade_sizing.get_trade_sizing_stats()
+    assert stats["batches"] == batches + 1
+    for opp in opportunities:
+        buy, sell = opp["details"]["pool_a"], opp["details"]["pool_b"]
+        legs = [
+            {"price": pool[key], "liquidity": pool["liquidity_usd"], "fee": pool["fee_pct"],
+             "cl": pool["pool_type"] in ("CLMM", "Whirlpool", "DLMM")}
+            for pool, key in ((buy, "buy_price"), (sell, "sell_price"))
+        ]
+        size, profit = best_by_search(*legs)
+        fee_usd = trade_sizing.estimate_network_fee_usd("solana")
+        if profit > fee_usd:
+            assert math.isclose(opp["expected_profit_usd"], profit - fee_usd, rel_tol=1e-6)
+            assert math.isclose(opp["optimal_size_usd"], size, rel_tol=1e-3)  # optimum plat
+        else:
+            assert opp["optimal_size_usd"] == 0 and opp["expected_profit_usd"] == 0
+        assert isinstance(opp["marginal_spread"], float)
+    assert size_opportunities([]) == []
+    print(f"✅ size_opportunities: {len(opportunities)} opportunités en une passe "
+          f"({stats['last_batch_ms']:.2f} ms)")
+
+
+if __name__ == "__main__":
+    test_constant_product_closed_form()
+    test_concentrated_numeric_search()
+    test_edge_cases()
+    test_size_opportunities_batch()
@@ -0,0 +1,198 @@
+# test_triangular_arbitrage.py
+"""
+Tests du détecteur de cycles multi-pools (triangular_arbitrage) contre une
+énumération exhaustive des cycles simples.
+
+Tests:
+1. Cycle planté SOL -> X -> USDC -> SOL sur trois DEX: trouvé avec le bon
+   profit; graphe cohérent avec frais: aucun cycle
+2. Graphes aléatoires: chaque cycle rapporté existe (chemin simple, taux
+   = produit des arêtes) et le meilleur cycle est celui de l'énumération
+3. Mises à jour incrémentales: snapshot inchangé -> recherche sautée;
+   PoolTable modifiée en place (update_row), pool retirée ou ajoutée ->
+   mêmes cycles qu'un graphe reconstruit de zéro
+
+Usage:
+    SAVE_LOGS=false LOG_LEVEL=ERROR python test_triangular_arbitrage.py
+"""
+import math
+import random
+
+from pool_fetchers import SOL_MINT, USDC_MINT
+from pool_table import PoolTable
+from triangular_arbitrage import PoolGraph
+
+
+def _pool(pool_id, token_a, token_b, price, fee_pct=0.0025, liquidity_usd=1e6):
+    return {
+        "pool_id": pool_id,
+        "token_a": token_a,
+        "token_b": token_b,
+        "price": price,
+        "fee_pct": fee_pct,
+        "liquidity_usd": liquidity_usd,
+    }
+
+
+def random_snapshot(rng: random.Random, n_tokens: int, n_pools: int, noise: float = 0.03):
+    """Pools entre mints de prix USD connus, prix bruités de ±noise."""
+    usd = {SOL_MINT: 150.0, USDC_MINT: 1.0}
+    usd.update({f"MINT{i}": 10 ** rng.uniform(-4, 2) for i in range(n_tokens)})
+    mints = list(usd)
+    snapshot = {"orca": [], "raydium": [], "meteora": []}
+    for i in range(n_pools):
+        a, b = rng.sample(mints, 2)
+        price = usd[a] / usd[b] * (1 + rng.uniform(-noise, noise))
+        snapshot[rng.choice(list(snapshot))].append(
+            _pool(f"P{i}", a, b, price, rng.choice([0.0001, 0.0025, 0.003]), 10 ** rng.uniform(3.5, 7))
+        )
+    return snapshot
+
+
+def brute_force(snapshot, anchors, max_hops, min_profit, min_liquidity):
+    """Tous les cycles simples de 3 à max_hops pools passant par une ancre: {arêtes: profit}."""
+    edges = []
+    for dex, pools in snapshot.items():
+        for pool in pools:
+            if pool["liquidity_usd"] < min_liquidity:
+                continue
+            gamma = 1 - pool["fee_pct"]
+            edges.append((pool["token_a"], pool["token_b"], pool["price"] * gamma, (dex, pool["pool_id"], 0)))
+            edges.append((pool["token_b"], pool["token_a"], gamma / pool["price"], (dex, pool["pool_id"], 1)))
+    out = {}
+    for anchor in anchors:
+        def walk(node, visited, rate, used):
+            for u, v, r, key in edges:
+                if u != node:
+                    continue
+                if v == anchor and len(used) + 1 >= 3:
+                    cycle = frozenset(used + [key])
+                    if rate * r - 1 > min_profit:
+                        out.setdefault(cycle, rate * r - 1)
+                elif v not in visited and len(used) + 1 < max_hops:
+                    walk(v, visited | {v}, rate * r, used + [key])
+        walk(anchor, {anchor}, 1.0, [])
+    return out
+
+
+def _cycle_keys(graph, cycle):
+    return frozenset((hop["dex"], hop["pool_id"], int(hop["from"] != graph._fingerprints[
+        graph._slots[(hop["dex"], hop["pool_id"])]][0])) for hop in cycle["hops"])
+
+
+def _check_cycle(cycle, anchors):
+    tokens = cycle["tokens"]
+    assert tokens[0] == tokens[-1] == cycle["anchor"] and cycle["anchor"] in anchors
+    assert len(set(tokens[:-1])) == len(tokens) - 1 == cycle["hop_count"] >= 3
+    rate = math.prod(hop["rate"] for hop in cycle["hops"])
+    assert math.isclose(rate, cycle["rate"], rel_tol=1e-9)
+    assert math.isclose(cycle["profit_pct"], rate - 1, rel_tol=1e-9, abs_tol=1e-12)
+
+
+def test_planted_cycle():
+    x = "MINTX"
+    # 1 X = 0.01 SOL = 1.5 USDC, mais la pool X/USDC paie 1.56 USDC
+    pools = {
+        "orca": [_pool("SOL-X", SOL_MINT, x, 100.0)],             # X par SOL
+        "raydium": [_pool("X-USDC", x, USDC_MINT, 1.56)],         # USDC par X
+        "meteora": [_pool("USDC-SOL", USDC_MINT, SOL_MINT, 1 / 150)],
+    }
+    graph = PoolGraph(min_profit=0.001, min_liquidity_usd=1e4)
+    graph.update(pools)
+    cycles = graph.find_cycles()
+    assert len(cycles) == 1, cycles
+    cycle = cycles[0]
+    expected = 100 * 1.56 / 150 * 0.9975 ** 3 - 1
+    assert math.isclose(cycle["profit_pct"], expected, rel_tol=1e-9)
+    assert cycle["tokens"] == [SOL_MINT, x, USDC_MINT, SOL_MINT]
+    assert [hop["dex"] for hop in cycle["hops"]] == ["orca", "raydium", "meteora"]
+    _check_cycle(cycle, graph.anchors)
+
+    # Prix cohérents: les frais rendent tout cycle perdant
+    pools["raydium"] = [_pool("X-USDC", x, USDC_MINT, 1.5)]
+    graph.update(pools)
+    assert graph.find_cycles() == []
+    # Pool trop peu liquide: hors du graphe
+    pools["raydium"] = [_pool("X-USDC", x, USDC_MINT, 1.56, liquidity_usd=5e3)]
+    graph.update(pools)
+    assert graph.find_cycles() == []
+    print(f"✅ Cycle planté trouvé ({expected:.2%}), aucun cycle sur prix cohérents")
+
+
+def test_matches_brute_force():
+    rng = random.Random(1)
+    anchors = [SOL_MINT, USDC_MINT]
+    total = 0
+    for trial in range(30):
+        max_hops = 3 + trial % 2
+        snapshot = random_snapshot(rng, 6, 40)
+        graph = PoolGraph(anchors=anchors, max_hops=max_hops, min_profit=0.002, min_liquidity_usd=1e4)
+        graph.update(snapshot)
+        cycles = graph.find_cycles()
+        expected = brute_force(snapshot, anchors, max_hops, 0.002, 1e4)
+        found = {}
+        for cycle in cycles:
+            _check_cycle(cycle, anchors)
+            key = _cycle_keys(graph, cycle)
+            assert key in expected, cycle
+            assert math.isclose(cycle["profit_pct"], expected[key], rel_tol=1e-9)
+            found[key] = cycle["profit_pct"]
+        assert bool(found) == bool(expected)
+        if expected:
+            assert math.isclose(max(found.values()), max(expected.values()), rel_tol=1e-9)
+        assert [c["profit_pct"] for c in cycles] == sorted(found.values(), reverse=True)
+        total += len(cycles)
+    print(f"✅ 30 graphes aléatoires: {total} cycles, tous réels, meilleur cycle = énumération")
+
+
+def _keys(graph, cycles):
+    return sorted((sorted(_cycle_keys(graph, c)), round(c["profit_pct"], 12)) for c in cycles)
+
+
+def test_incremental_updates():
+    rng = random.Random(2)
+    snapshot = random_snapshot(rng, 30, 400)
+    snapshot["raydium"] = PoolTable.from_dicts(snapshot["raydium"])
+    graph = PoolGraph(min_profit=0.002, min_liquidity_usd=1e4)
+    assert graph.update(snapshot) == 400
+    first = graph.find_cycles()
+    assert first and graph.stats["searches"] == 2
+
+    # Cycle suivant, mêmes pools (nouveaux dicts, même table): rien à refaire
+    snapshot = {dex: pools if isinstance(pools, PoolTable) else [dict(p) for p in pools]
+                for dex, pools in snapshot.items()}
+    assert graph.update(snapshot) == 0
+    assert _keys(graph, graph.find_cycles()) == _keys(graph, first)
+    assert graph.stats["searches"] == 2 and graph.stats["searches_skipped"] == 2
+
+    def check_against_fresh(label):
+        fresh = PoolGraph(min_profit=0.002, min_liquidity_usd=1e4)
+        fresh.update(snapshot)
+        assert _keys(graph, graph.find_cycles()) == _keys(fresh, fresh.find_cycles()), label
+
+    # Mise à jour on-chain en place dans la PoolTable
+    table = snapshot["raydium"]
+    for row in range(0, len(table), 7):
+        table.update_row(row, {"price": table[row]["price"] * 1.04})
+    assert graph.update(snapshot) == len(range(0, len(table), 7))
+    check_against_fresh("update_row")
+
+    # Pool retirée, pool ajoutée (nouveau mint)
+    removed = snapshot["orca"].pop(3)
+    snapshot["meteora"].append(_pool("NEW", SOL_MINT, "MINTNEW", 42.0))
+    assert graph.update(snapshot) == 2
+    assert graph.stats["pools"] == 400
+    check_against_fresh("remove/add")
+    # Le slot libéré est réutilisé
+    snapshot["orca"].append(removed)
+    graph.update(snapshot)
+    assert len(graph._keys) == 401
+    check_against_fresh("re-add")
+    print(f"✅ Incrémental: recherche sautée sur snapshot inchangé, update_row / retrait / ajout "
+          f"= graphe reconstruit ({len(first)} cycles)")
+
+
+if __name__ == "__main__":
+    test_planted_cycle()
+    test_matches_brute_force()
+    test_incremental_updates()
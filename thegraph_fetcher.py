@@ -18,6 +18,10 @@ from typing import Optional, Dict, Any, List
 import aiohttp
 
 from utils import logger
+from singleflight import singleflight, graphql_key
+from http_transport import create_session
+from rate_limiter import acquire as acquire_rate_limit, observe as observe_rate_limit
+from circuit_breaker import allow_request, track
 
 # Proxies (optionnel, pour réseaux bloqués)
 HTTP_PROXY = os.getenv("HTTP_PROXY")
@@ -49,6 +53,15 @@ def sqrt_price_x96_to_price(sqrt_price_x96: float, dec0: int, dec1: int) -> Opti
         return None
 
 
+def subgraph_breaker_name(subgraph_url: str) -> str:
+    """Nom du circuit breaker d'un subgraph: "subgraph:<chain>_<dex>" si connu."""
+    for chain, urls in SUBGRAPHS.items():
+        for dex, url in urls.items():
+            if url == subgraph_url:
+                return f"subgraph:{chain}_{dex}"
+    return f"subgraph:{subgraph_url}"
+
+
 async def query_subgraph(
     session: aiohttp.ClientSession,
     subgraph_url: str,
@@ -58,37 +71,67 @@ async def query_subgraph(
 ) -> Optional[dict]:
     """
     Query TheGraph subgraph avec support proxy et validation stricte.
+
+    Les requêtes identiques (url + query + variables) lancées en même temps
+    sont coalescées en un seul POST.
     """
+    payload = {"query": query, "variables": variables}
+    return await singleflight(
+        graphql_key("subgraph", subgraph_url, payload),
+        lambda: _query_subgraph_uncached(session, subgraph_url, query, variables, timeout),
+    )
+
+
+async def _query_subgraph_uncached(
+    session: aiohttp.ClientSession,
+    subgraph_url: str,
+    query: str,
+    variables: dict,
+    timeout: int = 15
+) -> Optional[dict]:
     headers = {
         "Content-Type": "application/json",
         "Accept": "application/json",
     }
 
+    breaker = subgraph_breaker_name(subgraph_url)
+
     for attempt in range(3):
+        if not allow_request(breaker):
+            logger.debug(f"Subgraph skipped (circuit open): {subgraph_url}")
+            return None
         try:
-            async with session.post(
-                subgraph_url,
-                json={"query": query, "variables": variables},
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=timeout),
-            ) as resp:
-                if resp.status != 200:
-                    logger.warning(f"Subgraph returned {resp.status}: {subgraph_url}")
-                    await asyncio.sleep(1 * (2 ** attempt))
-                    continue
-
-                data = await resp.json()
-
-                if not data:
-                    logger.error(f"Empty response from {subgraph_url}")
-                    return None
-                if "errors" in data:
-                    logger.error(f"GraphQL errors: {data['errors']}")
-                    return None
-                if "data" not in data:
-                    logger.error(f"No 'data' field in response from {subgraph_url}")
-                    return None
-                return data
+            await acquire_rate_limit(subgraph_url)
+            with track(breaker) as call:
+                async with session.post(
+                    subgraph_url,
+                    json={"query": query, "variables": variables},
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=timeout),
+                ) as resp:
+                    call.status = resp.status
+                    observe_rate_limit(subgraph_url, resp.status, resp.headers)
+                    if resp.status == 429:
+                        # Pause Retry-After appliquée par le limiter de l'hôte
+                        logger.warning(f"Subgraph rate limited (429): {subgraph_url}")
+                        continue
+                    if resp.status != 200:
+                        logger.warning(f"Subgraph returned {resp.status}: {subgraph_url}")
+                        await asyncio.sleep(1 * (2 ** attempt))
+                        continue
+
+                    data = await resp.json()
+
+                    if not data:
+                        logger.error(f"Empty response from {subgraph_url}")
+                        return None
+                    if "errors" in data:
+                        logger.error(f"GraphQL errors: {data['errors']}")
+                        return None
+                    if "data" not in data:
+                        logger.error(f"No 'data' field in response from {subgraph_url}")
+                        return None
+                    return data
 
         except asyncio.TimeoutError:
             logger.warning(f"Timeout querying {subgraph_url}")
@@ -141,6 +184,75 @@ async def query_pools_generic(
         return []
 
 
+# Requête groupée: un alias pools(...) par token, même filtre et même tri
+# que query_pools_generic. Au-delà de SUBGRAPH_BATCH_TOKENS alias, la requête
+# est découpée (limites de complexité/taille des requêtes TheGraph).
+SUBGRAPH_BATCH_TOKENS = 20
+
+_POOL_FIELDS_FRAGMENT = """
+fragment PoolFields on Pool {
+  id
+  token0 { id decimals }
+  token1 { id decimals }
+  feeTier
+  sqrtPrice
+  liquidity
+  totalValueLockedUSD
+}
+"""
+
+
+def build_batch_pools_query(tokens: List[str], quote: str) -> tuple:
+    """
+    Requête aliasée t0..tN: pools (token_i, quote) par TVL décroissante.
+
+    Returns:
+        (query, variables)
+    """
+    declarations = ["$quote: Bytes!"]
+    selections = []
+    variables = {"quote": quote.lower()}
+    for i, token in enumerate(tokens):
+        declarations.append(f"$t{i}: Bytes!")
+        variables[f"t{i}"] = token.lower()
+        selections.append(
+            f"  t{i}: pools(where: {{token0_in: [$t{i}, $quote], token1_in: [$t{i}, $quote]}}, "
+            f"first: 20, orderBy: totalValueLockedUSD, orderDirection: desc) {{ ...PoolFields }}"
+        )
+    query = f"query BatchPools({', '.join(declarations)}) {{\n" + "\n".join(selections) + "\n}\n" + _POOL_FIELDS_FRAGMENT
+    return query, variables
+
+
+async def query_pools_batch(
+    session: aiohttp.ClientSession,
+    url: str,
+    tokens: List[str],
+    quote: str,
+    dex: str
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Pools (token, quote) de chaque token en une requête par lot de
+    SUBGRAPH_BATCH_TOKENS (lots en parallèle). Les tokens d'un lot en
+    échec sont absents du résultat.
+    """
+    tokens = list(dict.fromkeys(tokens))
+    chunks = [tokens[i:i + SUBGRAPH_BATCH_TOKENS] for i in range(0, len(tokens), SUBGRAPH_BATCH_TOKENS)]
+
+    async def run_chunk(chunk: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        query, variables = build_batch_pools_query(chunk, quote)
+        data = await query_subgraph(session, url, query, variables, timeout=20)
+        if not data:
+            return {}
+        payload = data.get("data") or {}
+        return {token: payload.get(f"t{i}") or [] for i, token in enumerate(chunk)}
+
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    for chunk_result in await asyncio.gather(*(run_chunk(chunk) for chunk in chunks)):
+        results.update(chunk_result)
+    logger.debug(f"[{dex}] batched subgraph query: {len(results)}/{len(tokens)} tokens in {len(chunks)} request(s)")
+    return results
+
+
 async def normalize_pools(pools: List[Dict[str, Any]], token: str, dex: str, chain: str) -> Optional[Dict[str, Any]]:
     """
     Sélectionne la pool avec la plus grande TVL et normalise buy/sell price.
@@ -209,6 +321,30 @@ async def get_pool_from_subgraph(
     return best
 
 
+async def get_pools_from_subgraph_batch(
+    session: aiohttp.ClientSession,
+    tokens: List[str],
+    quote: str,
+    dex: str,
+    chain: str
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Version groupée de get_pool_from_subgraph: {token: pool de plus grande
+    TVL pour token/quote, ou None}, en une requête par lot de tokens.
+    """
+    url = SUBGRAPHS.get(chain, {}).get(dex)
+    if not url:
+        logger.warning(f"No subgraph URL for chain={chain}, dex={dex}")
+        return {token: None for token in tokens}
+
+    pools_by_token = await query_pools_batch(session, url, tokens, quote, dex)
+    best = {}
+    for token in tokens:
+        pools = pools_by_token.get(token)
+        best[token] = await normalize_pools(pools, token, dex, chain) if pools else None
+    return best
+
+
 # ============================================================================
 # Static fallback
 # ============================================================================
@@ -283,7 +419,7 @@ async def _test():
     # Example: WETH/USDC on Base via Uniswap V3 subgraph
     WETH = "0x4200000000000000000000000000000000000006"
     USDC = "0x833589fcd6edb6e08f4c7c19962234ef8f82f18e"
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         res = await get_pool_from_subgraph(session, WETH, USDC, "uniswap_v3", "base")
         print(res)
 
@@ -0,0 +1,115 @@
+# token_evaluation_cache.py
+"""
+Cache des opportunités par token, invalidé par empreinte des pools.
+
+La boucle principale réévaluait toutes les paires de pools de chaque token
+à chaque cycle, alors que la plupart des pools reviennent avec le même prix
+et la même liquidité. Ici, chaque token garde l'empreinte des pools sur
+lesquelles ses opportunités ont été calculées:
+- empreinte d'une pool: (pool_id, dex, buy_price, sell_price,
+  liquidity_usd, fee_pct, fee_bps, stale), dans l'ordre de la liste (l'ordre
+  départage les égalités de spread)
+- dirty_tokens(): tokens dont l'empreinte a changé, sans résultat en cache
+  ou dont le résultat a plus de EVALUATION_CACHE_MAX_AGE_SECONDS
+- les autres tokens réutilisent get(token) sans recalcul
+
+Le ratio de tokens sales par cycle est exposé par get_dirty_token_stats().
+"""
+import time
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+from config import EVALUATION_CACHE_MAX_AGE_SECONDS
+
+
+def pool_fingerprint(pool: Mapping) -> Tuple:
+    """Champs dont dépend l'évaluation d'une pool (prix, liquidité, frais)."""
+    return (
+        pool.get("pool_id"),
+        pool.get("dex"),
+        pool.get("buy_price"),
+        pool.get("sell_price"),
+        pool.get("liquidity_usd"),
+        pool.get("fee_pct"),
+        pool.get("fee_bps"),
+        bool(pool.get("stale")),
+    )
+
+
+def token_fingerprint(pools: List[Mapping]) -> Tuple:
+    return tuple(pool_fingerprint(pool) for pool in pools)
+
+
+class TokenEvaluationCache:
+    """Opportunités par token + empreinte des pools évaluées."""
+
+    def __init__(self, max_age_seconds: Optional[float] = None):
+        self.max_age_seconds = (
+            EVALUATION_CACHE_MAX_AGE_SECONDS if max_age_seconds is None else max_age_seconds
+        )
+        # token -> (empreinte, opportunités, évalué à)
+        self._entries: Dict[str, Tuple[Tuple, List[Dict[str, Any]], float]] = {}
+        self.stats = {
+            "cycles": 0,
+            "tokens": 0,
+            "dirty": 0,
+            "aged_out": 0,
+            "last_tokens": 0,
+            "last_dirty": 0,
+            "last_dirty_ratio": 0.0,
+        }
+
+    def dirty_tokens(self, pools_by_token: Dict[str, List[Mapping]]) -> Set[str]:
+        """
+        Tokens du cycle à réévaluer; les tokens absents du cycle sont oubliés.
+        Met à jour les stats du cycle (ratio de tokens sales).
+        """
+        now = time.monotonic()
+        for token in self._entries.keys() - pools_by_token.keys():
+            del self._entries[token]
+
+        dirty = set()
+        for token, pools in pools_by_token.items():
+            entry = self._entries.get(token)
+            if entry is None or entry[0] != token_fingerprint(pools):
+                dirty.add(token)
+            elif now - entry[2] > self.max_age_seconds:
+                self.stats["aged_out"] += 1
+                dirty.add(token)
+
+        self.stats["cycles"] += 1
+        self.stats["tokens"] += len(pools_by_token)
+        self.stats["dirty"] += len(dirty)
+        self.stats["last_tokens"] = len(pools_by_token)
+        self.stats["last_dirty"] = len(dirty)
+        self.stats["last_dirty_ratio"] = len(dirty) / len(pools_by_token) if pools_by_token else 0.0
+        return dirty
+
+    def get(self, token: str) -> Optional[List[Dict[str, Any]]]:
+        entry = self._entries.get(token)
+        return entry[1] if entry is not None else None
+
+    def store(self, token: str, pools: List[Mapping], opportunities: List[Dict[str, Any]]):
+        """Résultat de l'évaluation de pools (cycle principal ou stream)."""
+        self._entries[token] = (token_fingerprint(pools), opportunities, time.monotonic())
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "cached_tokens": len(self._entries),
+            "dirty_ratio": self.stats["dirty"] / self.stats["tokens"] if self.stats["tokens"] else 0.0,
+        }
+
+
+# ============================================================================
+# INSTANCE PARTAGÉE
+# ============================================================================
+_cache = TokenEvaluationCache()
+
+
+def get_token_evaluation_cache() -> TokenEvaluationCache:
+    return _cache
+
+
+def get_dirty_token_stats() -> Dict[str, Any]:
+    """Stats: cycles, tokens, dirty, aged_out, last_dirty_ratio, dirty_ratio (cumulé)..."""
+    return _cache.snapshot()
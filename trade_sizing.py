@@ -0,0 +1,249 @@
+# trade_sizing.py
+"""
+Taille de trade optimale pour une paire pool d'achat / pool de vente.
+
+Le profit affiché était toujours calculé pour swap_size_usd = 1000, avec
+slippage et impact tirés des paliers heuristiques de estimate_slippage /
+estimate_price_impact. Ici chaque pool est modélisée par une courbe de
+liquidité déduite de sa TVL (liquidity_usd), de son prix et de son fee, et
+on cherche l'entrée Δ (USD) qui maximise out(Δ) - Δ - frais réseau:
+
+- constant product (AMM, PMM, OrderBook par défaut): réserves virtuelles
+  L/2 de chaque côté; la composition achat -> vente reste une fonction
+  homographique out = NΔ / (E + DΔ), d'où Δ* = (sqrt(N·E) - E) / D
+- liquidité concentrée (CLMM, Whirlpool, DLMM, V3 Base): liquidité
+  répartie sur une plage ±CL_RANGE_PCT autour du prix courant, donc
+  réserves virtuelles amplifiées mais sortie plafonnée par les réserves
+  réelles (prix au bord de la plage). Pas de forme close: recherche par
+  section dorée, le profit étant concave en Δ
+
+Unités: chaque pool est exprimée en "USD au prix de la pool" (prix = 1);
+le passage de la pool d'achat à la pool de vente multiplie les tokens par
+sell_price / buy_price. Le prix SOL/USD (ou ETH/USD) se simplifie.
+
+Toutes les opportunités d'un cycle sont dimensionnées en une passe
+vectorisée (size_trades); size_opportunities ajoute optimal_size_usd,
+expected_profit_usd et marginal_spread (rendement net du dernier dollar,
+≈ 0 à l'optimum intérieur) aux dicts.
+"""
+import math
+import time
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+
+from fees import estimate_network_fee_usd
+from utils import logger
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+CONCENTRATED_POOL_TYPES = frozenset({"CLMM", "Whirlpool", "DLMM"})
+CL_RANGE_PCT = 0.05        # demi-largeur de la plage supposée autour du prix
+SEARCH_ITERATIONS = 80     # section dorée: intervalle x 0.618^80
+
+_INV_PHI = (math.sqrt(5) - 1) / 2
+
+_stats = {
+    "batches": 0,
+    "opportunities": 0,
+    "closed_form": 0,
+    "numeric": 0,
+    "profitable": 0,
+    "last_batch_ms": 0.0,
+}
+
+
+def is_concentrated(pool: Optional[Mapping], dex: Optional[str] = None) -> bool:
+    """Pool à liquidité concentrée (type de pool Solana ou DEX V3 sur Base)."""
+    from base_rpc_reader import V3_DEXES  # import différé (cycle)
+
+    pool_type = pool.get("pool_type") if pool else None
+    return pool_type in CONCENTRATED_POOL_TYPES or (dex or (pool or {}).get("dex")) in V3_DEXES
+
+
+def _leg_curves(liquidity: np.ndarray, concentrated: np.ndarray, range_pct: float):
+    """
+    (réserve virtuelle, plafond de sortie token, plafond de sortie quote)
+    d'une pool de TVL donnée, au prix 1.
+    """
+    upper = 1 / math.sqrt(1 + range_pct)
+    lower = math.sqrt(1 - range_pct)
+    # Position sur [1-r, 1+r]: TVL = L (1 - 1/sqrt(pb)) + L (1 - sqrt(pa))
+    virtual = np.where(concentrated, liquidity / (2 - upper - lower), liquidity / 2)
+    token_cap = np.where(concentrated, virtual * (1 - upper), np.inf)
+    quote_cap = np.where(concentrated, virtual * (1 - lower), np.inf)
+    return virtual, token_cap, quote_cap
+
+
+def _swap(amount, virtual, gamma, cap):
+    return np.minimum(virtual * gamma * amount / (virtual + gamma * amount), cap)
+
+
+def _swap_slope(amount, virtual, gamma, cap):
+    """Dérivée de _swap (0 une fois le plafond atteint)."""
+    out = virtual * gamma * amount / (virtual + gamma * amount)
+    return np.where(out < cap, virtual * virtual * gamma / (virtual + gamma * amount) ** 2, 0.0)
+
+
+def _route(size, curves):
+    """USD reçus pour size USD: achat sur la pool A, vente des tokens sur la pool B."""
+    v_a, gamma_a, cap_a, ratio, v_b, gamma_b, cap_b = curves
+    return _swap(_swap(size, v_a, gamma_a, cap_a) * ratio, v_b, gamma_b, cap_b)
+
+
+def _route_slope(size, curves):
+    v_a, gamma_a, cap_a, ratio, v_b, gamma_b, cap_b = curves
+    tokens = _swap(size, v_a, gamma_a, cap_a) * ratio
+    return _swap_slope(tokens, v_b, gamma_b, cap_b) * ratio * _swap_slope(size, v_a, gamma_a, cap_a)
+
+
+def size_trades(
+    buy_price: np.ndarray,
+    sell_price: np.ndarray,
+    buy_fee: np.ndarray,
+    sell_fee: np.ndarray,
+    buy_liquidity: np.ndarray,
+    sell_liquidity: np.ndarray,
+    buy_concentrated: np.ndarray,
+    sell_concentrated: np.ndarray,
+    network_fee_usd: np.ndarray,
+    max_size_usd: Optional[float] = None,
+    range_pct: float = CL_RANGE_PCT,
+) -> Dict[str, np.ndarray]:
+    """
+    Taille optimale de chaque paire (tableaux alignés, une ligne par paire).
+
+    Returns:
+        {"size", "profit", "marginal_spread", "initial_spread", "numeric"}
+        size/profit à 0 quand aucun montant ne couvre les frais réseau
+    """
+    buy_price = np.asarray(buy_price, dtype=np.float64)
+    sell_price = np.asarray(sell_price, dtype=np.float64)
+    gamma_a = 1 - np.asarray(buy_fee, dtype=np.float64)
+    gamma_b = 1 - np.asarray(sell_fee, dtype=np.float64)
+    liq_a = np.asarray(buy_liquidity, dtype=np.float64)
+    liq_b = np.asarray(sell_liquidity, dtype=np.float64)
+    conc_a = np.asarray(buy_concentrated, dtype=bool)
+    conc_b = np.asarray(sell_concentrated, dtype=bool)
+    network_fee_usd = np.asarray(network_fee_usd, dtype=np.float64)
+
+    valid = (buy_price > 0) & (sell_price > 0) & (liq_a > 0) & (liq_b > 0) & (gamma_a > 0) & (gamma_b > 0)
+    valid &= np.isfinite(buy_price) & np.isfinite(sell_price) & np.isfinite(liq_a) & np.isfinite(liq_b)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(valid, sell_price / buy_price, 0.0)
+    liq_a = np.where(valid, liq_a, 1.0)
+    liq_b = np.where(valid, liq_b, 1.0)
+
+    v_a, token_cap_a, _ = _leg_curves(liq_a, conc_a, range_pct)
+    v_b, _, quote_cap_b = _leg_curves(liq_b, conc_b, range_pct)
+
+    curves = (v_a, gamma_a, token_cap_a, ratio, v_b, gamma_b, quote_cap_b)
+
+    initial_spread = gamma_a * gamma_b * ratio - 1
+    upper_bound = np.inf if max_size_usd is None else max_size_usd
+
+    # Constant product des deux côtés: forme close
+    n = gamma_a * gamma_b * v_a * v_b * ratio
+    e = v_a * v_b
+    d = gamma_a * (v_b + gamma_b * ratio * v_a)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        closed = np.maximum((np.sqrt(n * e) - e) / d, 0.0)
+    size = np.minimum(np.where(valid, closed, 0.0), upper_bound)
+
+    # Liquidité concentrée d'un côté au moins: section dorée sur [0, hi]
+    numeric = valid & (conc_a | conc_b) & (initial_spread > 0)
+    if numeric.any():
+        rows = np.flatnonzero(numeric)
+        lo = np.zeros(len(rows))
+        hi = np.minimum(2 * (liq_a[rows] + liq_b[rows]), upper_bound)
+        sub = tuple(column[rows] for column in curves)
+
+        def profit(x):
+            return _route(x, sub) - x
+
+        x1 = hi - _INV_PHI * (hi - lo)
+        x2 = lo + _INV_PHI * (hi - lo)
+        f1, f2 = profit(x1), profit(x2)
+        for _ in range(SEARCH_ITERATIONS):
+            right = f1 < f2  # maximum dans [x1, hi]
+            lo = np.where(right, x1, lo)
+            hi = np.where(right, hi, x2)
+            x_new = np.where(right, lo + _INV_PHI * (hi - lo), hi - _INV_PHI * (hi - lo))
+            f_new = profit(x_new)
+            x1, x2 = np.where(right, x2, x_new), np.where(right, x_new, x1)
+            f1, f2 = np.where(right, f2, f_new), np.where(right, f_new, f1)
+        size[rows] = (lo + hi) / 2
+
+    gross = _route(size, curves) - size
+    profitable = valid & (size > 0) & (gross > network_fee_usd)
+    size = np.where(profitable, size, 0.0)
+    return {
+        "size": size,
+        "profit": np.where(profitable, gross - network_fee_usd, 0.0),
+        "marginal_spread": np.where(valid, _route_slope(size, curves) - 1, 0.0),
+        "initial_spread": np.where(valid, initial_spread, 0.0),
+        "numeric": numeric,
+    }
+
+
+def size_opportunities(
+    opportunities: List[Dict[str, Any]],
+    max_size_usd: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Dimensionne toutes les opportunités (dicts de compute_pool_arbitrage ou
+    de build_pool_opportunity) en une passe et ajoute optimal_size_usd,
+    expected_profit_usd et marginal_spread à chacune.
+    """
+    if not opportunities:
+        return opportunities
+
+    started = time.perf_counter()
+    fee_by_chain: Dict[str, float] = {}
+    columns = {key: [] for key in ("buy", "sell", "buy_fee", "sell_fee", "buy_liq", "sell_liq",
+                                   "buy_cl", "sell_cl", "network")}
+    for opp in opportunities:
+        details = opp.get("details") or {}
+        chain = opp.get("chain") or "solana"
+        if chain not in fee_by_chain:
+            fee_by_chain[chain] = estimate_network_fee_usd(chain)
+        columns["buy"].append(opp.get("buy_price") or 0)
+        columns["sell"].append(opp.get("sell_price") or 0)
+        columns["buy_fee"].append(details.get("buy_pool_fee_pct") or 0)
+        columns["sell_fee"].append(details.get("sell_pool_fee_pct") or 0)
+        columns["buy_liq"].append(details.get("buy_pool_liquidity") or 0)
+        columns["sell_liq"].append(details.get("sell_pool_liquidity") or 0)
+        columns["buy_cl"].append(is_concentrated(details.get("pool_a"), opp.get("buy_dex")))
+        columns["sell_cl"].append(is_concentrated(details.get("pool_b"), opp.get("sell_dex")))
+        columns["network"].append(fee_by_chain[chain])
+
+    result = size_trades(
+        columns["buy"], columns["sell"], columns["buy_fee"], columns["sell_fee"],
+        columns["buy_liq"], columns["sell_liq"], columns["buy_cl"], columns["sell_cl"],
+        columns["network"], max_size_usd,
+    )
+    for opp, size, profit, marginal in zip(
+        opportunities, result["size"].tolist(), result["profit"].tolist(), result["marginal_spread"].tolist()
+    ):
+        opp["optimal_size_usd"] = size
+        opp["expected_profit_usd"] = profit
+        opp["marginal_spread"] = marginal
+
+    numeric = int(result["numeric"].sum())
+    _stats["batches"] += 1
+    _stats["opportunities"] += len(opportunities)
+    _stats["numeric"] += numeric
+    _stats["closed_form"] += len(opportunities) - numeric
+    _stats["profitable"] += int((result["size"] > 0).sum())
+    _stats["last_batch_ms"] = (time.perf_counter() - started) * 1000
+    logger.debug(
+        f"[SIZING] {len(opportunities)} opportunities sized ({numeric} numeric) "
+        f"in {_stats['last_batch_ms']:.2f} ms"
+    )
+    return opportunities
+
+
+def get_trade_sizing_stats() -> Dict[str, Any]:
+    """Stats: batches, opportunities, closed_form, numeric, profitable, last_batch_ms."""
+    return dict(_stats)
@@ -0,0 +1,387 @@
+# triangular_arbitrage.py
+"""
+Arbitrage multi-pools (triangulaire) sur le graphe des pools.
+
+Le détecteur pool-to-pool ne compare que deux pools d'un même token contre
+une seule base (SOL côté Solana, USDC côté Base): un cycle
+SOL -> X -> USDC -> SOL à travers trois DEX n'est jamais vu. Ici:
+
+- graphe orienté des mints construit depuis le snapshot normalisé
+  (fetch_all_pools): chaque pool donne deux arêtes, token_a -> token_b de
+  taux price x (1 - fee) et token_b -> token_a de taux (1 / price) x (1 - fee)
+  (price = token_b par token_a), de poids -log(taux); un cycle rentable est
+  un cycle de poids négatif
+- recherche de Bellman-Ford bornée en nombre de sauts depuis chaque ancre
+  (SOL, USDC): au saut k, meilleur chemin simple de k pools vers chaque
+  mint; toute arête qui revient à l'ancre au saut 3..TRIANGULAR_MAX_HOPS
+  ferme un cycle candidat
+- mises à jour incrémentales: une pool n'est réécrite que si son empreinte
+  (mints, prix, liquidité, fee) change; pour une PoolTable déjà vue (mises à
+  jour on-chain en place), comparaison vectorisée des colonnes. La
+  recherche d'une ancre n'est relancée que si une arête modifiée part d'un
+  mint atteint par sa recherche précédente (un chemin ne peut changer
+  qu'en passant par une arête modifiée)
+
+Les frais réseau (un swap par pool) ne sont pas inclus dans profit_pct.
+Stats exposées par get_triangular_stats().
+"""
+import math
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+import numpy as np
+
+from config import (
+    TRIANGULAR_MAX_HOPS,
+    TRIANGULAR_MIN_LIQUIDITY_USD,
+    TRIANGULAR_MIN_PROFIT,
+)
+from pool_fetchers import SOL_MINT, USDC_MINT
+from pool_table import PoolTable
+from utils import logger
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+DEFAULT_ANCHORS = (SOL_MINT, USDC_MINT)
+MIN_HOPS = 3  # 2 pools: couvert par le détecteur pool-to-pool
+
+_FREE = -1  # génération d'un slot libre
+
+
+def _pool_fingerprint(pool: Mapping) -> Tuple:
+    return (
+        pool.get("token_a"),
+        pool.get("token_b"),
+        pool.get("price"),
+        pool.get("fee_pct"),
+        pool.get("liquidity_usd"),
+    )
+
+
+def _numeric_columns(table: PoolTable) -> np.ndarray:
+    rows = table.rows
+    return np.stack([rows["price"], rows["liquidity_usd"], rows["fee_pct"]])
+
+
+class PoolGraph:
+    """
+    Graphe des mints, deux arêtes par pool (slot s: arêtes 2s et 2s+1),
+    mis à jour en place d'un snapshot à l'autre.
+    """
+
+    def __init__(
+        self,
+        anchors: Optional[Iterable[str]] = None,
+        max_hops: Optional[int] = None,
+        min_profit: Optional[float] = None,
+        min_liquidity_usd: Optional[float] = None,
+    ):
+        self.anchors = list(anchors or DEFAULT_ANCHORS)
+        self.max_hops = max_hops or TRIANGULAR_MAX_HOPS
+        self.min_profit = TRIANGULAR_MIN_PROFIT if min_profit is None else min_profit
+        self.min_liquidity_usd = (
+            TRIANGULAR_MIN_LIQUIDITY_USD if min_liquidity_usd is None else min_liquidity_usd
+        )
+        self.nodes: Dict[str, int] = {}
+        self.node_names: List[str] = []
+
+        # Slots de pools
+        self._slots: Dict[Tuple[str, Any], int] = {}  # (dex, pool_id) -> slot
+        self._keys: List[Optional[Tuple[str, Any]]] = []
+        self._pools: List[Optional[Mapping]] = []
+        self._fingerprints: List[Optional[Tuple]] = []
+        self._free: List[int] = []
+        self._seen = np.zeros(0, dtype=np.int64)
+
+        # Arêtes
+        self.src = np.zeros(0, dtype=np.int64)
+        self.dst = np.zeros(0, dtype=np.int64)
+        self.weight = np.zeros(0, dtype=np.float64)
+
+        self._tables: Dict[str, Tuple[PoolTable, np.ndarray, np.ndarray]] = {}
+        self._generation = 0
+        self._dirty_nodes: Set[int] = set()   # mints de départ des arêtes modifiées
+        self._reach: Dict[str, np.ndarray] = {}
+        self._cycles: Dict[str, List[Dict[str, Any]]] = {}
+        self.stats = {
+            "updates": 0,
+            "pools": 0,
+            "changed_pools": 0,
+            "searches": 0,
+            "searches_skipped": 0,
+            "cycles": 0,
+            "last_update_ms": 0.0,
+            "last_search_ms": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Mises à jour
+    # ------------------------------------------------------------------
+    def _node(self, mint: str) -> int:
+        node = self.nodes.get(mint)
+        if node is None:
+            node = self.nodes[mint] = len(self.node_names)
+            self.node_names.append(mint)
+        return node
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        slot = len(self._keys)
+        self._keys.append(None)
+        self._pools.append(None)
+        self._fingerprints.append(None)
+        if 2 * slot + 2 > len(self.weight):
+            capacity = max(2 * len(self.weight), 1024)
+            self.src = np.resize(self.src, capacity)
+            self.dst = np.resize(self.dst, capacity)
+            self.weight = np.concatenate((self.weight, np.full(capacity - len(self.weight), np.inf)))
+            self._seen = np.concatenate((self._seen, np.full(capacity // 2 - len(self._seen), _FREE)))
+        return slot
+
+    def _write(self, slot: int, fingerprint: Optional[Tuple]):
+        """Réécrit les deux arêtes du slot (arêtes infinies si pool inexploitable ou retirée)."""
+        edges = (2 * slot, 2 * slot + 1)
+        for edge in edges:
+            if np.isfinite(self.weight[edge]):
+                self._dirty_nodes.add(int(self.src[edge]))
+        self._fingerprints[slot] = fingerprint
+        self.weight[2 * slot] = self.weight[2 * slot + 1] = np.inf
+        if fingerprint is None:
+            return
+
+        token_a, token_b, price, fee_pct, liquidity = fingerprint
+        fee_pct = fee_pct or 0
+        if (
+            not token_a or not token_b or token_a == token_b
+            or not price or not price > 0 or math.isinf(price)
+            or not 0 <= fee_pct < 1
+            or (liquidity or 0) < self.min_liquidity_usd
+        ):
+            return
+        a, b = self._node(token_a), self._node(token_b)
+        gamma = 1 - fee_pct
+        self.src[2 * slot], self.dst[2 * slot] = a, b
+        self.src[2 * slot + 1], self.dst[2 * slot + 1] = b, a
+        self.weight[2 * slot] = -math.log(price * gamma)
+        self.weight[2 * slot + 1] = -math.log(gamma / price)
+        self._dirty_nodes.update((a, b))
+
+    def _upsert(self, dex: str, pool: Mapping) -> int:
+        pool_id = pool.get("pool_id")
+        if not pool_id:
+            return -1
+        key = (dex, pool_id)
+        fingerprint = _pool_fingerprint(pool)
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._allocate()
+            self._slots[key] = slot
+            self._keys[slot] = key
+            self._write(slot, fingerprint)
+            self.stats["changed_pools"] += 1
+        elif self._fingerprints[slot] != fingerprint:
+            self._write(slot, fingerprint)
+            self.stats["changed_pools"] += 1
+        self._pools[slot] = pool
+        self._seen[slot] = self._generation
+        return slot
+
+    def update(self, snapshot: Mapping[str, Iterable[Mapping]]) -> int:
+        """
+        Applique un snapshot {dex: pools} (listes de dicts ou PoolTable).
+
+        Returns:
+            Nombre de pools ajoutées, modifiées ou retirées
+        """
+        started = time.perf_counter()
+        changed_before = self.stats["changed_pools"]
+        self._generation += 1
+
+        for dex, pools in snapshot.items():
+            previous = self._tables.get(dex)
+            if isinstance(pools, PoolTable) and previous is not None and previous[0] is pools:
+                # Même table (mises à jour en place): seules les lignes modifiées
+                _, slots, columns = previous
+                current = _numeric_columns(pools)
+                same = (current == columns) | (np.isnan(current) & np.isnan(columns))
+                views = pools.views()
+                for row in np.flatnonzero(~same.all(axis=0)).tolist():
+                    if slots[row] >= 0:
+                        self._upsert(dex, views[row])
+                self._seen[slots[slots >= 0]] = self._generation
+                self._tables[dex] = (pools, slots, current)
+            else:
+                slots = np.array([self._upsert(dex, pool) for pool in pools], dtype=np.int64)
+                if isinstance(pools, PoolTable):
+                    self._tables[dex] = (pools, slots, _numeric_columns(pools))
+                else:
+                    self._tables.pop(dex, None)
+        for dex in self._tables.keys() - snapshot.keys():
+            del self._tables[dex]
+
+        # Pools absentes du snapshot: arêtes retirées, slot libéré
+        allocated = self._seen[:len(self._keys)]
+        for slot in np.flatnonzero((allocated != _FREE) & (allocated < self._generation)).tolist():
+            self._write(slot, None)
+            del self._slots[self._keys[slot]]
+            self._keys[slot] = self._pools[slot] = None
+            self._seen[slot] = _FREE
+            self._free.append(slot)
+            self.stats["changed_pools"] += 1
+
+        changed = self.stats["changed_pools"] - changed_before
+        self.stats["updates"] += 1
+        self.stats["pools"] = len(self._slots)
+        self.stats["last_update_ms"] = (time.perf_counter() - started) * 1000
+        return changed
+
+    # ------------------------------------------------------------------
+    # Recherche
+    # ------------------------------------------------------------------
+    def find_cycles(self) -> List[Dict[str, Any]]:
+        """Cycles rentables de 3 à max_hops pools par ancre, meilleur profit d'abord."""
+        started = time.perf_counter()
+        dirty = np.fromiter(self._dirty_nodes, dtype=np.int64, count=len(self._dirty_nodes))
+        self._dirty_nodes = set()
+
+        for anchor in self.anchors:
+            reach = self._reach.get(anchor)
+            if reach is not None:
+                known = dirty[dirty < len(reach)]
+                if not reach[known].any():
+                    self.stats["searches_skipped"] += 1
+                    continue
+            node = self.nodes.get(anchor)
+            if node is None:
+                self._cycles[anchor], self._reach[anchor] = [], np.zeros(0, dtype=bool)
+                continue
+            self._cycles[anchor], self._reach[anchor] = self._search(anchor, node)
+            self.stats["searches"] += 1
+
+        # Un même cycle vu depuis deux ancres (rotation): gardé une fois
+        seen_edges = set()
+        cycles = []
+        for anchor in self.anchors:
+            for cycle in self._cycles.get(anchor, []):
+                if cycle["_edges"] not in seen_edges:
+                    seen_edges.add(cycle["_edges"])
+                    cycles.append(cycle)
+        cycles.sort(key=lambda c: -c["profit_pct"])
+        self.stats["cycles"] = len(cycles)
+        self.stats["last_search_ms"] = (time.perf_counter() - started) * 1000
+        return cycles
+
+    def _search(self, anchor: str, start: int) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        n = len(self.node_names)
+        active = np.flatnonzero(np.isfinite(self.weight))
+        src, dst, weight = self.src[active], self.dst[active], self.weight[active]
+        threshold = -math.log1p(self.min_profit)
+
+        dist = np.full(n, np.inf)
+        dist[start] = 0.0
+        paths = np.full((n, 1), -1, dtype=np.int64)  # mints du meilleur chemin simple
+        paths[start, 0] = start
+        reach = np.zeros(n, dtype=bool)
+        reach[start] = True
+        preds: List[np.ndarray] = []
+        cycles = []
+
+        for hop in range(1, self.max_hops + 1):
+            candidate = dist[src] + weight
+            finite = np.isfinite(candidate)
+            if hop >= MIN_HOPS:
+                for position in np.flatnonzero(finite & (dst == start) & (candidate < threshold)).tolist():
+                    cycles.append(self._cycle(anchor, preds, int(src[position]), int(active[position]),
+                                              float(candidate[position])))
+            if hop == self.max_hops:
+                break
+            # Chemins simples: pas de retour sur un mint du chemin (ancre comprise)
+            ok = finite & ~(paths[src] == dst[:, None]).any(axis=1)
+            edges, cost, target, origin = active[ok], candidate[ok], dst[ok], src[ok]
+            order = np.lexsort((cost, target))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = target[order][1:] != target[order][:-1]
+            best = order[first]
+
+            pred = np.full(n, -1, dtype=np.int64)
+            pred[target[best]] = edges[best]
+            preds.append(pred)
+            dist = np.full(n, np.inf)
+            dist[target[best]] = cost[best]
+            new_paths = np.full((n, hop + 1), -1, dtype=np.int64)
+            new_paths[target[best], :hop] = paths[origin[best]]
+            new_paths[target[best], hop] = target[best]
+            paths = new_paths
+            reach[target[best]] = True
+
+        return cycles, reach
+
+    def _cycle(self, anchor: str, preds: List[np.ndarray], last: int, closing: int, total: float) -> Dict[str, Any]:
+        edges = [closing]
+        node = last
+        for pred in reversed(preds):
+            edge = int(pred[node])
+            edges.append(edge)
+            node = int(self.src[edge])
+        edges.reverse()
+
+        hops = []
+        for edge in edges:
+            slot = edge // 2
+            pool = self._pools[slot]
+            _, _, _, fee_pct, liquidity = self._fingerprints[slot]
+            hops.append({
+                "from": self.node_names[self.src[edge]],
+                "to": self.node_names[self.dst[edge]],
+                "pool_id": pool.get("pool_id"),
+                "dex": self._keys[slot][0],
+                "rate": math.exp(-self.weight[edge]),
+                "fee_pct": fee_pct or 0,
+                "liquidity_usd": liquidity,
+            })
+        return {
+            "anchor": anchor,
+            "tokens": [hops[0]["from"]] + [hop["to"] for hop in hops],
+            "hops": hops,
+            "hop_count": len(hops),
+            "rate": math.exp(-total),
+            "profit_pct": math.expm1(-total),
+            "min_liquidity_usd": min(hop["liquidity_usd"] or 0 for hop in hops),
+            "_edges": frozenset(edges),
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "nodes": len(self.node_names), "edges": int(np.isfinite(self.weight).sum())}
+
+
+# ============================================================================
+# INSTANCE PARTAGÉE
+# ============================================================================
+_graph: Optional[PoolGraph] = None
+
+
+def get_pool_graph() -> PoolGraph:
+    global _graph
+
+    if _graph is None:
+        _graph = PoolGraph()
+    return _graph
+
+
+def find_triangular_opportunities(snapshot: Mapping[str, Iterable[Mapping]]) -> List[Dict[str, Any]]:
+    """Met à jour le graphe partagé avec le snapshot et renvoie les cycles rentables."""
+    graph = get_pool_graph()
+    changed = graph.update(snapshot)
+    cycles = graph.find_cycles()
+    logger.debug(
+        f"[TRI] {changed} pools changed, {len(cycles)} cycles "
+        f"(update {graph.stats['last_update_ms']:.1f} ms, search {graph.stats['last_search_ms']:.1f} ms)"
+    )
+    return cycles
+
+
+def get_triangular_stats() -> Dict[str, Any]:
+    """Stats: pools, nodes, edges, changed_pools, searches, searches_skipped, cycles..."""
+    return _graph.snapshot() if _graph is not None else {}